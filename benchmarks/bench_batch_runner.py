@@ -0,0 +1,108 @@
+"""Throughput, resume and memory profile of the batch runner.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_batch_runner.py --items 20000 --latency 0.05
+
+A fake model (fixed latency, no network) answers every prompt, so the
+numbers show the runner's own overhead:
+
+    scaling → items/s at increasing concurrency (ideal: concurrency / latency)
+    memory  → tracemalloc peak for N/10 and N items (should stay flat)
+    resume  → the batch is interrupted halfway and resumed; every item must
+              appear exactly once in the output
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import AsyncGenerator
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.agents import LlmAgent  # noqa: E402
+from google.adk.models import LlmRequest, LlmResponse  # noqa: E402
+from google.adk.models.base_llm import BaseLlm  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from batch_runner import run_batch  # noqa: E402
+
+
+class FakeLlm(BaseLlm):
+    latency: float = 0.05
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self.latency)
+        prompt = llm_request.contents[-1].parts[0].text
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"echo: {prompt}")]))
+
+
+def make_runner(latency: float) -> InMemoryRunner:
+    agent = LlmAgent(name="echo", model=FakeLlm(model="fake", latency=latency), instruction="Echo.")
+    return InMemoryRunner(agent=agent)
+
+
+def write_input(path: Path, items: int):
+    with path.open("w") as f:
+        for i in range(items):
+            f.write(json.dumps({"id": f"q{i}", "prompt": f"question number {i}"}) + "\n")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    logger.remove()
+    tmp = Path(tempfile.mkdtemp())
+
+    small = tmp / "small.jsonl"
+    for concurrency in (1, 8, 32, 128):
+        items = min(2_000, 40 * concurrency)
+        write_input(small, items)
+        report = await run_batch(make_runner(args.latency), small, tmp / "out.jsonl", concurrency, resume=False)
+        ideal = concurrency / args.latency
+        print(
+            f"concurrency {concurrency:>4}: {report.throughput:8.1f} items/s (ideal {ideal:7.1f})"
+            f" | p50 {report.latency_ms['p50']} ms p99 {report.latency_ms['p99']} ms"
+        )
+
+    for items in (args.items // 10, args.items):
+        source = tmp / f"in-{items}.jsonl"
+        write_input(source, items)
+        tracemalloc.start()
+        report = await run_batch(make_runner(0.0), source, tmp / f"out-{items}.jsonl", 64, resume=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{items:>7} items: peak {peak / 1e6:6.2f} MB traced, {report.throughput:8.1f} items/s")
+
+    source, output = tmp / "resume.jsonl", tmp / "resume-out.jsonl"
+    write_input(source, 2_000)
+    task = asyncio.create_task(
+        run_batch(make_runner(args.latency), source, output, 32, resume=False, checkpoint_every=0.1)
+    )
+    await asyncio.sleep(2_000 / (32 / args.latency) / 2)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    partial = sum(1 for _ in output.open())
+    report = await run_batch(make_runner(args.latency), source, output, 32)
+    ids = [json.loads(line)["id"] for line in output.open()]
+    print(
+        f"resume: {partial} results before interrupt, {report.skipped} skipped on resume,"
+        f" {len(ids)} in output, {len(set(ids))} unique (expected 2000)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,176 @@
+"""Cold start of the CLI: import cost and time to first model request.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_cold_start.py --runs 5
+
+Each measurement is a fresh interpreter:
+
+    list      → `main.py list`, which must not import google.adk at all
+    baseline  → `import google.adk.agents, google.adk.runners`: the floor
+                every agent pays (~2.5 s on a laptop, mostly google.genai.types)
+    import    → `python -X importtime -c "import <module>"` per agent module
+                (import only: no .env, no agents, no network)
+    first req → `main.py run <agent> ping` against a local generateContent
+                stand-in (GOOGLE_GEMINI_BASE_URL); measured from process
+                spawn until the stand-in receives the first request
+
+Targets (p50): `list` under 150 ms without importing google.adk, and time to
+first request within 750 ms of the baseline (config, agent construction,
+runner and session setup, request build).
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+MAIN = SRC / "main.py"
+MODULES = ("agent", "app", "custom_tool", "memory", "multiagent")
+BASELINE = "import google.adk.agents, google.adk.runners"
+LIST_TARGET_MS = 150
+FIRST_REQUEST_OVERHEAD_TARGET_MS = 750
+
+RESPONSE = json.dumps(
+    {
+        "candidates": [
+            {"content": {"role": "model", "parts": [{"text": "ok"}]}, "finishReason": "STOP"}
+        ],
+        "usageMetadata": {"promptTokenCount": 5, "candidatesTokenCount": 1, "totalTokenCount": 6},
+    }
+).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    first_request: threading.Event = threading.Event()
+    first_request_at = 0.0
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        if not self.first_request.is_set():
+            type(self).first_request_at = time.perf_counter()
+            self.first_request.set()
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def _env(base_url: str | None = None) -> dict[str, str]:
+    env = dict(os.environ, PYTHONPATH=str(SRC), llm_cache_path="")  # memory-only cache: always a miss
+    env.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    if base_url:
+        env["GOOGLE_GEMINI_BASE_URL"] = base_url
+    return env
+
+
+def time_list() -> tuple[float, bool]:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", str(MAIN), "list"],
+        env=_env(), capture_output=True, text=True, check=True,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, "google.adk" in out.stderr
+
+
+def time_baseline() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", BASELINE], env=_env(), check=True)
+    return time.perf_counter() - start
+
+
+def import_time(module: str) -> tuple[float, list[tuple[float, str]]]:
+    """Cumulative import time of a module and its three heaviest direct imports."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=_env(), capture_output=True, text=True, check=True,
+    )
+    children: list[tuple[float, str]] = []
+    for line in out.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if not match:
+            continue
+        seconds, depth, name = int(match.group(1)) / 1e6, len(match.group(2)), match.group(3)
+        if depth == 0 and name == module:
+            return seconds, sorted(children, reverse=True)[:3]
+        if depth == 0:
+            children = []
+        elif depth == 2:  # direct import of the next top-level module
+            children.append((seconds, name))
+    raise RuntimeError(f"{module} missing from -X importtime output")
+
+
+def first_request(agent: str, base_url: str) -> float:
+    StubHandler.first_request.clear()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(MAIN), "run", agent, "ping"],
+        env=_env(base_url), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not StubHandler.first_request.wait(timeout=60):
+            raise TimeoutError(f"{agent}: no request reached the stand-in within 60 s")
+        return StubHandler.first_request_at - start
+    finally:
+        process.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--agent", default="currency", help="Agent used for time to first request.")
+    args = parser.parse_args()
+
+    lists = [time_list() for _ in range(args.runs)]
+    list_ms = statistics.median(t for t, _ in lists) * 1000
+    leaked = any(adk for _, adk in lists)
+    print(
+        f"main.py list            p50 {list_ms:7.1f} ms (target < {LIST_TARGET_MS} ms)"
+        f"{'  ⚠ imports google.adk' if leaked else ''}"
+    )
+
+    baseline_ms = statistics.median(time_baseline() for _ in range(args.runs)) * 1000
+    print(f"baseline (google.adk)   p50 {baseline_ms:7.1f} ms")
+
+    for module in MODULES:
+        total, heaviest = import_time(module)
+        breakdown = ", ".join(f"{name} {seconds * 1000:.0f} ms" for seconds, name in heaviest)
+        print(f"import {module:<16} {total * 1000:7.1f} ms  ({breakdown})")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    samples = [first_request(args.agent, base_url) for _ in range(args.runs)]
+    server.shutdown()
+    first_ms = statistics.median(samples) * 1000
+    overhead_ms = first_ms - baseline_ms
+    print(
+        f"first request ({args.agent}) p50 {first_ms:7.1f} ms, max {max(samples) * 1000:7.1f} ms,"
+        f" baseline + {overhead_ms:.1f} ms (target < + {FIRST_REQUEST_OVERHEAD_TARGET_MS} ms)"
+    )
+    ok = list_ms < LIST_TARGET_MS and not leaked and overhead_ms < FIRST_REQUEST_OVERHEAD_TARGET_MS
+    print("targets met" if ok else "targets missed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Gemini context caching of the instruction + tools prefix, offline.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_context_cache.py --requests 30
+
+A local stand-in for the Gemini API (GOOGLE_GEMINI_BASE_URL) implements
+generateContent and cachedContents create/update/delete. Its latency grows
+with the uncached prompt tokens (prefill), and it reports
+cachedContentTokenCount like the real API. enhanced_currency_agent's
+instruction and tools are sent with different user questions:
+
+    plain   → no context cache, the prefix is processed on every request
+    cached  → ContextCachedLlm: the cache is created after the prefix is
+              seen twice and referenced afterwards
+    expiry  → the stand-in drops the cache mid-run; the next request falls
+              back to the full prompt and the prefix is cached again
+
+calculation_agent's prefix (~200 tokens) is below the API's 1,024-token
+minimum and is never cached; enhanced_currency_agent's is above it.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.models import LlmRequest  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from context_cache import ContextCachedLlm, ContextCacheManager  # noqa: E402
+from custom_tool import build_enhanced_currency_agent  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+SECONDS_PER_1K_TOKENS = 0.05
+
+
+def _tokens(payload) -> int:
+    return len(json.dumps(payload)) // 4
+
+
+class GeminiStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    caches: dict[str, dict] = {}
+    ids = itertools.count(1)
+    billed_tokens = 0
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict:
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+    def _cache_resource(self, name: str) -> dict:
+        entry = self.caches[name]
+        expire = datetime.fromtimestamp(entry["expires"], timezone.utc).isoformat()
+        return {"name": name, "model": entry["model"], "expireTime": expire}
+
+    @staticmethod
+    def _ttl(body: dict) -> float:
+        return float(body.get("ttl", "3600s").rstrip("s"))
+
+    def do_POST(self):
+        body = self._body()
+        path = self.path.split("?")[0]
+        if path.endswith("/cachedContents"):
+            name = f"cachedContents/{next(self.ids)}"
+            prefix = {k: body.get(k) for k in ("systemInstruction", "tools", "toolConfig")}
+            self.caches[name] = {"model": body["model"], "tokens": _tokens(prefix), "expires": time.time() + self._ttl(body)}
+            return self._reply(200, self._cache_resource(name))
+
+        cached_tokens = 0
+        if name := body.get("cachedContent"):
+            entry = self.caches.get(name)
+            if entry is None or entry["expires"] < time.time():
+                return self._reply(404, {"error": {"code": 404, "message": f"CachedContent not found: {name}", "status": "NOT_FOUND"}})
+            cached_tokens = entry["tokens"]
+        uncached = _tokens({k: body.get(k) for k in ("systemInstruction", "tools", "toolConfig", "contents")})
+        type(self).billed_tokens += uncached
+        time.sleep(0.01 + uncached / 1000 * SECONDS_PER_1K_TOKENS)
+        self._reply(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}, "finishReason": "STOP"}],
+            "usageMetadata": {
+                "promptTokenCount": uncached + cached_tokens,
+                "cachedContentTokenCount": cached_tokens,
+                "candidatesTokenCount": 1,
+                "totalTokenCount": uncached + cached_tokens + 1,
+            },
+        })
+
+    def do_PATCH(self):
+        body = self._body()
+        name = self.path.split("?")[0].split("/v1beta/")[-1]
+        if name not in self.caches:
+            return self._reply(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+        self.caches[name]["expires"] = time.time() + self._ttl(body)
+        self._reply(200, self._cache_resource(name))
+
+    def do_DELETE(self):
+        self.caches.pop(self.path.split("?")[0].split("/v1beta/")[-1], None)
+        self._reply(200, {})
+
+    def log_message(self, *args):
+        pass
+
+
+def make_request(agent, tools: list[types.Tool], question: str) -> LlmRequest:
+    return LlmRequest(
+        model="gemini-2.5-flash-lite",
+        contents=[types.Content(role="user", parts=[types.Part(text=question)])],
+        config=types.GenerateContentConfig(system_instruction=agent.instruction, tools=tools),
+    )
+
+
+async def run(model, agent, tools, n: int, drop_at: int | None = None) -> list[float]:
+    latencies = []
+    for i in range(n):
+        if i == drop_at:
+            GeminiStandIn.caches.clear()  # the cache expired or was deleted server-side
+        request = make_request(agent, tools, f"Convert {100 + i} USD to EUR using a bank transfer.")
+        start = time.perf_counter()
+        async for _ in model.generate_content_async(request):
+            pass
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.02)  # let background cache creation finish between requests
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--min-tokens", type=int, default=1024)
+    args = parser.parse_args()
+    logger.remove()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GeminiStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["GOOGLE_GEMINI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+    agent = build_enhanced_currency_agent()
+    from google.adk.tools.function_tool import FunctionTool
+
+    declarations = [FunctionTool(t)._get_declaration() if callable(t) else t._get_declaration() for t in agent.tools]
+    tools = [types.Tool(function_declarations=declarations)]
+
+    registry = ModelRegistry(cache=False, rate_limit=False, context_cache=False)
+    gemini = registry.get_model("gemini-2.5-flash-lite")
+    GeminiStandIn.billed_tokens = 0
+    plain = await run(gemini, agent, tools, args.requests)
+    plain_tokens = GeminiStandIn.billed_tokens
+
+    manager = ContextCacheManager(gemini.api_client, ttl_seconds=600, min_tokens=args.min_tokens)
+    cached_model = ContextCachedLlm(gemini, manager=manager)
+    GeminiStandIn.billed_tokens = 0
+    cached = await run(cached_model, agent, tools, args.requests, drop_at=args.requests // 2)
+    cached_tokens = GeminiStandIn.billed_tokens
+
+    def summary(latencies):
+        steady = sorted(latencies[3:])
+        return f"median {steady[len(steady) // 2] * 1000:6.1f} ms"
+
+    print(f"prefix ≈ {_tokens({'i': agent.instruction, 't': [t.model_dump(mode='json', exclude_none=True) for t in tools]})} tokens")
+    print(f"plain   {summary(plain)} | uncached prompt tokens {plain_tokens:,}")
+    print(f"cached  {summary(cached)} | uncached prompt tokens {cached_tokens:,} (cache dropped at request {args.requests // 2})")
+    print(f"cache stats: {manager.stats}")
+    await manager.aclose()
+    print(f"caches left on the stand-in after aclose(): {len(GeminiStandIn.caches)}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
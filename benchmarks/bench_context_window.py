@@ -0,0 +1,84 @@
+"""Request size per turn with and without the context window.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_context_window.py --turns 40
+
+Runs one long session against a fake model whose latency grows with the
+prompt (fixed cost plus a per-token cost, roughly how prefill behaves).
+Without ContextWindowTool every turn resends the whole history; with it
+the request stays bounded by keep_turns verbatim turns plus the summary.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import AsyncGenerator
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.agents import LlmAgent  # noqa: E402
+from google.adk.models import LlmRequest, LlmResponse  # noqa: E402
+from google.adk.models.base_llm import BaseLlm  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from context_window import ContextWindowTool, content_tokens  # noqa: E402
+
+ANSWER = "Here is a detailed answer that restates the question and explains the reasoning step by step. " * 4
+
+
+class FakeLlm(BaseLlm):
+    base_latency: float = 0.02
+    seconds_per_1k_tokens: float = 0.01
+    prompt_tokens: list[int] = []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        tokens = sum(content_tokens(c) for c in llm_request.contents)
+        instruction = llm_request.config.system_instruction
+        tokens += len(instruction) // 4 if isinstance(instruction, str) else 0
+        self.prompt_tokens.append(tokens)
+        await asyncio.sleep(self.base_latency + tokens / 1000 * self.seconds_per_1k_tokens)
+        prompt = llm_request.contents[-1].parts[0].text
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"{prompt} {ANSWER}")]))
+
+
+async def run(turns: int, tools: list) -> tuple[list[int], float]:
+    model = FakeLlm(model="fake", prompt_tokens=[])
+    runner = InMemoryRunner(agent=LlmAgent(name="chat", model=model, instruction="Answer.", tools=tools))
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id="u")
+    start = time.perf_counter()
+    for i in range(turns):
+        message = types.Content(role="user", parts=[types.Part(text=f"Question {i}: what about item {i}?")])
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+            pass
+    return model.prompt_tokens, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--keep-turns", type=int, default=4)
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    args = parser.parse_args()
+    logger.remove()
+
+    full, full_time = await run(args.turns, [])
+    tool = ContextWindowTool(keep_turns=args.keep_turns, max_tokens=args.max_tokens)
+    windowed, windowed_time = await run(args.turns, [tool])
+
+    step = max(1, args.turns // 8)
+    for turn in [*range(0, args.turns, step), args.turns - 1]:
+        print(f"turn {turn + 1:4d}: full history {full[turn]:7d} tokens | context window {windowed[turn]:6d} tokens")
+    print(f"total prompt tokens: {sum(full):,} vs {sum(windowed):,}")
+    print(f"session wall time:   {full_time:.2f} s vs {windowed_time:.2f} s")
+    print(f"last report: {tool.last_report}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""Per-pair tool calls vs one vectorized quote.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_currency_engine.py --rows 10000
+
+Compares quoting N conversions by calling get_fee_for_payment_method and
+get_exchange_rate once per row (what the agent does without the batch
+tools) with one quote_conversions call. Model round trips are not
+included: each avoided tool call also saves one model turn.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from loguru import logger  # noqa: E402
+
+from custom_tool import get_exchange_rate, get_fee_for_payment_method, quote_conversions  # noqa: E402
+
+CURRENCIES = ["USD", "EUR", "JPY", "INR"]
+METHODS = ["platinum credit card", "gold debit card", "bank transfer"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+    logger.remove()
+
+    rng = random.Random(0)
+    amounts = [round(rng.uniform(10, 5000), 2) for _ in range(args.rows)]
+    bases = [rng.choice(CURRENCIES) for _ in range(args.rows)]
+    targets = [rng.choice(CURRENCIES) for _ in range(args.rows)]
+    methods = [rng.choice(METHODS) for _ in range(args.rows)]
+
+    start = time.perf_counter()
+    single = []
+    for amount, base, target, method in zip(amounts, bases, targets, methods):
+        fee = get_fee_for_payment_method(method)["fee_percentage"]
+        rate = get_exchange_rate(base, target)["rate"]
+        single.append(amount * (1 - fee) * rate)
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = quote_conversions(amounts, bases, targets, methods)["results"]
+    vectorized = time.perf_counter() - start
+
+    mismatches = sum(abs(a - b["converted_amount"]) > 1e-3 for a, b in zip(single, batch))
+    print(f"{args.rows} rows: per-row tools {per_row * 1000:8.1f} ms ({2 * args.rows} tool calls)")
+    print(f"{args.rows} rows: quote_conversions {vectorized * 1000:6.1f} ms (1 tool call), mismatches {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
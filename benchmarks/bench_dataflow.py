@@ -0,0 +1,90 @@
+"""SequentialAgent vs DataflowAgent on the blog pipeline with two extra independent steps.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_dataflow.py --conversations 20 --concurrency 4
+
+The models answer from FakeGemini (src/fake_gemini.py) with the same script
+as bench_suite.py; the registry has no response cache, so every variant
+makes every call. Variants:
+
+    sequential 3  → build_blog_pipeline(): outline → writer → editor
+    sequential 5  → the five agents of build_blog_dataflow() in a
+                    SequentialAgent (keywords and social post added in line)
+    dataflow 5    → build_blog_dataflow(): order derived from the keys;
+                    keywords run next to the outline, the social post next
+                    to the writer
+    dataflow 5/1  → the same with max_concurrency=1 (the graph's order, one
+                    agent at a time)
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.agents import SequentialAgent  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from latency import LatencyHistogram  # noqa: E402
+from bench_suite import RULES, single_turn  # noqa: E402
+from fake_gemini import FakeGemini, Latency  # noqa: E402
+from model_registry import ModelRegistry, set_default_registry  # noqa: E402
+
+
+async def drive(agent, conversations: int, concurrency: int) -> dict:
+    runner = InMemoryRunner(agent=agent)
+    histogram, semaphore = LatencyHistogram(), asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await single_turn(runner, i, f"Multi-agent systems, angle {i}")
+            histogram.add(time.perf_counter() - start)
+
+    await single_turn(runner, conversations, "warm-up")
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(conversations)))
+    wall = time.perf_counter() - start
+    await runner.close()
+    return {"p50": histogram.percentile(50), "p95": histogram.percentile(95), "throughput": conversations / wall}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--median-ms", type=float, default=150, help="Median model latency before prefill/decode")
+    args = parser.parse_args()
+    logger.remove()
+
+    fake = FakeGemini(RULES, Latency(median_ms=args.median_ms, sigma=0.2), seed=1)
+    fake.start()
+    fake.install_env()
+    set_default_registry(ModelRegistry(cache=False, rate_limit=False, context_cache=False))
+    from multiagent import blog_dataflow_agents, build_blog_dataflow, build_blog_pipeline
+
+    variants = {
+        "sequential 3": build_blog_pipeline,
+        "sequential 5": lambda: SequentialAgent(name="BlogSequential", sub_agents=blog_dataflow_agents()),
+        "dataflow 5": build_blog_dataflow,
+        "dataflow 5/1": lambda: build_blog_dataflow(max_concurrency=1),
+    }
+    print(f"{args.conversations} conversations per variant, concurrency {args.concurrency}, "
+          f"model latency median {args.median_ms:g} ms\n")
+    print(f"{'variant':<14} {'conv/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'calls':>6}")
+    for name, build in variants.items():
+        agent = build()
+        fake.reset_stats()
+        r = await drive(agent, args.conversations, args.concurrency)
+        calls = fake.stats["requests"] / (args.conversations + 1)
+        print(f"{name:<14} {r['throughput']:7.2f} {r['p50'] * 1000:8.1f} {r['p95'] * 1000:8.1f} {calls:6.1f}")
+    fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""Warm local process pool vs a process per code block.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_local_code_executor.py --blocks 64
+
+Measures LocalProcessCodeExecutor: first-call (cold) latency, warm
+latency, cache hits, CPU-bound throughput with 1 vs N concurrent callers,
+and that the wall-clock, CPU, memory and network limits hold. The
+"fresh process" column starts a new python interpreter per block, which is
+what a naive subprocess-based executor pays.
+
+"agents" runs the same CPU-bound blocks as concurrent agent requests on one
+event loop (an in-process fake model writes the code): once with the pool
+in the code_executor= slot, which ADK calls synchronously, and once as the
+async run_python tool from as_tool().
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from loguru import logger  # noqa: E402
+
+SIMPLE = "print(round(1250 * (1 - 0.01) * 83.58, 2))"
+CPU_BOUND = "print(sum(i * i for i in range({n})) % 97)"
+LIMITS = {
+    "wall-clock": "import time\ntime.sleep(60)",
+    "cpu": "while True:\n    pass",
+    "memory": "x = bytearray(4 * 1024 ** 3)",
+    "network": "import socket\nsocket.create_connection(('8.8.8.8', 53), timeout=1)",
+}
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def code_writing_llm(as_tool: bool):
+    """A fake model that writes one code block for the number in the prompt, then answers."""
+    from google.adk.models import LlmRequest, LlmResponse
+    from google.adk.models.base_llm import BaseLlm
+    from google.genai import types
+
+    class CodeWritingLlm(BaseLlm):
+        async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False):
+            if any(content.role == "model" for content in llm_request.contents):
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Done.")]))
+                return
+            code = CPU_BOUND.format(n=int(llm_request.contents[-1].parts[0].text))
+            if as_tool:
+                part = types.Part(function_call=types.FunctionCall(name="run_python", args={"code": code}))
+            else:
+                part = types.Part(text=f"```python\n{code}\n```")
+            yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+    return CodeWritingLlm(model="fake")
+
+
+async def agents_concurrently(executor, requests: int, loop: int, as_tool: bool) -> float:
+    from google.adk.agents import LlmAgent
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    slot = {"tools": [executor.as_tool()]} if as_tool else {"code_executor": executor}
+    agent = LlmAgent(name="calculator", model=code_writing_llm(as_tool), instruction="Calculate.", **slot)
+    runner = InMemoryRunner(agent=agent)
+
+    async def one(i: int):
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id="u", session_id=f"s{i}")
+        message = types.Content(role="user", parts=[types.Part(text=str(loop + i))])
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+            pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    await runner.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=64, help="CPU-bound code blocks per throughput run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--loop", type=int, default=2_000_000, help="Iterations per CPU-bound block")
+    args = parser.parse_args()
+    logger.remove()
+    # Imported here so the forkserver's copy of this script stays light.
+    from local_code_executor import LocalProcessCodeExecutor
+
+    fresh = timed(lambda: subprocess.run([sys.executable, "-c", SIMPLE], capture_output=True, check=True))
+
+    executor = LocalProcessCodeExecutor(workers=args.workers, timeout_seconds=3, cpu_seconds=1, memory_limit_mb=256)
+    cold = timed(lambda: executor.run(SIMPLE))
+    executor.cache_size = 0
+    warm = min(timed(lambda: executor.run(SIMPLE)) for _ in range(20))
+    executor.cache_size = 256
+    executor.run(SIMPLE)
+    cached = timed(lambda: executor.run(SIMPLE))
+    print(f"fresh process {fresh * 1000:7.1f} ms | pool cold {cold * 1000:7.1f} ms | "
+          f"warm {warm * 1000:5.2f} ms | cache hit {cached * 1000:5.3f} ms")
+
+    executor.warm()
+    blocks = [CPU_BOUND.format(n=args.loop + i) for i in range(args.blocks)]  # distinct: no cache hits
+    serial = timed(lambda: [executor.run(code) for code in blocks])
+    blocks = [CPU_BOUND.format(n=args.loop + args.blocks + i) for i in range(args.blocks)]
+    parallel = timed(lambda: executor.run_many(blocks))
+    print(f"{args.blocks} CPU-bound blocks: 1 caller {serial:6.2f} s | {args.workers} callers {parallel:6.2f} s "
+          f"({serial / parallel:.1f}x)")
+
+    requests = args.workers * 4
+    offset = args.loop + 2 * args.blocks  # fresh numbers: no cache hits
+    in_slot = asyncio.run(agents_concurrently(executor, requests, offset, as_tool=False))
+    as_tool = asyncio.run(agents_concurrently(executor, requests, offset + requests, as_tool=True))
+    print(f"agents, {requests} concurrent requests: code_executor slot {in_slot:6.2f} s | "
+          f"run_python tool {as_tool:6.2f} s ({in_slot / as_tool:.1f}x)")
+
+    for name, code in LIMITS.items():
+        start = time.perf_counter()
+        stdout, stderr = executor.run(code)
+        elapsed = time.perf_counter() - start
+        last = (stderr.strip().splitlines() or ["<no error>"])[-1]
+        print(f"limit {name:10s} {elapsed:5.2f} s → {last[:90]}")
+
+    print(f"after limits: {executor.run(SIMPLE)[0].strip()} (pool still serving)")
+    print(executor.stats())
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
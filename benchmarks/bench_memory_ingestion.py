@@ -0,0 +1,90 @@
+"""Ingestion cost of auto_save_to_memory over a long conversation.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_memory_ingestion.py --turns 500
+
+Simulates a session that grows by one user and one model event per turn and
+calls add_session_to_memory() after every turn, like auto_save_to_memory in
+memory.py. The incremental service (watermarks + content hashes) is compared
+with re-ingesting the whole session each turn, the previous behaviour.
+Expected: incremental per-turn cost stays flat (total cost linear in turns).
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.events import Event  # noqa: E402
+from google.adk.sessions import Session  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from semantic_memory import SemanticMemoryService  # noqa: E402
+
+
+def turn_events(turn: int) -> list[Event]:
+    return [
+        Event(
+            author="user",
+            timestamp=2 * turn,
+            content=types.Content(role="user", parts=[types.Part(text=f"Question number {turn} about topic {turn % 37}")]),
+        ),
+        Event(
+            author="AutoMemoryAgent",
+            timestamp=2 * turn + 1,
+            content=types.Content(role="model", parts=[types.Part(text=f"Answer {turn}: details on topic {turn % 37}")]),
+        ),
+    ]
+
+
+async def run(turns: int, incremental: bool, batch_writes: bool) -> tuple[list[float], int]:
+    service = SemanticMemoryService(batch_writes=batch_writes)
+    session = Session(id="long-session", app_name="MemoryDemoApp", user_id="demo_user")
+    costs = []
+    for turn in range(turns):
+        session.events.extend(turn_events(turn))
+        start = time.perf_counter()
+        if incremental:
+            await service.add_session_to_memory(session)
+        else:
+            # Previous behaviour: every turn writes the whole session again.
+            service.add_entries(
+                session.app_name,
+                session.user_id,
+                [None] * len(session.events),
+                [e.content.parts[0].text for e in session.events],
+            )
+        costs.append(time.perf_counter() - start)
+    await service.flush()
+    stored = len(service._partitions[(session.app_name, session.user_id)].entries)
+    return costs, stored
+
+
+def report(label: str, costs: list[float], stored: int):
+    window = max(1, len(costs) // 10)
+    first = sum(costs[:window]) / window * 1e6
+    last = sum(costs[-window:]) / window * 1e6
+    print(
+        f"{label:<22} total {sum(costs) * 1000:9.1f} ms | per turn first {first:8.1f} us"
+        f" last {last:8.1f} us (x{last / first:5.1f}) | stored {stored}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+    logger.remove()
+
+    report("full re-ingest", *await run(args.turns, incremental=False, batch_writes=False))
+    report("incremental", *await run(args.turns, incremental=True, batch_writes=False))
+    report("incremental + batched", *await run(args.turns, incremental=True, batch_writes=True))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
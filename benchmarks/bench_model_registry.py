@@ -0,0 +1,113 @@
+"""Connection reuse of the model registry in a six-agent pipeline.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_model_registry.py --rounds 20
+
+A local HTTP stand-in for generateContent counts the TCP connections it
+accepts. Six models (one per agent in multiagent.py) each send one request
+per round, first as separate Gemini(...) objects (one Client and connection
+pool each), then through ModelRegistry (one shared pool).
+Expected: the registry opens ~1 connection instead of ~6, and the cold first
+round is faster.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.models import LlmRequest  # noqa: E402
+from google.adk.models.google_llm import Gemini  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from model_registry import ModelRegistry  # noqa: E402
+
+RESPONSE = json.dumps(
+    {
+        "candidates": [
+            {"content": {"role": "model", "parts": [{"text": "ok"}]}, "finishReason": "STOP"}
+        ],
+        "usageMetadata": {"promptTokenCount": 5, "candidatesTokenCount": 1, "totalTokenCount": 6},
+    }
+).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        type(self).connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+async def run_round(models) -> float:
+    start = time.perf_counter()
+    for model in models:
+        request = LlmRequest(
+            model=model.model,
+            contents=[types.Content(role="user", parts=[types.Part(text="ping")])],
+        )
+        async for _ in model.generate_content_async(request):
+            pass
+    return time.perf_counter() - start
+
+
+async def measure(label: str, models, rounds: int):
+    StubHandler.connections = 0
+    cold = await run_round(models)
+    warm = [await run_round(models) for _ in range(rounds)]
+    print(
+        f"{label:<22} cold round {cold * 1000:7.1f} ms | warm round {sum(warm) / len(warm) * 1000:6.1f} ms"
+        f" | connections opened {StubHandler.connections}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--agents", type=int, default=6)
+    args = parser.parse_args()
+    logger.remove()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["GOOGLE_GEMINI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+    retry = types.HttpRetryOptions(attempts=5, exp_base=7, initial_delay=1)
+    separate = [Gemini(model="gemini-2.5-flash-lite", retry_options=retry) for _ in range(args.agents)]
+    await measure("one Gemini per agent", separate, args.rounds)
+
+    registry = ModelRegistry(cache=False, rate_limit=False)
+    shared = [registry.get_model("gemini-2.5-flash-lite", retry) for _ in range(args.agents)]
+    await measure("model registry", shared, args.rounds)
+    print(f"registry stats: {registry.pool_stats()}")
+    await registry.aclose()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""Model cascade (CascadeLlm) vs always calling the strongest model.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_model_router.py --requests 120 --concurrency 8
+
+The calls go to FakeGemini (src/fake_gemini.py) over HTTP, with the tiers
+and checks of agent.yaml's routing section and a mix of requests:
+
+    easy    → every tier answers well
+    hard    → gemini-2.5-flash-lite answers with an empty text (escalates)
+    convert → gemini-2.5-flash-lite calls an undeclared function (escalates)
+
+Three phases run back to back: normal; degraded, where flash-lite's latency
+rises past the SLO (the router stops starting there); recovered, where its
+latency is back and, once the bad samples have left the window, the router
+starts there again. Cost uses list prices per 1M tokens (input / output).
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.models import LlmRequest  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from latency import LatencyHistogram  # noqa: E402
+from fake_gemini import FakeGemini, Latency, Rule, filler  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from model_router import CascadeLlm, load_routing_policy  # noqa: E402
+
+LITE, PRO = "gemini-2.5-flash-lite", "gemini-2.5-pro"
+PRICES = {LITE: (0.10, 0.40), "gemini-2.5-flash": (0.30, 2.50), PRO: (1.25, 10.00)}
+CONVERT = types.FunctionDeclaration(
+    name="convert",
+    description="Converts an amount between currencies.",
+    parameters=types.Schema(
+        type="OBJECT",
+        properties={"amount": types.Schema(type="NUMBER"), "target": types.Schema(type="STRING")},
+        required=["amount", "target"],
+    ),
+)
+RULES = [
+    Rule(name="lite/hard", model=LITE, prompt="hard", reply=""),
+    Rule(name="lite/tool", model=LITE, prompt="convert", calls=[("convert_currency", {"amount": 1})]),
+    Rule(name="tool", prompt="convert", calls=[("convert", {"amount": 100, "target": "EUR"})]),
+    Rule(name="answer", reply=filler(120, 2)),
+]
+KINDS = ("easy", "easy", "easy", "easy", "hard", "hard", "convert")
+
+
+def request(i: int, model: str) -> LlmRequest:
+    kind = KINDS[i % len(KINDS)]
+    config = types.GenerateContentConfig(tools=[types.Tool(function_declarations=[CONVERT])]) if kind == "convert" else None
+    return LlmRequest(
+        model=model,
+        contents=[types.Content(role="user", parts=[types.Part(text=f"{kind} question {i}")])],
+        config=config or types.GenerateContentConfig(),
+    )
+
+
+def cost(fake: FakeGemini) -> float:
+    return sum(
+        (usage["prompt_tokens"] * PRICES[model][0] + usage["output_tokens"] * PRICES[model][1]) / 1e6
+        for model, usage in fake.stats["by_model"].items()
+    )
+
+
+async def drive(model, requests: int, concurrency: int) -> dict:
+    histogram, semaphore, failed = LatencyHistogram(), asyncio.Semaphore(concurrency), 0
+
+    async def one(i: int):
+        nonlocal failed
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async for _ in model.generate_content_async(request(i, model.model)):
+                    pass
+            except Exception:
+                failed += 1
+            histogram.add(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return {"p50": histogram.percentile(50), "p95": histogram.percentile(95), "failed": failed}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=120, help="Requests per phase")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slo-ms", type=float, default=600, help="latency_slo_ms (agent.yaml's is for real models)")
+    args = parser.parse_args()
+    logger.remove()
+
+    policy = load_routing_policy()
+    if policy is None:
+        parser.error("agent.yaml has no routing section")
+    policy = replace(policy, latency_slo_ms=args.slo_ms, window_seconds=3.0)
+    fast = Latency(median_ms=60, sigma=0.2)
+    fake = FakeGemini(RULES, fast, model_latency={LITE: Latency(median_ms=25, sigma=0.2)}, seed=1)
+    fake.start()
+    fake.install_env()
+    registry = ModelRegistry(cache=False, rate_limit=False, context_cache=False)
+    retry_config = types.HttpRetryOptions(attempts=3, initial_delay=0.2)
+    cascade = CascadeLlm([registry.get_model(m, retry_config) for m in policy.tiers], policy)
+    strongest = registry.get_model(PRO, retry_config)
+
+    phases = {
+        "normal": lambda: None,
+        "degraded": lambda: fake.model_latency.update({LITE: Latency(median_ms=900, sigma=0.2)}),
+        "recovered": lambda: fake.model_latency.update({LITE: Latency(median_ms=25, sigma=0.2)}),
+    }
+    print(f"{args.requests} requests per phase, concurrency {args.concurrency}, tiers {' → '.join(policy.tiers)}, "
+          f"SLO p95 {args.slo_ms:g} ms\n")
+    print(f"{'phase':<10} {'variant':<10} {'p50 ms':>7} {'p95 ms':>7} {'failed':>6} {'cost $':>8}  served by / escalations")
+    for phase, setup in phases.items():
+        setup()
+        if phase == "recovered":
+            await asyncio.sleep(policy.window_seconds)  # let the slow samples age out
+        for variant, model in (("cascade", cascade), ("pro only", strongest)):
+            fake.reset_stats()
+            before = {k: dict(v) for k, v in cascade.stats.items() if isinstance(v, dict)}
+            r = await drive(model, args.requests, args.concurrency)
+            detail = ""
+            if model is cascade:
+                served = {m: n - before["served_by"].get(m, 0) for m, n in cascade.stats["served_by"].items()}
+                escalated = {k: n - before["escalations"].get(k, 0) for k, n in cascade.stats["escalations"].items()}
+                detail = f"{ {m.removeprefix('gemini-'): n for m, n in served.items() if n} } {escalated}"
+            print(f"{phase:<10} {variant:<10} {r['p50'] * 1000:7.1f} {r['p95'] * 1000:7.1f} {r['failed']:6d} "
+                  f"{cost(fake):8.4f}  {detail}")
+    await registry.aclose()
+    fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""Fixed-count LoopAgent vs RefinementLoop on critique-and-revise rounds.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_refinement.py --conversations 10 --max-iterations 4
+
+FakeGemini (src/fake_gemini.py) plays the critic and the reviser of
+build_blog_refinement() (multiagent.py); the topic picks how they behave:
+
+    approve  → the reviser rewrites the draft every round; the critic
+               approves the second revision
+    converge → the critic never approves; the reviser rewrites once, then
+               only touches up (the text stops changing)
+    never    → the critic never approves and every round is a full rewrite
+               (nothing to save; shows the checks cost nothing)
+
+"loop" is the same two agents in a plain LoopAgent(max_iterations), which
+always runs every round. Per variant: rounds and model calls per
+conversation, stop reasons, p50 latency and tokens reported by the model.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.agents import LoopAgent  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from latency import LatencyHistogram  # noqa: E402
+from bench_suite import RULES, converse  # noqa: E402
+from fake_gemini import FILLER, FakeGemini, FakeRequest, Latency, Rule  # noqa: E402
+from model_registry import ModelRegistry, set_default_registry  # noqa: E402
+from refinement import REPORT_STATE_KEY  # noqa: E402
+
+_REVISION_RE = re.compile(r"\[rev (\d+)\]")
+
+
+def _draft(request: FakeRequest) -> str:
+    match = re.search(r"draft[^:]*: (.*?)\n\s*(?:Fix|List) the ", request.instruction, re.S)
+    return match.group(1) if match else ""
+
+
+def _topic(request: FakeRequest) -> str:
+    """The user's message (later user-role contents are other agents' output "for context")."""
+    return next((p.get("text", "") for c in request.contents if c.get("role") == "user" for p in c.get("parts", [])), "")
+
+
+def _revision(text: str) -> int:
+    return max((int(n) for n in _REVISION_RE.findall(text)), default=0)
+
+
+def _critique(request: FakeRequest) -> str:
+    approved = _topic(request).startswith("approve") and _revision(_draft(request)) >= 2
+    score = 0.95 if approved else 0.6
+    return json.dumps({"approved": approved, "score": score, "issues": [] if approved else ["flow", "clarity"]})
+
+
+def _revise(request: FakeRequest) -> str:
+    draft = _draft(request)
+    revision = _revision(draft) + 1
+    body = _REVISION_RE.sub("", draft).strip()
+    if not (_topic(request).startswith("converge") and revision > 1):
+        body = " ".join(random.Random(revision).sample(FILLER * 12, len(FILLER) * 12))  # a full rewrite
+    return f"[rev {revision}] {body}"
+
+
+LOOP_RULES = [
+    Rule(name="CriticAgent", instruction="Review this blog draft", reply=_critique),
+    Rule(name="ReviserAgent", instruction="Revise this blog draft", reply=_revise),
+    *RULES,
+]
+
+
+async def drive(agent, topic: str, conversations: int, concurrency: int, fake: FakeGemini) -> dict:
+    runner = InMemoryRunner(agent=agent)
+    histogram, semaphore = LatencyHistogram(), asyncio.Semaphore(concurrency)
+    reasons, rounds = Counter(), 0
+
+    async def one(i: int):
+        nonlocal rounds
+        async with semaphore:
+            start = time.perf_counter()
+            session = await converse(runner, f"user{i}", f"c{i}", f"{topic}: multi-agent systems, angle {i}")
+            histogram.add(time.perf_counter() - start)
+            session = await runner.session_service.get_session(
+                app_name=runner.app_name, user_id=f"user{i}", session_id=session.id
+            )
+            events = session.events
+            revisions = sum(e.author == "CriticAgent" and not e.partial for e in events)
+            report = next((e.actions.state_delta[REPORT_STATE_KEY] for e in events
+                           if REPORT_STATE_KEY in (e.actions.state_delta or {})), None)
+            reasons[report["stop_reason"] if report else "max_iterations"] += 1
+            rounds += revisions
+
+    fake.reset_stats()
+    await asyncio.gather(*(one(i) for i in range(conversations)))
+    await runner.close()
+    return {
+        "rounds": rounds / conversations,
+        "calls": fake.stats["requests"] / conversations,
+        "tokens": (fake.stats["prompt_tokens"] + fake.stats["output_tokens"]) / conversations,
+        "p50": histogram.percentile(50),
+        "reasons": dict(reasons),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-iterations", type=int, default=4)
+    parser.add_argument("--median-ms", type=float, default=80, help="Median model latency before prefill/decode")
+    args = parser.parse_args()
+    logger.remove()
+
+    fake = FakeGemini(LOOP_RULES, Latency(median_ms=args.median_ms, sigma=0.2), seed=1)
+    fake.start()
+    fake.install_env()
+    set_default_registry(ModelRegistry(cache=False, rate_limit=False, context_cache=False))
+    from multiagent import build_blog_refinement
+
+    def plain_loop():
+        agent = build_blog_refinement(args.max_iterations)
+        refine = agent.sub_agents[-1]
+        loop = LoopAgent(name="EditLoop", max_iterations=args.max_iterations, sub_agents=[])
+        loop.sub_agents, refine.sub_agents = refine.sub_agents, []
+        for sub_agent in loop.sub_agents:
+            sub_agent.parent_agent = loop
+        agent.sub_agents[-1] = loop
+        loop.parent_agent = agent
+        return agent
+
+    print(f"{args.conversations} conversations per run, max_iterations {args.max_iterations}, "
+          f"model latency median {args.median_ms:g} ms\n")
+    print(f"{'topic':<9} {'variant':<8} {'rounds':>6} {'calls':>6} {'p50 ms':>8} {'tokens':>7}  stop reasons")
+    for topic in ("approve", "converge", "never"):
+        for variant, build in (("loop", plain_loop), ("refine", lambda: build_blog_refinement(args.max_iterations))):
+            r = await drive(build(), topic, args.conversations, args.concurrency, fake)
+            print(f"{topic:<9} {variant:<8} {r['rounds']:6.1f} {r['calls']:6.1f} {r['p50'] * 1000:8.1f} "
+                  f"{r['tokens']:7.0f}  {r['reasons'] if variant == 'refine' else ''}")
+    fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
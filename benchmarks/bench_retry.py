@@ -0,0 +1,117 @@
+"""HTTP-level retries (retry_config) vs ResilientLlm under throttling, outages and slow tails.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_retry.py --requests 200 --concurrency 10
+
+The calls go to FakeGemini (src/fake_gemini.py) over HTTP:
+
+    throttled → 10% of requests answered 429 with Retry-After: 0.5
+    outage    → the model answers 503 for 3 s, then recovers; requests arrive
+                at a steady 50/s instead of back to back
+    slow tail → no errors, but 5% of requests stall for 1.5 s
+
+"http" is Gemini with retry_config (google.genai's backoff: 1 s, 7 s, 49 s
+...), as the agents used it before. "resilient" is ResilientLlm with the
+same attempts and initial delay (decorrelated jitter, Retry-After, circuit
+breaker); "hedged" additionally hedges calls slower than the rolling p95.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.models import LlmRequest  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from latency import LatencyHistogram  # noqa: E402
+from fake_gemini import FakeGemini, Latency  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from retry import CircuitBreaker, CircuitOpenError, ResilientLlm, RetryPolicy  # noqa: E402
+
+MODEL = "gemini-2.5-flash-lite"
+RETRY_CONFIG = types.HttpRetryOptions(attempts=5, exp_base=7, initial_delay=1, http_status_codes=[429, 500, 503, 504])
+
+
+async def drive(model, requests: int, concurrency: int, rate: float | None = None) -> dict:
+    histogram, semaphore = LatencyHistogram(), asyncio.Semaphore(concurrency)
+    outcome = {"ok": 0, "failed": 0, "fast_failed": 0}
+
+    async def one(i: int):
+        request = LlmRequest(model=MODEL, contents=[types.Content(role="user", parts=[types.Part(text=f"question {i}")])])
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async for _ in model.generate_content_async(request):
+                    pass
+                outcome["ok"] += 1
+            except CircuitOpenError:
+                outcome["fast_failed"] += 1
+            except Exception:
+                outcome["failed"] += 1
+            histogram.add(time.perf_counter() - start)
+
+    async def arrive(i: int):
+        if rate:
+            await asyncio.sleep(i / rate)
+        await one(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(arrive(i) for i in range(requests)))
+    outcome["wall"] = time.perf_counter() - start
+    outcome.update(p50=histogram.percentile(50), p99=histogram.percentile(99), max=histogram.max)
+    return outcome
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    logger.remove()
+
+    fake = FakeGemini(latency=Latency(median_ms=40, sigma=0.2), retry_after=0.5, seed=1)
+    fake.start()
+    fake.install_env()
+    plain = ModelRegistry(cache=False, rate_limit=False, context_cache=False, resilient=False)
+    no_http_retries = types.HttpRetryOptions(attempts=1)
+    policy = RetryPolicy.from_http_options(RETRY_CONFIG)
+
+    def variants():
+        yield "http", plain.get_model(MODEL, RETRY_CONFIG)
+        for variant, hedge in (("resilient", False), ("hedged", True)):
+            breaker = CircuitBreaker(reset_timeout=1)
+            yield variant, ResilientLlm(plain.get_model(MODEL, no_http_retries), policy=policy, breaker=breaker, hedge=hedge, seed=1)
+
+    scenarios = {
+        "throttled": lambda: setattr(fake, "error_rates", {429: 0.1}),
+        "outage": lambda: fake.fail_for(503, 3),
+        "slow tail": lambda: setattr(fake, "latency", Latency(40, 0.2, 0.05, 1500)),
+    }
+    print(f"{args.requests} requests per run, concurrency {args.concurrency}\n")
+    print(f"{'scenario':<10} {'variant':<10} {'wall s':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'ok':>4} {'failed':>6} {'fast':>5} {'backend':>7}")
+    for scenario, setup in scenarios.items():
+        for variant, model in variants():
+            fake.latency, fake.error_rates = Latency(median_ms=40, sigma=0.2), {}
+            if isinstance(model, ResilientLlm) and model.hedge:
+                await drive(model, 50, args.concurrency)  # learn the p95 first
+            setup()
+            fake.reset_stats()
+            r = await drive(model, args.requests, args.concurrency, rate=50 if scenario == "outage" else None)
+            fake.clear_faults()
+            extra = f"  {model.stats}" if isinstance(model, ResilientLlm) else ""
+            print(f"{scenario:<10} {variant:<10} {r['wall']:7.2f} {r['p50'] * 1000:8.1f} {r['p99'] * 1000:8.1f} "
+                  f"{r['max'] * 1000:8.1f} {r['ok']:4d} {r['failed']:6d} {r['fast_failed']:5d} "
+                  f"{fake.stats['requests']:7d}{extra}")
+    await plain.aclose()
+    fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""Search latency of SemanticMemoryService's VectorIndex as the store grows.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_semantic_memory.py --sizes 10000 100000 1000000
+
+Vectors are synthetic (random unit vectors around a set of topics) so the
+benchmark measures index cost only, independently of the embedder.
+Target: p50 search latency below 1 ms at 1M events.
+
+recall@k is the share of the exact top-k (every cluster scanned) that the
+IVF search returns. "max add ms" is the slowest add() batch: with the
+index's own auto_train it includes the in-place retrain, which
+SemanticMemoryService moves to a background thread (its adds and searches
+never wait for one). "bg add ms" repeats the ingestion the service's way.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from semantic_memory import VectorIndex  # noqa: E402
+
+
+def synthetic_vectors(rng, topics: np.ndarray, n: int) -> np.ndarray:
+    vectors = topics[rng.integers(len(topics), size=n)]
+    vectors = vectors + 0.5 * rng.standard_normal(vectors.shape).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall_at_k(index: VectorIndex, queries: np.ndarray, k: int) -> float:
+    found = 0
+    for query in queries:
+        approximate, _ = index.search(query, k)
+        exact, _ = index.search(query, k, exact=True)
+        found += len(np.intersect1d(approximate, exact))
+    return found / (k * len(queries))
+
+
+def ingest(index: VectorIndex, rng, topics: np.ndarray, size: int, background: bool) -> tuple[float, float]:
+    """Adds vectors up to `size` in batches; returns (seconds, slowest batch in ms)."""
+    start, slowest, trainer = time.perf_counter(), 0.0, None
+    while len(index) < size:
+        batch = min(10_000, size - len(index))
+        vectors = synthetic_vectors(rng, topics, batch)
+        t0 = time.perf_counter()
+        with lock:
+            index.add(vectors, np.arange(len(index), len(index) + batch))
+            snapshot = index.begin_training() if background and index.needs_training else None
+        slowest = max(slowest, (time.perf_counter() - t0) * 1000)
+        if snapshot is not None:
+            trainer = threading.Thread(target=train_and_install, args=(index, snapshot))
+            trainer.start()
+    if trainer is not None:
+        trainer.join()
+    return time.perf_counter() - start, slowest
+
+
+def train_and_install(index: VectorIndex, snapshot):
+    layout = index.train(*snapshot)
+    with lock:
+        index.install_training(layout)
+
+
+lock = threading.Lock()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--recall-queries", type=int, default=100, help="Queries checked against exact search")
+    args = parser.parse_args()
+    logger.remove()
+
+    rng = np.random.default_rng(0)
+    topics = rng.standard_normal((2_000, args.dim)).astype(np.float32)
+    index = VectorIndex(args.dim)
+    background = VectorIndex(args.dim, auto_train=False)
+    queries = synthetic_vectors(rng, topics, args.queries)
+
+    print(f"{'events':>10} {'layout':>6} {'ingest s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{f'recall@{args.k}':>9} {'max add ms':>10} {'bg add ms':>9}")
+    for size in sorted(args.sizes):
+        ingest_seconds, slowest = ingest(index, rng, topics, size, background=False)
+        _, slowest_background = ingest(background, rng, topics, size, background=True)
+
+        latencies = []
+        for query in queries:
+            t0 = time.perf_counter()
+            index.search(query, args.k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        p50, p99 = np.percentile(latencies, [50, 99])
+        layout = "ivf" if index.is_ivf else "flat"
+        recall = recall_at_k(index, queries[: args.recall_queries], args.k)
+        print(f"{size:>10} {layout:>6} {ingest_seconds:>9.2f} {p50:>8.3f} {p99:>8.3f} "
+              f"{recall:>9.3f} {slowest:>10.1f} {slowest_background:>9.1f}")
+
+if __name__ == "__main__":
+    main()
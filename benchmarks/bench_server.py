@@ -0,0 +1,210 @@
+"""Load test of the ASGI agent server (src/server.py) against the fake Gemini backend.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_server.py --turns 200 currency
+    uv run python benchmarks/bench_server.py --median-ms 80 --max-per-user 2 --queue-per-user 8 blog
+
+The server runs in-process under uvicorn on a free localhost port; clients
+are httpx streams reading the SSE answer of POST /agents/{agent}/run, so
+the numbers include HTTP, SSE encoding and the limiter. FakeGemini
+(src/fake_gemini.py) answers with the script of bench_suite.py. The
+response cache is off: the runs repeat prompts, and replayed answers would
+not exercise the model path.
+
+    serial     → the same turns one after the other on one runner, the way
+                 app.py / run_debug serve a single user (the baseline)
+    scaling    → distinct users, one turn each, at increasing client
+                 concurrency: turns/s, end-to-end and first-event latency
+    hot user   → one user sends a burst far above max_per_user +
+                 queue_per_user while ordinary users keep arriving: how many
+                 of the burst are queued or refused (429), and the
+                 ordinary users' p99 next to the scaling run's
+    disconnect → clients hang up after the first SSE event; afterwards no
+                 turn may still be active or waiting in the limiter
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from latency import LatencyHistogram  # noqa: E402
+from bench_suite import RULES, SCENARIOS  # noqa: E402
+from fake_gemini import FakeGemini, Latency  # noqa: E402
+from model_registry import ModelRegistry, set_default_registry  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def prompt(agent: str, i: int) -> str:
+    return {
+        "currency": f"Convert {500 + i} USD to EUR using a platinum credit card.",
+        "enhanced_currency": f"Convert {1250 + i} USD to EUR using a platinum credit card.",
+    }.get(agent, f"Multi-agent systems, angle {i}" if agent.startswith("blog") else f"Quantum computing milestones, part {i}")
+
+
+class Load:
+    """Outcome of a batch of turns seen from the client side."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.first_event = LatencyHistogram()
+        self.ok = self.rejected = self.queued = self.failed = 0
+
+    def row(self, wall: float) -> str:
+        return (f"{self.ok / wall:7.1f} {self.latency.percentile(50) * 1000:8.1f} "
+                f"{self.latency.percentile(99) * 1000:8.1f} {self.first_event.percentile(50) * 1000:8.1f} "
+                f"{self.ok:5d} {self.queued:6d} {self.rejected:5d} {self.failed:6d}")
+
+
+async def turn(client: httpx.AsyncClient, agent: str, user_id: str, session_id: str, text: str, load: Load,
+               hang_up: bool = False):
+    start = time.perf_counter()
+    body = {"user_id": user_id, "session_id": session_id, "message": text}
+    kinds = []
+    try:
+        async with client.stream("POST", f"/agents/{agent}/run", json=body) as response:
+            if response.status_code == 429:
+                load.rejected += 1
+                return
+            async for line in response.aiter_lines():
+                if not line.startswith("event: "):
+                    continue
+                kinds.append(line.removeprefix("event: "))
+                if kinds[-1] == "queued":
+                    load.queued += 1
+                elif kinds[-1] == "event" and kinds.count("event") == 1:
+                    load.first_event.add(time.perf_counter() - start)
+                    if hang_up:
+                        return
+    except httpx.TransportError:  # connection refused, reset or cut mid-stream: the turn failed
+        load.failed += 1
+        return
+    if kinds and kinds[-1] == "done":
+        load.ok += 1
+        load.latency.add(time.perf_counter() - start)
+    else:
+        load.failed += 1
+
+
+async def serial(agent: str, turns: int) -> tuple[Load, float]:
+    from bench_suite import converse
+    from main import build_runner
+
+    runner, load = build_runner(agent), Load()
+    await converse(runner, "warm", "warm", prompt(agent, turns))
+    start = time.perf_counter()
+    for i in range(turns):
+        t = time.perf_counter()
+        await converse(runner, f"serial{i}", f"s{i}", prompt(agent, i))
+        load.latency.add(time.perf_counter() - t)
+        load.ok += 1
+    wall = time.perf_counter() - start
+    await runner.close()
+    return load, wall
+
+
+async def fan_out(client, agent: str, turns: int, concurrency: int, tag: str, hang_up: bool = False) -> tuple[Load, float]:
+    load, semaphore = Load(), asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await turn(client, agent, f"{tag}{i}", f"{tag}{i}", prompt(agent, i), load, hang_up)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(turns)))
+    return load, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("agent", nargs="?", default="currency", choices=sorted(SCENARIOS))
+    parser.add_argument("--turns", type=int, default=200, help="Turns per scaling step")
+    parser.add_argument("--median-ms", type=float, default=40, help="Median model latency before prefill/decode")
+    parser.add_argument("--max-per-user", type=int, default=2)
+    parser.add_argument("--queue-per-user", type=int, default=8)
+    parser.add_argument("--burst", type=int, default=50, help="Turns the hot user sends at once")
+    args = parser.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    os.environ["rate_limit_rpm"] = "1000000"
+    os.environ["rate_limit_tpm"] = "1000000000"
+    os.environ["llm_cache_path"] = str(Path(tempfile.mkdtemp()) / "llm_cache.sqlite")
+    os.environ.pop("session_db_path", None)
+    fake = FakeGemini(RULES, Latency(median_ms=args.median_ms, sigma=0.3), seed=0)
+    fake.start()
+    fake.install_env()
+    set_default_registry(ModelRegistry(cache=False))
+
+    from server import AgentServer, UserLimiter, build_app
+
+    limiter = UserLimiter(args.max_per_user, args.queue_per_user)
+    agent_server = AgentServer([args.agent], limiter)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(build_app(agent_server), port=port, log_level="error", lifespan="on"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    print(f"agent {args.agent}, model latency median {args.median_ms:g} ms, "
+          f"max {args.max_per_user} running + {args.queue_per_user} queued per user\n")
+    header = f"{'run':<22} {'turns/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'1st ms':>8} {'ok':>5} {'queued':>6} {'429':>5} {'failed':>6}"
+    print(header)
+    load, wall = await serial(args.agent, min(args.turns, 50))
+    print(f"{'serial (run_debug)':<22} {load.row(wall)}")
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None) as client:
+        await fan_out(client, args.agent, 4, 4, "warm")  # runner built, connections open
+        scaling_p99 = 0.0
+        for concurrency in (1, 8, 32, 128):
+            fake.reset_stats()
+            load, wall = await fan_out(client, args.agent, min(args.turns, 25 * concurrency), concurrency, f"c{concurrency}-")
+            scaling_p99 = load.latency.percentile(99)
+            print(f"{f'concurrency {concurrency}':<22} {load.row(wall)}")
+
+        hot = Load()
+
+        async def burst():
+            await asyncio.gather(*(
+                turn(client, args.agent, "hot", f"hot{i}", prompt(args.agent, i), hot) for i in range(args.burst)
+            ))
+
+        start = time.perf_counter()
+        _, (others, others_wall) = await asyncio.gather(burst(), fan_out(client, args.agent, args.turns, 32, "calm"))
+        print(f"{'hot user burst':<22} {hot.row(time.perf_counter() - start)}")
+        print(f"{'  others meanwhile':<22} {others.row(others_wall)}  (p99 at concurrency 128: {scaling_p99 * 1000:.1f})")
+
+        load, wall = await fan_out(client, args.agent, args.turns, 32, "gone", hang_up=True)
+        await asyncio.sleep(0.5)  # let cancelled turns unwind
+        report = (await client.get("/stats")).json()
+        print(f"{'disconnect':<22} {load.first_event.count:>7} first events read, "
+              f"server saw {report['disconnected']} disconnects, "
+              f"{report['limiter']['active']} active / {report['limiter']['waiting']} waiting left (expected 0 / 0)")
+
+    print(f"\nserver: {report['runs']} turns, {report['completed']} completed, peak {report['limiter']['peak_active']} "
+          f"active, {report['limiter']['rejected']} refused; latency {report['latency_ms']}, "
+          f"first event {report['first_event_ms']}")
+    server.should_exit = True
+    await serving
+    fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""Append and resume latency of session services at 10k events per session.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_session_store.py --events 10000
+
+Appends N events (alternating user message / final model reply, i.e. N/2
+turns) to one session, then measures resuming it with get_session():
+
+    memory   → InMemorySessionService (nothing survives a restart)
+    adk      → ADK's SqliteSessionService (a connection and commit per event,
+               whole history deserialized on resume)
+    durable  → DurableSessionService, per-event writes (batch_size=1)
+    batched  → DurableSessionService, one transaction per turn
+
+Resume for the durable stores is timed from a fresh service instance
+(as after a restart), for a 200-event GetSessionConfig window and for the
+full history (the default).
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.events import Event, EventActions  # noqa: E402
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+from google.adk.sessions.base_session_service import GetSessionConfig  # noqa: E402
+from google.adk.sessions.sqlite_session_service import SqliteSessionService  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from session_store import DurableSessionService  # noqa: E402
+
+APP, USER, SESSION = "bench", "user", "long_session"
+TEXT = "Convert 1250 USD to INR using the platinum credit card and show the breakdown. " * 3
+
+
+def make_event(i: int) -> Event:
+    user_turn = i % 2 == 0
+    return Event(
+        invocation_id=f"inv-{i // 2}",
+        author="user" if user_turn else "assistant",
+        content=types.Content(role="user" if user_turn else "model", parts=[types.Part(text=f"{i}: {TEXT}")]),
+        actions=EventActions(state_delta={} if user_turn else {"turns": i // 2 + 1}),
+    )
+
+
+async def append_all(service, n: int) -> float:
+    session = await service.create_session(app_name=APP, user_id=USER, session_id=SESSION)
+    events = [make_event(i) for i in range(n)]
+    start = time.perf_counter()
+    for event in events:
+        await service.append_event(session, event)
+    await service.flush()
+    return time.perf_counter() - start
+
+
+async def resume(service, config: GetSessionConfig | None = None) -> tuple[float, int]:
+    start = time.perf_counter()
+    session = await service.get_session(app_name=APP, user_id=USER, session_id=SESSION, config=config)
+    return time.perf_counter() - start, len(session.events)
+
+
+async def bench(n: int, skip_adk: bool):
+    tmp = Path(tempfile.mkdtemp())
+    recent = GetSessionConfig(num_recent_events=200)
+
+    memory = InMemorySessionService()
+    elapsed = await append_all(memory, n)
+    resumed, count = await resume(memory)
+    print(f"memory   append {elapsed / n * 1e6:8.1f} µs/event | resume {resumed * 1000:8.1f} ms ({count} events)")
+
+    if not skip_adk:
+        adk = SqliteSessionService(str(tmp / "adk.sqlite"))
+        elapsed = await append_all(adk, n)
+        resumed, count = await resume(SqliteSessionService(str(tmp / "adk.sqlite")))
+        print(f"adk      append {elapsed / n * 1e6:8.1f} µs/event | resume {resumed * 1000:8.1f} ms ({count} events)")
+
+    for name, batch_size in (("durable", 1), ("batched", 64)):
+        path = tmp / f"{name}.sqlite"
+        service = DurableSessionService(path, batch_size=batch_size)
+        elapsed = await append_all(service, n)
+        flushes = service.stats["flushes"]
+        service.close()
+        window, count = await resume(DurableSessionService(path), recent)
+        whole, total = await resume(DurableSessionService(path))
+        print(
+            f"{name:8s} append {elapsed / n * 1e6:8.1f} µs/event ({flushes} transactions) | "
+            f"resume {window * 1000:6.1f} ms ({count} events), full {whole * 1000:8.1f} ms ({total} events)"
+        )
+
+    service = DurableSessionService(tmp / "batched.sqlite")
+    start = time.perf_counter()
+    pages, cursor = 0, None
+    while True:
+        events, cursor = await service.list_events(
+            app_name=APP, user_id=USER, session_id=SESSION, page_size=500, before=cursor
+        )
+        pages += 1
+        if cursor is None:
+            break
+    print(f"paged history: {pages} pages of ≤500 in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--skip-adk", action="store_true", help="Skip ADK's SqliteSessionService (slowest)")
+    args = parser.parse_args()
+    logger.remove()
+    asyncio.run(bench(args.events, args.skip_adk))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Time to first byte and total latency: BlogPipeline vs StreamingBlogPipeline.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_streaming_pipeline.py --token-ms 20
+
+Both pipelines from multiagent.py run against the same fake streaming model.
+It answers each stage with a fixed number of blank-line separated paragraphs
+and sleeps token_ms per word. Time to first byte is when the first text of
+the final stage reaches the caller; "calls" counts model requests.
+
+With --rpm the fake sits behind RateLimitedLlm at that quota (the default
+configuration has 15): StreamingPipeline makes one call per chunk (13 for
+this outline instead of 3), which the limiter then spaces out.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import AsyncGenerator
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.agents import LlmAgent  # noqa: E402
+from google.adk.models import LlmRequest, LlmResponse  # noqa: E402
+from google.adk.models.base_llm import BaseLlm  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+import multiagent  # noqa: E402
+
+
+class FakeStreamingLlm(BaseLlm):
+    """Replies like the blog stages would, one word every token_ms."""
+
+    token_ms: float = 20
+    words_per_paragraph: int = 40
+    calls: int = 0
+
+    def _reply(self, llm_request: LlmRequest) -> str:
+        instruction = str(llm_request.config.system_instruction or "")
+        per_chunk = "Edit this paragraph" in instruction or "one outline part at a time" in instruction
+        paragraphs = 1 if per_chunk else 6  # headline, hook, 3 sections, conclusion
+        words = " ".join(["word"] * self.words_per_paragraph)
+        return "\n\n".join(f"P{i} {words}" for i in range(paragraphs))
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        text = self._reply(llm_request)
+        tokens = text.split(" ")
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(self.token_ms / 1000)
+            if stream:
+                piece = token if i == 0 else " " + token
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=piece)]), partial=True
+                )
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def use_fake(agent, model: BaseLlm):
+    if isinstance(agent, LlmAgent):
+        agent.model = model
+    for stage in getattr(agent, "stages", []):
+        stage.model = model
+    for sub_agent in agent.sub_agents:
+        use_fake(sub_agent, model)
+
+
+async def measure(label: str, agent, model: FakeStreamingLlm) -> tuple[float, float]:
+    model.calls = 0
+    runner = InMemoryRunner(agent=agent)
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id="bench")
+    start, first = time.perf_counter(), None
+    async for event in runner.run_async(
+        user_id="bench",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text="multi-agent systems")]),
+    ):
+        if event.author == "EditorAgent" and event.content and first is None:
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    session = await runner.session_service.get_session(
+        app_name=runner.app_name, user_id="bench", session_id=session.id
+    )
+    keys = [key for key in ("blog_outline", "blog_draft", "final_blog") if session.state.get(key)]
+    print(f"{label:<20} first byte {first:6.2f}s | total {total:6.2f}s | calls {model.calls:3d} | state keys {keys}")
+    return first, total
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=int, default=None, help="Rate-limit the model to this many requests per minute")
+    args = parser.parse_args()
+    logger.remove()
+
+    fake = FakeStreamingLlm(model="fake-stream", token_ms=args.token_ms)
+    model = fake
+    if args.rpm:
+        from rate_limiter import ModelLimits, ModelRateLimiter, RateLimitedLlm
+
+        limiter = ModelRateLimiter(ModelLimits(rpm=args.rpm, tpm=10_000_000))
+        model = RateLimitedLlm(fake, limiter=limiter)
+        print(f"rate limit: {args.rpm} requests per minute")
+    sequential = multiagent.build_blog_pipeline()
+    use_fake(sequential, model)
+    streaming = multiagent.build_streaming_blog_pipeline()
+    streaming.concurrency = args.concurrency
+    use_fake(streaming, model)
+
+    seq_first, seq_total = await measure("BlogPipeline", sequential, fake)
+    if args.rpm:
+        model.limiter = ModelRateLimiter(ModelLimits(rpm=args.rpm, tpm=10_000_000))  # a fresh quota for each pipeline
+    str_first, str_total = await measure("StreamingPipeline", streaming, fake)
+    print(f"speed-up: first byte ×{seq_first / str_first:.1f}, total ×{seq_total / str_total:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
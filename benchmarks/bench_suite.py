@@ -0,0 +1,262 @@
+"""Offline benchmark suite: every agent against the fake Gemini backend.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_suite.py --conversations 40 --concurrency 8
+    uv run python benchmarks/bench_suite.py --error-rate 0.05 --sigma 0.5 blog research
+
+No API key is needed. FakeGemini (src/fake_gemini.py) answers on localhost
+with a script that drives each agent the way Gemini would: the currency
+agents call their function tools, ResearchCoordinator calls its two
+AgentTools, the memory agent calls load_memory, the pipelines get replies of
+realistic length. The agents are built exactly as `main.py run` builds them
+(ModelRegistry stack, RateLimitPlugin, retries); only the rate limit is
+raised and the response cache goes to a temporary file.
+
+Per scenario: conversations per second, p50/p95/p99 latency of a whole
+conversation, model calls per conversation as ADK sees them, requests that
+reached the backend (retries included, response-cache hits excluded) and the
+faults injected. --bare builds the models without the response cache, rate
+limiter and context cache.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from latency import LatencyHistogram  # noqa: E402
+from fake_gemini import FakeGemini, FakeRequest, Latency, Rule, filler  # noqa: E402
+
+COLOURS = ("blue", "green", "red", "amber", "violet")
+
+
+def _echo(words: int, paragraphs: int = 1):
+    """Reply text that starts from the prompt, so every conversation's requests differ like real ones."""
+    return lambda request: f"{' '.join(request.prompt.split()[:8])}: {filler(words, paragraphs)}"
+
+
+def _sub_queries(request: FakeRequest) -> str:
+    return "\n".join(f"{request.prompt} ({facet})" for facet in ("history", "current state", "outlook"))
+
+
+def _conversion_args(request: FakeRequest) -> dict:
+    amount = next((float(w) for w in request.prompt.split() if w.replace(".", "").isdigit()), 100.0)
+    return {"amount": amount, "base_currency": "USD", "target_currency": "EUR", "payment_method": "platinum credit card"}
+
+
+# Matched in order; the instruction substrings identify the agents in src/.
+RULES = [
+    Rule(
+        name="ResearchCoordinator",
+        instruction="You are a research coordinator",
+        calls=[
+            ("ResearchAgent", lambda r: {"request": r.prompt}),
+            ("SummarizerAgent", {"request": "Summarize the research findings."}),
+        ],
+        reply=filler(120, 4),
+    ),
+    Rule(name="QueryPlanner", instruction="Split the user's question", reply=_sub_queries),
+    Rule(name="ResearchAgent", instruction="You are a specialized research agent", reply=_echo(150, 3)),
+    Rule(name="SummarizerAgent", instruction="Read the provided research findings", reply=_echo(80, 4)),
+    Rule(name="OutlineAgent", instruction="Create a blog outline", reply=_echo(90, 6)),
+    Rule(name="KeywordAgent", instruction="search keywords readers", reply="agents, orchestration, LLM, tools, workflows"),
+    Rule(name="WriterAgent", instruction="Following this outline", reply=_echo(280, 5)),
+    Rule(name="SocialPostAgent", instruction="social media post", reply=_echo(40)),
+    Rule(name="EditorAgent", instruction="Edit this draft", reply=_echo(280, 5)),
+    Rule(name="CriticAgent", instruction="Review this blog draft", reply='{"approved": true, "score": 0.9, "issues": []}'),
+    Rule(name="ReviserAgent", instruction="Revise this blog draft", reply=_echo(280, 5)),
+    Rule(
+        name="enhanced_currency_agent",
+        instruction="call calculate_conversion() once",
+        calls=[("calculate_conversion", _conversion_args)],
+        reply="You receive the converted amount shown in the breakdown above.",
+    ),
+    Rule(
+        name="currency_agent",
+        instruction="smart currency conversion assistant",
+        calls=[
+            ("get_fee_for_payment_method", {"method": "platinum credit card"}),
+            ("get_exchange_rate", {"base_currency": "USD", "target_currency": "EUR"}),
+        ],
+        reply="After the 2% fee you receive 456.27 EUR at 0.93 EUR/USD.",
+    ),
+    Rule(
+        name="MemoryDemoAgent/recall",
+        instruction="Use load_memory tool",
+        prompt="favourite colour?",
+        calls=[("load_memory", {"query": "favourite colour"})],
+        reply="Your favourite colour is the one you told me earlier.",
+    ),
+    Rule(name="helpful_assistant", instruction="Use Google Search", reply=_echo(120, 3)),
+    Rule(name="other", reply=filler(30)),
+]
+
+
+@dataclass
+class ModelCalls:
+    """Span exporter counting model calls and response-cache hits."""
+
+    calls: int = 0
+    cache_hits: int = 0
+
+    def export(self, span):
+        if span.kind == "model":
+            self.calls += 1
+            self.cache_hits += bool(span.attributes.get("cache_hit"))
+
+
+async def converse(runner, user_id: str, session_id: str, prompt: str):
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id
+    )
+    async for _ in runner.run_async(
+        user_id=user_id, session_id=session.id, new_message=types.Content(role="user", parts=[types.Part(text=prompt)])
+    ):
+        pass
+    return session
+
+
+async def single_turn(runner, i: int, prompt: str):
+    await converse(runner, f"user{i}", f"c{i}", prompt)
+
+
+async def remember_then_recall(runner, i: int, save: bool):
+    """Tell a fact in one session, ask for it in a new one (memory.py flows)."""
+    colour = COLOURS[i % len(COLOURS)]
+    session = await converse(runner, f"user{i}", f"c{i}-tell", f"My favourite colour is {colour}.")
+    if save:  # auto_memory saves from its after_agent_callback instead
+        session = await runner.session_service.get_session(app_name=runner.app_name, user_id=f"user{i}", session_id=session.id)
+        await runner.memory_service.add_session_to_memory(session)
+    await converse(runner, f"user{i}", f"c{i}-ask", "What is my favourite colour?")
+
+
+@dataclass
+class Scenario:
+    agent: str  # key of main.AGENTS
+    conversation: Callable[[object, int], Awaitable[None]]
+    notes: str = ""
+    results: dict = field(default_factory=dict)
+
+
+SCENARIOS = {
+    "assistant": Scenario("assistant", lambda r, i: single_turn(r, i, f"What changed in AI agents this week? ({i})")),
+    "currency": Scenario(
+        "currency", lambda r, i: single_turn(r, i, f"Convert {500 + i} USD to EUR using a platinum credit card.")
+    ),
+    "enhanced_currency": Scenario(
+        "enhanced_currency", lambda r, i: single_turn(r, i, f"Convert {1250 + i} USD to EUR using a platinum credit card.")
+    ),
+    "memory": Scenario("memory", lambda r, i: remember_then_recall(r, i, save=True), "2 sessions"),
+    "auto_memory": Scenario("auto_memory", lambda r, i: remember_then_recall(r, i, save=False), "2 sessions"),
+    "research": Scenario("research", lambda r, i: single_turn(r, i, f"Quantum computing milestones, part {i}")),
+    "parallel_research": Scenario(
+        "parallel_research", lambda r, i: single_turn(r, i, f"Quantum computing milestones, part {i}")
+    ),
+    "blog": Scenario("blog", lambda r, i: single_turn(r, i, f"Multi-agent systems, angle {i}")),
+    "blog_dataflow": Scenario("blog_dataflow", lambda r, i: single_turn(r, i, f"Multi-agent systems, angle {i}")),
+    "blog_refine": Scenario("blog_refine", lambda r, i: single_turn(r, i, f"Multi-agent systems, angle {i}")),
+}
+
+
+async def run_scenario(scenario: Scenario, fake: FakeGemini, conversations: int, concurrency: int) -> dict:
+    from main import build_runner
+    from tracing import TracingPlugin
+
+    runner = build_runner(scenario.agent)
+    counter = ModelCalls()
+    runner.plugin_manager.register_plugin(TracingPlugin(exporters=[counter]))
+    histogram = LatencyHistogram()
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await scenario.conversation(runner, i)
+            except Exception as e:
+                failures += 1
+                logger.warning(f"{scenario.agent} conversation {i} failed: {e}")
+                return
+            histogram.add(time.perf_counter() - start)
+
+    await scenario.conversation(runner, conversations)  # warm-up: imports, clients, connections
+    fake.reset_stats()
+    counter.calls = counter.cache_hits = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(conversations)))
+    wall = time.perf_counter() - start
+    await runner.close()
+    done = max(1, histogram.count)
+    return {
+        "throughput": histogram.count / wall,
+        "p50": histogram.percentile(50) * 1000,
+        "p95": histogram.percentile(95) * 1000,
+        "p99": histogram.percentile(99) * 1000,
+        "model_calls": counter.calls / done,
+        "cache_hits": counter.cache_hits / done,
+        "backend": fake.stats["requests"] / done,
+        "faults": sum(fake.stats["faults"].values()),
+        "failures": failures,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"Subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--conversations", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--median-ms", type=float, default=40, help="Median model latency before prefill/decode")
+    parser.add_argument("--sigma", type=float, default=0.3, help="Lognormal latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 429 or 503 (half each)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bare", action="store_true", help="Models without response cache, rate limiter, context cache")
+    args = parser.parse_args()
+    if unknown := set(args.scenarios) - set(SCENARIOS):
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    os.environ["rate_limit_rpm"] = "1000000"
+    os.environ["rate_limit_tpm"] = "1000000000"
+    os.environ["llm_cache_path"] = str(Path(tempfile.mkdtemp()) / "llm_cache.sqlite")
+    os.environ.pop("session_db_path", None)
+
+    rates = {429: args.error_rate / 2, 503: args.error_rate / 2} if args.error_rate else {}
+    fake = FakeGemini(RULES, Latency(median_ms=args.median_ms, sigma=args.sigma), error_rates=rates, seed=args.seed)
+    fake.start()
+    fake.install_env()
+    if args.bare:
+        from model_registry import ModelRegistry, set_default_registry
+
+        set_default_registry(ModelRegistry(cache=False, rate_limit=False, context_cache=False))
+
+    print(f"{args.conversations} conversations per scenario, concurrency {args.concurrency}, "
+          f"latency median {args.median_ms:g} ms σ={args.sigma:g}, error rate {args.error_rate:g}"
+          f"{', bare models' if args.bare else ''}\n")
+    print(f"{'scenario':<18} {'conv/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'calls':>6} {'cached':>6} {'backend':>7} {'faults':>6} {'failed':>6}")
+    for name in args.scenarios or SCENARIOS:
+        r = await run_scenario(SCENARIOS[name], fake, args.conversations, args.concurrency)
+        print(f"{name:<18} {r['throughput']:7.1f} {r['p50']:8.1f} {r['p95']:8.1f} {r['p99']:8.1f} "
+              f"{r['model_calls']:6.1f} {r['cache_hits']:6.1f} {r['backend']:7.1f} {r['faults']:6d} {r['failures']:6d}"
+              f"  {SCENARIOS[name].notes}")
+    print("\ncalls/cached/backend are per conversation: model calls seen by ADK callbacks, response-cache hits,"
+          "\nrequests that reached the backend.")
+    fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
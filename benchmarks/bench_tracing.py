@@ -0,0 +1,154 @@
+"""Where BlogPipeline and ResearchCoordinator spend their time, from the trace.
+
+Run from the repository root:
+
+    uv run python benchmarks/bench_tracing.py --runs 20
+
+Both agents from multiagent.py run against a fake model with TracingPlugin
+installed. The fake answers each agent after a latency that grows with the
+prompt and the reply, reports token usage, and drives ResearchCoordinator
+through its two AgentTool hops. The script prints one trace as a tree, the
+time per agent and per span kind, the Prometheus metrics, and the cost of the
+plugin itself (the same runs without it).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import AsyncGenerator
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google.adk.agents import LlmAgent  # noqa: E402
+from google.adk.models import LlmRequest, LlmResponse  # noqa: E402
+from google.adk.models.base_llm import BaseLlm  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.adk.tools import AgentTool  # noqa: E402
+from google.genai import types  # noqa: E402
+from loguru import logger  # noqa: E402
+
+import multiagent  # noqa: E402
+from tracing import JsonlSpanExporter, PrometheusMetrics, TracingPlugin, format_trace, read_traces  # noqa: E402
+
+# Reply length per agent, recognised by the start of its instruction.
+REPLY_WORDS = {
+    "Create a blog outline": 80,
+    "Following this outline": 300,
+    "Edit this draft": 300,
+    "You are a specialized research agent": 150,
+}
+
+
+class FakeLlm(BaseLlm):
+    """Latency = base + prompt tokens + output tokens; calls the coordinator's tools in order."""
+
+    base_latency: float = 0.01
+    seconds_per_1k_prompt: float = 0.01
+    seconds_per_1k_output: float = 0.1
+
+    def _reply(self, llm_request: LlmRequest) -> types.Part:
+        instruction = str(llm_request.config.system_instruction or "")
+        if "research coordinator" in instruction:
+            called = {p.function_response.name for c in llm_request.contents for p in c.parts or [] if p.function_response}
+            for tool in ("ResearchAgent", "SummarizerAgent"):
+                if tool not in called:
+                    return types.Part(function_call=types.FunctionCall(name=tool, args={"request": "topic"}))
+        words = next((n for start, n in REPLY_WORDS.items() if instruction.lstrip().startswith(start)), 60)
+        return types.Part(text=" ".join(["word"] * words))
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        part = self._reply(llm_request)
+        prompt = len(json.dumps([c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents])) // 4
+        prompt += len(str(llm_request.config.system_instruction or "")) // 4
+        output = len((part.text or "").split()) or 10
+        await asyncio.sleep(
+            self.base_latency + prompt / 1000 * self.seconds_per_1k_prompt + output / 1000 * self.seconds_per_1k_output
+        )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt, candidates_token_count=output, total_token_count=prompt + output
+            ),
+        )
+
+
+def use_fake(agent, model: BaseLlm):
+    if isinstance(agent, LlmAgent):
+        agent.model = model
+        for tool in agent.tools:
+            if isinstance(tool, AgentTool):
+                use_fake(tool.agent, model)
+    for sub_agent in agent.sub_agents:
+        use_fake(sub_agent, model)
+
+
+async def run(agent, runs: int, plugins: list) -> float:
+    runner = InMemoryRunner(agent=agent, plugins=plugins)
+    start = time.perf_counter()
+    for i in range(runs):
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id="bench")
+        async for _ in runner.run_async(
+            user_id="bench",
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text=f"multi-agent systems {i}")]),
+        ):
+            pass
+    return time.perf_counter() - start
+
+
+def breakdown(spans: list[dict]):
+    by_agent, by_kind = defaultdict(float), defaultdict(float)
+    for span in spans:
+        if span["kind"] == "model":
+            by_agent[span["name"]] += span["duration_ms"]
+        if span["kind"] != "run" and span["kind"] != "agent":
+            by_kind[span["kind"]] += span["duration_ms"]
+    runs = sum(span["kind"] == "run" and span["parent_id"] is None for span in spans)
+    print("  model time per agent (ms/run):", ", ".join(f"{k} {v / runs:.1f}" for k, v in sorted(by_agent.items())))
+    print("  time per span kind (ms/run):  ", ", ".join(f"{k} {v / runs:.1f}" for k, v in sorted(by_kind.items())))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--metrics", action="store_true", help="Print the full Prometheus exposition")
+    args = parser.parse_args()
+    logger.remove()
+
+    model = FakeLlm(model="gemini-2.5-flash-lite")
+    trace_dir = Path(tempfile.mkdtemp())
+    metrics = PrometheusMetrics()
+    for label, build in (("BlogPipeline", multiagent.build_blog_pipeline),
+                         ("ResearchCoordinator", multiagent.build_research_coordinator)):
+        agent = build()
+        use_fake(agent, model)
+        exporter = JsonlSpanExporter(trace_dir / f"{label}.jsonl")
+        traced = await run(agent, args.runs, [TracingPlugin(exporters=[exporter, metrics])])
+        exporter.close()
+        plain = await run(agent, args.runs, [])
+
+        traces = read_traces(exporter.path)
+        spans = [span for trace in traces.values() for span in trace]
+        print(f"{label}: {len(traces)} traces, {len(spans)} spans → {exporter.path}")
+        print(format_trace(next(iter(traces.values()))))
+        breakdown(spans)
+        overhead = (traced - plain) / args.runs * 1000
+        print(f"  wall time/run: traced {traced / args.runs * 1000:.1f} ms, untraced {plain / args.runs * 1000:.1f} ms"
+              f" (plugin overhead ≈ {overhead:.2f} ms/run)\n")
+
+    exposition = metrics.render()
+    if args.metrics:
+        print(exposition)
+    else:
+        print("\n".join(line for line in exposition.splitlines() if line.startswith("adk_model_tokens_total")))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
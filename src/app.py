@@ -1,55 +1,38 @@
-from dotenv import load_dotenv
-import os   
+import asyncio
 
-from google.adk import models as google_models
 from google.adk.agents import Agent
-from google.adk.models.google_llm import Gemini
 from google.adk.runners import InMemoryRunner
 from google.adk.tools import google_search
-from google.genai import types
 from loguru import logger
 
-load_dotenv()
-try:
-    gemini_api_key = os.getenv("gemini_api_key")
-    attempts = int(os.getenv("attempts", 5))
-    exp_base = int(os.getenv("exp_base", 7))
-    initial_delay = int(os.getenv("initial_delay", 1))
-    http_status_codes = eval(os.getenv("http_status_codes", "[429, 500, 503, 504]"))
- 
-
-    retry_config = types.HttpRetryOptions(
-        attempts=attempts,
-        exp_base=exp_base,
-        initial_delay=initial_delay,
-        http_status_codes=http_status_codes
-    )
-    logger.success("Environment variables loaded and retry configuration set successfully.")
-except Exception as e:
-    logger.error(f"Error loading environment variables: {e} or setting up retry configuration.")
-    raise ConnectionError("Failed to load environment variables or set up retry configuration.")
+from config import get_settings
+from model_registry import get_model
 
 
 # Agent Definition (agent to answer general questions using Google Search)
 
-root_agent = Agent(
-    name="helpful_assistant",
-    model=Gemini(
-        model="gemini-2.0-flash-exp",  # ❌ Cambia "gemini-2.5-flash-lite" por este
-        retry_options=retry_config
-    ),
-    description="A simple agent that can answer general questions.",
-    instruction="You are a helpful assistant. Use Google Search for current info or if unsure.",
-    tools=[google_search],
-)
+def build_root_agent() -> Agent:
+    retry_config = get_settings().retry_config
+    root_agent = Agent(
+        name="helpful_assistant",
+        model=get_model("gemini-2.0-flash-exp", retry_config),  # falls back per agent.yaml if no longer listed
+        description="A simple agent that can answer general questions.",
+        instruction="You are a helpful assistant. Use Google Search for current info or if unsure.",
+        tools=[google_search],
+    )
+    logger.debug("✅ Root Agent defined.")
+    return root_agent
+
 
+async def main():
+    runner = InMemoryRunner(agent=build_root_agent())
 
-logger.debug("✅ Root Agent defined.")
+    logger.debug("✅ Runner created.")
 
-runner = InMemoryRunner(agent=root_agent)
+    response = await runner.run_debug(
+        "What is Agent Development Kit from Google? What languages is the SDK available in?"
+    )
 
-logger.debug("✅ Runner created.")
 
-response = await runner.run_debug(
-    "What is Agent Development Kit from Google? What languages is the SDK available in?"
-)
+if __name__ == "__main__":
+    asyncio.run(main())
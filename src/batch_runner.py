@@ -0,0 +1,255 @@
+'''
+Batch Runner
+
+run_session (memory.py) and runner.run_debug (app.py, multiagent.py) send one
+prompt at a time. run_batch() pushes a whole file of prompts through any
+Runner:
+
+    Input       → JSONL ({"id": ..., "prompt": ...} or a bare string per
+                  line) or CSV with a `prompt` column (and optional `id`),
+                  read lazily line by line
+    Concurrency → a fixed pool of worker tasks fed through a bounded queue,
+                  so at most `concurrency` prompts are in flight and at most
+                  2 × concurrency are buffered
+    Isolation   → every item runs in its own session, deleted afterwards;
+                  model calls are tagged with request_lane(..., BATCH) so
+                  interactive traffic keeps priority in the rate limiter
+    Output      → one JSONL result per item, written as soon as it finishes
+    Resume      → a checkpoint next to the output records the lowest
+                  unfinished index, the finished indices above it and the
+                  output size; on resume the output is truncated to that
+                  size and only unfinished items are run again
+    Report      → throughput and latency percentiles (log-bucketed
+                  histogram, so memory does not grow with the input)
+
+Usage:
+    python src/main.py batch currency prompts.jsonl -o results.jsonl --concurrency 16
+'''
+
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from google.adk.runners import Runner
+from google.genai import types
+from loguru import logger
+
+from latency import LatencyHistogram
+from rate_limiter import Priority, request_lane
+
+
+@dataclass
+class BatchItem:
+    index: int
+    id: str
+    prompt: str
+
+
+def read_items(path: str | Path) -> Iterator[BatchItem]:
+    """Yields the prompts of a .jsonl or .csv file, one at a time."""
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            for index, row in enumerate(csv.DictReader(f)):
+                yield BatchItem(index, row.get("id") or str(index), row["prompt"])
+            return
+        index = 0
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield BatchItem(index, str(index), record)
+            else:
+                yield BatchItem(index, str(record.get("id", index)), record["prompt"])
+            index += 1
+
+
+@dataclass
+class BatchReport:
+    """Outcome of one run_batch() call (resumed items are not counted)."""
+
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    wall_seconds: float = 0.0
+    throughput: float = 0.0
+    latency_ms: dict[str, float] = field(default_factory=dict)
+
+
+class _Checkpoint:
+    """Lowest unfinished index + finished indices above it + output size."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.next_index = 0
+        self.done_above: set[int] = set()
+        self.output_offset = 0
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        data = json.loads(self.path.read_text())
+        self.next_index = data["next_index"]
+        self.done_above = set(data["done_above"])
+        self.output_offset = data["output_offset"]
+        return True
+
+    def is_done(self, index: int) -> bool:
+        return index < self.next_index or index in self.done_above
+
+    def mark_done(self, index: int):
+        self.done_above.add(index)
+        while self.next_index in self.done_above:
+            self.done_above.remove(self.next_index)
+            self.next_index += 1
+
+    def save(self, output_offset: int):
+        self.output_offset = output_offset
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "next_index": self.next_index,
+                    "done_above": sorted(self.done_above),
+                    "output_offset": output_offset,
+                }
+            )
+        )
+        os.replace(tmp, self.path)
+
+
+async def run_item(runner: Runner, item: BatchItem, user_id: str, session_prefix: str) -> dict:
+    """Runs one prompt in a fresh session and returns its result record."""
+    session_id = f"{session_prefix}-{item.index}"
+    session_service = runner.session_service
+    await session_service.create_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id
+    )
+    texts, error = [], None
+    try:
+        with request_lane(session_id, Priority.BATCH):
+            async for event in runner.run_async(
+                user_id=user_id,
+                session_id=session_id,
+                new_message=types.Content(role="user", parts=[types.Part(text=item.prompt)]),
+            ):
+                if event.error_code:
+                    error = f"{event.error_code}: {event.error_message}"
+                if event.is_final_response() and event.content and event.content.parts:
+                    texts.extend(part.text for part in event.content.parts if part.text)
+    finally:
+        await session_service.delete_session(
+            app_name=runner.app_name, user_id=user_id, session_id=session_id
+        )
+    if error and not texts:
+        return {"id": item.id, "index": item.index, "status": "error", "error": error}
+    return {"id": item.id, "index": item.index, "status": "success", "response": "\n".join(texts)}
+
+
+async def run_batch(
+    runner: Runner,
+    input_path: str | Path,
+    output_path: str | Path,
+    concurrency: int = 8,
+    resume: bool = True,
+    user_id: str = "batch_user",
+    timeout: float | None = None,
+    checkpoint_every: float = 1.0,
+) -> BatchReport:
+    """Runs every prompt of input_path through runner and streams results to output_path.
+
+    Args:
+        runner: Any ADK Runner (e.g. main.build_runner("currency")).
+        input_path: .jsonl or .csv file of prompts.
+        output_path: JSONL file the results are appended to.
+        concurrency: Maximum prompts in flight.
+        resume: Continue from output_path's checkpoint if there is one;
+                otherwise start over and truncate the output.
+        user_id: User id of the per-item sessions.
+        timeout: Per-item timeout in seconds (None waits indefinitely).
+        checkpoint_every: Seconds between checkpoint writes.
+
+    Returns:
+        A BatchReport with counts, throughput and latency percentiles.
+    """
+    output_path = Path(output_path)
+    checkpoint = _Checkpoint(output_path.with_suffix(output_path.suffix + ".ckpt"))
+    resumed = resume and checkpoint.load()
+    output = output_path.open("a+b" if resumed else "wb")
+    if resumed:
+        output.truncate(checkpoint.output_offset)  # drop results written after the checkpoint
+        output.seek(0, os.SEEK_END)
+        logger.info(
+            f"↩️ Resuming {input_path} from item {checkpoint.next_index} "
+            f"({len(checkpoint.done_above)} later items already done)."
+        )
+
+    report, latencies = BatchReport(), LatencyHistogram()
+    session_prefix = f"batch-{uuid.uuid4().hex[:8]}"
+    queue: asyncio.Queue[BatchItem | None] = asyncio.Queue(maxsize=2 * concurrency)
+    last_checkpoint = time.monotonic()
+
+    def record(result: dict, latency: float):
+        nonlocal last_checkpoint
+        output.write(json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n")
+        checkpoint.mark_done(result["index"])
+        latencies.add(latency)
+        if result["status"] == "success":
+            report.completed += 1
+        else:
+            report.failed += 1
+        if time.monotonic() - last_checkpoint >= checkpoint_every:
+            output.flush()
+            checkpoint.save(output.tell())
+            last_checkpoint = time.monotonic()
+
+    async def worker():
+        while (item := await queue.get()) is not None:
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    run_item(runner, item, user_id, session_prefix), timeout
+                )
+            except Exception as e:  # one bad item must not stop the batch
+                result = {"id": item.id, "index": item.index, "status": "error", "error": repr(e)}
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            record(result, time.perf_counter() - start)
+
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for item in read_items(input_path):
+            if checkpoint.is_done(item.index):
+                report.skipped += 1
+                continue
+            await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        output.flush()
+        checkpoint.save(output.tell())
+        output.close()
+
+    report.wall_seconds = time.perf_counter() - started
+    done = report.completed + report.failed
+    report.throughput = done / report.wall_seconds if report.wall_seconds else 0.0
+    report.latency_ms = {
+        name: round(latencies.percentile(q) * 1000, 1)
+        for name, q in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99))
+    }
+    report.latency_ms["max"] = round(latencies.max * 1000, 1)
+    logger.success(
+        f"📦 Batch done: {report.completed} ok, {report.failed} failed, {report.skipped} skipped "
+        f"in {report.wall_seconds:.1f}s ({report.throughput:.1f} items/s), latency {report.latency_ms}"
+    )
+    return report
@@ -0,0 +1,184 @@
+'''
+Local Calculator
+
+enhanced_currency_agent used to hand every calculation to calculation_agent
+through AgentTool: one more LLM round trip to write Python, plus a remote
+BuiltInCodeExecutor run, just to multiply a few numbers. calculate() does the
+arithmetic locally:
+
+    Parse    → Python's ast in "eval" mode; only numbers, + - * / // % **,
+               parentheses and unit names are accepted (no calls, no
+               attributes), and the size of the expression is bounded
+    Numbers  → Decimal (28 significant digits), so 0.1 + 0.2 == 0.3 and
+               money never picks up binary rounding noise
+    Percent  → "2%" is 0.02 and "2% of 1250" is 0.02 * 1250 ("5 % 3" stays modulo)
+    Units    → upper-case codes such as USD or INR multiply like variables:
+               "1250 USD * 83.58 INR/USD" is INR, and adding USD to INR fails
+    Audit    → every operation is recorded as a step, the same breakdown
+               show_python_code_and_result used to print
+'''
+
+import ast
+import re
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal, DivisionByZero, InvalidOperation, localcontext
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 200
+MAX_EXPONENT = 100
+
+_NUMBER = r"\d+(?:\.\d+)?(?:[eE][-+]?\d+)?"  # also 4e-05 and 1E+16, as str(float) and str(Decimal) print them
+_THOUSANDS_RE = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+_PERCENT_OF_RE = re.compile(rf"({_NUMBER})\s*%\s*of\b", re.IGNORECASE)
+_PERCENT_RE = re.compile(rf"({_NUMBER})\s*%(?!\s*[\d(.])")
+_QUANTITY_RE = re.compile(rf"({_NUMBER})\s*([A-Z]{{3}})(?:\s*/\s*([A-Z]{{3}}))?\b")
+_UNIT_RE = re.compile(r"^[A-Z]{3}$")
+_SYMBOLS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "×", ast.Div: "÷", ast.FloorDiv: "//", ast.Mod: "mod", ast.Pow: "^"}
+
+
+class CalculationError(ValueError):
+    """The expression is not allowed or cannot be evaluated."""
+
+
+@dataclass(frozen=True)
+class Quantity:
+    value: Decimal
+    units: tuple[tuple[str, int], ...] = ()  # sorted (unit, exponent) pairs
+
+    def unit_text(self) -> str:
+        top = [u if e == 1 else f"{u}^{e}" for u, e in self.units if e > 0]
+        bottom = [u if e == -1 else f"{u}^{-e}" for u, e in self.units if e < 0]
+        text = "·".join(top) or ("1" if bottom else "")
+        return f"{text}/{'·'.join(bottom)}" if bottom else text
+
+    def __str__(self) -> str:
+        value = format(self.value.normalize(), "f") if self.value == self.value.to_integral() else str(self.value)
+        return f"{value} {self.unit_text()}".strip()
+
+
+def _combine(a: Quantity, b: Quantity, sign: int) -> tuple[tuple[str, int], ...]:
+    units = dict(a.units)
+    for unit, exponent in b.units:
+        units[unit] = units.get(unit, 0) + sign * exponent
+    return tuple(sorted((u, e) for u, e in units.items() if e))
+
+
+@dataclass
+class Calculation:
+    expression: str
+    result: Quantity
+    steps: list[str] = field(default_factory=list)
+
+    def as_dict(self, places: int = 2) -> dict:
+        try:
+            rounded = self.result.value.quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+        except InvalidOperation:  # more digits than the context precision
+            rounded = self.result.value
+        return {
+            "status": "success",
+            "expression": self.expression,
+            "result": str(self.result.value),
+            "rounded": str(rounded),
+            "unit": self.result.unit_text(),
+            "steps": self.steps,
+        }
+
+
+def _percent(match: re.Match) -> str:
+    return str(Decimal(match.group(1)) / 100)
+
+
+def _quantity(match: re.Match) -> str:
+    number, unit, per = match.groups()
+    return f"({number} * {unit} / {per})" if per else f"({number} * {unit})"
+
+
+def normalize(expression: str) -> str:
+    """Rewrites thousands separators, percentages and unit quantities.
+
+    Example:
+        "(1,250 USD - 1% of 1,250 USD) * 83.58 INR/USD"
+        → "((1250 * USD) - 0.01 * (1250 * USD)) * (83.58 * INR / USD)"
+    """
+    text = _THOUSANDS_RE.sub("", expression.strip())
+    text = _PERCENT_OF_RE.sub(lambda m: f"{_percent(m)} *", text)
+    text = _PERCENT_RE.sub(_percent, text)
+    text = text.replace("×", "*").replace("÷", "/").replace("^", "**")
+    return _QUANTITY_RE.sub(_quantity, text)
+
+
+class _Evaluator:
+    def __init__(self):
+        self.steps: list[str] = []
+
+    def eval(self, node: ast.AST) -> Quantity:
+        if isinstance(node, ast.Expression):
+            return self.eval(node.body)
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return Quantity(Decimal(str(node.value)))
+        if isinstance(node, ast.Name) and _UNIT_RE.match(node.id):
+            return Quantity(Decimal(1), ((node.id, 1),))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+            operand = self.eval(node.operand)
+            return operand if isinstance(node.op, ast.UAdd) else Quantity(-operand.value, operand.units)
+        if isinstance(node, ast.BinOp) and type(node.op) in _SYMBOLS:
+            left, right = self.eval(node.left), self.eval(node.right)
+            result = self._apply(node.op, left, right)
+            if not self._attaches_unit(node):
+                self.steps.append(f"{left} {_SYMBOLS[type(node.op)]} {right} = {result}")
+            return result
+        raise CalculationError(f"Not allowed in a calculation: {ast.unparse(node)!r}")
+
+    @staticmethod
+    def _attaches_unit(node: ast.BinOp) -> bool:
+        # "1250 * USD" and "83.58 * INR / USD" build a quantity; they are not steps.
+        return isinstance(node.op, (ast.Mult, ast.Div)) and isinstance(node.right, ast.Name)
+
+    @staticmethod
+    def _apply(op: ast.operator, a: Quantity, b: Quantity) -> Quantity:
+        if isinstance(op, (ast.Add, ast.Sub, ast.Mod, ast.FloorDiv)):
+            if a.units != b.units:
+                raise CalculationError(f"Cannot combine {a.unit_text() or 'a number'} with {b.unit_text() or 'a number'}")
+            value = {
+                ast.Add: lambda: a.value + b.value,
+                ast.Sub: lambda: a.value - b.value,
+                ast.Mod: lambda: a.value % b.value,
+                ast.FloorDiv: lambda: a.value // b.value,
+            }[type(op)]()
+            return Quantity(value, a.units)
+        if isinstance(op, ast.Mult):
+            return Quantity(a.value * b.value, _combine(a, b, 1))
+        if isinstance(op, ast.Div):
+            return Quantity(a.value / b.value, _combine(a, b, -1))
+        # Pow
+        if b.units or b.value != b.value.to_integral() or abs(b.value) > MAX_EXPONENT:
+            raise CalculationError(f"Exponent must be a whole number up to {MAX_EXPONENT}")
+        exponent = int(b.value)
+        return Quantity(a.value**exponent, tuple((u, e * exponent) for u, e in a.units))
+
+
+def calculate(expression: str) -> Calculation:
+    """Evaluates an arithmetic expression with Decimal precision.
+
+    Raises:
+        CalculationError: The expression is too long, uses anything but
+                          arithmetic and units, or cannot be evaluated.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculationError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    normalized = normalize(expression)
+    try:
+        tree = ast.parse(normalized, mode="eval")
+    except SyntaxError as e:
+        raise CalculationError(f"Invalid expression: {e.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise CalculationError("Expression too complex")
+    evaluator = _Evaluator()
+    with localcontext(prec=28):
+        try:
+            result = evaluator.eval(tree)
+        except (DivisionByZero, ZeroDivisionError):
+            raise CalculationError("Division by zero") from None
+        except ArithmeticError as e:  # InvalidOperation, Overflow
+            raise CalculationError(f"Invalid operation: {e!r}") from None
+    return Calculation(normalized, result, evaluator.steps)
@@ -0,0 +1,105 @@
+'''
+Configuration
+
+Every module used to run load_dotenv() and eval() the retry settings at
+import time. get_settings() does it once per process, on first use, and
+every agent factory reads the parsed values from there.
+
+.env keys (all optional):
+
+    gemini_api_key
+    attempts, exp_base, initial_delay, max_delay,
+    http_status_codes                                       → retry_config
+    hedge_requests                                          → retry.py
+    model_routing (opt-in; routing: section of agent.yaml)  → model_router.py
+    llm_cache_path, llm_cache_ttl, llm_cache_max_entries,
+    llm_cache_max_disk_entries                              → llm_cache.py
+    rate_limit_rpm, rate_limit_tpm                          → rate_limiter.py
+    context_cache_ttl, context_cache_min_tokens             → context_cache.py
+    session_db_path                                         → session_store.py
+    model_catalog_path, model_catalog_ttl                   → model_catalog.py
+
+agent.yaml (model, routing, fallbacks) is read with load_agent_config().
+'''
+
+import ast
+import os
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+import yaml
+from dotenv import load_dotenv
+from google.genai import types
+from loguru import logger
+
+AGENT_CONFIG = Path(__file__).resolve().parents[1] / "agent.yaml"
+
+
+@dataclass(frozen=True)
+class Settings:
+    gemini_api_key: str | None
+    retry_config: types.HttpRetryOptions
+    llm_cache_path: str
+    llm_cache_ttl: float
+    llm_cache_max_entries: int
+    llm_cache_max_disk_entries: int
+    rate_limit_rpm: int
+    rate_limit_tpm: int
+    context_cache_ttl: float
+    context_cache_min_tokens: int
+    session_db_path: str
+    hedge_requests: bool
+    model_routing: bool
+    model_catalog_path: str
+    model_catalog_ttl: float
+
+
+@cache
+def get_settings() -> Settings:
+    """Loads .env and parses the settings (once per process)."""
+    load_dotenv()
+    try:
+        retry_config = types.HttpRetryOptions(
+            attempts=int(os.getenv("attempts", 5)),
+            exp_base=int(os.getenv("exp_base", 7)),
+            initial_delay=int(os.getenv("initial_delay", 1)),
+            max_delay=float(os.getenv("max_delay", 20)),
+            http_status_codes=list(
+                ast.literal_eval(os.getenv("http_status_codes", "[429, 500, 503, 504]"))
+            ),
+        )
+        settings = Settings(
+            gemini_api_key=os.getenv("gemini_api_key"),
+            retry_config=retry_config,
+            llm_cache_path=os.getenv(
+                "llm_cache_path", str(Path.home() / ".cache" / "agent_google" / "llm_cache.sqlite")
+            ),
+            llm_cache_ttl=float(os.getenv("llm_cache_ttl", 24 * 3600)),
+            llm_cache_max_entries=int(os.getenv("llm_cache_max_entries", 1024)),
+            llm_cache_max_disk_entries=int(os.getenv("llm_cache_max_disk_entries", 50_000)),
+            rate_limit_rpm=int(os.getenv("rate_limit_rpm", 15)),
+            rate_limit_tpm=int(os.getenv("rate_limit_tpm", 250_000)),
+            context_cache_ttl=float(os.getenv("context_cache_ttl", 3600)),
+            context_cache_min_tokens=int(os.getenv("context_cache_min_tokens", 1024)),
+            session_db_path=os.getenv("session_db_path", ""),
+            hedge_requests=os.getenv("hedge_requests", "false").lower() in ("1", "true", "yes"),
+            model_routing=os.getenv("model_routing", "false").lower() in ("1", "true", "yes"),
+            model_catalog_path=os.getenv(
+                "model_catalog_path", str(Path.home() / ".cache" / "agent_google" / "models.json")
+            ),
+            model_catalog_ttl=float(os.getenv("model_catalog_ttl", 24 * 3600)),
+        )
+        logger.success("Environment variables loaded and retry configuration set successfully.")
+        return settings
+    except Exception as e:
+        logger.error(f"Error loading environment variables: {e} or setting up retry configuration.")
+        raise ConnectionError("Failed to load environment variables or set up retry configuration.")
+
+
+def load_agent_config(path: str | Path = AGENT_CONFIG) -> dict:
+    """agent.yaml as a dict ({} if the file does not exist)."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
@@ -0,0 +1,279 @@
+'''
+Gemini Context Cache
+
+enhanced_currency_agent and calculation_agent send the same long
+instruction and tool declarations on every request, and Gemini processes
+them again each time. ContextCachedLlm stores that fixed prefix once as a
+cachedContents resource and sends only the conversation afterwards:
+
+    Detect   → the prefix key is a hash of model, system instruction, tools
+               and tool config; a prefix seen min_uses times is stable
+    Create   → in the background, so no request waits for it; prefixes
+               below min_tokens (the API minimum) are never cached
+    Use      → requests with a cached prefix carry cached_content and drop
+               the instruction, tools and tool config
+    Refresh  → a cache close to its expiry gets its TTL extended while it
+               is still being used; idle caches just expire
+    Fallback → an expired or missing cache (or a failed create) sends the
+               full request instead, and the prefix is cached again later
+
+ADK's own ContextCacheConfig caches per session and only from the second
+invocation of each session; this cache is shared by every session that
+uses the same agent.
+
+Configuration comes from config.get_settings() (.env): context_cache_ttl,
+context_cache_min_tokens.
+'''
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncGenerator, Callable
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import Client, errors, types
+from loguru import logger
+
+from config import get_settings
+from llm_wrapper import WrappedLlm
+from tokens import estimate_tokens
+
+
+@dataclass
+class _CacheEntry:
+    name: str | None  # None: creating it failed, do not retry before expire_time
+    expire_time: float
+    refreshing: bool = False
+
+
+def prefix_key(llm_request: LlmRequest, model: str) -> str | None:
+    """Hash of the cacheable prefix, or None if the request has none."""
+    config = llm_request.config
+    if config is None or not (config.system_instruction or config.tools):
+        return None
+    if config.cached_content:
+        return None  # already uses an explicit cache
+    payload = {
+        "model": llm_request.model or model,
+        "instruction": config.system_instruction
+        if isinstance(config.system_instruction, str)
+        else repr(config.system_instruction),
+        "tools": [t.model_dump(mode="json", exclude_none=True) if hasattr(t, "model_dump") else repr(t)
+                  for t in config.tools or []],
+        "tool_config": config.tool_config.model_dump(mode="json", exclude_none=True) if config.tool_config else None,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def prefix_tokens(llm_request: LlmRequest) -> int:
+    config = llm_request.config
+    instruction = config.system_instruction if isinstance(config.system_instruction, str) else ""
+    tools = json.dumps(
+        [t.model_dump(mode="json", exclude_none=True) for t in config.tools or [] if hasattr(t, "model_dump")]
+    )
+    return estimate_tokens(instruction) + estimate_tokens(tools)
+
+
+def _is_cache_error(error: errors.APIError) -> bool:
+    """The referenced cachedContents resource expired, was deleted or is not ours."""
+    message = (error.message or "").lower()
+    return error.code in (403, 404) or (error.code == 400 and "cache" in message)
+
+
+class ContextCacheManager:
+    """Creates, refreshes and hands out cachedContents for stable prefixes.
+
+    Args:
+        client: The google.genai Client used for the cachedContents calls, or a
+                callable returning it at each call (e.g. the Client of the
+                running loop).
+        ttl_seconds: Lifetime of a created cache.
+        min_tokens: Estimated prefix tokens below which nothing is cached.
+        min_uses: Requests with the same prefix before a cache is created.
+        refresh_margin: Seconds before expiry at which a used cache is extended.
+        max_prefixes: Distinct prefixes tracked (least recently used dropped).
+    """
+
+    def __init__(
+        self,
+        client: Client | Callable[[], Client],
+        ttl_seconds: float = 3600,
+        min_tokens: int = 1024,
+        min_uses: int = 2,
+        refresh_margin: float = 120,
+        max_prefixes: int = 256,
+    ):
+        self._client = client
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.min_uses = min_uses
+        self.refresh_margin = refresh_margin
+        self.max_prefixes = max_prefixes
+        self._seen: OrderedDict[str, int] = OrderedDict()
+        self._entries: dict[str, _CacheEntry] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "created": 0,
+            "refreshed": 0,
+            "create_failures": 0,
+            "fallbacks": 0,
+            "too_small": 0,
+            "cached_tokens": 0,
+        }
+
+    @property
+    def client(self) -> Client:
+        return self._client() if callable(self._client) else self._client
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def lookup(self, key: str, llm_request: LlmRequest) -> str | None:
+        """Returns the cache name for a prefix, scheduling creation or refresh as needed."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and entry.expire_time <= now:
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            if entry.name is None:
+                self.stats["misses"] += 1
+                return None
+            if entry.expire_time - now < self.refresh_margin and not entry.refreshing:
+                entry.refreshing = True
+                self._spawn(self._refresh(key, entry))
+            self.stats["hits"] += 1
+            return entry.name
+
+        self.stats["misses"] += 1
+        uses = self._seen.pop(key, 0) + 1
+        self._seen[key] = uses
+        while len(self._seen) > self.max_prefixes:
+            self._seen.popitem(last=False)
+        if uses >= self.min_uses:
+            if prefix_tokens(llm_request) < self.min_tokens:
+                self.stats["too_small"] += 1
+                self._entries[key] = _CacheEntry(None, now + self.ttl_seconds)
+            else:
+                # Placeholder until the cache exists, so it is only created once.
+                self._entries[key] = _CacheEntry(None, now + self.ttl_seconds)
+                snapshot = llm_request.model_copy(update={"config": llm_request.config.model_copy()})
+                self._spawn(self._create(key, snapshot))
+        return None
+
+    async def _create(self, key: str, llm_request: LlmRequest):
+        config = llm_request.config
+        try:
+            cached = await self.client.aio.caches.create(
+                model=llm_request.model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=config.system_instruction,
+                    tools=config.tools,
+                    tool_config=config.tool_config,
+                    ttl=f"{int(self.ttl_seconds)}s",
+                    display_name=f"agent-google-{key[:12]}",
+                ),
+            )
+        except Exception as e:
+            self.stats["create_failures"] += 1
+            logger.warning(f"Context cache not created for {llm_request.model}: {e}")
+            return  # the failed placeholder stays until it expires
+        self._entries[key] = _CacheEntry(cached.name, time.time() + self.ttl_seconds)
+        self.stats["created"] += 1
+        logger.debug(f"📌 Context cache {cached.name} created for {llm_request.model}.")
+
+    async def _refresh(self, key: str, entry: _CacheEntry):
+        try:
+            await self.client.aio.caches.update(
+                name=entry.name, config=types.UpdateCachedContentConfig(ttl=f"{int(self.ttl_seconds)}s")
+            )
+            entry.expire_time = time.time() + self.ttl_seconds
+            self.stats["refreshed"] += 1
+        except Exception as e:
+            logger.warning(f"Context cache {entry.name} not refreshed: {e}")
+            self.invalidate(key)
+        finally:
+            entry.refreshing = False
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    async def aclose(self):
+        """Waits for pending creates and deletes every cache created here."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        for entry in list(self._entries.values()):
+            if entry.name:
+                try:
+                    await self.client.aio.caches.delete(name=entry.name)
+                except Exception as e:
+                    logger.warning(f"Context cache {entry.name} not deleted: {e}")
+        self._entries.clear()
+
+
+class ContextCachedLlm(WrappedLlm):
+    """Sends the stable instruction + tools prefix of requests as a Gemini context cache.
+
+    The inner model must be a Gemini (its api_client is used for the
+    cachedContents calls).
+
+    Args:
+        inner: The Gemini model to wrap.
+        manager: Cache manager; defaults to one built from the settings.
+    """
+
+    manager: ContextCacheManager | None = None
+
+    def _manager(self) -> ContextCacheManager:
+        if self.manager is None:
+            settings = get_settings()
+            self.manager = ContextCacheManager(
+                lambda: self.inner.api_client,
+                ttl_seconds=settings.context_cache_ttl,
+                min_tokens=settings.context_cache_min_tokens,
+            )
+        return self.manager
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = prefix_key(llm_request, self.model)
+        manager = self._manager()
+        name = manager.lookup(key, llm_request) if key else None
+        if name is None:
+            async for llm_response in self.inner.generate_content_async(llm_request, stream):
+                yield llm_response
+            return
+
+        cached_request = llm_request.model_copy(
+            update={
+                "contents": list(llm_request.contents),
+                "config": llm_request.config.model_copy(
+                    update={"system_instruction": None, "tools": None, "tool_config": None, "cached_content": name}
+                )
+            }
+        )
+        yielded = False
+        try:
+            async for llm_response in self.inner.generate_content_async(cached_request, stream):
+                usage = llm_response.usage_metadata
+                if usage and usage.cached_content_token_count:
+                    manager.stats["cached_tokens"] += usage.cached_content_token_count
+                yielded = True
+                yield llm_response
+        except errors.APIError as e:
+            if yielded or not _is_cache_error(e):
+                raise
+            manager.invalidate(key)
+            manager.stats["fallbacks"] += 1
+            logger.info(f"♻️ Context cache {name} unavailable ({e.code}), sending the full request.")
+            async for llm_response in self.inner.generate_content_async(llm_request, stream):
+                yield llm_response
@@ -0,0 +1,301 @@
+'''
+Context Window
+
+ADK sends the whole session history to the model on every call, so each
+turn of run_session() in memory.py is slower and more expensive than the
+one before. ContextWindowTool sits between the session and the model
+request (like BudgetedPreloadMemoryTool it only edits llm_request):
+
+    Window  → the current turn and the last keep_turns turns go verbatim
+    Summary → older turns are folded into a rolling summary in the system
+              instruction; it is cached per session and only the turns that
+              left the window since the last request are folded in
+    Pinned  → the current turn (with its function calls and responses) is
+              never trimmed; responses of pinned_tools are kept verbatim
+              even from summarized turns
+    Ceiling → if the request is still above max_tokens, more turns are
+              folded, then the summary is truncated
+
+A turn starts at each user message (function responses do not start one).
+'''
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Protocol
+
+from google.adk.models import LlmRequest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.tools import ToolContext
+from google.adk.tools.base_tool import BaseTool
+from google.genai import types
+from loguru import logger
+
+from tokens import estimate_tokens
+
+REPORT_STATE_KEY = "temp:context_window_report"
+
+Turn = list[types.Content]
+
+
+@dataclass
+class ContextReport:
+    """What one request kept, folded and pinned."""
+
+    turns: int
+    verbatim_turns: int
+    summarized_turns: int
+    folded_now: int
+    pinned_contents: int
+    tokens_before: int
+    tokens_after: int
+    max_tokens: int
+
+
+class HistorySummarizer(Protocol):
+    """Folds transcripts of whole turns into an existing summary."""
+
+    async def fold(self, summary: str, turns: list[str]) -> str: ...
+
+
+def _part_text(part: types.Part) -> str:
+    if part.text:
+        return part.text
+    if part.function_call:
+        return f"[called {part.function_call.name}({json.dumps(part.function_call.args or {}, default=str)})]"
+    if part.function_response:
+        response = json.dumps(part.function_response.response or {}, default=str)
+        return f"[{part.function_response.name} returned {response}]"
+    return ""
+
+
+def content_text(content: types.Content) -> str:
+    return " ".join(filter(None, (_part_text(p) for p in content.parts or [])))
+
+
+def content_tokens(content: types.Content) -> int:
+    return sum(estimate_tokens(_part_text(p)) for p in content.parts or [])
+
+
+def _starts_turn(content: types.Content) -> bool:
+    parts = content.parts or []
+    return (
+        content.role == "user"
+        and any(p.text for p in parts)
+        and not any(p.function_response for p in parts)
+    )
+
+
+def split_turns(contents: list[types.Content]) -> list[Turn]:
+    """Groups request contents into turns, oldest first."""
+    turns: list[Turn] = []
+    for content in contents:
+        if not turns or _starts_turn(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def turn_transcript(turn: Turn) -> str:
+    return "\n".join(
+        f"{'User' if c.role == 'user' else 'Assistant'}: {text}" for c in turn if (text := content_text(c))
+    )
+
+
+def _turn_hash(turn: Turn) -> str:
+    return hashlib.sha256(turn_transcript(turn).encode("utf-8")).hexdigest()
+
+
+class ExtractiveSummarizer:
+    """Local, deterministic stand-in for an LLM summarizer.
+
+    Each folded turn becomes one line with the start of the user message and
+    of the answer; the oldest lines are dropped beyond max_tokens.
+    """
+
+    def __init__(self, max_tokens: int = 400, chars_per_side: int = 160):
+        self.max_tokens = max_tokens
+        self.chars_per_side = chars_per_side
+
+    def _clip(self, text: str) -> str:
+        text = " ".join(text.split())
+        return text if len(text) <= self.chars_per_side else text[: self.chars_per_side - 1] + "…"
+
+    async def fold(self, summary: str, turns: list[str]) -> str:
+        lines = summary.splitlines() if summary else []
+        for transcript in turns:
+            rows = transcript.splitlines()
+            user = [r.removeprefix("User: ") for r in rows if r.startswith("User: ")]
+            answer = [r.removeprefix("Assistant: ") for r in rows if r.startswith("Assistant: ")]
+            line = f"- User: {self._clip(user[0]) if user else '…'}"
+            if answer:
+                line += f" → Assistant: {self._clip(answer[-1])}"
+            lines.append(line)
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+
+class LlmHistorySummarizer:
+    """Summarizer backed by a model, e.g. get_model("gemini-2.5-flash-lite").
+
+    Costs one model call per request in which turns leave the window.
+    """
+
+    INSTRUCTION = """You maintain a running summary of a conversation between a user and an assistant.
+Update the summary with the new turns below. Keep facts the user stated, decisions, numbers and open questions;
+drop greetings and repetition. Write at most {max_words} words as short bullet points. Output only the summary."""
+
+    def __init__(self, llm: BaseLlm, max_words: int = 250):
+        self.llm = llm
+        self.max_words = max_words
+
+    async def fold(self, summary: str, turns: list[str]) -> str:
+        prompt = f"Current summary:\n{summary or '(empty)'}\n\nNew turns:\n" + "\n\n".join(turns)
+        request = LlmRequest(
+            model=self.llm.model,
+            contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
+            config=types.GenerateContentConfig(
+                system_instruction=self.INSTRUCTION.format(max_words=self.max_words), temperature=0
+            ),
+        )
+        text = ""
+        async for response in self.llm.generate_content_async(request):
+            if response.content and response.content.parts:
+                text += "".join(p.text for p in response.content.parts if p.text)
+        return text.strip() or summary
+
+
+@dataclass
+class _RollingSummary:
+    text: str
+    last_turn: str  # hash of the newest folded turn
+
+
+class ContextWindowTool(BaseTool):
+    """Keeps recent turns verbatim, folds older ones into a cached summary.
+
+    Args:
+        keep_turns: Previous turns sent verbatim (the current turn always is).
+        max_tokens: Ceiling on the estimated tokens of contents, summary and
+                    system instruction per request.
+        summarizer: Folds old turns into the summary; defaults to the local
+                    ExtractiveSummarizer.
+        pinned_tools: Tools whose calls and responses are kept verbatim even
+                      when their turn is summarized.
+        max_sessions: Sessions whose summary is cached (least recently used
+                      are evicted and rebuilt on demand).
+    """
+
+    def __init__(
+        self,
+        keep_turns: int = 4,
+        max_tokens: int = 8000,
+        summarizer: HistorySummarizer | None = None,
+        pinned_tools: tuple[str, ...] = (),
+        max_sessions: int = 1024,
+    ):
+        # Name and description are not used because this tool only
+        # changes llm_request.
+        super().__init__(name="context_window", description="context_window")
+        self.keep_turns = keep_turns
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer or ExtractiveSummarizer()
+        self.pinned_tools = set(pinned_tools)
+        self.max_sessions = max_sessions
+        self._summaries: OrderedDict[str, _RollingSummary] = OrderedDict()
+        self.last_report: ContextReport | None = None
+
+    def _is_pinned(self, content: types.Content) -> bool:
+        for part in content.parts or []:
+            call = part.function_call or part.function_response
+            if call and call.name in self.pinned_tools:
+                return True
+        return False
+
+    def _pinned(self, turn: Turn) -> list[types.Content]:
+        """Pinned contents of a folded turn, after its user message (a function
+        call has to follow a user turn)."""
+        pins = [c for c in turn if self._is_pinned(c)]
+        return [turn[0], *pins] if pins and turn[0] is not pins[0] else pins
+
+    async def _summarize(self, key: str, history: list[Turn], cut: int) -> tuple[str, int, int]:
+        """Summary covering at least history[:cut]; returns (text, turns covered, turns folded now)."""
+        cached = self._summaries.get(key)
+        hashes = [_turn_hash(turn) for turn in history]
+        start, text = 0, ""
+        if cached is not None and cached.last_turn in hashes:
+            start = len(hashes) - hashes[::-1].index(cached.last_turn)
+            text = cached.text
+        cut = max(cut, start)  # a folded turn never goes back to verbatim
+        if cut > start:
+            text = await self.summarizer.fold(text, [turn_transcript(t) for t in history[start:cut]])
+        if cut:
+            self._summaries[key] = _RollingSummary(text, hashes[cut - 1])
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.max_sessions:
+                self._summaries.popitem(last=False)
+        return text, cut, cut - start
+
+    @staticmethod
+    def _summary_block(text: str) -> str:
+        return f"""Summary of the earlier part of this conversation (older turns are not shown):
+<CONVERSATION_SUMMARY>
+{text}
+</CONVERSATION_SUMMARY>"""
+
+    async def process_llm_request(self, *, tool_context: ToolContext, llm_request: LlmRequest) -> None:
+        turns = split_turns(llm_request.contents)
+        if len(turns) <= 1:
+            return
+        history, current = turns[:-1], turns[-1]
+        instruction = llm_request.config.system_instruction
+        fixed = estimate_tokens(instruction if isinstance(instruction, str) else "")
+        before = fixed + sum(content_tokens(c) for c in llm_request.contents)
+        if len(history) <= self.keep_turns and before <= self.max_tokens:
+            return
+
+        key = f"{tool_context.session.app_name}/{tool_context.user_id}/{tool_context.session.id}"
+        cached = self._summaries.get(key)
+        reserve = estimate_tokens(self._summary_block(cached.text)) if cached else 0
+        turn_tokens = [sum(content_tokens(c) for c in turn) for turn in history]
+        pinned_tokens = [sum(content_tokens(c) for c in self._pinned(turn)) for turn in history]
+        used = fixed + sum(content_tokens(c) for c in current)
+        cut = max(0, len(history) - self.keep_turns)
+        # Fold more turns until the verbatim part leaves room for the summary.
+        while cut < len(history) and used + sum(pinned_tokens[:cut]) + sum(turn_tokens[cut:]) + reserve > self.max_tokens:
+            cut += 1
+
+        summary, cut, folded_now = await self._summarize(key, history, cut)
+        pinned = [c for turn in history[:cut] for c in self._pinned(turn)]
+        recent = [c for turn in history[cut:] for c in turn]
+        used += sum(content_tokens(c) for c in pinned + recent)
+        room = self.max_tokens - used
+        while summary and estimate_tokens(self._summary_block(summary)) > room:
+            # Keep the newest part of the summary that still fits.
+            keep_chars = int(len(summary) * 0.8) - 1
+            summary = "…" + summary[-keep_chars:] if keep_chars > 40 else ""
+
+        llm_request.contents = pinned + recent + current
+        if summary:
+            llm_request.append_instructions([self._summary_block(summary)])
+
+        after = fixed + sum(content_tokens(c) for c in llm_request.contents)
+        after += estimate_tokens(self._summary_block(summary)) if summary else 0
+        report = ContextReport(
+            turns=len(turns),
+            verbatim_turns=len(history) - cut + 1,
+            summarized_turns=cut,
+            folded_now=folded_now,
+            pinned_contents=len(pinned),
+            tokens_before=before,
+            tokens_after=after,
+            max_tokens=self.max_tokens,
+        )
+        self.last_report = report
+        tool_context.state[REPORT_STATE_KEY] = asdict(report)
+        logger.debug(
+            f"🪟 Context: {report.verbatim_turns}/{report.turns} turns verbatim, {cut} summarized"
+            f" ({folded_now} folded now), {before} → {after} tokens."
+        )
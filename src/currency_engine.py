@@ -0,0 +1,167 @@
+'''
+Currency Engine
+
+get_exchange_rate() used to rebuild a nested dict on every call, only knew
+USD as a base and answered one pair per call, so a portfolio question cost
+one model round trip per pair. CurrencyEngine keeps the rates ready:
+
+    Source  → any RateSource (base currency + units per 1 base); the
+              StaticRateSource below holds the demo rates
+    Matrix  → cross[i, j] = units of j per 1 unit of i, triangulated through
+              the base and rebuilt only when the source's TTL expires
+    Batch   → rates(), fees() and quote() look up whole arrays at once with
+              NumPy fancy indexing
+
+Usage:
+    engine = CurrencyEngine(StaticRateSource(), ttl_seconds=3600)
+    engine.quote([500, 1250], ["USD", "USD"], ["EUR", "INR"], ["platinum credit card", "bank transfer"])
+'''
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+# Units of each currency per 1 USD.
+DEFAULT_RATES = {"EUR": 0.93, "JPY": 157.50, "INR": 83.58, "IDR": 16250.0, "VND": 25400.0}
+
+# Transaction fee (fraction of the amount) per payment method.
+DEFAULT_FEES = {
+    "platinum credit card": 0.02,  # 2%
+    "gold debit card": 0.035,  # 3.5%
+    "bank transfer": 0.01,  # 1%
+}
+
+
+class RateSource(Protocol):
+    def fetch(self) -> tuple[str, dict[str, float]]:
+        """Returns (base currency, units of each currency per 1 base)."""
+        ...
+
+
+@dataclass
+class StaticRateSource:
+    """Fixed rates, e.g. the demo table or a test fixture."""
+
+    base: str = "USD"
+    rates: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_RATES))
+
+    def fetch(self) -> tuple[str, dict[str, float]]:
+        return self.base, self.rates
+
+
+@dataclass
+class JsonFileRateSource:
+    """Rates from a JSON file {"base": "USD", "rates": {"EUR": 0.93, ...}},
+    re-read on every refresh so an external job can keep it current."""
+
+    path: str | Path
+
+    def fetch(self) -> tuple[str, dict[str, float]]:
+        data = json.loads(Path(self.path).read_text())
+        return data["base"], data["rates"]
+
+
+class CurrencyEngine:
+    """Cross-rate matrix and fee table with vectorized lookups.
+
+    Args:
+        source: Where the rates come from.
+        ttl_seconds: Age after which the next lookup refreshes the rates.
+        fees: Fee fraction per payment method (matched case-insensitively).
+    """
+
+    def __init__(
+        self,
+        source: RateSource | None = None,
+        ttl_seconds: float = 3600,
+        fees: dict[str, float] | None = None,
+    ):
+        self.source = source or StaticRateSource()
+        self.ttl_seconds = ttl_seconds
+        self.fee_methods = [m.lower() for m in (fees or DEFAULT_FEES)]
+        self.fee_index = {m: i for i, m in enumerate(self.fee_methods)}
+        self.fee_table = np.array(list((fees or DEFAULT_FEES).values()), dtype=np.float64)
+        self._lock = threading.Lock()
+        self._loaded_at = -float("inf")
+        self.codes: list[str] = []
+        self.index: dict[str, int] = {}
+        self.cross = np.empty((0, 0))
+
+    def refresh(self):
+        """Rebuilds the cross-rate matrix from the source."""
+        base, rates = self.source.fetch()
+        per_base = {code.upper(): float(rate) for code, rate in rates.items()}
+        per_base[base.upper()] = 1.0
+        codes = sorted(per_base)
+        vector = np.array([per_base[c] for c in codes], dtype=np.float64)
+        self.cross = vector[np.newaxis, :] / vector[:, np.newaxis]
+        self.codes = codes
+        self.index = {c: i for i, c in enumerate(codes)}
+        self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if time.monotonic() - self._loaded_at >= self.ttl_seconds:
+            with self._lock:
+                if time.monotonic() - self._loaded_at >= self.ttl_seconds:
+                    self.refresh()
+
+    def _lookup(self, codes: list[str]) -> np.ndarray:
+        return np.array([self.index.get(c.strip().upper(), -1) for c in codes], dtype=np.int64)
+
+    def rates(self, bases: list[str], targets: list[str]) -> np.ndarray:
+        """Units of targets[k] per 1 bases[k]; NaN for unknown currencies."""
+        self._ensure_fresh()
+        i, j = self._lookup(bases), self._lookup(targets)
+        valid = (i >= 0) & (j >= 0)
+        out = np.full(len(i), np.nan)
+        out[valid] = self.cross[i[valid], j[valid]]
+        return out
+
+    def rate(self, base: str, target: str) -> float | None:
+        value = self.rates([base], [target])[0]
+        return None if np.isnan(value) else float(value)
+
+    def fees(self, methods: list[str]) -> np.ndarray:
+        """Fee fraction per payment method; NaN for unknown methods."""
+        idx = np.array([self.fee_index.get(m.strip().lower(), -1) for m in methods], dtype=np.int64)
+        out = np.full(len(idx), np.nan)
+        out[idx >= 0] = self.fee_table[idx[idx >= 0]]
+        return out
+
+    def fee(self, method: str) -> float | None:
+        value = self.fees([method])[0]
+        return None if np.isnan(value) else float(value)
+
+    def quote(
+        self, amounts: list[float], bases: list[str], targets: list[str], methods: list[str]
+    ) -> dict[str, np.ndarray]:
+        """Fee, amount after fee, rate and converted amount for each row."""
+        amount = np.asarray(amounts, dtype=np.float64)
+        fee_rate = self.fees(methods)
+        rate = self.rates(bases, targets)
+        fee_amount = amount * fee_rate
+        after_fee = amount - fee_amount
+        return {
+            "amount": amount,
+            "fee_percentage": fee_rate,
+            "fee_amount": fee_amount,
+            "amount_after_fee": after_fee,
+            "rate": rate,
+            "converted_amount": after_fee * rate,
+        }
+
+
+_default_engine: CurrencyEngine | None = None
+
+
+def default_currency_engine() -> CurrencyEngine:
+    """The engine used by the currency tools in custom_tool.py."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = CurrencyEngine()
+    return _default_engine
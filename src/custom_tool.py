@@ -1,39 +1,18 @@
-from dotenv import load_dotenv
-import os   
+import asyncio
 
 from google.adk.agents import LlmAgent
 from google.adk.runners import InMemoryRunner
-from google.adk.sessions import InMemorySessionService
-from google.adk.tools import google_search, AgentTool, ToolContext
-from google.adk.code_executors import BuiltInCodeExecutor
-
-from google.adk.agents import Agent, SequentialAgent, ParallelAgent, LoopAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.runners import InMemoryRunner
-from google.adk.tools import AgentTool, FunctionTool, google_search
+from google.adk.tools import AgentTool
+from google.adk.code_executors import BaseCodeExecutor, BuiltInCodeExecutor
 from google.genai import types
 
+import numpy as np
 from loguru import logger
 
-load_dotenv()
-try:
-    gemini_api_key = os.getenv("gemini_api_key")
-    attempts = int(os.getenv("attempts", 5))
-    exp_base = int(os.getenv("exp_base", 7))
-    initial_delay = int(os.getenv("initial_delay", 1))
-    http_status_codes = eval(os.getenv("http_status_codes", "[429, 500, 503, 504]"))
- 
-
-    retry_config = types.HttpRetryOptions(
-        attempts=attempts,
-        exp_base=exp_base,
-        initial_delay=initial_delay,
-        http_status_codes=http_status_codes
-    )
-    logger.success("Environment variables loaded and retry configuration set successfully.")
-except Exception as e:
-    logger.error(f"Error loading environment variables: {e} or setting up retry configuration.")
-    raise ConnectionError("Failed to load environment variables or set up retry configuration.")
+from calculator import CalculationError, calculate as evaluate_expression
+from config import get_settings
+from currency_engine import default_currency_engine
+from model_registry import get_model
 
 '''
 🤔 2.2: How to define a Tool?¶
@@ -78,6 +57,18 @@ def show_python_code_and_result(response):
                     print("Generated Python Response >> ", response_code["result"])
 
 
+def show_calculation_breakdown(response):
+    """Prints the steps of local calculate / calculate_conversion calls (calculator.py)."""
+    for event in response:
+        for part in (event.content.parts if event.content else None) or []:
+            result = part.function_response.response if part.function_response else None
+            if result and "steps" in result:
+                print(f"Local calculation ({part.function_response.name}) >> ")
+                for step in result["steps"]:
+                    print(f"    {step}")
+                logger.success("✅ Calculation breakdown displayed.")
+
+
 
 
 # Pay attention to the docstring, type hints, and return value.
@@ -96,14 +87,8 @@ def get_fee_for_payment_method(method: str) -> dict:
         Success: {"status": "success", "fee_percentage": 0.02}
         Error: {"status": "error", "error_message": "Payment method not found"}
     """
-    # This simulates looking up a company's internal fee structure.
-    fee_database = {
-        "platinum credit card": 0.02,  # 2%
-        "gold debit card": 0.035,  # 3.5%
-        "bank transfer": 0.01,  # 1%
-    }
-
-    fee = fee_database.get(method.lower())
+    # Fees come from the currency engine's precomputed table (currency_engine.py).
+    fee = default_currency_engine().fee(method)
     if fee is not None:
         return {"status": "success", "fee_percentage": fee}
     else:
@@ -113,10 +98,6 @@ def get_fee_for_payment_method(method: str) -> dict:
         }
 
 
-logger.info("✅ Fee lookup function created")
-logger.info(f"💳 Test: {get_fee_for_payment_method('platinum credit card')}")
-
-
 def get_exchange_rate(base_currency: str, target_currency: str) -> dict:
     """Looks up and returns the exchange rate between two currencies.
 
@@ -132,22 +113,11 @@ def get_exchange_rate(base_currency: str, target_currency: str) -> dict:
         Error: {"status": "error", "error_message": "Unsupported currency pair"}
     """
 
-    # Static data simulating a live exchange rate API
-    # In production, this would call something like: requests.get("api.exchangerates.com")
-    rate_database = {
-        "usd": {
-            "eur": 0.93,  # Euro
-            "jpy": 157.50,  # Japanese Yen
-            "inr": 83.58,  # Indian Rupee
-        }
-    }
-
-    # Input validation and processing
-    base = base_currency.lower()
-    target = target_currency.lower()
+    # Any pair is triangulated through the engine's cross-rate matrix (currency_engine.py).
+    # In production, plug a live RateSource into the engine; rates refresh after its TTL.
+    rate = default_currency_engine().rate(base_currency, target_currency)
 
     # Return structured result with status
-    rate = rate_database.get(base, {}).get(target)
     if rate is not None:
         return {"status": "success", "rate": rate}
     else:
@@ -157,40 +127,204 @@ def get_exchange_rate(base_currency: str, target_currency: str) -> dict:
         }
 
 
-logger.info("✅ Exchange rate function created")
-logger.info(f"💱 Test: {get_exchange_rate('USD', 'EUR')}")
+def _rows(values: dict, errors: list[str | None]) -> list[dict]:
+    names = list(values)
+    columns = zip(*(np.round(values[name], 6).tolist() for name in names))
+    return [
+        {"status": "error", "error_message": error} if error
+        else {"status": "success", **dict(zip(names, row))}
+        for error, row in zip(errors, columns)
+    ]
+
+
+def get_exchange_rates(base_currencies: list[str], target_currencies: list[str]) -> dict:
+    """Looks up many exchange rates in one call.
+
+    Args:
+        base_currencies: ISO 4217 codes to convert from, e.g. ["USD", "EUR"].
+        target_currencies: ISO 4217 codes to convert to, same length, e.g. ["INR", "JPY"].
+
+    Returns:
+        Dictionary with status and one result per pair, in order.
+        Success: {"status": "success", "results": [{"status": "success", "rate": 89.87}, ...]}
+        Error: {"status": "error", "error_message": "..."}
+    """
+    if len(base_currencies) != len(target_currencies):
+        return {"status": "error", "error_message": "base_currencies and target_currencies differ in length"}
+    rates = default_currency_engine().rates(base_currencies, target_currencies)
+    errors = [
+        f"Unsupported currency pair: {b}/{t}" if missing else None
+        for b, t, missing in zip(base_currencies, target_currencies, np.isnan(rates).tolist())
+    ]
+    return {"status": "success", "results": _rows({"rate": rates}, errors)}
+
+
+def get_fees_for_payment_methods(methods: list[str]) -> dict:
+    """Looks up the transaction fee percentage of many payment methods in one call.
+
+    Args:
+        methods: Payment method names, e.g. ["platinum credit card", "bank transfer"].
+
+    Returns:
+        Dictionary with status and one result per method, in order.
+        Success: {"status": "success", "results": [{"status": "success", "fee_percentage": 0.02}, ...]}
+    """
+    fees = default_currency_engine().fees(methods)
+    errors = [
+        f"Payment method '{m}' not found" if missing else None
+        for m, missing in zip(methods, np.isnan(fees).tolist())
+    ]
+    return {"status": "success", "results": _rows({"fee_percentage": fees}, errors)}
+
+
+def quote_conversions(
+    amounts: list[float],
+    base_currencies: list[str],
+    target_currencies: list[str],
+    payment_methods: list[str],
+) -> dict:
+    """Quotes many fee-and-rate conversions in one call (e.g. a whole portfolio).
+
+    All lists must have the same length; row k converts amounts[k] from
+    base_currencies[k] to target_currencies[k] paid with payment_methods[k].
+
+    Args:
+        amounts: Amounts to convert, in their base currency, e.g. [500, 1250].
+        base_currencies: ISO 4217 codes the amounts are in, e.g. ["USD", "EUR"].
+        target_currencies: ISO 4217 codes to convert into, e.g. ["EUR", "INR"].
+        payment_methods: Payment method of each row, e.g. ["platinum credit card", "bank transfer"].
+
+    Returns:
+        Dictionary with status and one breakdown per row, in order.
+        Success: {"status": "success", "results": [{"status": "success", "amount": 500.0,
+                  "fee_percentage": 0.02, "fee_amount": 10.0, "amount_after_fee": 490.0,
+                  "rate": 0.93, "converted_amount": 455.7}, ...]}
+        Error: {"status": "error", "error_message": "..."}
+    """
+    lengths = {len(amounts), len(base_currencies), len(target_currencies), len(payment_methods)}
+    if len(lengths) != 1:
+        return {"status": "error", "error_message": "All argument lists must have the same length"}
+    quote = default_currency_engine().quote(amounts, base_currencies, target_currencies, payment_methods)
+    errors = [
+        f"Payment method '{m}' not found" if no_fee
+        else f"Unsupported currency pair: {b}/{t}" if no_rate
+        else None
+        for m, b, t, no_fee, no_rate in zip(
+            payment_methods,
+            base_currencies,
+            target_currencies,
+            np.isnan(quote["fee_percentage"]).tolist(),
+            np.isnan(quote["rate"]).tolist(),
+        )
+    ]
+    return {"status": "success", "results": _rows(quote, errors)}
+
+
+def calculate(expression: str) -> dict:
+    """Evaluates an arithmetic expression locally with exact decimal arithmetic.
+
+    Supports + - * / // % ** and parentheses, percentages ("2%", "2% of 1250"),
+    thousands separators ("1,250") and currency units ("1250 USD * 83.58 INR/USD").
+
+    Args:
+        expression: The expression to evaluate, e.g. "(500 USD - 2% of 500 USD) * 0.93 EUR/USD".
+
+    Returns:
+        Dictionary with status, the exact and rounded result, its unit and every step.
+        Success: {"status": "success", "result": "455.7000", "rounded": "455.70", "unit": "EUR",
+                  "steps": ["0.02 × 500 USD = 10.00 USD", ...]}
+        Error: {"status": "error", "error_message": "Cannot combine USD with EUR"}
+    """
+    try:
+        return evaluate_expression(expression).as_dict()
+    except CalculationError as e:
+        return {"status": "error", "error_message": str(e)}
+
+
+def calculate_conversion(
+    amount: float, base_currency: str, target_currency: str, payment_method: str
+) -> dict:
+    """Converts an amount after deducting the payment method's fee, in one call.
+
+    Looks up the fee and the exchange rate and does the arithmetic locally.
+
+    Args:
+        amount: The amount to convert, in base_currency.
+        base_currency: ISO 4217 code to convert from, e.g. "USD".
+        target_currency: ISO 4217 code to convert to, e.g. "INR".
+        payment_method: e.g. "bank transfer".
+
+    Returns:
+        Dictionary with status and the full breakdown.
+        Success: {"status": "success", "fee_percentage": 0.01, "fee_amount": "12.50 USD",
+                  "amount_after_fee": "1237.50 USD", "rate": 83.58, "converted_amount": "103430.25 INR",
+                  "steps": [...]}
+        Error: {"status": "error", "error_message": "..."}
+    """
+    fee = get_fee_for_payment_method(payment_method)
+    if fee["status"] == "error":
+        return fee
+    rate = get_exchange_rate(base_currency, target_currency)
+    if rate["status"] == "error":
+        return rate
+    base, target = base_currency.strip().upper(), target_currency.strip().upper()
+    try:
+        fee_amount = evaluate_expression(f"{amount} {base} * {fee['fee_percentage']}")
+        after_fee = evaluate_expression(f"{amount} {base} - {fee_amount.result.value} {base}")
+        converted = evaluate_expression(f"{after_fee.result.value} {base} * {rate['rate']} {target}/{base}")
+    except CalculationError as e:
+        return {"status": "error", "error_message": str(e)}
+    return {
+        "status": "success",
+        "fee_percentage": fee["fee_percentage"],
+        "fee_amount": f"{fee_amount.as_dict()['rounded']} {base}",
+        "amount_after_fee": f"{after_fee.as_dict()['rounded']} {base}",
+        "rate": rate["rate"],
+        "converted_amount": f"{converted.as_dict()['rounded']} {target}",
+        "steps": fee_amount.steps + after_fee.steps + converted.steps,
+    }
+
 
 # Currency agent with custom function tools
-currency_agent = LlmAgent(
-    name="currency_agent",
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
-    instruction="""You are a smart currency conversion assistant.
-
-    For currency conversion requests:
-    1. Use `get_fee_for_payment_method()` to find transaction fees
-    2. Use `get_exchange_rate()` to get currency conversion rates
-    3. Check the "status" field in each tool's response for errors
-    4. Calculate the final amount after fees based on the output from `get_fee_for_payment_method` and `get_exchange_rate` methods and provide a clear breakdown.
-    5. First, state the final converted amount.
-        Then, explain how you got that result by showing the intermediate amounts. Your explanation must include: the fee percentage and its
-        value in the original currency, the amount remaining after the fee, and the exchange rate used for the final conversion.
-
-    If any tool returns status "error", explain the issue to the user clearly.
-    """,
-    tools=[get_fee_for_payment_method, get_exchange_rate],
-)
-
-logger.info("✅ Currency agent created with custom function tools")
-logger.info("🔧 Available tools:")
-logger.info("  • get_fee_for_payment_method - Looks up company fee structure")
-logger.info("  • get_exchange_rate - Gets current exchange rates")
-
-
-# Test the currency agent
-currency_runner = InMemoryRunner(agent=currency_agent)
-_ = await currency_runner.run_debug(
-    "I want to convert 500 US Dollars to Euros using my Platinum Credit Card. How much will I receive?"
-)
+def build_currency_agent() -> LlmAgent:
+    currency_agent = LlmAgent(
+        name="currency_agent",
+        model=get_model("gemini-2.5-flash-lite", get_settings().retry_config),
+        # temperature 0: the same question gets the same answer, so CachedLlm may replay it
+        generate_content_config=types.GenerateContentConfig(temperature=0),
+        instruction="""You are a smart currency conversion assistant.
+
+        For currency conversion requests:
+        1. Use `get_fee_for_payment_method()` to find transaction fees
+        2. Use `get_exchange_rate()` to get currency conversion rates
+        3. Check the "status" field in each tool's response for errors
+        4. Calculate the final amount after fees based on the output from `get_fee_for_payment_method` and `get_exchange_rate` methods and provide a clear breakdown.
+        5. First, state the final converted amount.
+            Then, explain how you got that result by showing the intermediate amounts. Your explanation must include: the fee percentage and its
+            value in the original currency, the amount remaining after the fee, and the exchange rate used for the final conversion.
+
+        If any tool returns status "error", explain the issue to the user clearly.
+
+        When the request involves several amounts, currency pairs or payment methods, make ONE call to
+        `quote_conversions()` (or `get_exchange_rates()` / `get_fees_for_payment_methods()`) with all of them
+        instead of one call per item.
+        """,
+        tools=[
+            get_fee_for_payment_method,
+            get_exchange_rate,
+            get_exchange_rates,  # Batch variants: one tool call for a whole portfolio
+            get_fees_for_payment_methods,
+            quote_conversions,
+        ],
+    )
+
+    logger.info("✅ Currency agent created with custom function tools")
+    logger.info("🔧 Available tools:")
+    logger.info("  • get_fee_for_payment_method - Looks up company fee structure")
+    logger.info("  • get_exchange_rate - Gets current exchange rates")
+    logger.info("  • quote_conversions - Quotes many conversions in one call")
+    return currency_agent
+
 
 '''
 
@@ -201,70 +335,129 @@ ADK has a built-in Code Executor capable of running code in a sandbox. Note: Thi
 Let's create a calculation_agent which takes in a Python code and uses the BuiltInCodeExecutor to run it.
 '''
 
-calculation_agent = LlmAgent(
-    name="CalculationAgent",
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
-    instruction="""You are a specialized calculator that ONLY responds with Python code. You are forbidden from providing any text, explanations, or conversational responses.
+def build_calculation_agent(code_executor: BaseCodeExecutor | None = None) -> LlmAgent:
+    """code_executor defaults to BuiltInCodeExecutor (runs on Gemini's side)."""
+    calculation_agent = LlmAgent(
+        name="CalculationAgent",
+        model=get_model("gemini-2.5-flash-lite", get_settings().retry_config),
+        instruction="""You are a specialized calculator that ONLY responds with Python code. You are forbidden from providing any text, explanations, or conversational responses.
  
-     Your task is to take a request for a calculation and translate it into a single block of Python code that calculates the answer.
+         Your task is to take a request for a calculation and translate it into a single block of Python code that calculates the answer.
      
-     **RULES:**
-    1.  Your output MUST be ONLY a Python code block.
-    2.  Do NOT write any text before or after the code block.
-    3.  The Python code MUST calculate the result.
-    4.  The Python code MUST print the final result to stdout.
-    5.  You are PROHIBITED from performing the calculation yourself. Your only job is to generate the code that will perform the calculation.
+         **RULES:**
+        1.  Your output MUST be ONLY a Python code block.
+        2.  Do NOT write any text before or after the code block.
+        3.  The Python code MUST calculate the result.
+        4.  The Python code MUST print the final result to stdout.
+        5.  You are PROHIBITED from performing the calculation yourself. Your only job is to generate the code that will perform the calculation.
    
-    Failure to follow these rules will result in an error.
-       """,
-    code_executor=BuiltInCodeExecutor(),  # Use the built-in Code Executor Tool. This gives the agent code execution capabilities
-)
+        Failure to follow these rules will result in an error.
+           """,
+        code_executor=code_executor or BuiltInCodeExecutor(),  # Use the built-in Code Executor Tool. This gives the agent code execution capabilities
+    )
+    return calculation_agent
+
+
+def build_local_calculation_agent() -> LlmAgent:
+    """calculation_agent whose code runs in a warm local process pool.
 
-enhanced_currency_agent = LlmAgent(
-    name="enhanced_currency_agent",
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
-    # Updated instruction
-    instruction="""You are a smart currency conversion assistant. You must strictly follow these steps and use the available tools.
+    The pool is given as the async run_python tool rather than as
+    code_executor: ADK runs code executors synchronously on the event loop,
+    which would serialize the code of concurrent requests.
+    """
+    from local_code_executor import LocalProcessCodeExecutor
+
+    return LlmAgent(
+        name="CalculationAgent",
+        model=get_model("gemini-2.5-flash-lite", get_settings().retry_config),
+        instruction="""You are a specialized calculator. You never calculate anything yourself.
+
+         Translate the request into a single block of Python code that prints the final result, call
+         run_python() once with that code and answer with the printed result. If the status is "error",
+         report the stderr to the user.
+           """,
+        tools=[LocalProcessCodeExecutor().as_tool()],
+    )
 
-  For any currency conversion request:
 
-   1. Get Transaction Fee: Use the get_fee_for_payment_method() tool to determine the transaction fee.
-   2. Get Exchange Rate: Use the get_exchange_rate() tool to get the currency conversion rate.
-   3. Error Check: After each tool call, you must check the "status" field in the response. If the status is "error", you must stop and clearly explain the issue to the user.
-   4. Calculate Final Amount (CRITICAL): You are strictly prohibited from performing any arithmetic calculations yourself. You must use the calculation_agent tool to generate Python code that calculates the final converted amount. This 
-      code will use the fee information from step 1 and the exchange rate from step 2.
-   5. Provide Detailed Breakdown: In your summary, you must:
-       * State the final converted amount.
-       * Explain how the result was calculated, including:
-           * The fee percentage and the fee amount in the original currency.
-           * The amount remaining after deducting the fee.
-           * The exchange rate applied.
-    """,
-    tools=[
-        get_fee_for_payment_method,
-        get_exchange_rate,
-        AgentTool(agent=calculation_agent),  # Using another agent as a tool!
-    ],
-)
+def build_enhanced_currency_agent(local_math: bool = True) -> LlmAgent:
+    """Currency agent that never does arithmetic itself.
 
-logger.info("✅ Enhanced currency agent created")
-logger.info("🎯 New capability: Delegates calculations to specialist agent")
-logger.info("🔧 Tool types used:")
-logger.info("  • Function Tools (fees, rates)")
-logger.info("  • Agent Tool (calculation specialist)")
+    With local_math (default) the arithmetic runs in-process (calculator.py):
+    calculate_conversion answers a fee-and-rate conversion in one tool call.
+    With local_math=False calculations go to calculation_agent (AgentTool +
+    BuiltInCodeExecutor), as in the original tutorial.
+    """
+    if local_math:
+        calculation_step = """4. Calculate Final Amount (CRITICAL): You are strictly prohibited from performing any arithmetic calculations yourself.
+          For a conversion, call calculate_conversion() once: it looks up the fee and the rate and returns the exact
+          breakdown, so steps 1-2 are not needed. For any other arithmetic use the calculate() tool with one expression,
+          e.g. "(1250 USD - 1% of 1250 USD) * 83.58 INR/USD"."""
+        tools = [get_fee_for_payment_method, get_exchange_rate, calculate_conversion, calculate]
+    else:
+        calculation_step = """4. Calculate Final Amount (CRITICAL): You are strictly prohibited from performing any arithmetic calculations yourself. You must use the calculation_agent tool to generate Python code that calculates the final converted amount. This 
+          code will use the fee information from step 1 and the exchange rate from step 2."""
+        tools = [
+            get_fee_for_payment_method,
+            get_exchange_rate,
+            AgentTool(agent=build_calculation_agent()),  # Using another agent as a tool!
+        ]
+
+    enhanced_currency_agent = LlmAgent(
+        name="enhanced_currency_agent",
+        model=get_model("gemini-2.5-flash-lite", get_settings().retry_config),
+        # temperature 0: the same question gets the same answer, so CachedLlm may replay it
+        generate_content_config=types.GenerateContentConfig(temperature=0),
+        # Updated instruction
+        instruction=f"""You are a smart currency conversion assistant. You must strictly follow these steps and use the available tools.
+
+      For any currency conversion request:
+
+       1. Get Transaction Fee: Use the get_fee_for_payment_method() tool to determine the transaction fee.
+       2. Get Exchange Rate: Use the get_exchange_rate() tool to get the currency conversion rate.
+       3. Error Check: After each tool call, you must check the "status" field in the response. If the status is "error", you must stop and clearly explain the issue to the user.
+       {calculation_step}
+       5. Provide Detailed Breakdown: In your summary, you must:
+           * State the final converted amount.
+           * Explain how the result was calculated, including:
+               * The fee percentage and the fee amount in the original currency.
+               * The amount remaining after deducting the fee.
+               * The exchange rate applied.
+        """,
+        tools=tools,
+    )
 
+    logger.info("✅ Enhanced currency agent created")
+    logger.info("🔧 Tool types used:")
+    logger.info("  • Function Tools (fees, rates)")
+    if local_math:
+        logger.info("🎯 New capability: Exact local arithmetic (calculate, calculate_conversion)")
+    else:
+        logger.info("🎯 New capability: Delegates calculations to specialist agent")
+        logger.info("  • Agent Tool (calculation specialist)")
+    return enhanced_currency_agent
 
-# Define a runner
-enhanced_runner = InMemoryRunner(agent=enhanced_currency_agent)
 
+async def main():
+    logger.info(f"💳 Test: {get_fee_for_payment_method('platinum credit card')}")
+    logger.info(f"💱 Test: {get_exchange_rate('USD', 'EUR')}")
 
+    # Test the currency agent
+    currency_runner = InMemoryRunner(agent=build_currency_agent())
+    _ = await currency_runner.run_debug(
+        "I want to convert 500 US Dollars to Euros using my Platinum Credit Card. How much will I receive?"
+    )
 
-# Test the enhanced agent
-response = await enhanced_runner.run_debug(
-    "Convert 1,250 USD to INR using a Bank Transfer. Show me the precise calculation."
-)
+    # Define a runner
+    enhanced_runner = InMemoryRunner(agent=build_enhanced_currency_agent())
 
+    # Test the enhanced agent
+    response = await enhanced_runner.run_debug(
+        "Convert 1,250 USD to INR using a Bank Transfer. Show me the precise calculation."
+    )
 
+    show_calculation_breakdown(response)  # show_python_code_and_result(...) with local_math=False
 
-show_python_code_and_result(response)
 
+if __name__ == "__main__":
+    asyncio.run(main())
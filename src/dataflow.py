@@ -0,0 +1,245 @@
+'''
+Dataflow Scheduler
+
+The agents already say what they read and write: `output_key` is the state
+key an agent writes, `{placeholder}` in its instruction a key it reads
+(blog_outline → WriterAgent → blog_draft → EditorAgent). The pipelines in
+multiagent.py still spell the order out with SequentialAgent, so a step
+that only needs the user's topic waits for everything listed before it.
+DataflowAgent derives the order from the keys instead:
+
+    Graph    → an edge from the agent writing a key to every agent reading
+               it; `{key?}` adds the edge only if some agent writes key,
+               and prefixed keys (user:, app:, temp:) are external state
+    Checks   → at construction: a key read but written by no agent (and not
+               in initial_keys), a key written by two agents, and cycles
+               raise DataflowError, before any model is called
+    Schedule → every agent whose inputs are written starts, at most
+               max_concurrency at a time; when slots are short the agent
+               with the longest chain of dependants goes first
+    Events   → as ParallelAgent: each agent runs on its own branch, and
+               waits until the runner has stored its event (and state
+               delta) before going on, so dependants always see the value
+
+Custom agents that do not use output_key / instructions declare their keys
+with `input_keys` / `output_keys` attributes (research_fanout.py).
+Wall-clock time becomes the longest chain, not the sum of every agent.
+'''
+
+import asyncio
+import re
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from loguru import logger
+from pydantic import Field
+
+_PLACEHOLDER_RE = re.compile(r"{+[^{}]*}+")  # as google.adk's inject_session_state
+
+
+class DataflowError(Exception):
+    """The agents' keys do not form a runnable graph (not a ValueError, which pydantic would wrap)."""
+
+    def __init__(self, missing: dict[str, list[str]], duplicates: dict[str, list[str]], cycles: list[list[str]]):
+        problems = [f"{agent} reads {', '.join(keys)}, which no agent writes" for agent, keys in missing.items()]
+        problems += [f"{key} is written by {' and '.join(agents)}" for key, agents in duplicates.items()]
+        problems += [f"cycle {' → '.join(cycle)}" for cycle in cycles]
+        super().__init__("Invalid dataflow: " + "; ".join(problems) + ".")
+        self.missing = missing
+        self.duplicates = duplicates
+        self.cycles = cycles
+
+
+def instruction_keys(instruction: str) -> tuple[set[str], set[str]]:
+    """(required, optional) state keys of an instruction template."""
+    required, optional = set(), set()
+    for match in _PLACEHOLDER_RE.finditer(instruction):
+        name = match.group().lstrip("{").rstrip("}").strip()
+        is_optional = name.endswith("?")
+        name = name.removesuffix("?")
+        if not name.isidentifier():  # artifact.x, prefixed (user:x) and non-identifiers are not dataflow
+            continue
+        (optional if is_optional else required).add(name)
+    return required, optional
+
+
+def agent_keys(agent: BaseAgent) -> tuple[set[str], set[str], set[str]]:
+    """(required inputs, optional inputs, outputs) of an agent.
+
+    Explicit input_keys / output_keys win; composite agents (sub_agents) read
+    what their sub-agents read and do not write themselves.
+    """
+    outputs = set(getattr(agent, "output_keys", None) or ())
+    if key := getattr(agent, "output_key", None):
+        outputs.add(key)
+    if (declared := getattr(agent, "input_keys", None)) is not None:
+        return set(declared), set(), outputs
+    if isinstance(agent, LlmAgent):
+        if not isinstance(agent.instruction, str):
+            raise DataflowError({agent.name: ["<instruction provider: declare input_keys>"]}, {}, [])
+        required, optional = instruction_keys(agent.instruction)
+        return required, optional, outputs
+    required, optional = set(), set()
+    for sub_agent in agent.sub_agents:
+        sub_required, sub_optional, sub_outputs = agent_keys(sub_agent)
+        required |= sub_required
+        optional |= sub_optional
+        outputs |= sub_outputs
+    for stage in getattr(agent, "stages", []):  # StreamingPipeline
+        outputs.add(stage.output_key)
+    return required - outputs, optional - outputs, outputs
+
+
+def dependency_graph(agents: list[BaseAgent], initial_keys: set[str] = frozenset()) -> dict[str, set[str]]:
+    """Agent name → names of the agents it waits for.
+
+    Raises:
+        DataflowError: Missing inputs, keys written twice, or cycles.
+    """
+    keys = {agent.name: agent_keys(agent) for agent in agents}
+    writers: dict[str, list[str]] = {}
+    for name, (_, _, outputs) in keys.items():
+        for key in outputs:
+            writers.setdefault(key, []).append(name)
+    duplicates = {key: names for key, names in writers.items() if len(names) > 1}
+
+    graph, missing = {}, {}
+    for name, (required, optional, _) in keys.items():
+        if absent := sorted(required - writers.keys() - set(initial_keys)):
+            missing[name] = absent
+        graph[name] = {w for key in required | optional for w in writers.get(key, []) if w != name}
+    cycles = find_cycles(graph)
+    if missing or duplicates or cycles:
+        raise DataflowError(missing, duplicates, cycles)
+    return graph
+
+
+def find_cycles(graph: dict[str, set[str]]) -> list[list[str]]:
+    """One cycle (as a closed path) per strongly connected group, found by DFS."""
+    cycles, state = [], {}  # state: 1 = on the current path, 2 = done
+
+    def visit(node: str, path: list[str]):
+        state[node] = 1
+        path.append(node)
+        for dep in sorted(graph.get(node, ())):
+            if state.get(dep) == 1:
+                cycles.append([*path[path.index(dep) :], dep])
+            elif dep not in state:
+                visit(dep, path)
+        path.pop()
+        state[node] = 2
+
+    for node in sorted(graph):
+        if node not in state:
+            visit(node, [])
+    return cycles
+
+
+def chain_lengths(graph: dict[str, set[str]]) -> dict[str, int]:
+    """Agent name → agents on the longest chain starting there (itself included)."""
+    dependants: dict[str, set[str]] = {name: set() for name in graph}
+    for name, deps in graph.items():
+        for dep in deps:
+            dependants[dep].add(name)
+    lengths: dict[str, int] = {}
+
+    def length(name: str) -> int:
+        if name not in lengths:
+            lengths[name] = 1 + max((length(d) for d in dependants[name]), default=0)
+        return lengths[name]
+
+    for name in graph:
+        length(name)
+    return lengths
+
+
+def steps(graph: dict[str, set[str]]) -> list[list[str]]:
+    """Agents grouped by the earliest step they can run in (for logs and docs)."""
+    depth: dict[str, int] = {}
+
+    def level(name: str) -> int:
+        if name not in depth:
+            depth[name] = 1 + max((level(d) for d in graph[name]), default=-1)
+        return depth[name]
+
+    grouped: dict[int, list[str]] = {}
+    for name in graph:
+        grouped.setdefault(level(name), []).append(name)
+    return [grouped[i] for i in sorted(grouped)]
+
+
+class DataflowAgent(BaseAgent):
+    """Runs its sub-agents in the order their state keys require, independent ones concurrently.
+
+    Args:
+        sub_agents: The agents; their order does not matter.
+        max_concurrency: Most sub-agents running at the same time.
+        initial_keys: State keys present before the run (e.g. set by the
+                      caller), so reading them is not a missing input.
+    """
+
+    max_concurrency: int = 4
+    initial_keys: list[str] = Field(default_factory=list)
+
+    def model_post_init(self, context):
+        super().model_post_init(context)
+        graph = dependency_graph(self.sub_agents, set(self.initial_keys))  # raises DataflowError
+        plan = " | ".join(", ".join(step) for step in steps(graph))
+        logger.debug(f"🕸️ {self.name} dataflow: {plan}")
+
+    @property
+    def graph(self) -> dict[str, set[str]]:
+        return dependency_graph(self.sub_agents, set(self.initial_keys))
+
+    def _branch_ctx(self, agent: BaseAgent, ctx: InvocationContext) -> InvocationContext:
+        ctx = ctx.model_copy()
+        suffix = f"{self.name}.{agent.name}"
+        ctx.branch = f"{ctx.branch}.{suffix}" if ctx.branch else suffix
+        return ctx
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        graph = self.graph
+        priority = chain_lengths(graph)
+        agents = {agent.name: agent for agent in self.sub_agents}
+        waiting = {name: set(deps) for name, deps in graph.items()}
+        queue: asyncio.Queue = asyncio.Queue()
+        running: dict[str, asyncio.Task] = {}
+
+        async def run(agent: BaseAgent):
+            try:
+                async for event in agent.run_async(self._branch_ctx(agent, ctx)):
+                    stored = asyncio.Event()
+                    await queue.put((agent.name, event, stored))
+                    await stored.wait()  # the runner has appended the event (and its state delta)
+            except Exception as e:
+                await queue.put((agent.name, e, None))
+            else:
+                await queue.put((agent.name, None, None))
+
+        def start_ready():
+            ready = sorted((n for n, deps in waiting.items() if not deps), key=lambda n: -priority[n])
+            for name in ready[: self.max_concurrency - len(running)]:
+                del waiting[name]
+                running[name] = asyncio.create_task(run(agents[name]))
+
+        try:
+            start_ready()
+            while running:
+                name, item, stored = await queue.get()
+                if isinstance(item, Event):
+                    yield item
+                    stored.set()
+                    continue
+                running.pop(name)
+                if isinstance(item, Exception):
+                    raise item
+                for deps in waiting.values():
+                    deps.discard(name)
+                start_ready()
+        finally:
+            for task in running.values():
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.values(), return_exceptions=True)
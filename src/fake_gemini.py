@@ -0,0 +1,488 @@
+'''
+Fake Gemini Backend
+
+Every agent here needs a live API key, so nothing can be measured (or even
+run) offline, and the free tier's 15 requests per minute make repeatable
+numbers impossible anyway. FakeGemini is a localhost HTTP stand-in for the
+parts of the Gemini API the agents use; google.genai talks to it through
+GOOGLE_GEMINI_BASE_URL, so the whole model stack (ModelRegistry, CachedLlm,
+RateLimitedLlm, ContextCachedLlm, HTTP retries) runs unchanged:
+
+    Script   → ordered Rules matched on the system instruction, the latest
+               user text and the model; a rule makes its function calls one by one
+               (each until its response is in the turn) and then replies
+    Latency  → lognormal around a median, optional slow tail, plus prefill
+               time per prompt token and decode time per output token, per
+               model if needed; streamed replies arrive word by word over SSE
+    Faults   → 429 / 503 at given rates (429 with Retry-After), scripted
+               for the next requests with fail_next(), or an outage of a
+               few seconds with fail_for()
+    API      → generateContent, streamGenerateContent (SSE), cachedContents
+               create / update / delete, models list
+    Stats    → requests, faults, tokens and calls per rule
+
+Randomness comes from one seeded generator, so a script replays the same
+replies, latencies and faults for the same sequence of requests.
+
+Usage:
+    with FakeGemini([Rule(instruction="currency", calls=[("get_exchange_rate", {...})], reply="...")]) as fake:
+        fake.install_env()   # before the first model client is built
+        ...run agents...
+    print(fake.stats)
+'''
+
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+FILLER = (
+    "agents plan call tools and combine their results into a clear answer for the user while keeping "
+    "latency cost and reliability in balance across every step of the workflow"
+).split()
+
+
+def filler(words: int, paragraphs: int = 1) -> str:
+    """Deterministic placeholder text of about `words` words in blank-line separated paragraphs."""
+    per = max(1, words // max(1, paragraphs))
+    return "\n\n".join(
+        " ".join(FILLER[(p * per + i) % len(FILLER)] for i in range(per)).capitalize() + "."
+        for p in range(paragraphs)
+    )
+
+
+def _text(content: dict | None) -> str:
+    return " ".join(p.get("text", "") for p in (content or {}).get("parts", []) if p.get("text"))
+
+
+def _tokens(payload: Any) -> int:
+    return max(1, len(json.dumps(payload, ensure_ascii=False)) // 4)
+
+
+@dataclass
+class FakeRequest:
+    """What a Rule sees of a generateContent request."""
+
+    model: str
+    instruction: str
+    prompt: str  # text of the latest user message (function responses excluded)
+    contents: list[dict]
+    body: dict
+
+    def turn(self) -> list[dict]:
+        """Contents since the latest user message, i.e. the calls and responses of this turn."""
+        for i in range(len(self.contents) - 1, -1, -1):
+            content = self.contents[i]
+            parts = content.get("parts", [])
+            if content.get("role") == "user" and any(p.get("text") for p in parts) and not any(
+                "functionResponse" in p for p in parts
+            ):
+                return self.contents[i + 1 :]
+        return self.contents
+
+    def answered(self) -> set[str]:
+        return {p["functionResponse"]["name"] for c in self.turn() for p in c.get("parts", []) if "functionResponse" in p}
+
+
+Reply = str | Callable[[FakeRequest], str]
+Args = dict | Callable[[FakeRequest], dict]
+
+
+@dataclass
+class Rule:
+    """One scripted behaviour; the first rule whose conditions all match answers.
+
+    Args:
+        reply: Final text, or a function of the request returning it.
+        instruction: Substring the system instruction must contain.
+        prompt: Substring the latest user message must contain.
+        model: Model name the request must be for.
+        calls: (function name, args) made in this order before the reply;
+               args may be a function of the request.
+        name: Label used in stats (defaults to the instruction or prompt).
+    """
+
+    reply: Reply = "OK."
+    instruction: str | None = None
+    prompt: str | None = None
+    model: str | None = None
+    calls: list[tuple[str, Args]] = field(default_factory=list)
+    name: str | None = None
+
+    def matches(self, request: FakeRequest) -> bool:
+        return (
+            (self.instruction is None or self.instruction in request.instruction)
+            and (self.prompt is None or self.prompt in request.prompt)
+            and (self.model is None or self.model == request.model)
+        )
+
+    def respond(self, request: FakeRequest) -> dict:
+        """The next part: a pending function call, or the reply text."""
+        answered = request.answered()
+        for function, args in self.calls:
+            if function not in answered:
+                return {"functionCall": {"name": function, "args": args(request) if callable(args) else args}}
+        return {"text": self.reply(request) if callable(self.reply) else self.reply}
+
+
+@dataclass
+class Latency:
+    """Time to answer one request.
+
+    Args:
+        median_ms: Median of the fixed part (lognormal around it).
+        sigma: Lognormal shape; 0 gives a fixed latency.
+        tail_rate: Fraction of requests that take tail_ms extra (stalls).
+        tail_ms: Extra latency of those requests.
+        per_1k_prompt_ms: Prefill time per 1,000 uncached prompt tokens.
+        per_output_token_ms: Decode time per output token.
+    """
+
+    median_ms: float = 40
+    sigma: float = 0.0
+    tail_rate: float = 0.0
+    tail_ms: float = 0.0
+    per_1k_prompt_ms: float = 5
+    per_output_token_ms: float = 0.5
+
+    def first_token(self, rng: random.Random, prompt_tokens: int) -> float:
+        ms = self.median_ms * math.exp(rng.gauss(0, self.sigma)) if self.sigma else self.median_ms
+        if self.tail_rate and rng.random() < self.tail_rate:
+            ms += self.tail_ms
+        return (ms + prompt_tokens / 1000 * self.per_1k_prompt_ms) / 1000
+
+    def per_token(self) -> float:
+        return self.per_output_token_ms / 1000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict:
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+    def _resource(self) -> str:
+        return self.path.split("?")[0].split("/v1beta/")[-1]
+
+    def do_GET(self):
+        fake = self.server.fake
+        if self._resource() == "models":
+            return self._send_json(200, {"models": [fake.model_resource(m) for m in fake.models]})
+        if self._resource().startswith("models/"):
+            model = self._resource().removeprefix("models/")
+            if model in fake.models:
+                return self._send_json(200, fake.model_resource(model))
+        self._send_json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = self._body()
+        resource = self._resource()
+        if resource == "cachedContents":
+            return self._send_json(200, fake.create_cache(body))
+        model, _, method = resource.removeprefix("models/").partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return self._send_json(404, {"error": {"code": 404, "message": f"unknown method {method}", "status": "NOT_FOUND"}})
+
+        fault = fake.next_fault()
+        if fault is not None:
+            status, headers = fault
+            message = "Resource has been exhausted (e.g. check quota)." if status == 429 else "The model is overloaded."
+            return self._send_json(
+                status,
+                {"error": {"code": status, "message": message, "status": "RESOURCE_EXHAUSTED" if status == 429 else "UNAVAILABLE"}},
+                headers,
+            )
+        try:
+            part, usage, first_token, per_token = fake.answer(model, body)
+        except LookupError as e:
+            return self._send_json(404, {"error": {"code": 404, "message": str(e), "status": "NOT_FOUND"}})
+
+        if method == "generateContent":
+            output_tokens = usage["candidatesTokenCount"]
+            time.sleep(first_token + output_tokens * per_token)
+            return self._send_json(200, {"candidates": [self._candidate(part)], "usageMetadata": usage, "modelVersion": model})
+
+        # streamGenerateContent?alt=sse: one event per word, the usage on the last one.
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        time.sleep(first_token)
+        pieces = [part] if "text" not in part else [
+            {"text": w if i == 0 else " " + w} for i, w in enumerate(part["text"].split(" "))
+        ]
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(per_token)
+            event = {"candidates": [self._candidate(piece, last=i == len(pieces) - 1)], "modelVersion": model}
+            if i == len(pieces) - 1:
+                event["usageMetadata"] = usage
+            self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+            self.wfile.flush()
+
+    @staticmethod
+    def _candidate(part: dict, last: bool = True) -> dict:
+        candidate = {"content": {"role": "model", "parts": [part]}, "index": 0}
+        if last:
+            candidate["finishReason"] = "STOP"
+        return candidate
+
+    def do_PATCH(self):
+        cache = self.server.fake.update_cache(self._resource(), self._body())
+        if cache is None:
+            return self._send_json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+        self._send_json(200, cache)
+
+    def do_DELETE(self):
+        self.server.fake.caches.pop(self._resource(), None)
+        self._send_json(200, {})
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+    fake: "FakeGemini"
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # client gave up (cancelled, hedged)
+            super().handle_error(request, client_address)
+
+
+class FakeGemini:
+    """Scripted, seeded stand-in for the Gemini API on http://127.0.0.1:<port>.
+
+    Args:
+        rules: Tried in order; requests that match none get default_reply.
+        latency: Latency model (defaults to Latency()).
+        model_latency: Latency models of particular model names (e.g. a
+                       degraded tier); can be changed while serving.
+        error_rates: Probability per request of answering with that HTTP
+                     status, e.g. {429: 0.05, 503: 0.02}.
+        retry_after: Seconds sent as Retry-After with a 429 (None: omitted).
+        seed: Seed of the generator behind latencies, faults and jitter.
+        models: Model names served (and listed by models.list); others get 404.
+        default_reply: Text for requests no rule matches.
+    """
+
+    def __init__(
+        self,
+        rules: list[Rule] | None = None,
+        latency: Latency | None = None,
+        model_latency: dict[str, Latency] | None = None,
+        error_rates: dict[int, float] | None = None,
+        retry_after: float | None = 1.0,
+        seed: int = 0,
+        models: tuple[str, ...] = (
+            "gemini-2.5-flash-lite",
+            "gemini-2.5-flash-lite-preview-09-2025",
+            "gemini-2.5-flash",
+            "gemini-2.5-pro",
+            "gemini-2.0-flash-exp",
+        ),
+        default_reply: str = "OK.",
+    ):
+        self.rules = list(rules or [])
+        self.latency = latency or Latency()
+        self.model_latency = dict(model_latency or {})
+        self.error_rates = dict(error_rates or {})
+        self.retry_after = retry_after
+        self.models = models
+        self.default_reply = default_reply
+        self.caches: dict[str, dict] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scripted_faults: deque[int] = deque()
+        self._outage: tuple[int, float] | None = None  # (status, until monotonic time)
+        self._cache_ids = itertools.count(1)
+        self._server: _Server | None = None
+        self.stats: dict[str, Any] = {}
+        self.reset_stats()
+
+    # ---- lifecycle ----
+
+    def start(self) -> str:
+        """Starts serving in a daemon thread; returns the base URL."""
+        if self._server is None:
+            self._server = _Server(("127.0.0.1", 0), _Handler)
+            self._server.fake = self
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeGemini":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def install_env(self):
+        """Points google.genai at this backend (clients built afterwards use it)."""
+        os.environ["GOOGLE_GEMINI_BASE_URL"] = self.base_url
+        os.environ["GOOGLE_API_KEY"] = os.environ.get("GOOGLE_API_KEY") or "fake-gemini"
+        os.environ.pop("GOOGLE_GENAI_USE_VERTEXAI", None)
+
+    # ---- script ----
+
+    def fail_next(self, status: int, times: int = 1):
+        """The next `times` generate requests are answered with `status`."""
+        with self._lock:
+            self._scripted_faults.extend([status] * times)
+
+    def fail_for(self, status: int, seconds: float):
+        """Every generate request of the next `seconds` is answered with `status`."""
+        with self._lock:
+            self._outage = (status, time.monotonic() + seconds)
+
+    def clear_faults(self):
+        """Drops faults scheduled with fail_next() / fail_for() that were not used yet."""
+        with self._lock:
+            self._scripted_faults.clear()
+            self._outage = None
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {
+                "requests": 0,
+                "faults": Counter(),
+                "by_rule": Counter(),
+                "by_model": defaultdict(Counter),  # model → requests, prompt_tokens, output_tokens
+                "function_calls": 0,
+                "prompt_tokens": 0,
+                "cached_tokens": 0,
+                "output_tokens": 0,
+            }
+
+    def next_fault(self) -> tuple[int, dict] | None:
+        with self._lock:
+            self.stats["requests"] += 1
+            status = self._scripted_faults.popleft() if self._scripted_faults else None
+            if status is None and self._outage is not None and time.monotonic() < self._outage[1]:
+                status = self._outage[0]
+            if status is None:
+                draw = self._rng.random()
+                for code, rate in self.error_rates.items():
+                    if draw < rate:
+                        status = code
+                        break
+                    draw -= rate
+            if status is None:
+                return None
+            self.stats["faults"][status] += 1
+        headers = {"Retry-After": f"{self.retry_after:g}"} if status == 429 and self.retry_after is not None else {}
+        return status, headers
+
+    def answer(self, model: str, body: dict) -> tuple[dict, dict, float, float]:
+        """(response part, usageMetadata, seconds to the first token, seconds per further token)."""
+        if model not in self.models:
+            raise LookupError(f"models/{model} is not found for API version v1beta.")
+        contents = body.get("contents", [])
+        prompt = next(
+            (_text(c) for c in reversed(contents)
+             if c.get("role") == "user" and not any("functionResponse" in p for p in c.get("parts", []))),
+            "",
+        )
+        instruction, cached_tokens = _text(body.get("systemInstruction")), 0
+        if name := body.get("cachedContent"):
+            cache = self.caches.get(name)
+            if cache is None or cache["expires"] < time.time():
+                raise LookupError(f"CachedContent not found: {name}")
+            instruction, cached_tokens = cache["instruction"], cache["tokens"]
+        request = FakeRequest(model, instruction, prompt, contents, body)
+        rule = next((r for r in self.rules if r.matches(request)), None)
+        part = rule.respond(request) if rule else {"text": self.default_reply}
+
+        prompt_tokens = _tokens({k: body.get(k) for k in ("systemInstruction", "tools", "toolConfig", "contents")})
+        output_tokens = len(part["text"].split()) if "text" in part else _tokens(part)
+        with self._lock:
+            label = (rule.name or rule.instruction or rule.prompt or "rule") if rule else "default"
+            self.stats["by_rule"][label] += 1
+            self.stats["function_calls"] += "functionCall" in part
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["cached_tokens"] += cached_tokens
+            self.stats["output_tokens"] += output_tokens
+            self.stats["by_model"][model].update(requests=1, prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+            latency = self.model_latency.get(model, self.latency)
+            first_token = latency.first_token(self._rng, prompt_tokens)
+        usage = {
+            "promptTokenCount": prompt_tokens + cached_tokens,
+            "cachedContentTokenCount": cached_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + cached_tokens + output_tokens,
+        }
+        return part, usage, first_token, latency.per_token()
+
+    # ---- models and caches ----
+
+    @staticmethod
+    def model_resource(model: str) -> dict:
+        return {
+            "name": f"models/{model}",
+            "displayName": model,
+            "inputTokenLimit": 1_048_576,
+            "outputTokenLimit": 65_536,
+            # As the real listing: the experimental models have no caching or batch API.
+            "supportedGenerationMethods": ["generateContent", "countTokens", "bidiGenerateContent"]
+            if model.endswith("-exp")
+            else ["generateContent", "countTokens", "createCachedContent", "batchGenerateContent"],
+        }
+
+    def _cache_resource(self, name: str) -> dict:
+        cache = self.caches[name]
+        expire = datetime.fromtimestamp(cache["expires"], timezone.utc).isoformat()
+        return {"name": name, "model": cache["model"], "expireTime": expire}
+
+    @staticmethod
+    def _ttl(body: dict) -> float:
+        return float(str(body.get("ttl", "3600s")).rstrip("s"))
+
+    def create_cache(self, body: dict) -> dict:
+        name = f"cachedContents/{next(self._cache_ids)}"
+        prefix = {k: body.get(k) for k in ("systemInstruction", "tools", "toolConfig")}
+        self.caches[name] = {
+            "model": body.get("model"),
+            "instruction": _text(body.get("systemInstruction")),
+            "tokens": _tokens(prefix),
+            "expires": time.time() + self._ttl(body),
+        }
+        return self._cache_resource(name)
+
+    def update_cache(self, name: str, body: dict) -> dict | None:
+        if name not in self.caches:
+            return None
+        self.caches[name]["expires"] = time.time() + self._ttl(body)
+        return self._cache_resource(name)
@@ -0,0 +1,47 @@
+'''
+Latency histogram
+
+Shared by batch_runner.py, server.py, local_code_executor.py and the
+benchmarks: latencies go into log-spaced buckets, so percentiles stay within
+~1% while memory is bounded by the number of buckets, not the number of
+samples.
+'''
+
+import math
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (~1% relative error, fixed memory).
+
+    Args:
+        growth: Ratio between consecutive bucket bounds.
+        min_seconds: Latencies below this land in the first bucket.
+    """
+
+    def __init__(self, growth: float = 1.02, min_seconds: float = 1e-4):
+        self.growth = growth
+        self.min_seconds = min_seconds
+        self._log_growth = math.log(growth)
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        bucket = max(0, int(math.log(max(seconds, self.min_seconds) / self.min_seconds) / self._log_growth))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q / 100 * self.count)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.max, self.min_seconds * self.growth ** (bucket + 1))
+        return self.max
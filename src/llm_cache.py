@@ -0,0 +1,287 @@
+'''
+LLM Response Cache
+
+Re-running the blog pipeline or the currency examples sends byte-identical
+requests to Gemini and pays the full latency (and quota) every time.
+CachedLlm wraps any model and answers repeated requests from a two-tier cache:
+
+    Key     → SHA-256 of the normalized model name, system instruction,
+              contents, tool schemas and generation config
+    Tier 1  → in-process LRU (OrderedDict)
+    Tier 2  → on-disk SQLite, survives restarts
+    Evict   → TTL on both tiers, max entries per tier (least recently used)
+    Bypass  → anything not pinned to temperature 0: an unset temperature
+              samples at Gemini's default, as do temperature > 0 and
+              candidate_count > 1; requests with search grounding
+              (google_search, url_context, ...) are never cached either,
+              since their answers go stale
+
+Configuration comes from config.get_settings() (.env): llm_cache_path,
+llm_cache_ttl, llm_cache_max_entries, llm_cache_max_disk_entries.
+'''
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncGenerator
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.base_llm import BaseLlm
+from loguru import logger
+
+from config import get_settings
+from llm_wrapper import WrappedLlm
+
+_CONFIG_EXCLUDE = {"http_options", "system_instruction", "tools", "labels", "response_schema"}
+
+
+def _normalize_text(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+
+def _schema(schema) -> object:
+    """JSON form of a response_schema, which ADK sets to the agent's output_schema class."""
+    if schema is None:
+        return None
+    if isinstance(schema, type) and hasattr(schema, "model_json_schema"):
+        return schema.model_json_schema()
+    if hasattr(schema, "model_dump"):
+        return schema.model_dump(mode="json", exclude_none=True)
+    return repr(schema)
+
+
+def request_cache_key(llm_request: LlmRequest, model: str) -> str:
+    """Returns a stable hash identifying the model output for a request."""
+    config = llm_request.config
+    instruction = config.system_instruction
+    if instruction is not None and not isinstance(instruction, str):
+        instruction = json.dumps(
+            instruction.model_dump(mode="json", exclude_none=True), sort_keys=True
+        )
+    payload = {
+        "model": llm_request.model or model,
+        "instruction": _normalize_text(instruction or ""),
+        "contents": [c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents],
+        "tools": [
+            t.model_dump(mode="json", exclude_none=True) if hasattr(t, "model_dump") else repr(t)
+            for t in (config.tools or [])
+        ],
+        "config": config.model_dump(mode="json", exclude_none=True, exclude=_CONFIG_EXCLUDE),
+        "response_schema": _schema(config.response_schema),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+_GROUNDING_TOOLS = ("google_search", "google_search_retrieval", "url_context", "enterprise_web_search", "google_maps")
+
+
+def is_grounded(llm_request: LlmRequest) -> bool:
+    """True when the request lets Gemini search the web (or maps) for current information."""
+    return any(
+        getattr(tool, name, None) is not None
+        for tool in (llm_request.config.tools or [])
+        for name in _GROUNDING_TOOLS
+    )
+
+
+def is_deterministic(llm_request: LlmRequest) -> bool:
+    """True only for requests pinned to temperature 0 with one candidate.
+
+    Gemini samples when no temperature is set, so an unset temperature is
+    not deterministic: agents opt in to caching with temperature=0.
+    """
+    config = llm_request.config
+    if config.temperature is None or config.temperature > 0:
+        return False
+    if config.candidate_count is not None and config.candidate_count > 1:
+        return False
+    return True
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) store of serialized model responses.
+
+    Args:
+        db_path: SQLite file for the persistent tier. None keeps memory only.
+        ttl_seconds: Lifetime of an entry in both tiers.
+        max_entries: Maximum entries kept in the in-process LRU tier.
+        max_disk_entries: Maximum rows kept in SQLite (least recently used
+                          rows are deleted first).
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        ttl_seconds: float = 24 * 3600,
+        max_entries: int = 1024,
+        max_disk_entries: int = 50_000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+        self._db: sqlite3.Connection | None = None
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, payload TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)"
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, payload: str):
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached payload for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            if (hit := self._memory.get(key)) is not None:
+                if hit[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return hit[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    self._db.execute(
+                        "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+                    )
+                    self._db.commit()
+                    self._remember(key, row[1], row[0])
+                    self.stats["disk_hits"] += 1
+                    return row[0]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, payload: str):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, payload)
+            self.stats["stores"] += 1
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, payload, expires_at, now),
+            )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_disk_entries:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (count - self.max_disk_entries,),
+                )
+                self.stats["evictions"] += count - self.max_disk_entries
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+
+_default_cache: ResponseCache | None = None
+
+
+def default_response_cache() -> ResponseCache:
+    """Process-wide cache shared by every CachedLlm, configured from the env."""
+    global _default_cache
+    if _default_cache is None:
+        settings = get_settings()
+        path = settings.llm_cache_path
+        _default_cache = ResponseCache(
+            db_path=path or None,
+            ttl_seconds=settings.llm_cache_ttl,
+            max_entries=settings.llm_cache_max_entries,
+            max_disk_entries=settings.llm_cache_max_disk_entries,
+        )
+        logger.debug(f"🗄️ LLM response cache ready ({path or 'memory only'}).")
+    return _default_cache
+
+
+class CachedLlm(WrappedLlm):
+    """Serves repeated identical requests from a ResponseCache.
+
+    Only complete (non-partial) responses without an error code are stored.
+    On a hit the stored responses are replayed, with
+    custom_metadata["response_cache"] set to "hit".
+
+    Args:
+        inner: The model to wrap, e.g. Gemini(model="gemini-2.5-flash-lite").
+        cache: The cache to use; defaults to default_response_cache().
+        cache_sampled: Also cache requests without temperature 0 (grounded
+                       requests are still never cached).
+    """
+
+    cache: ResponseCache | None = None
+    cache_sampled: bool = False
+
+    def __init__(self, inner: BaseLlm, **data):
+        super().__init__(inner, **data)
+        if self.cache is None:
+            self.cache = default_response_cache()
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if is_grounded(llm_request) or (not self.cache_sampled and not is_deterministic(llm_request)):
+            self.cache.stats["bypassed"] += 1
+            async for llm_response in self.inner.generate_content_async(llm_request, stream):
+                yield llm_response
+            return
+
+        key = request_cache_key(llm_request, self.model)
+        if (payload := self.cache.get(key)) is not None:
+            for item in json.loads(payload):
+                llm_response = LlmResponse.model_validate(item)
+                llm_response.custom_metadata = {
+                    **(llm_response.custom_metadata or {}),
+                    "response_cache": "hit",
+                }
+                yield llm_response
+            return
+
+        final, failed = [], False
+        async for llm_response in self.inner.generate_content_async(llm_request, stream):
+            if llm_response.error_code:
+                failed = True
+            if not llm_response.partial:
+                final.append(llm_response.model_dump(mode="json", exclude_none=True))
+            yield llm_response
+        if final and not failed:
+            self.cache.put(key, json.dumps(final))
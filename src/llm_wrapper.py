@@ -0,0 +1,41 @@
+'''
+LLM wrappers
+
+Agents accept any BaseLlm as `model=`, so cross-cutting behaviour (caching,
+rate limiting, ...) is added by wrapping the Gemini instance instead of
+changing the agents:
+
+    model=CachedLlm(Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config))
+
+WrappedLlm forwards everything to the inner model; subclasses override
+generate_content_async() and call the inner model where needed.
+'''
+
+from typing import AsyncGenerator
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.base_llm_connection import BaseLlmConnection
+
+
+class WrappedLlm(BaseLlm):
+    """BaseLlm that delegates to an inner BaseLlm.
+
+    The wrapper reports the inner model's name, so agents, logs and
+    llm_request.model look exactly as if the inner model were used directly.
+    """
+
+    inner: BaseLlm
+
+    def __init__(self, inner: BaseLlm, **data):
+        data.setdefault("model", inner.model)
+        super().__init__(inner=inner, **data)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for llm_response in self.inner.generate_content_async(llm_request, stream):
+            yield llm_response
+
+    def connect(self, llm_request: LlmRequest) -> BaseLlmConnection:
+        return self.inner.connect(llm_request)
@@ -0,0 +1,291 @@
+'''
+Local Code Executor
+
+BuiltInCodeExecutor runs calculation_agent's code on Gemini's servers:
+extra network latency and no offline use. LocalProcessCodeExecutor plugs
+into the same code_executor= slot and runs the code on this machine:
+
+    Warm pool → worker processes forked from a forkserver that has already
+                imported sandbox_worker and the usual math modules, started
+                on first use (or warm()) and reused for every code block
+    Limits    → per-worker memory, CPU and wall-clock limits, no network
+                (see sandbox_worker.py); a worker that hits a limit is
+                replaced by a fresh fork
+    Cache     → opt-in (cache_size): identical code blocks are answered from
+                an LRU cache, but only blocks that import nothing beyond pure
+                math/text modules and call no open()/input()/eval(), so
+                random, time or file reads are always run again
+    Metrics   → stats(): queue depth, busy workers, cache hits, timeouts,
+                crashes and execution latency percentiles
+    Scaling   → execute_code() is thread-safe; calls from several threads
+                (or execute_code_async / run_many) run on separate cores
+    Agents    → ADK calls code_executor.execute_code() synchronously from its
+                async flow, so in the code_executor= slot every code block
+                blocks the event loop and concurrent agent requests run their
+                code one at a time. as_tool() exposes the pool as an async
+                run_python tool instead; ADK awaits it, so code blocks of
+                concurrent requests run side by side on separate workers
+
+Usage:
+    LlmAgent(..., tools=[LocalProcessCodeExecutor(workers=4).as_tool()])
+    LlmAgent(..., code_executor=LocalProcessCodeExecutor())   # single-user, blocks the loop
+'''
+
+import ast
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.code_executors import BaseCodeExecutor
+from google.adk.code_executors.code_execution_utils import CodeExecutionInput, CodeExecutionResult
+from google.adk.tools import FunctionTool
+from loguru import logger
+from pydantic import Field, PrivateAttr
+
+import sandbox_worker
+from latency import LatencyHistogram
+
+
+_PURE_MODULES = frozenset(
+    {"math", "cmath", "decimal", "fractions", "statistics", "itertools", "functools", "operator",
+     "collections", "re", "json", "string"}
+)
+_IMPURE_CALLS = frozenset({"open", "input", "eval", "exec", "compile", "__import__", "globals", "vars"})
+
+
+def _is_pure(code: str) -> bool:
+    """True if the code's output can only depend on its text (safe to cache)."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return True  # always fails the same way
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules = [node.module or ""]
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            if node.func.id in _IMPURE_CALLS:
+                return False
+            continue
+        else:
+            continue
+        if any(module.partition(".")[0] not in _PURE_MODULES for module in modules):
+            return False
+    return True
+
+
+class _Worker:
+    def __init__(self, ctx, memory_limit_mb: int, cpu_seconds: float, max_output: int):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=sandbox_worker.serve,
+            args=(child, memory_limit_mb, cpu_seconds, max_output),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+
+    def run(self, code: str, timeout: float) -> tuple[str, str, str | None]:
+        """Returns (stdout, stderr, failure); failure is set if the worker must be replaced."""
+        try:
+            self.conn.send(code)
+            if not self.conn.poll(timeout):
+                return "", f"TimeoutError: execution exceeded {timeout:g}s", "timeout"
+            stdout, stderr, _ = self.conn.recv()
+            return stdout, stderr, None
+        except (EOFError, OSError):
+            return "", "Execution aborted: the worker hit its CPU or memory limit", "crash"
+
+    def close(self):
+        self.conn.close()
+        self.process.kill()
+        self.process.join(timeout=1)
+
+
+class LocalProcessCodeExecutor(BaseCodeExecutor):
+    """Runs model-written Python in a pool of warm, resource-limited local processes.
+
+    Args:
+        workers: Pool size (defaults to the number of CPUs).
+        timeout_seconds: Wall-clock limit per code block.
+        cpu_seconds: CPU-time limit per code block.
+        memory_limit_mb: Address-space limit per worker.
+        max_output: Characters of stdout/stderr kept per code block.
+        cache_size: Pure code blocks whose results are cached (0, the default,
+                    disables the cache).
+    """
+
+    stateful: bool = Field(default=False, frozen=True)
+    optimize_data_file: bool = Field(default=False, frozen=True)
+
+    workers: int = Field(default_factory=lambda: os.cpu_count() or 2)
+    timeout_seconds: float = 10.0
+    cpu_seconds: float = 5.0
+    memory_limit_mb: int = 512
+    max_output: int = 65_536
+    cache_size: int = 0
+
+    _lock: threading.Condition = PrivateAttr(default_factory=threading.Condition)
+    _idle: list[_Worker] = PrivateAttr(default_factory=list)
+    _started: int = PrivateAttr(default=0)
+    _ctx = PrivateAttr(default=None)
+    _cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _latency: LatencyHistogram = PrivateAttr(default_factory=LatencyHistogram)
+    _stats: dict = PrivateAttr(
+        default_factory=lambda: {
+            "executions": 0,
+            "cache_hits": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "waiting": 0,
+            "max_queue_depth": 0,
+        }
+    )
+
+    def _context(self):
+        if self._ctx is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._ctx = multiprocessing.get_context(method)
+            if method == "forkserver":
+                # "__main__" (the stdlib default) is imported once in the forkserver;
+                # otherwise every worker re-runs the main script's imports on start.
+                self._ctx.set_forkserver_preload(["__main__", "sandbox_worker", *sandbox_worker.PRELOAD])
+        return self._ctx
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context(), self.memory_limit_mb, self.cpu_seconds, self.max_output)
+
+    def warm(self):
+        """Starts every worker now instead of on first use."""
+        with self._lock:
+            while self._started < self.workers:
+                self._idle.append(self._spawn())
+                self._started += 1
+        logger.debug(f"🔥 {self.workers} sandbox workers ready.")
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            self._stats["waiting"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["waiting"])
+            try:
+                while not self._idle and self._started >= self.workers:
+                    self._lock.wait()
+                if self._idle:
+                    return self._idle.pop()
+                self._started += 1
+            finally:
+                self._stats["waiting"] -= 1
+        try:
+            return self._spawn()
+        except BaseException:
+            with self._lock:
+                self._started -= 1
+                self._lock.notify()
+            raise
+
+    def _release(self, worker: _Worker, failure: str | None):
+        if failure:
+            worker.close()
+            try:
+                worker = self._spawn()
+            except Exception as e:
+                logger.error(f"Could not replace sandbox worker: {e}")
+                with self._lock:
+                    self._started -= 1
+                    self._lock.notify()
+                return
+        with self._lock:
+            self._idle.append(worker)
+            self._lock.notify()
+
+    def run(self, code: str) -> tuple[str, str]:
+        """Executes a code block and returns (stdout, stderr)."""
+        key = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        with self._lock:
+            if self.cache_size and (hit := self._cache.get(key)) is not None:
+                self._cache.move_to_end(key)
+                self._stats["cache_hits"] += 1
+                return hit
+
+        start = time.perf_counter()
+        worker = self._acquire()
+        stdout, stderr, failure = worker.run(code, self.timeout_seconds)
+        self._release(worker, failure)
+        elapsed = time.perf_counter() - start
+        cacheable = not failure and self.cache_size and _is_pure(code)
+
+        with self._lock:
+            self._stats["executions"] += 1
+            self._latency.add(elapsed)
+            if failure == "timeout":
+                self._stats["timeouts"] += 1
+            elif failure == "crash":
+                self._stats["crashes"] += 1
+            elif cacheable:
+                self._cache[key] = (stdout, stderr)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return stdout, stderr
+
+    def execute_code(
+        self,
+        invocation_context: InvocationContext,
+        code_execution_input: CodeExecutionInput,
+    ) -> CodeExecutionResult:
+        stdout, stderr = self.run(code_execution_input.code)
+        return CodeExecutionResult(stdout=stdout, stderr=stderr, output_files=[])
+
+    async def execute_code_async(self, code: str) -> tuple[str, str]:
+        """run() without blocking the event loop."""
+        return await asyncio.to_thread(self.run, code)
+
+    def as_tool(self) -> FunctionTool:
+        """An async run_python tool backed by this pool (see Agents in the module docstring)."""
+
+        async def run_python(code: str) -> dict:
+            """Runs one block of Python code and returns what it printed.
+
+            Args:
+                code: Python source that print()s the final result.
+
+            Returns:
+                Dictionary with status ("success" or "error"), stdout and stderr.
+            """
+            stdout, stderr = await self.execute_code_async(code)
+            return {"status": "error" if stderr.strip() else "success", "stdout": stdout, "stderr": stderr}
+
+        return FunctionTool(run_python)
+
+    def run_many(self, codes: list[str]) -> list[tuple[str, str]]:
+        """Runs several code blocks concurrently, one per worker."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(self.run, codes))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "queue_depth": self._stats["waiting"],
+                "workers": self._started,
+                "busy": self._started - len(self._idle),
+                "cached": len(self._cache),
+                "latency_ms": {
+                    name: round(self._latency.percentile(q) * 1000, 2)
+                    for name, q in (("p50", 50), ("p95", 95), ("p99", 99))
+                },
+            }
+
+    def shutdown(self):
+        """Stops every worker."""
+        with self._lock:
+            for worker in self._idle:
+                worker.close()
+            self._started -= len(self._idle)
+            self._idle.clear()
@@ -1,6 +1,234 @@
-def main():
-    print("Hello from agent-google!")
+'''
+agent-google CLI
+
+    python src/main.py list
+    python src/main.py run currency "Convert 500 USD to EUR with a platinum credit card"
+    python src/main.py demo memory
+    python src/main.py batch currency prompts.jsonl -o results.jsonl --concurrency 16
+    python src/main.py run blog --trace trace.jsonl "AI agents" && python src/main.py trace trace.jsonl
+    python src/main.py models --refresh
+    python src/main.py serve --port 8000 --max-per-user 2 currency blog
+
+Nothing from google.adk is imported until an agent is selected: `list` only
+reads the table below, and `run` / `demo` import the one module they need.
+Every agent module exposes build_*() factories and runs its tutorial only
+under `if __name__ == "__main__"`, so importing it has no side effects.
+'''
+
+import argparse
+import importlib
+import sys
+import time
+from typing import NamedTuple
+
+_STARTED = time.perf_counter()
+
+
+class AgentSpec(NamedTuple):
+    module: str
+    factory: str
+    description: str
+    returns_runner: bool = False  # factory builds a Runner (custom services) instead of an agent
+
+
+AGENTS: dict[str, AgentSpec] = {
+    "assistant": AgentSpec("agent", "build_root_agent", "Google Search assistant (adk web root_agent)"),
+    "app": AgentSpec("app", "build_root_agent", "Google Search assistant with retry configuration"),
+    "currency": AgentSpec("custom_tool", "build_currency_agent", "Currency conversion with fee and rate tools"),
+    "enhanced_currency": AgentSpec(
+        "custom_tool", "build_enhanced_currency_agent", "Currency conversion with exact local arithmetic"
+    ),
+    "calculation_local": AgentSpec(
+        "custom_tool", "build_local_calculation_agent", "Code-writing calculator run in a local sandbox pool"
+    ),
+    "memory": AgentSpec("memory", "build_memory_runner", "Agent with load_memory over semantic memory", True),
+    "auto_memory": AgentSpec(
+        "memory", "build_auto_runner", "Auto-saving agent with budgeted, consolidated preload memory", True
+    ),
+    "research": AgentSpec("multiagent", "build_research_coordinator", "Research + summarizer coordinator"),
+    "parallel_research": AgentSpec(
+        "multiagent", "build_parallel_research", "Sub-queries researched concurrently, merged, summarized once"
+    ),
+    "blog": AgentSpec("multiagent", "build_blog_pipeline", "Outline → writer → editor blog pipeline"),
+    "blog_dataflow": AgentSpec(
+        "multiagent", "build_blog_dataflow", "Blog pipeline plus keywords and social post, ordered by dataflow"
+    ),
+    "blog_refine": AgentSpec(
+        "multiagent", "build_blog_refinement", "Blog pipeline with critique/revise rounds until approved or converged"
+    ),
+}
+
+DEMOS = ("app", "custom_tool", "memory", "multiagent")
+
+
+def build_runner(name: str, session_db: str | None = None):
+    """Imports the selected agent's module and returns a ready Runner.
+
+    With session_db, conversations are kept in that SQLite file
+    (session_store.py) instead of in memory. With model_routing=true and a
+    routing section in agent.yaml, agents get a model cascade (model_router.py).
+    """
+    spec = AGENTS[name]
+    factory = getattr(importlib.import_module(spec.module), spec.factory)
+    if spec.returns_runner:
+        runner = factory()
+    else:
+        from google.adk.runners import InMemoryRunner
+
+        from rate_limiter import RateLimitPlugin
+
+        runner = InMemoryRunner(agent=factory(), plugins=[RateLimitPlugin()])
+    from config import get_settings
+
+    if get_settings().model_routing:
+        from model_router import route_agents
+
+        route_agents(runner.agent)
+    if session_db:
+        from session_store import DurableSessionService
+
+        runner.session_service = DurableSessionService(session_db)
+    return runner
+
+
+async def run(
+    name: str,
+    prompts: list[str],
+    session_db: str | None = None,
+    session_id: str = "debug_session_id",
+    trace: str | None = None,
+    metrics_port: int | None = None,
+):
+    from config import get_settings
+
+    runner = build_runner(name, session_db or get_settings().session_db_path)
+    from loguru import logger
+
+    exporter = None
+    if trace or metrics_port is not None:
+        from tracing import JsonlSpanExporter, PrometheusMetrics, TracingPlugin, serve_metrics
+
+        exporters = []
+        if trace:
+            exporter = JsonlSpanExporter(trace)
+            exporters.append(exporter)
+        if metrics_port is not None:
+            metrics = PrometheusMetrics()
+            serve_metrics(metrics, port=metrics_port)
+            exporters.append(metrics)
+        runner.plugin_manager.register_plugin(TracingPlugin(exporters=exporters))
+
+    logger.debug(f"⏱️ Runner for {name} ready {time.perf_counter() - _STARTED:.3f}s after start.")
+    try:
+        await runner.run_debug(prompts, session_id=session_id)
+    finally:
+        if hasattr(runner.session_service, "close"):
+            runner.session_service.close()
+        if exporter is not None:
+            exporter.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="agent-google", description="Run the ADK example agents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List the available agents.")
+    run_parser = commands.add_parser("run", help="Send one or more prompts to an agent.")
+    run_parser.add_argument("agent", choices=sorted(AGENTS))
+    run_parser.add_argument("prompt", nargs="+")
+    run_parser.add_argument("--session-db", help="SQLite file that keeps the conversation across runs")
+    run_parser.add_argument("--session-id", default="debug_session_id", help="Conversation to continue")
+    run_parser.add_argument("--trace", help="Append spans of every run, model and tool call to this JSONL file")
+    run_parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while running")
+    batch_parser = commands.add_parser("batch", help="Run a JSONL/CSV file of prompts through an agent.")
+    batch_parser.add_argument("agent", choices=sorted(AGENTS))
+    batch_parser.add_argument("input", help=".jsonl or .csv file of prompts")
+    batch_parser.add_argument("-o", "--output", required=True, help="JSONL results file")
+    batch_parser.add_argument("--concurrency", type=int, default=8)
+    batch_parser.add_argument("--timeout", type=float, default=None, help="Per-item timeout in seconds")
+    batch_parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    trace_parser = commands.add_parser("trace", help="Print the traces of a --trace file as trees.")
+    trace_parser.add_argument("file")
+    trace_parser.add_argument("--last", type=int, default=5, help="Number of most recent traces")
+    models_parser = commands.add_parser("models", help="Show the model catalog (models.list, cached on disk).")
+    models_parser.add_argument("--refresh", action="store_true", help="List the models again now")
+    models_parser.add_argument("--all", action="store_true", help="Include models without generateContent")
+    serve_parser = commands.add_parser("serve", help="Serve agents over HTTP (SSE) and WebSocket.")
+    serve_parser.add_argument("agents", nargs="*", metavar="agent", help="Agents to serve (default: all)")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--max-per-user", type=int, default=2, help="Turns of one user running at once")
+    serve_parser.add_argument("--queue-per-user", type=int, default=8, help="Turns of one user waiting; more get 429")
+    serve_parser.add_argument("--max-active", type=int, default=None, help="Turns running at once in total")
+    serve_parser.add_argument("--timeout", type=float, default=None, help="Per-turn timeout in seconds")
+    serve_parser.add_argument("--session-db", help="SQLite file that keeps the conversations across restarts")
+    demo_parser = commands.add_parser("demo", help="Run a module's tutorial walkthrough.")
+    demo_parser.add_argument("module", choices=DEMOS)
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        width = max(map(len, AGENTS))
+        for name, spec in AGENTS.items():
+            print(f"{name:<{width}}  {spec.description}  [{spec.module}.{spec.factory}]")
+        return 0
+    if args.command == "trace":
+        from tracing import format_trace, read_traces
+
+        for trace_id, spans in list(read_traces(args.file).items())[-args.last :]:
+            print(f"trace {trace_id}\n{format_trace(spans)}\n")
+        return 0
+    if args.command == "models":
+        from model_catalog import default_catalog
+
+        catalog = default_catalog()
+        models = catalog.models(refresh=args.refresh)
+        if models is None:
+            print("models.list() failed and there is no cached listing.", file=sys.stderr)
+            return 1
+        for info in models.values():
+            if args.all or info.supports("generateContent"):
+                print(f"{info.name:<48} {', '.join(info.actions)}")
+        for model in catalog.fallbacks:
+            print(f"fallback: {' → '.join(catalog.chain(model))} ⇒ {catalog.resolve(model)}")
+        return 0
+
+    if args.command == "serve":
+        if unknown := sorted(set(args.agents) - AGENTS.keys()):
+            parser.error(f"unknown agent(s): {', '.join(unknown)} (see `list`)")
+        import uvicorn
+
+        from config import get_settings
+        from server import AgentServer, UserLimiter, build_app
+
+        limiter = UserLimiter(args.max_per_user, args.queue_per_user, args.max_active)
+        server = AgentServer(
+            args.agents or None, limiter, args.session_db or get_settings().session_db_path or None, args.timeout
+        )
+        uvicorn.run(build_app(server), host=args.host, port=args.port, log_level="warning")
+        return 0
+
+    import asyncio
+
+    if args.command == "run":
+        asyncio.run(
+            run(args.agent, args.prompt, args.session_db, args.session_id, args.trace, args.metrics_port)
+        )
+    elif args.command == "batch":
+        from batch_runner import run_batch
+
+        asyncio.run(
+            run_batch(
+                build_runner(args.agent),
+                args.input,
+                args.output,
+                concurrency=args.concurrency,
+                resume=not args.restart,
+                timeout=args.timeout,
+            )
+        )
+    else:
+        asyncio.run(importlib.import_module(args.module).main())
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,36 +1,24 @@
-
+import asyncio
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from google.adk.memory import BaseMemoryService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.adk.memory import InMemoryMemoryService
-from google.adk.tools import load_memory, preload_memory
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.adk.tools import load_memory
 from google.genai import types
 
-from dotenv import load_dotenv
-import os 
 from loguru import logger
 
-load_dotenv()
-try:
-    gemini_api_key = os.getenv("gemini_api_key")
-    attempts = int(os.getenv("attempts", 5))
-    exp_base = int(os.getenv("exp_base", 7))
-    initial_delay = int(os.getenv("initial_delay", 1))
-    http_status_codes = eval(os.getenv("http_status_codes", "[429, 500, 503, 504]"))
- 
-
-    retry_config = types.HttpRetryOptions(
-        attempts=attempts,
-        exp_base=exp_base,
-        initial_delay=initial_delay,
-        http_status_codes=http_status_codes
-    )
-    logger.success("Environment variables loaded and retry configuration set successfully.")
-except Exception as e:
-    logger.error(f"Error loading environment variables: {e} or setting up retry configuration.")
-    raise ConnectionError("Failed to load environment variables or set up retry configuration.")
+from config import get_settings
+from model_registry import get_model
+from context_window import ContextWindowTool
+from memory_consolidation import MemoryConsolidator, RuleBasedSummarizer
+from memory_preload import BudgetedPreloadMemoryTool
+from semantic_memory import SemanticMemoryService
+
+# Define constants used throughout running code
+APP_NAME = "MemoryDemoApp"
+USER_ID = "demo_user"
 
 async def run_session(runner_instance: Runner, 
                       user_queries: list[str] | str, session_id: str = "default"
@@ -38,14 +26,17 @@ async def run_session(runner_instance: Runner,
     """Helper function to run queries in a session and display responses."""
     logger.info(f"\n### Session: {session_id}")
 
+    session_service = runner_instance.session_service
+    app_name = runner_instance.app_name
+
     # Create or retrieve session
     try:
         session = await session_service.create_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+            app_name=app_name, user_id=USER_ID, session_id=session_id
         )
     except:
         session = await session_service.get_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+            app_name=app_name, user_id=USER_ID, session_id=session_id
         )
 
     # Convert single query to list
@@ -80,47 +71,52 @@ Three-step integration process:
 
 # Initialize
 
-memory_service = (
-    InMemoryMemoryService()
-)  # ADK's built-in Memory Service for development and testing
-
+def build_memory_service() -> SemanticMemoryService:
+    return SemanticMemoryService(
+        batch_writes=True
+    )  # Indexed drop-in for ADK's InMemoryMemoryService (embeddings + top-k cosine search)
 
 
-# Define constants used throughout running code
-APP_NAME = "MemoryDemoApp"
-USER_ID = "demo_user"
-
-# Create agent
-user_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
-    name="MemoryDemoAgent",
-    instruction="Answer user questions in simple words.",
-)
-
-logger.info("✅ Agent created")
-
-
-# Create Session Service 
-session_service = InMemorySessionService()  # Handles conversations
-
-# Create runner with BOTH services
-runner = Runner(
-    agent=user_agent,
-    app_name="MemoryDemoApp",
-    session_service=session_service,
-    memory_service=memory_service,  # Memory service is now available!
-)
-
-logger.info("✅ Agent and Runner created with memory support!")
-
- # Testing Memory
+def build_user_agent(with_load_memory: bool = False) -> LlmAgent:
+    """MemoryDemoAgent; with_load_memory adds the reactive load_memory tool (Section 4)."""
+    if not with_load_memory:
+        user_agent = LlmAgent(
+            model=get_model("gemini-2.5-flash-lite", get_settings().retry_config),
+            name="MemoryDemoAgent",
+            instruction="Answer user questions in simple words.",
+            tools=[ContextWindowTool(keep_turns=4)],  # Older turns are sent as a rolling summary
+        )
+        logger.info("✅ Agent created")
+        return user_agent
+
+    user_agent = LlmAgent(
+        model=get_model("gemini-2.5-flash-lite", get_settings().retry_config),
+        name="MemoryDemoAgent",
+        instruction="Answer user questions in simple words. Use load_memory tool if you need to recall past conversations.",
+        tools=[
+            load_memory,
+            ContextWindowTool(keep_turns=4, pinned_tools=("load_memory",)),  # Recalled memories stay verbatim
+        ],  # Agent now has access to Memory and can search it whenever it decides to!
+    )
+    logger.info("✅ Agent with load_memory tool created.")
+    return user_agent
+
+
+def build_memory_runner(
+    session_service: BaseSessionService | None = None,
+    memory_service: BaseMemoryService | None = None,
+    with_load_memory: bool = True,
+) -> Runner:
+    # Create runner with BOTH services
+    runner = Runner(
+        agent=build_user_agent(with_load_memory),
+        app_name=APP_NAME,
+        session_service=session_service or InMemorySessionService(),  # Handles conversations
+        memory_service=memory_service or build_memory_service(),  # Memory service is now available!
+    )
+    logger.info("✅ Agent and Runner created with memory support!")
+    return runner
 
- # User tells agent about their favorite color
-await run_session(
-    runner,
-    "My favorite color is blue-green. Can you write a Haiku about it?",
-    "conversation-01",  # Session ID
-)
 
 '''
 InMemoryMemoryService
@@ -129,28 +125,15 @@ InMemoryMemoryService
     Keyword-based search (simple word matching)
     In-memory storage (resets on restart)
     Ideal for learning and local development
-'''
-
-session = await session_service.get_session(
-    app_name=APP_NAME, user_id=USER_ID, session_id="conversation-01"
-)
-
-# Let's see what's in the session
-print("📝 Session contains:")
-for event in session.events:
-    text = (
-        event.content.parts[0].text[:60]
-        if event.content and event.content.parts
-        else "(empty)"
-    )
-    print(f"  {event.content.role}: {text}...")
 
+SemanticMemoryService (semantic_memory.py, used above)
 
-
-# This is the key method!
-await memory_service.add_session_to_memory(session)
-
-logger.success("✅ Session added to memory!")
+    Embeds each event once at ingestion (offline HashingEmbedder by default)
+    Top-k cosine search over a contiguous NumPy matrix per app_name/user_id
+    Switches to an IVF index for large stores (sub-millisecond at 1M events)
+    Same add_session_to_memory / search_memory API, so load_memory and
+    preload_memory work unchanged
+'''
 
 '''
 Add Load Memory Tool to Agent¶
@@ -162,50 +145,6 @@ is a built-in ADK tool, you simply include it in the tools
 array without any custom implementation.'''
 
 
-# Create agent
-user_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
-    name="MemoryDemoAgent",
-    instruction="Answer user questions in simple words. Use load_memory tool if you need to recall past conversations.",
-    tools=[
-        load_memory
-    ],  # Agent now has access to Memory and can search it whenever it decides to!
-)
-
-logger.info("✅ Agent with load_memory tool created.")
-
-
-
-# Create a new runner with the updated agent
-runner = Runner(
-    agent=user_agent,
-    app_name=APP_NAME,
-    session_service=session_service,
-    memory_service=memory_service,
-)
-
-await run_session(runner, "What is my favorite color?", "color-test")
-
-
-await run_session(runner, "My birthday is on March 15th.", "birthday-session-01")
-
-
-
-# Manually save the session to memory
-birthday_session = await session_service.get_session(
-    app_name=APP_NAME, user_id=USER_ID, session_id="birthday-session-01"
-)
-
-await memory_service.add_session_to_memory(birthday_session)
-
-logger.info("✅ Birthday session saved to memory!")
-
-
-# Test retrieval in a NEW session
-await run_session(
-    runner, "When is my birthday?", "birthday-session-02"  # Different session ID
-)
-
 '''
 Manual Memory Search¶
 
@@ -218,19 +157,7 @@ Beyond agent tools, you can also search memories directly in your code. This is
 The search_memory() method takes a text query and returns a SearchMemoryResponse with matching memories.
 '''
 
-# Search for color preferences
-search_response = await memory_service.search_memory(
-    app_name=APP_NAME, user_id=USER_ID, query="What is the user's favorite color?"
-)
 
-print("🔍 Search Results:")
-print(f"  Found {len(search_response.memories)} relevant memories")
-print()
-
-for memory in search_response.memories:
-    if memory.content and memory.content.parts:
-        text = memory.content.parts[0].text[:80]
-        print(f"  [{memory.author}]: {text}...")
 '''
 Automatic Memory Storage with Callbacks¶
 
@@ -248,14 +175,17 @@ How we'll use it: In our callback, we'll access the memory service and current s
 
 
 async def auto_save_to_memory(callback_context):
-    """Automatically save session to memory after each agent turn."""
+    """Automatically save session to memory after each agent turn.
+
+    SemanticMemoryService keeps a per-session watermark and a content-hash set,
+    so this only queues the events added since the previous turn instead of
+    re-ingesting the whole session every time.
+    """
     await callback_context._invocation_context.memory_service.add_session_to_memory(
         callback_context._invocation_context.session
     )
 
 
-logger.info ("✅ Callback created.")
-
 '''
 Create an Agent: Callback and PreLoad Memory Tool¶
 
@@ -268,43 +198,136 @@ This creates a fully automated memory system with zero manual intervention.'''
 
 
 
-# Agent with automatic memory saving
-auto_memory_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
-    name="AutoMemoryAgent",
-    instruction="Answer user questions.",
-    tools=[preload_memory],
-    after_agent_callback=auto_save_to_memory,  # Saves after each turn!
-)
-
-logger.info("✅ Agent created with automatic memory saving!")
-
-# Create a runner for the auto-save agent
-# This connects our automated agent to the session and memory services
-auto_runner = Runner(
-    agent=auto_memory_agent,  # Use the agent with callback + preload_memory
-    app_name=APP_NAME,
-    session_service=session_service,  # Same services from Section 3
-    memory_service=memory_service,
-)
-
-logger.info ("✅ Runner created.")
-
-#  Test 1: Tell the agent about a gift (first conversation)
-# The callback will automatically save this to memory when the turn completes
-await run_session(
-    auto_runner,
-    "I gifted a new toy to my nephew on his 1st birthday!",
-    "auto-save-test",
-)
-
-# Test 2: Ask about the gift in a NEW session (second conversation)
-# The agent should retrieve the memory using preload_memory and answer correctly
-await run_session(
-    auto_runner,
-    "What did I gift my nephew?",
-    "auto-save-test-2",  # Different session ID - proves memory works across sessions!
-)
+def build_auto_memory_agent() -> LlmAgent:
+    # Agent with automatic memory saving
+    auto_memory_agent = LlmAgent(
+        model=get_model("gemini-2.5-flash-lite", get_settings().retry_config),
+        name="AutoMemoryAgent",
+        instruction="Answer user questions.",
+        # Budgeted preload_memory: ranks memories by relevance and recency and only
+        # injects what fits in 400 tokens, so prompts stop growing with history.
+        tools=[BudgetedPreloadMemoryTool(token_budget=400), ContextWindowTool(keep_turns=4)],
+        after_agent_callback=auto_save_to_memory,  # Saves after each turn!
+    )
+    logger.info("✅ Agent created with automatic memory saving!")
+    return auto_memory_agent
+
+
+def build_consolidated_memory_service() -> SemanticMemoryService:
+    # preload_memory injects every retrieved memory into the system instruction on
+    # each turn, so this agent gets a consolidating memory service by default: raw turns are
+    # merged in the background into compact fact records (duplicates dropped,
+    # superseded facts replaced) and searches return those records instead.
+    return SemanticMemoryService(
+        top_k=20,  # Candidates for the budgeted preload below, which keeps the best that fit
+        batch_writes=True,
+        consolidator=MemoryConsolidator(summarizer=RuleBasedSummarizer()),  # Swap for LlmSummarizer(get_model(...))
+    )
+
+
+def build_auto_runner(
+    session_service: BaseSessionService | None = None,
+    memory_service: BaseMemoryService | None = None,
+) -> Runner:
+    # Create a runner for the auto-save agent
+    # This connects our automated agent to the session and memory services
+    auto_runner = Runner(
+        agent=build_auto_memory_agent(),  # Use the agent with callback + preload_memory
+        app_name=APP_NAME,
+        session_service=session_service or InMemorySessionService(),
+        memory_service=memory_service or build_consolidated_memory_service(),
+    )
+    logger.info ("✅ Runner created.")
+    return auto_runner
+
+
+async def main():
+    # Create Session Service 
+    session_service = InMemorySessionService()  # Handles conversations
+    memory_service = build_memory_service()
+    runner = build_memory_runner(session_service, memory_service, with_load_memory=False)
+
+    # Testing Memory
+
+    # User tells agent about their favorite color
+    await run_session(
+        runner,
+        "My favorite color is blue-green. Can you write a Haiku about it?",
+        "conversation-01",  # Session ID
+    )
+
+    session = await session_service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id="conversation-01"
+    )
+
+    # Let's see what's in the session
+    print("📝 Session contains:")
+    for event in session.events:
+        text = (
+            event.content.parts[0].text[:60]
+            if event.content and event.content.parts
+            else "(empty)"
+        )
+        print(f"  {event.content.role}: {text}...")
+
+    # This is the key method!
+    await memory_service.add_session_to_memory(session)
+
+    logger.success("✅ Session added to memory!")
+
+    # Create a new runner with the updated agent (load_memory tool)
+    runner = build_memory_runner(session_service, memory_service)
+
+    await run_session(runner, "What is my favorite color?", "color-test")
+
+    await run_session(runner, "My birthday is on March 15th.", "birthday-session-01")
+
+    # Manually save the session to memory
+    birthday_session = await session_service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id="birthday-session-01"
+    )
+
+    await memory_service.add_session_to_memory(birthday_session)
+
+    logger.info("✅ Birthday session saved to memory!")
+
+    # Test retrieval in a NEW session
+    await run_session(
+        runner, "When is my birthday?", "birthday-session-02"  # Different session ID
+    )
+
+    # Search for color preferences
+    search_response = await memory_service.search_memory(
+        app_name=APP_NAME, user_id=USER_ID, query="What is the user's favorite color?"
+    )
+
+    print("🔍 Search Results:")
+    print(f"  Found {len(search_response.memories)} relevant memories")
+    print()
+
+    for memory in search_response.memories:
+        if memory.content and memory.content.parts:
+            text = memory.content.parts[0].text[:80]
+            print(f"  [{memory.author}]: {text}...")
+
+    auto_runner = build_auto_runner(session_service, memory_service)  # Same services from Section 3
+
+    #  Test 1: Tell the agent about a gift (first conversation)
+    # The callback will automatically save this to memory when the turn completes
+    await run_session(
+        auto_runner,
+        "I gifted a new toy to my nephew on his 1st birthday!",
+        "auto-save-test",
+    )
+
+    # Test 2: Ask about the gift in a NEW session (second conversation)
+    # The agent should retrieve the memory using preload_memory and answer correctly
+    await run_session(
+        auto_runner,
+        "What did I gift my nephew?",
+        "auto-save-test-2",  # Different session ID - proves memory works across sessions!
+    )
+
 
 '''
 How often should you save Sessions to Memory?¶
@@ -329,6 +352,12 @@ Search:  Returns all 50 messages → Agent must process 10,000 tokens
 
 This doesn't scale. We need consolidation.
 
+Local consolidation (memory_consolidation.py, the default memory service of build_auto_runner):
+
+Session: 50 messages = 10,000 tokens
+Memory:  Only user statements, merged into fact records ("The user's birthday is ...")
+Search:  Returns the top-k current facts → a few dozen tokens per preload
+
 Summary
 
 You've learned the core mechanics of Memory in ADK:
@@ -357,3 +386,6 @@ You've learned the core mechanics of Memory in ADK:
 🎉 Congratulations! You've learned Memory Management in ADK!
 '''
 
+
+if __name__ == "__main__":
+    asyncio.run(main())
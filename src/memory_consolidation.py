@@ -0,0 +1,263 @@
+'''
+Memory Consolidation
+
+Raw storage keeps every message, so a 50-message session becomes ~10,000
+tokens that preload_memory pushes into every prompt. Consolidation turns raw
+events into a small set of fact records per user:
+
+    Raw events  → "My birthday is on March 15th." / "Happy early birthday! ..."
+    Fact record → birthday: "The user's birthday is on March 15th."
+
+    Deduplicate → the same fact said twice is stored once
+    Supersede   → a newer fact with the same key replaces the old one
+                  (e.g. an updated birthday)
+
+The MemoryConsolidator runs in the background after add_session_to_memory()
+and SemanticMemoryService(consolidator=...) then answers searches from the
+fact records instead of raw turns.
+'''
+
+import asyncio
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Protocol
+
+import numpy as np
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.models import LlmRequest
+from google.adk.models.base_llm import BaseLlm
+from google.genai import types
+from loguru import logger
+
+from semantic_memory import HashingEmbedder, VectorIndex
+
+
+@dataclass
+class FactRecord:
+    """One consolidated fact about a user."""
+
+    key: str
+    text: str
+    timestamp: str | None = None
+    sources: list[str] = field(default_factory=list)
+
+
+class Summarizer(Protocol):
+    """Turns a batch of raw memory entries into fact records."""
+
+    async def summarize(self, entries: list[MemoryEntry]) -> list[FactRecord]: ...
+
+
+def _entry_text(entry: MemoryEntry) -> str:
+    if not entry.content or not entry.content.parts:
+        return ""
+    return " ".join(part.text for part in entry.content.parts if part.text)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9 ]", " ", text.lower())).strip()
+
+
+class RuleBasedSummarizer:
+    """Local, deterministic stand-in for an LLM summarizer.
+
+    Only user-authored statements become facts; questions and model replies
+    are dropped. "My <attribute> is <value>" sentences are keyed by the
+    attribute, so a later statement about the same attribute supersedes the
+    earlier one. "I live/work ..." sentences are keyed by the verb; any other
+    statement is kept verbatim and only deduplicated.
+    """
+
+    _MY_ATTRIBUTE = re.compile(
+        r"\bmy ([a-z][a-z' -]{1,40}?) (?:is|are|was|were) (?:now )?(.+)$", re.IGNORECASE
+    )
+    _I_SUPERSEDING = re.compile(r"\bi (?:now )?(live|work|study)\b(.*)$", re.IGNORECASE)
+    _SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+    def __init__(self, max_fact_chars: int = 200):
+        self.max_fact_chars = max_fact_chars
+
+    def _facts_from_sentence(self, sentence: str) -> FactRecord | None:
+        sentence = sentence.strip()
+        if not sentence or sentence.endswith("?"):
+            return None
+        sentence = sentence.rstrip(".!")[: self.max_fact_chars]
+
+        if match := self._MY_ATTRIBUTE.search(sentence):
+            attribute, value = match.group(1).strip().lower(), match.group(2).strip()
+            return FactRecord(key=attribute, text=f"The user's {attribute} is {value}.")
+        if match := self._I_SUPERSEDING.search(sentence):
+            verb = match.group(1).lower()
+            return FactRecord(key=verb, text=f"The user {verb}s{match.group(2)}.")
+        return FactRecord(key=f"said:{_normalize(sentence)}", text=f"The user said: {sentence}.")
+
+    async def summarize(self, entries: list[MemoryEntry]) -> list[FactRecord]:
+        facts = []
+        for entry in entries:
+            if entry.author != "user":
+                continue
+            for sentence in self._SENTENCE_END.split(_entry_text(entry)):
+                if fact := self._facts_from_sentence(sentence):
+                    fact.timestamp = entry.timestamp
+                    fact.sources = [entry.id] if entry.id else []
+                    facts.append(fact)
+        return facts
+
+
+class LlmSummarizer:
+    """Summarizer backed by a model, e.g. Gemini(model="gemini-2.5-flash-lite").
+
+    The model is asked for one "key | fact" line per durable fact, where the
+    key names the attribute the fact is about so newer facts can supersede
+    older ones.
+    """
+
+    INSTRUCTION = """Extract durable facts about the user from the conversation below.
+Output one line per fact using the format: key | fact
+- key: a short lowercase name for what the fact is about (e.g. birthday, favorite color)
+- fact: one short sentence in third person
+Ignore greetings, questions and anything the assistant said that the user did not confirm.
+Output nothing else."""
+
+    def __init__(self, llm: BaseLlm):
+        self.llm = llm
+
+    async def summarize(self, entries: list[MemoryEntry]) -> list[FactRecord]:
+        transcript = "\n".join(f"{e.author}: {_entry_text(e)}" for e in entries)
+        request = LlmRequest(
+            model=self.llm.model,
+            contents=[types.Content(role="user", parts=[types.Part(text=transcript)])],
+            config=types.GenerateContentConfig(system_instruction=self.INSTRUCTION, temperature=0),
+        )
+        text = ""
+        async for response in self.llm.generate_content_async(request):
+            if response.content and response.content.parts:
+                text += "".join(p.text for p in response.content.parts if p.text)
+
+        timestamp = max((e.timestamp for e in entries if e.timestamp), default=None)
+        sources = [e.id for e in entries if e.id]
+        facts = []
+        for line in text.splitlines():
+            key, sep, fact = line.partition("|")
+            if sep and key.strip() and fact.strip():
+                facts.append(
+                    FactRecord(
+                        key=key.strip().lower(),
+                        text=fact.strip(),
+                        timestamp=timestamp,
+                        sources=sources,
+                    )
+                )
+        return facts
+
+
+class _FactTable:
+    """Current facts of one user plus their embeddings.
+
+    Superseded facts are tombstoned (row set to None) instead of being
+    removed from the index, and filtered out at search time.
+    """
+
+    def __init__(self, dim: int):
+        self.index = VectorIndex(dim, ann_threshold=None)
+        self.rows: list[FactRecord | None] = []
+        self.by_key: dict[str, int] = {}
+        self.texts: set[str] = set()
+
+
+class MemoryConsolidator:
+    """Background stage that merges raw events into fact records per user.
+
+    Args:
+        summarizer: Any Summarizer; defaults to the local RuleBasedSummarizer.
+        embedder: Embedder used to index fact records (HashingEmbedder by
+                  default).
+    """
+
+    def __init__(self, summarizer: Summarizer | None = None, embedder=None):
+        self.summarizer = summarizer or RuleBasedSummarizer()
+        self.embedder = embedder or HashingEmbedder()
+        self._lock = threading.Lock()
+        self._tables: dict[tuple[str, str], _FactTable] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, app_name: str, user_id: str, entries: list[MemoryEntry]):
+        """Schedules consolidation of new raw entries without waiting for it."""
+        task = asyncio.create_task(self.consolidate(app_name, user_id, entries))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Waits for every scheduled consolidation to finish."""
+        # Done tasks leave _tasks only when their callbacks run on the loop, so
+        # wait on the pending ones: gathering finished tasks never yields.
+        while pending := [task for task in self._tasks if not task.done()]:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def consolidate(self, app_name: str, user_id: str, entries: list[MemoryEntry]):
+        try:
+            facts = await self.summarizer.summarize(entries)
+        except Exception as e:
+            logger.error(f"Memory consolidation failed for {app_name}/{user_id}: {e}")
+            return
+        if facts:
+            self.add_facts(app_name, user_id, facts)
+
+    def add_facts(self, app_name: str, user_id: str, facts: list[FactRecord]):
+        """Applies fact records: drops duplicates and supersedes older keys."""
+        with self._lock:
+            table = self._tables.setdefault((app_name, user_id), _FactTable(self.embedder.dim))
+            fresh = []
+            for fact in facts:
+                if _normalize(fact.text) in table.texts:
+                    continue
+                previous = table.by_key.get(fact.key)
+                if previous is not None:
+                    old = table.rows[previous]
+                    if old.timestamp and fact.timestamp and old.timestamp > fact.timestamp:
+                        continue
+                    table.texts.discard(_normalize(old.text))
+                    table.rows[previous] = None
+                    logger.debug(f"🧹 Fact '{fact.key}' superseded: {old.text!r} → {fact.text!r}")
+                table.by_key[fact.key] = len(table.rows)
+                table.texts.add(_normalize(fact.text))
+                table.rows.append(fact)
+                fresh.append(fact)
+            if fresh:
+                first = len(table.rows) - len(fresh)
+                table.index.add(
+                    self.embedder.embed([f.text for f in fresh]),
+                    np.arange(first, len(table.rows)),
+                )
+
+    def facts(self, app_name: str, user_id: str) -> list[FactRecord]:
+        """Returns the current (non-superseded) facts of a user."""
+        with self._lock:
+            table = self._tables.get((app_name, user_id))
+            return [f for f in table.rows if f is not None] if table else []
+
+    def search(
+        self, app_name: str, user_id: str, query_vector: np.ndarray, top_k: int, min_score: float
+    ) -> list[MemoryEntry]:
+        with self._lock:
+            table = self._tables.get((app_name, user_id))
+            if table is None:
+                return []
+            # Over-fetch so tombstoned rows do not starve the result.
+            ids, scores = table.index.search(query_vector, top_k + len(table.rows) - len(table.by_key))
+            hits = [
+                (table.rows[i], float(s))
+                for i, s in zip(ids, scores)
+                if table.rows[i] is not None and s >= min_score
+            ][:top_k]
+
+        return [
+            MemoryEntry(
+                content=types.Content(role="user", parts=[types.Part(text=fact.text)]),
+                author="memory",
+                timestamp=fact.timestamp,
+                custom_metadata={"fact_key": fact.key, "sources": fact.sources, "score": score},
+            )
+            for fact, score in hits
+        ]
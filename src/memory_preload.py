@@ -0,0 +1,164 @@
+'''
+Budgeted Preload Memory
+
+ADK's preload_memory pastes every memory returned by search_memory() into the
+system instruction on every turn. For a long-lived user that block keeps
+growing, so each request gets larger and slower. BudgetedPreloadMemoryTool
+does the same job under a fixed token budget:
+
+    Rank  → relevance (search score or keyword overlap) blended with recency
+    Pack  → greedily keep the best memories that still fit in the budget
+    Report → what was kept and dropped is logged and saved to session state
+'''
+
+import math
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.models import LlmRequest
+from google.adk.tools import ToolContext
+from google.adk.tools.base_tool import BaseTool
+from loguru import logger
+
+from tokens import estimate_tokens
+
+REPORT_STATE_KEY = "temp:preload_memory_report"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class PreloadReport:
+    """Outcome of one budgeted preload."""
+
+    token_budget: int
+    tokens_used: int = 0
+    kept: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+
+
+def _memory_text(memory: MemoryEntry) -> str:
+    if not memory.content or not memory.content.parts:
+        return ""
+    return " ".join(part.text for part in memory.content.parts if part.text)
+
+
+def _memory_line(memory: MemoryEntry) -> str:
+    text = _memory_text(memory)
+    line = f"{memory.author}: {text}" if memory.author else text
+    return f"Time: {memory.timestamp}\n{line}" if memory.timestamp else line
+
+
+def _keyword_overlap(query: str, text: str) -> float:
+    query_words = set(_WORD_RE.findall(query.lower()))
+    text_words = set(_WORD_RE.findall(text.lower()))
+    if not query_words or not text_words:
+        return 0.0
+    return len(query_words & text_words) / len(query_words)
+
+
+def _parse_timestamp(timestamp: str | None) -> float | None:
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except ValueError:
+        return None
+
+
+class BudgetedPreloadMemoryTool(BaseTool):
+    """preload_memory with relevance/recency ranking and a token budget.
+
+    Args:
+        token_budget: Maximum estimated tokens of memory text added to the
+                      system instruction per request.
+        relevance_weight: Weight of relevance vs. recency in the ranking
+                          (1.0 ranks by relevance only).
+        recency_half_life_days: Age, relative to the newest candidate, at
+                                which a memory's recency score halves.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 400,
+        relevance_weight: float = 0.8,
+        recency_half_life_days: float = 30.0,
+    ):
+        # Name and description are not used because this tool only
+        # changes llm_request.
+        super().__init__(name="preload_memory", description="preload_memory")
+        self.token_budget = token_budget
+        self.relevance_weight = relevance_weight
+        self.recency_half_life_days = recency_half_life_days
+        self.last_report: PreloadReport | None = None
+
+    def rank(self, query: str, memories: list[MemoryEntry]) -> list[tuple[float, MemoryEntry]]:
+        """Returns (score, memory) pairs, best first."""
+        times = [_parse_timestamp(m.timestamp) for m in memories]
+        newest = max((t for t in times if t is not None), default=None)
+        half_life = self.recency_half_life_days * 86400
+
+        ranked = []
+        for memory, ts in zip(memories, times):
+            relevance = memory.custom_metadata.get("score")
+            if relevance is None:
+                relevance = _keyword_overlap(query, _memory_text(memory))
+            recency = 0.5 if ts is None or newest is None else math.exp2(-(newest - ts) / half_life)
+            w = self.relevance_weight
+            ranked.append((w * float(relevance) + (1 - w) * recency, memory))
+        ranked.sort(key=lambda pair: pair[0], reverse=True)
+        return ranked
+
+    def pack(self, query: str, memories: list[MemoryEntry]) -> tuple[list[str], PreloadReport]:
+        """Greedily selects memory lines that fit in the token budget."""
+        report = PreloadReport(token_budget=self.token_budget)
+        lines = []
+        for _, memory in self.rank(query, memories):
+            if not _memory_text(memory):
+                continue
+            line = _memory_line(memory)
+            cost = estimate_tokens(line)
+            if report.tokens_used + cost <= self.token_budget:
+                lines.append(line)
+                report.tokens_used += cost
+                report.kept.append(memory.id or line[:60])
+            else:
+                report.dropped.append(memory.id or line[:60])
+        return lines, report
+
+    async def process_llm_request(
+        self, *, tool_context: ToolContext, llm_request: LlmRequest
+    ) -> None:
+        user_content = tool_context.user_content
+        if not user_content or not user_content.parts or not user_content.parts[0].text:
+            return
+
+        user_query = user_content.parts[0].text
+        try:
+            response = await tool_context.search_memory(user_query)
+        except Exception as e:
+            logger.warning(f"Failed to preload memory for query {user_query!r}: {e}")
+            return
+        if not response.memories:
+            return
+
+        lines, report = self.pack(user_query, response.memories)
+        self.last_report = report
+        tool_context.state[REPORT_STATE_KEY] = asdict(report)
+        logger.debug(
+            f"🧠 Preloaded {len(report.kept)} memories ({report.tokens_used}/{report.token_budget}"
+            f" tokens), dropped {len(report.dropped)}."
+        )
+        if not lines:
+            return
+
+        full_memory_text = "\n".join(lines)
+        si = f"""The following content is from your previous conversations with the user.
+They may be useful for answering the user's current query.
+<PAST_CONVERSATIONS>
+{full_memory_text}
+</PAST_CONVERSATIONS>
+"""
+        llm_request.append_instructions([si])
@@ -0,0 +1,222 @@
+'''
+Model Catalog
+
+Which model names work was kept by hand in comments (agent.py,
+agent_web_prototype_testing.md) and went stale: app.py still asks for
+gemini-2.0-flash-exp, and a dead name only showed up as a 404 after the
+retries and the rate limiter had already spent time on it. ModelCatalog
+asks the API once instead:
+
+    Listing   → models.list() with each model's supported actions
+                (generateContent, createCachedContent, batchGenerateContent,
+                ...) and token limits
+    Disk      → the listing is kept in a JSON file for model_catalog_ttl
+                seconds (one entry per API endpoint, so FakeGemini listings
+                never mix with real ones); startups within the TTL make no
+                call at all
+    Fallbacks → resolve() walks the requested name and then its fallback
+                chain (the `fallbacks:` section of agent.yaml) and returns the
+                first model that supports the action
+    Offline   → if the listing fails (no key, no network) a stale file is
+                used; with no file at all nothing is filtered and the
+                requested name is used as before
+
+ModelRegistry.get_model() resolves every name through the default catalog,
+and only wraps models that support createCachedContent in ContextCachedLlm.
+
+    python src/main.py models            # what the catalog knows
+    python src/main.py models --refresh  # list again now
+'''
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+from google.genai import Client
+from loguru import logger
+
+from config import get_settings, load_agent_config
+
+DEFAULT_ENDPOINT = "https://generativelanguage.googleapis.com"
+
+ClientSource = Client | Callable[[], Client] | None
+
+
+class ModelUnavailableError(LookupError):
+    """No model of a fallback chain supports the requested action."""
+
+    def __init__(self, chain: list[str], action: str):
+        super().__init__(f"None of {', '.join(chain)} supports {action} (python src/main.py models --refresh).")
+        self.chain = chain
+        self.action = action
+
+
+@dataclass(frozen=True)
+class ModelInfo:
+    """What models.list() reported for one model."""
+
+    name: str
+    actions: tuple[str, ...]
+    input_token_limit: int | None = None
+    output_token_limit: int | None = None
+
+    def supports(self, action: str) -> bool:
+        return action in self.actions
+
+
+def _endpoint() -> str:
+    return os.getenv("GOOGLE_GEMINI_BASE_URL") or DEFAULT_ENDPOINT
+
+
+class ModelCatalog:
+    """Cached models.list() with fallback resolution.
+
+    Args:
+        path: JSON file of the listing; defaults to the model_catalog_path setting.
+        ttl: Seconds a listing is trusted; defaults to model_catalog_ttl.
+        fallbacks: Model name → names to try after it; defaults to the
+                   `fallbacks:` section of agent.yaml.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ttl: float | None = None,
+        fallbacks: dict[str, list[str]] | None = None,
+    ):
+        settings = get_settings()
+        self.path = Path(path or settings.model_catalog_path)
+        self.ttl = settings.model_catalog_ttl if ttl is None else ttl
+        self.fallbacks = (load_agent_config().get("fallbacks") or {}) if fallbacks is None else fallbacks
+        self._lock = threading.Lock()
+        self._models: dict[str, ModelInfo] | None = None
+        self._fetched_at = 0.0
+        self._failed_at: float | None = None
+        self.stats = {"listings": 0, "disk_hits": 0, "failures": 0, "fallbacks": 0}
+
+    # ---- listing ----
+
+    def _read_file(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self) -> bool:
+        entry = self._read_file().get(_endpoint())
+        if not entry:
+            return False
+        self._models = {m["name"]: ModelInfo(m["name"], tuple(m["actions"]), m.get("input_token_limit"),
+                                             m.get("output_token_limit")) for m in entry["models"]}
+        self._fetched_at = entry["fetched_at"]
+        return True
+
+    def _save(self):
+        # Expired listings of other endpoints (e.g. FakeGemini's random ports) are dropped.
+        data = {k: v for k, v in self._read_file().items() if time.time() - v.get("fetched_at", 0) < self.ttl}
+        data[_endpoint()] = {
+            "fetched_at": self._fetched_at,
+            "models": [{**asdict(m), "actions": list(m.actions)} for m in self._models.values()],
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            tmp.replace(self.path)
+        except OSError as e:
+            logger.warning(f"Model catalog not saved to {self.path}: {e}")
+
+    def _list(self, client: Client) -> dict[str, ModelInfo]:
+        models = {}
+        for model in client.models.list(config={"page_size": 1000, "http_options": {"timeout": 10_000}}):
+            name = (model.name or "").removeprefix("models/")
+            models[name] = ModelInfo(
+                name, tuple(model.supported_actions or ()), model.input_token_limit, model.output_token_limit
+            )
+        return models
+
+    def models(self, client: ClientSource = None, refresh: bool = False) -> dict[str, ModelInfo] | None:
+        """Model name → ModelInfo, or None when there is no listing at all (offline, first run).
+
+        Listed again when the listing is older than the TTL (or on refresh);
+        a failed listing is not retried for a minute. `client` may be a
+        function returning the Client, so it is only built when needed.
+        """
+        with self._lock:
+            if self._models is None and not refresh and self._load():
+                self.stats["disk_hits"] += 1
+            fresh = self._models is not None and time.time() - self._fetched_at < self.ttl
+            recently_failed = self._failed_at is not None and time.monotonic() - self._failed_at < 60
+            if (fresh and not refresh) or (recently_failed and not refresh):
+                return self._models
+            try:
+                started = time.perf_counter()
+                self._models = self._list(client() if callable(client) else client or Client())
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                self.stats["failures"] += 1
+                state = "using the stale listing" if self._models else "model names are not checked"
+                logger.warning(f"📋 models.list() failed ({type(e).__name__}: {e}); {state}.")
+                return self._models
+            self._fetched_at, self._failed_at = time.time(), None
+            self.stats["listings"] += 1
+            self._save()
+            logger.debug(f"📋 {len(self._models)} models listed in {time.perf_counter() - started:.2f}s.")
+            return self._models
+
+    # ---- lookups ----
+
+    def supports(self, model: str, action: str = "generateContent", client: ClientSource = None) -> bool | None:
+        """Whether a model supports an action; None when there is no listing."""
+        models = self.models(client)
+        if models is None:
+            return None
+        return model in models and models[model].supports(action)
+
+    def chain(self, model: str) -> list[str]:
+        """The model followed by its fallbacks (transitively, each name once)."""
+        chain, pending = [], [model]
+        while pending:
+            name = pending.pop(0)
+            if name not in chain:
+                chain.append(name)
+                pending.extend(self.fallbacks.get(name) or [])
+        return chain
+
+    def resolve(self, model: str, action: str = "generateContent", client: ClientSource = None) -> str:
+        """The first model of model's fallback chain that supports `action`.
+
+        Raises:
+            ModelUnavailableError: The listing has none of the chain.
+        """
+        models = self.models(client)
+        if models is None:
+            return model
+        chain = self.chain(model)
+        for name in chain:
+            if name in models and models[name].supports(action):
+                if name != model:
+                    self.stats["fallbacks"] += 1
+                    logger.warning(f"📋 {model} is not available for {action}; using {name}.")
+                return name
+        raise ModelUnavailableError(chain, action)
+
+
+_default_catalog: ModelCatalog | None = None
+
+
+def default_catalog() -> ModelCatalog:
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = ModelCatalog()
+    return _default_catalog
+
+
+def set_default_catalog(catalog: ModelCatalog | None):
+    """Replaces the catalog behind get_model() (None: build a new default on next use)."""
+    global _default_catalog
+    _default_catalog = catalog
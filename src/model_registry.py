@@ -0,0 +1,239 @@
+'''
+Model Registry
+
+Each agent used to build its own Gemini(...) object, and each Gemini builds
+its own google.genai Client (and HTTP connection pool) on first use. With six
+agents in multiagent.py that is six TLS handshakes before the pipeline gets
+going, and no connection is ever reused between agents.
+
+get_model() instead hands out one model per (model name, retry config):
+
+    Transport → one shared httpx client pool (keep-alive) for the process,
+                plus one async pool per event loop (an httpx.AsyncClient's
+                connections belong to the loop that opened them)
+    Client    → one google.genai Client per retry configuration and loop
+    Model     → one CachedLlm(ResilientLlm(RateLimitedLlm(ContextCachedLlm(Gemini))))
+                per (model, config), built lazily on first use and shared by
+                every agent; ResilientLlm does the retries of retry_config
+                (jittered, Retry-After aware, circuit breaker), so the
+                Gemini itself is built with attempts=1
+    Name      → resolved through the model catalog first (model_catalog.py):
+                a name the API does not list is replaced by the first
+                available model of its fallback chain, and models without
+                createCachedContent get no ContextCachedLlm
+'''
+
+import asyncio
+import json
+import threading
+import time
+import weakref
+
+import httpx
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.genai import Client, types
+from loguru import logger
+
+from config import get_settings
+from context_cache import ContextCachedLlm
+from llm_cache import CachedLlm
+from model_catalog import default_catalog
+from rate_limiter import RateLimitedLlm
+from retry import ResilientLlm, RetryPolicy
+
+
+class PooledGemini(Gemini):
+    """Gemini that takes its Client from a ModelRegistry (the one of the running loop)."""
+
+    registry: "ModelRegistry"
+
+    @property
+    def api_client(self) -> Client:
+        return self.registry.client(self.retry_options)
+
+
+def _options_key(retry_options: types.HttpRetryOptions | None) -> str:
+    if retry_options is None:
+        return "{}"
+    return json.dumps(retry_options.model_dump(mode="json", exclude_none=True), sort_keys=True)
+
+
+class ModelRegistry:
+    """Lazily builds and shares models, clients and HTTP connections.
+
+    Args:
+        max_connections: Upper bound on open connections in the shared pool.
+        max_keepalive_connections: Idle connections kept open for reuse.
+        keepalive_expiry: Seconds an idle connection is kept open.
+        cache: Wrap models in CachedLlm.
+        rate_limit: Wrap models in RateLimitedLlm.
+        context_cache: Wrap models in ContextCachedLlm (Gemini context caching
+                       of the instruction + tools prefix).
+        resilient: Wrap models in ResilientLlm and turn off google.genai's
+                   own retries.
+        hedge: Let ResilientLlm hedge slow calls; defaults to the
+               hedge_requests setting.
+        catalog: Resolve model names through the model catalog (fallback
+                 chains, capability checks).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        max_keepalive_connections: int = 16,
+        keepalive_expiry: float = 60.0,
+        cache: bool = True,
+        rate_limit: bool = True,
+        context_cache: bool = True,
+        resilient: bool = True,
+        hedge: bool | None = None,
+        catalog: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.cache = cache
+        self.rate_limit = rate_limit
+        self.context_cache = context_cache
+        self.resilient = resilient
+        self.hedge = hedge
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._sync_http: httpx.Client | None = None
+        self._async_http: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._clients: dict[str, Client] = {}  # used outside any event loop (sync calls only)
+        self._loop_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, Client]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._models: dict[tuple[str, str], BaseLlm] = {}
+        self._stats = {"lookups": 0, "models_built": 0, "clients_built": 0, "build_seconds": 0.0}
+
+    def client(self, retry_options: types.HttpRetryOptions | None) -> Client:
+        """Returns the shared Client for a retry configuration on the running event loop.
+
+        Each loop gets its own Clients and async pool, dropped with the loop,
+        so a model shared by several asyncio.run() calls never touches a
+        connection of a closed loop.
+        """
+        key = _options_key(retry_options)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            clients = self._clients if loop is None else self._loop_clients.setdefault(loop, {})
+            if key not in clients:
+                if self._sync_http is None:
+                    self._sync_http = httpx.Client(limits=self.limits)
+                async_http = None
+                if loop is not None:
+                    if loop not in self._async_http:
+                        self._async_http[loop] = httpx.AsyncClient(limits=self.limits)
+                    async_http = self._async_http[loop]
+                clients[key] = Client(
+                    http_options=types.HttpOptions(
+                        retry_options=retry_options,
+                        httpx_client=self._sync_http,
+                        httpx_async_client=async_http,
+                    )
+                )
+                self._stats["clients_built"] += 1
+            return clients[key]
+
+    def get_model(
+        self, model: str, retry_options: types.HttpRetryOptions | None = None
+    ) -> BaseLlm:
+        """Returns the shared model for a (model name, retry options) pair.
+
+        With the catalog on, the name is resolved first, so the model may be a
+        fallback of the one asked for (ModelUnavailableError if none works).
+        """
+        context_cache = self.context_cache
+        if self.catalog:
+            catalog = default_catalog()
+            model = catalog.resolve(model, client=lambda: self.client(None))
+            context_cache = context_cache and catalog.supports(model, "createCachedContent") is not False
+        key = (model, _options_key(retry_options))
+        with self._lock:
+            self._stats["lookups"] += 1
+            if key in self._models:
+                return self._models[key]
+
+            start = time.perf_counter()
+            # Retries happen in ResilientLlm, outside the rate limiter, so each
+            # retry waits for its own rate-limit slot.
+            http_retries = types.HttpRetryOptions(attempts=1) if self.resilient else retry_options
+            llm: BaseLlm = PooledGemini(model=model, retry_options=http_retries, registry=self)
+            if context_cache:
+                llm = ContextCachedLlm(llm)
+            if self.rate_limit:
+                llm = RateLimitedLlm(llm)
+            if self.resilient:
+                hedge = get_settings().hedge_requests if self.hedge is None else self.hedge
+                llm = ResilientLlm(llm, policy=RetryPolicy.from_http_options(retry_options), hedge=hedge)
+            if self.cache:
+                llm = CachedLlm(llm)
+            self._models[key] = llm
+            self._stats["models_built"] += 1
+            self._stats["build_seconds"] += time.perf_counter() - start
+            logger.debug(f"🔌 Model {model} built and registered.")
+            return llm
+
+    def pool_stats(self) -> dict:
+        """Registry counters plus the state of the shared connection pool."""
+        clients = len(self._clients) + sum(len(c) for c in list(self._loop_clients.values()))
+        stats = dict(self._stats, models=len(self._models), clients=clients)
+        stats["reuses"] = stats["lookups"] - stats["models_built"]
+        connections = []
+        for async_http in list(self._async_http.values()):
+            pool = getattr(getattr(async_http, "_transport", None), "_pool", None)
+            connections += list(getattr(pool, "connections", []))
+        stats["open_connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+        return stats
+
+    async def aclose(self):
+        """Closes the shared HTTP connections (pools of other, finished loops are just dropped)."""
+        async_http = self._async_http.pop(asyncio.get_running_loop(), None)
+        if async_http is not None:
+            await async_http.aclose()
+        if self._sync_http is not None:
+            self._sync_http.close()
+        self._sync_http = None
+        self._async_http.clear()
+        self._clients.clear()
+        self._loop_clients.clear()
+        self._models.clear()
+
+
+_default_registry: ModelRegistry | None = None
+
+
+def default_registry() -> ModelRegistry:
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ModelRegistry()
+    return _default_registry
+
+
+def set_default_registry(registry: ModelRegistry):
+    """Replaces the registry behind get_model(), e.g. one without caching for benchmarks."""
+    global _default_registry
+    _default_registry = registry
+
+
+def get_model(model: str, retry_options: types.HttpRetryOptions | None = None) -> BaseLlm:
+    """Shortcut for default_registry().get_model(...).
+
+    Example:
+        Agent(model=get_model("gemini-2.5-flash-lite", retry_config), ...)
+    """
+    return default_registry().get_model(model, retry_options)
+
+
+PooledGemini.model_rebuild()
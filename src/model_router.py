@@ -0,0 +1,354 @@
+'''
+Model Cascade Router
+
+Every agent hard-codes one model (gemini-2.5-flash-lite, the 09-2025
+preview or gemini-2.0-flash-exp), so a hard request gets the weak model's
+answer and an easy one would pay for a strong model if we switched. With
+model_routing=true and a `routing:` section in agent.yaml, route_agents()
+gives LlmAgents a CascadeLlm instead:
+
+    Tiers     → ordered cheapest / fastest first; an agent starts at its own
+                model and escalates to the tiers above it (models not on the
+                ladder are left alone), unless routing.agents gives it tiers
+    Start     → the first healthy tier: circuit not open (retry.py), recent
+                error rate below max_error_rate, recent p95 below
+                latency_slo_ms; stats are live and per model name, and only
+                cover the last window_seconds, so a skipped tier is tried
+                again once its bad samples have aged out (an open circuit
+                once its reset_timeout has passed, for the half-open probe)
+    Checks    → the answer of a tier is validated; a failed check escalates
+                to the next tier:
+                  malformed_tool_call → unknown function, missing required
+                                        argument or MALFORMED_FUNCTION_CALL
+                  empty_answer        → no text and no function call
+                  missing_output_key  → the agent has an output_key (or
+                                        output_schema) and the final answer
+                                        is empty (or not valid for it)
+                  low_confidence      → avg_logprobs below min_avg_logprob
+    Errors    → a tier that raises (after its own retries) escalates too;
+                only the last tier's error reaches the agent
+    Streaming → streamed calls go to the start tier and are not validated
+                (the chunks are already with the caller)
+
+Responses carry custom_metadata["routed_model"] and ["escalations"], which
+TracingPlugin records on the model span.
+
+agent.yaml:
+    routing:
+      tiers: [gemini-2.5-flash-lite, gemini-2.5-flash, gemini-2.5-pro]
+      latency_slo_ms: 8000
+      agents:
+        EditorAgent: {tiers: [gemini-2.5-flash, gemini-2.5-pro]}
+'''
+
+import json
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.base_llm import BaseLlm
+from google.adk.tools import AgentTool
+from google.genai import types
+from loguru import logger
+from pydantic import BaseModel, PrivateAttr
+
+from config import AGENT_CONFIG, get_settings, load_agent_config
+from model_registry import get_model
+from retry import RollingPercentile, circuit_breaker
+
+CHECKS = ("malformed_tool_call", "empty_answer", "missing_output_key", "low_confidence")
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """Routing section of agent.yaml (see the module docstring)."""
+
+    tiers: tuple[str, ...]
+    checks: tuple[str, ...] = ("malformed_tool_call", "empty_answer", "missing_output_key")
+    min_avg_logprob: float | None = None
+    latency_slo_ms: float | None = None
+    max_error_rate: float = 0.5
+    min_samples: int = 5
+    window_seconds: float = 60.0
+    agents: dict = field(default_factory=dict, hash=False)
+
+    @classmethod
+    def from_dict(cls, data: dict, default_model: str | None = None) -> "RoutingPolicy":
+        known = {f.name for f in fields(cls)}
+        if unknown := set(data) - known:
+            raise ValueError(f"Unknown routing keys in agent.yaml: {', '.join(sorted(unknown))}")
+        tiers = tuple(data.get("tiers") or ([default_model] if default_model else []))
+        if not tiers:
+            raise ValueError("routing needs at least one tier (routing.tiers or model).")
+        checks = tuple(data.get("checks", cls.checks))
+        if bad := set(checks) - set(CHECKS):
+            raise ValueError(f"Unknown routing checks: {', '.join(sorted(bad))} (known: {', '.join(CHECKS)})")
+        return cls(**{**data, "tiers": tiers, "checks": checks, "agents": dict(data.get("agents") or {})})
+
+    def for_agent(self, name: str) -> "RoutingPolicy":
+        """This policy with the overrides of one agent applied."""
+        overrides = dict(self.agents.get(name) or {})
+        if "tiers" in overrides:
+            overrides["tiers"] = tuple(overrides["tiers"])
+        if "checks" in overrides:
+            overrides["checks"] = tuple(overrides["checks"])
+        return replace(self, **overrides) if overrides else self
+
+
+def load_routing_policy(path: str | Path = AGENT_CONFIG) -> RoutingPolicy | None:
+    """The routing policy of agent.yaml, or None if it has no routing section."""
+    config = load_agent_config(path)
+    if not config.get("routing"):
+        return None
+    return RoutingPolicy.from_dict(config["routing"], config.get("model"))
+
+
+class ModelHealth:
+    """Latencies and outcomes of one model name over the last window_seconds."""
+
+    def __init__(self, max_samples: int = 500):
+        self.samples: deque[tuple[float, float, bool]] = deque(maxlen=max_samples)  # (time, seconds, ok)
+
+    def record(self, seconds: float, ok: bool):
+        self.samples.append((time.monotonic(), seconds, ok))
+
+    def _recent(self, window_seconds: float) -> list[tuple[float, float, bool]]:
+        cutoff = time.monotonic() - window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return list(self.samples)
+
+    def summary(self, window_seconds: float) -> dict:
+        recent = self._recent(window_seconds)
+        latencies = RollingPercentile(window=len(recent) or 1)
+        for _, seconds, ok in recent:
+            if ok:
+                latencies.add(seconds)
+        p95 = latencies.percentile(95)
+        return {
+            "samples": len(recent),
+            "error_rate": sum(not ok for *_, ok in recent) / len(recent) if recent else 0.0,
+            "p95_ms": None if p95 is None else p95 * 1000,
+        }
+
+
+_health: dict[str, ModelHealth] = {}
+
+
+def model_health(model: str) -> ModelHealth:
+    """The process-wide health record of a model name."""
+    if model not in _health:
+        _health[model] = ModelHealth()
+    return _health[model]
+
+
+def _parts(responses: list[LlmResponse]) -> list[types.Part]:
+    return [p for r in responses if r.content for p in r.content.parts or [] if not p.thought]
+
+
+def _declarations(llm_request: LlmRequest) -> dict[str, types.FunctionDeclaration]:
+    declared = {}
+    for tool in (llm_request.config.tools if llm_request.config else None) or []:
+        for declaration in getattr(tool, "function_declarations", None) or []:
+            declared[declaration.name] = declaration
+    return declared
+
+
+def failed_check(
+    policy: RoutingPolicy,
+    llm_request: LlmRequest,
+    responses: list[LlmResponse],
+    output_key: str | None = None,
+    output_schema: type[BaseModel] | None = None,
+) -> str | None:
+    """Name of the first check the responses fail, or None."""
+    parts = _parts(responses)
+    calls = [p.function_call for p in parts if p.function_call]
+    text = "".join(p.text for p in parts if p.text).strip()
+    checks = policy.checks
+
+    if "malformed_tool_call" in checks:
+        if any(r.finish_reason == types.FinishReason.MALFORMED_FUNCTION_CALL for r in responses):
+            return "malformed_tool_call"
+        declared = _declarations(llm_request)
+        for call in calls:
+            if call.name not in declared and call.name not in llm_request.tools_dict:
+                return "malformed_tool_call"
+            schema = declared[call.name].parameters if call.name in declared else None
+            if schema is not None and set(schema.required or []) - set(call.args or {}):
+                return "malformed_tool_call"
+    if calls:
+        return None
+    if "missing_output_key" in checks and (output_key or output_schema):
+        if not text:
+            return "missing_output_key"
+        if output_schema is not None:
+            try:
+                output_schema.model_validate_json(text)
+            except ValueError:
+                return "missing_output_key"
+    if "empty_answer" in checks and not text:
+        return "empty_answer"
+    if "low_confidence" in checks and policy.min_avg_logprob is not None:
+        scores = [r.avg_logprobs for r in responses if r.avg_logprobs is not None]
+        if scores and min(scores) < policy.min_avg_logprob:
+            return "low_confidence"
+    return None
+
+
+class CascadeLlm(BaseLlm):
+    """Sends each request to the cheapest healthy tier, escalating when a check fails.
+
+    Args:
+        tiers: Models, cheapest / fastest first (e.g. from get_model()).
+        policy: Checks, latency and error thresholds.
+        output_key: The agent's output_key (for the missing_output_key check).
+        output_schema: The agent's output_schema (final answers must parse).
+    """
+
+    tiers: list[BaseLlm]
+    policy: RoutingPolicy
+    output_key: str | None = None
+    output_schema: type[BaseModel] | None = None
+    _stats: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, tiers: list[BaseLlm], policy: RoutingPolicy, **data):
+        data.setdefault("model", tiers[0].model)
+        super().__init__(tiers=tiers, policy=policy, **data)
+        self._stats = {"calls": 0, "served_by": Counter(), "escalations": Counter(), "skipped": Counter()}
+
+    @property
+    def stats(self) -> dict:
+        return self._stats
+
+    def _healthy(self, model: str) -> bool:
+        breaker = circuit_breaker(model)
+        if breaker.state == "open" and breaker.retry_in() > 0:
+            return False  # once the timeout is up, routing to it lets allow() send the probe
+        summary = model_health(model).summary(self.policy.window_seconds)
+        if summary["samples"] < self.policy.min_samples:
+            return True
+        if summary["error_rate"] > self.policy.max_error_rate:
+            return False
+        slo = self.policy.latency_slo_ms
+        return slo is None or summary["p95_ms"] is None or summary["p95_ms"] <= slo
+
+    def _route(self) -> list[BaseLlm]:
+        """Tiers to try in order: unhealthy ones are skipped (the last one never is)."""
+        route = []
+        for tier in self.tiers[:-1]:
+            if self._healthy(tier.model):
+                route.append(tier)
+            else:
+                self._stats["skipped"][tier.model] += 1
+        return [*route, self.tiers[-1]]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self._stats["calls"] += 1
+        route = self._route()
+        escalations = []
+        for i, tier in enumerate(route):
+            last = i == len(route) - 1
+            request = llm_request.model_copy(update={"model": tier.model})
+            health = model_health(tier.model)
+            start = time.monotonic()
+            if stream:
+                async for llm_response in tier.generate_content_async(request, stream=True):
+                    yield llm_response
+                health.record(time.monotonic() - start, True)
+                self._stats["served_by"][tier.model] += 1
+                return
+            try:
+                responses = [r async for r in tier.generate_content_async(request)]
+            except Exception as e:
+                health.record(time.monotonic() - start, False)
+                if last:
+                    raise
+                reason = f"error:{getattr(e, 'code', None) or type(e).__name__}"
+            else:
+                health.record(time.monotonic() - start, True)
+                reason = None if last else failed_check(
+                    self.policy, request, responses, self.output_key, self.output_schema
+                )
+                if reason is None:
+                    self._stats["served_by"][tier.model] += 1
+                    for llm_response in responses:
+                        llm_response.custom_metadata = {
+                            **(llm_response.custom_metadata or {}),
+                            "routed_model": tier.model,
+                            "escalations": escalations,
+                        }
+                        yield llm_response
+                    return
+            escalations.append(f"{tier.model}:{reason}")
+            self._stats["escalations"][reason] += 1
+            logger.info(f"⤴️ {tier.model} → {route[i + 1].model} ({reason}).")
+
+
+def _cascade(agent_name: str, model, policy: RoutingPolicy, output_key=None, output_schema=None) -> CascadeLlm | None:
+    """A CascadeLlm starting at the agent's own model, or None if it has nowhere to escalate.
+
+    An agent listed under routing.agents with its own tiers gets exactly those.
+    Any other agent keeps its configured model as the first tier and escalates
+    to the policy tiers ranked above it; a model that is not on the ladder
+    (e.g. app.py's gemini-2.0-flash-exp) is left alone.
+    """
+    retry_config = get_settings().retry_config
+    if "tiers" in (policy.agents.get(agent_name) or {}):
+        agent_policy = policy.for_agent(agent_name)
+        tiers = [get_model(name, retry_config) for name in agent_policy.tiers]
+        return CascadeLlm(tiers, agent_policy, output_key=output_key, output_schema=output_schema)
+    name = model if isinstance(model, str) else model.model
+    if name not in policy.tiers or name == policy.tiers[-1]:
+        return None
+    agent_policy = policy.for_agent(agent_name)
+    first = get_model(model, retry_config) if isinstance(model, str) else model
+    above = agent_policy.tiers[agent_policy.tiers.index(name) + 1 :]
+    tiers = [first, *(get_model(tier, retry_config) for tier in above)]
+    agent_policy = replace(agent_policy, tiers=(name, *above))
+    return CascadeLlm(tiers, agent_policy, output_key=output_key, output_schema=output_schema)
+
+
+def route_agents(agent, policy: RoutingPolicy | None = None) -> int:
+    """Gives LlmAgents (and StreamingPipeline stages) below `agent` a CascadeLlm.
+
+    Sub-agents, AgentTool agents and pipeline stages are included. The
+    policy defaults to agent.yaml's; returns how many models were replaced.
+    """
+    policy = policy or load_routing_policy()
+    if policy is None:
+        return 0
+    replaced = 0
+    if isinstance(agent, LlmAgent) and not isinstance(agent.model, CascadeLlm):
+        if cascade := _cascade(agent.name, agent.model, policy, agent.output_key, agent.output_schema):
+            agent.model = cascade
+            replaced += 1
+    for tool in getattr(agent, "tools", []):
+        if isinstance(tool, AgentTool):
+            replaced += route_agents(tool.agent, policy)
+    for stage in getattr(agent, "stages", []):
+        if not isinstance(stage.model, CascadeLlm) and (cascade := _cascade(stage.name, stage.model, policy)):
+            stage.model = cascade
+            replaced += 1
+    for sub_agent in agent.sub_agents:
+        replaced += route_agents(sub_agent, policy)
+    return replaced
+
+
+def describe(policy: RoutingPolicy) -> str:
+    """One line per tier with its live health, for logs and benchmarks."""
+    rows = []
+    for model in policy.tiers:
+        summary = model_health(model).summary(policy.window_seconds)
+        p95 = "-" if summary["p95_ms"] is None else f"{summary['p95_ms']:.0f} ms"
+        rows.append(
+            f"{model}: {summary['samples']} samples, p95 {p95}, errors {summary['error_rate']:.0%},"
+            f" circuit {circuit_breaker(model).state}"
+        )
+    return "\n".join(rows) + f"\n(policy {json.dumps({'slo_ms': policy.latency_slo_ms, 'checks': policy.checks})})"
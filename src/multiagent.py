@@ -1,174 +1,351 @@
-from dotenv import load_dotenv
-import os   
+import asyncio
 
-
-from google.adk.agents import Agent, SequentialAgent, ParallelAgent, LoopAgent
-from google.adk.models.google_llm import Gemini
+from google.adk.agents import Agent, ParallelAgent, SequentialAgent
 from google.adk.runners import InMemoryRunner
-from google.adk.tools import AgentTool, FunctionTool, google_search
-from google.genai import types
+from google.adk.tools import AgentTool, google_search
 
 from loguru import logger
 
-load_dotenv()
-try:
-    gemini_api_key = os.getenv("gemini_api_key")
-    attempts = int(os.getenv("attempts", 5))
-    exp_base = int(os.getenv("exp_base", 7))
-    initial_delay = int(os.getenv("initial_delay", 1))
-    http_status_codes = eval(os.getenv("http_status_codes", "[429, 500, 503, 504]"))
- 
-
-    retry_config = types.HttpRetryOptions(
-        attempts=attempts,
-        exp_base=exp_base,
-        initial_delay=initial_delay,
-        http_status_codes=http_status_codes
-    )
-    logger.success("Environment variables loaded and retry configuration set successfully.")
-except Exception as e:
-    logger.error(f"Error loading environment variables: {e} or setting up retry configuration.")
-    raise ConnectionError("Failed to load environment variables or set up retry configuration.")
+from config import get_settings
+from dataflow import DataflowAgent
+from model_registry import get_model
+from refinement import CritiqueVerdict, RefinementLoop
+from research_fanout import FindingsMerger, SubQuerySplitter, findings_key, sub_query_key
+from streaming_pipeline import StreamingPipeline, StreamingStage
 
 
 # # # # # # # # 1. Research & Summarization System  # # # # # # # 
 
-# Let's build a system with two specialized agents:
+def build_research_coordinator() -> Agent:
+    retry_config = get_settings().retry_config
 
-# Research Agent - Searches for information using Google Search
-# Summarizer Agent - Creates concise summaries from research findings
+    # Let's build a system with two specialized agents:
 
-# Research Agent: Its job is to use the google_search tool and present findings.
-research_agent = Agent(
-    name="ResearchAgent",
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        retry_options=retry_config
-    ),
-    instruction="""You are a specialized research agent. Your only job is to use the
-    google_search tool to find 2-3 pieces of relevant information on the given topic and present the findings with citations.""",
-    tools=[google_search],
-    output_key="research_findings",  # The result of this agent will be stored in the session state with this key.
-)
+    # Research Agent - Searches for information using Google Search
+    # Summarizer Agent - Creates concise summaries from research findings
 
-logger.debug("✅ research_agent created.")
+    # Research Agent: Its job is to use the google_search tool and present findings.
+    research_agent = Agent(
+        name="ResearchAgent",
+        model=get_model("gemini-2.5-flash-lite", retry_config),
+        instruction="""You are a specialized research agent. Your only job is to use the
+        google_search tool to find 2-3 pieces of relevant information on the given topic and present the findings with citations.""",
+        tools=[google_search],
+        output_key="research_findings",  # The result of this agent will be stored in the session state with this key.
+    )
 
+    logger.debug("✅ research_agent created.")
 
+    # Summarizer Agent: Its job is to summarize the text it receives.
+    summarizer_agent = Agent(
+        name="SummarizerAgent",
+        model=get_model("gemini-2.5-flash-lite", retry_config),
+        # The instruction is modified to request a bulleted list for a clear output format.
+        instruction="""Read the provided research findings: {research_findings}
+    Create a concise summary as a bulleted list with 3-5 key points.""",
+        output_key="final_summary",
+    )
 
+    logger.debug("✅ summarizer_agent created.")
+
+    # Root Coordinator: Orchestrates the workflow by calling the sub-agents as tools.
+    root_agent = Agent(
+        name="ResearchCoordinator",
+        model=get_model("gemini-2.5-flash-lite", retry_config),
+        # This instruction tells the root agent HOW to use its tools (which are the other agents).
+        instruction="""You are a research coordinator. Your goal is to answer the user's query by orchestrating a workflow.
+    1. First, you MUST call the `ResearchAgent` tool to find relevant information on the topic provided by the user.
+    2. Next, after receiving the research findings, you MUST call the `SummarizerAgent` tool to create a concise summary.
+    3. Finally, present the final summary clearly to the user as your response.""",
+        # We wrap the sub-agents in `AgentTool` to make them callable tools for the root agent.
+        tools=[AgentTool(research_agent), AgentTool(summarizer_agent)],
+    )
 
-# Summarizer Agent: Its job is to summarize the text it receives.
-summarizer_agent = Agent(
-    name="SummarizerAgent",
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        retry_options=retry_config
-    ),
-    # The instruction is modified to request a bulleted list for a clear output format.
-    instruction="""Read the provided research findings: {research_findings}
-Create a concise summary as a bulleted list with 3-5 key points.""",
-    output_key="final_summary",
-)
+    logger.debug("✅ root_agent created.")
+    return root_agent
 
-logger.debug("✅ summarizer_agent created.")
 
+# Parallel research: plan N sub-queries, research them concurrently, merge, summarize once.
+# Same tools and summary as the coordinator above, without an LLM turn per hop (research_fanout.py).
+def build_parallel_research(fan_out: int = 3) -> SequentialAgent:
+    retry_config = get_settings().retry_config
 
-# Root Coordinator: Orchestrates the workflow by calling the sub-agents as tools.
-root_agent = Agent(
-    name="ResearchCoordinator",
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        retry_options=retry_config
-    ),
-    # This instruction tells the root agent HOW to use its tools (which are the other agents).
-    instruction="""You are a research coordinator. Your goal is to answer the user's query by orchestrating a workflow.
-1. First, you MUST call the `ResearchAgent` tool to find relevant information on the topic provided by the user.
-2. Next, after receiving the research findings, you MUST call the `SummarizerAgent` tool to create a concise summary.
-3. Finally, present the final summary clearly to the user as your response.""",
-    # We wrap the sub-agents in `AgentTool` to make them callable tools for the root agent.
-    tools=[AgentTool(research_agent), AgentTool(summarizer_agent)],
-)
+    # Query Planner: splits the question into independent facets.
+    planner_agent = Agent(
+        name="QueryPlanner",
+        model=get_model("gemini-2.5-flash-lite", retry_config),
+        instruction=f"""Split the user's question into exactly {fan_out} independent web search queries,
+    each covering a different facet of the question. Reply with one query per line and nothing else.""",
+        output_key="sub_queries",
+    )
 
-logger.debug("✅ root_agent created.")
+    # Research Agents: one per sub-query, each writing its own state key.
+    research_agents = [
+        Agent(
+            name=f"ResearchAgent_{i}",
+            model=get_model("gemini-2.5-flash-lite", retry_config),
+            instruction=f"""You are a specialized research agent. Your only job is to use the
+        google_search tool to find 2-3 pieces of relevant information on: {{{sub_query_key(i)}}}
+        Present the findings with citations.""",
+            tools=[google_search],
+            output_key=findings_key(i),
+        )
+        for i in range(fan_out)
+    ]
+
+    summarizer_agent = Agent(
+        name="SummarizerAgent",
+        model=get_model("gemini-2.5-flash-lite", retry_config),
+        instruction="""Read the provided research findings: {research_findings}
+    Create a concise summary as a bulleted list with 3-5 key points.""",
+        output_key="final_summary",
+    )
 
-runner = InMemoryRunner(agent=root_agent)
-logger.debug("✅ Runner created.")
+    root_agent = SequentialAgent(
+        name="ParallelResearch",
+        sub_agents=[
+            planner_agent,
+            SubQuerySplitter(name="SubQuerySplitter", fan_out=fan_out),
+            ParallelAgent(name="ResearchFanOut", sub_agents=research_agents),
+            FindingsMerger(name="FindingsMerger", fan_out=fan_out),
+            summarizer_agent,
+        ],
+    )
 
+    logger.debug(f"✅ Parallel research agent created ({fan_out} branches).")
+    return root_agent
 
-response = await runner.run_debug(
-    "What are the latest advancements in quantum computing and what do they mean for AI?"
-)
 
 # # # # # # # # 1. Research & Summarization System  # # # # # # # 
 # To ensure proper flow we proceed with a sequential agent
 #  Blog Post Creation Pipeline: blog_outline_agent--> blog_writer_agent --> blog_editor_agent
 # # 
-# Outline Agent: Creates the initial blog post outline.
-outline_agent = Agent(
-    name="OutlineAgent",
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        retry_options=retry_config
-    ),
-    instruction="""Create a blog outline for the given topic with:
-    1. A catchy headline
-    2. An introduction hook
-    3. 3-5 main sections with 2-3 bullet points for each
-    4. A concluding thought""",
-    output_key="blog_outline",  # The result of this agent will be stored in the session state with this key.
-)
+def build_blog_pipeline() -> SequentialAgent:
+    retry_config = get_settings().retry_config
+
+    # Outline Agent: Creates the initial blog post outline.
+    outline_agent = Agent(
+        name="OutlineAgent",
+        model=get_model("gemini-2.5-flash-lite", retry_config),
+        instruction="""Create a blog outline for the given topic with:
+        1. A catchy headline
+        2. An introduction hook
+        3. 3-5 main sections with 2-3 bullet points for each
+        4. A concluding thought""",
+        output_key="blog_outline",  # The result of this agent will be stored in the session state with this key.
+    )
+
+    logger.debug("✅ outline_agent created.")
+
+    # Writer Agent: Writes the full blog post based on the outline from the previous agent.
+    writer_agent = Agent(
+        name="WriterAgent",
+        model=get_model("gemini-2.5-flash-lite", retry_config),
+        # The `{blog_outline}` placeholder automatically injects the state value from the previous agent's output.
+        instruction="""Following this outline strictly: {blog_outline}
+        Write a brief, 200 to 300-word blog post with an engaging and informative tone.""",
+        output_key="blog_draft",  # The result of this agent will be stored with this key.
+    )
+
+    logger.debug("✅ writer_agent created.")
+
+    # Editor Agent: Edits and polishes the draft from the writer agent.
+    editor_agent = Agent(
+        name="EditorAgent",
+        model=get_model("gemini-2.5-flash-lite", retry_config),
+        # This agent receives the `{blog_draft}` from the writer agent's output.
+        instruction="""Edit this draft: {blog_draft}
+        Your task is to polish the text by fixing any grammatical errors, improving the flow and sentence structure, and enhancing overall clarity.""",
+        output_key="final_blog",  # This is the final output of the entire pipeline.
+    )
 
-logger.debug("✅ outline_agent created.")
+    logger.debug("✅ editor_agent created.")
 
+    root_agent = SequentialAgent(
+        name="BlogPipeline",
+        sub_agents=[outline_agent, writer_agent, editor_agent],
+    )
 
+    logger.debug("✅ Sequential Agent created.")
+    return root_agent
+
+
+# Dataflow variant with two extra steps: keywords (needs only the topic) and a social post (needs only
+# the outline). No order is written down; DataflowAgent derives it from output_key / {placeholder}
+# (dataflow.py), so both extras run next to the main chain instead of adding to it.
+def blog_dataflow_agents() -> list[Agent]:
+    """The five agents of build_blog_dataflow(), in no particular order."""
+    retry_config = get_settings().retry_config
+    model = get_model("gemini-2.5-flash-lite", retry_config)
+
+    outline_agent = Agent(
+        name="OutlineAgent",
+        model=model,
+        instruction="""Create a blog outline for the given topic with:
+        1. A catchy headline
+        2. An introduction hook
+        3. 3-5 main sections with 2-3 bullet points for each
+        4. A concluding thought""",
+        output_key="blog_outline",
+    )
+    keyword_agent = Agent(
+        name="KeywordAgent",
+        model=model,
+        instruction="""List 5 search keywords readers would use to find a blog post on the given topic.
+        Reply with the keywords only, comma separated.""",
+        output_key="seo_keywords",
+    )
+    writer_agent = Agent(
+        name="WriterAgent",
+        model=model,
+        instruction="""Following this outline strictly: {blog_outline}
+        Work these keywords in naturally: {seo_keywords}
+        Write a brief, 200 to 300-word blog post with an engaging and informative tone.""",
+        output_key="blog_draft",
+    )
+    editor_agent = Agent(
+        name="EditorAgent",
+        model=model,
+        instruction="""Edit this draft: {blog_draft}
+        Your task is to polish the text by fixing any grammatical errors, improving the flow and sentence structure, and enhancing overall clarity.""",
+        output_key="final_blog",
+    )
+    social_agent = Agent(
+        name="SocialPostAgent",
+        model=model,
+        instruction="""Write a two-sentence social media post announcing a blog post with this outline: {blog_outline}""",
+        output_key="social_post",
+    )
 
+    return [outline_agent, keyword_agent, writer_agent, editor_agent, social_agent]
 
-# Writer Agent: Writes the full blog post based on the outline from the previous agent.
-writer_agent = Agent(
-    name="WriterAgent",
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        retry_options=retry_config
-    ),
-    # The `{blog_outline}` placeholder automatically injects the state value from the previous agent's output.
-    instruction="""Following this outline strictly: {blog_outline}
-    Write a brief, 200 to 300-word blog post with an engaging and informative tone.""",
-    output_key="blog_draft",  # The result of this agent will be stored with this key.
-)
 
-logger.debug("✅ writer_agent created.")
+def build_blog_dataflow(max_concurrency: int = 4) -> DataflowAgent:
+    root_agent = DataflowAgent(name="BlogDataflow", sub_agents=blog_dataflow_agents(), max_concurrency=max_concurrency)
 
+    logger.debug("✅ Dataflow blog pipeline created.")
+    return root_agent
 
 
+# Refinement variant: outline → writer, then critic and reviser take turns on the draft until the
+# critic approves or the draft stops changing (refinement.py), at most max_iterations rounds.
+def build_blog_refinement(max_iterations: int = 4) -> SequentialAgent:
+    retry_config = get_settings().retry_config
+    model = get_model("gemini-2.5-flash-lite", retry_config)
 
+    outline_agent = Agent(
+        name="OutlineAgent",
+        model=model,
+        instruction="""Create a blog outline for the given topic with:
+        1. A catchy headline
+        2. An introduction hook
+        3. 3-5 main sections with 2-3 bullet points for each
+        4. A concluding thought""",
+        output_key="blog_outline",
+    )
+    writer_agent = Agent(
+        name="WriterAgent",
+        model=model,
+        instruction="""Following this outline strictly: {blog_outline}
+        Write a brief, 200 to 300-word blog post with an engaging and informative tone.""",
+        output_key="blog_draft",
+    )
 
-# Editor Agent: Edits and polishes the draft from the writer agent.
-editor_agent = Agent(
-    name="EditorAgent",
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        retry_options=retry_config
-    ),
-    # This agent receives the `{blog_draft}` from the writer agent's output.
-    instruction="""Edit this draft: {blog_draft}
-    Your task is to polish the text by fixing any grammatical errors, improving the flow and sentence structure, and enhancing overall clarity.""",
-    output_key="final_blog",  # This is the final output of the entire pipeline.
-)
+    critic_agent = Agent(
+        name="CriticAgent",
+        model=model,
+        instruction="""Review this blog draft as a demanding editor: {blog_draft}
+        List the concrete problems (grammar, flow, clarity, accuracy), score the draft from 0 to 1,
+        and approve it only if it is ready to publish.""",
+        output_schema=CritiqueVerdict,
+        output_key="critique",
+    )
+    reviser_agent = Agent(
+        name="ReviserAgent",
+        model=model,
+        instruction="""Revise this blog draft: {blog_draft}
+        Fix the problems of this review: {critique}
+        Reply with the revised post only.""",
+        output_key="blog_draft",
+    )
 
-logger.debug("✅ editor_agent created.")
+    root_agent = SequentialAgent(
+        name="BlogRefinement",
+        sub_agents=[
+            outline_agent,
+            writer_agent,
+            RefinementLoop(
+                name="EditLoop",
+                sub_agents=[critic_agent, reviser_agent],
+                max_iterations=max_iterations,
+                output_key="blog_draft",
+                verdict_key="critique",
+            ),
+        ],
+    )
 
+    logger.debug("✅ Refinement blog pipeline created.")
+    return root_agent
+
+
+# Streaming variant: the writer starts on the first outline section and the editor on the
+# first draft paragraph while upstream stages are still generating (streaming_pipeline.py).
+def build_streaming_blog_pipeline() -> StreamingPipeline:
+    """BlogPipeline's stages overlapped chunk by chunk (see streaming_pipeline.py for the trade-offs)."""
+    retry_config = get_settings().retry_config
+    model = get_model("gemini-2.5-flash-lite", retry_config)
+
+    root_agent = StreamingPipeline(
+        name="StreamingBlogPipeline",
+        stages=[
+            StreamingStage(
+                name="OutlineAgent",
+                model=model,
+                instruction="""Create a blog outline for the given topic with:
+        1. A catchy headline
+        2. An introduction hook
+        3. 3-5 main sections with 2-3 bullet points for each
+        4. A concluding thought
+        Separate these parts with a blank line.""",
+                output_key="blog_outline",
+            ),
+            StreamingStage(
+                name="WriterAgent",
+                model=model,
+                instruction="""You are writing a brief, 200 to 300-word blog post with an engaging and informative tone,
+        one outline part at a time. The outline so far: {context}
+        Write only the text for the outline part you are given (a title line for the headline,
+        one short paragraph otherwise), with a blank line between paragraphs.""",
+                output_key="blog_draft",
+            ),
+            StreamingStage(
+                name="EditorAgent",
+                model=model,
+                instruction="""Edit this paragraph of a blog draft. Polish the text by fixing any grammatical errors,
+        improving the flow and sentence structure, and enhancing overall clarity.
+        Reply with the edited paragraph only.""",
+                output_key="final_blog",
+            ),
+        ],
+    )
 
+    logger.debug("✅ Streaming blog pipeline created.")
+    return root_agent
 
-root_agent = SequentialAgent(
-    name="BlogPipeline",
-    sub_agents=[outline_agent, writer_agent, editor_agent],
-)
 
-logger.debug("✅ Sequential Agent created.")
+async def main():
+    runner = InMemoryRunner(agent=build_research_coordinator())
+    logger.debug("✅ Runner created.")
 
+    response = await runner.run_debug(
+        "What are the latest advancements in quantum computing and what do they mean for AI?"
+    )
 
+    runner = InMemoryRunner(agent=build_blog_pipeline())
+    response = await runner.run_debug(
+        "Write a blog post about the benefits of multi-agent systems for software developers"
+    )
 
-runner = InMemoryRunner(agent=root_agent)
-response = await runner.run_debug(
-    "Write a blog post about the benefits of multi-agent systems for software developers"
-)
 
+if __name__ == "__main__":
+    asyncio.run(main())
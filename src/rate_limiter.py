@@ -0,0 +1,317 @@
+'''
+Client-side Rate Limiter
+
+The free tier allows ~15 requests per minute per model. Reacting to 429s with
+HttpRetryOptions(exp_base=7) means a burst (multiagent.py fires 4-6 model
+calls per user request) can stall for minutes in backoff. Instead, every
+model call first takes a ticket from a process-wide scheduler:
+
+    Buckets  → one RPM and one TPM token bucket per model name
+    Lanes    → INTERACTIVE requests are always served before BATCH ones
+    Fairness → within a lane, sessions are served round-robin, so one busy
+               session cannot starve the others
+
+Wrap a model with RateLimitedLlm(Gemini(...)); tag requests with
+request_lane(...) or install RateLimitPlugin on the runner so the session id
+is used as the fairness key automatically.
+
+Limits come from config.get_settings() (.env): rate_limit_rpm, rate_limit_tpm.
+'''
+
+import asyncio
+import contextvars
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import AsyncGenerator
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.base_llm import BaseLlm
+from google.adk.plugins.base_plugin import BasePlugin
+
+from config import get_settings
+from llm_wrapper import WrappedLlm
+from tokens import estimate_tokens
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+_session_key: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "rate_limit_session_key", default=None
+)
+_plugin_session_key: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "rate_limit_plugin_session_key", default=None
+)
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "rate_limit_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def request_lane(session_key: str | None = None, priority: Priority = Priority.INTERACTIVE):
+    """Tags every model call made inside the block with a session and lane.
+
+    Example:
+        with request_lane("nightly-report", Priority.BATCH):
+            await runner.run_debug("...")
+    """
+    key_token = _session_key.set(session_key)
+    priority_token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _session_key.reset(key_token)
+        _priority.reset(priority_token)
+
+
+class TokenBucket:
+    """Classic token bucket; the level may go negative to record debt."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self._last = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._last) * self.refill_per_second)
+        self._last = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_per_second
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+
+    def refund(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class ModelLimits:
+    """Per-minute quota of one model.
+
+    burst_fraction of the quota may be used at once; the rest refills evenly,
+    so no 60-second window ever exceeds the quota.
+    """
+
+    rpm: int = 15
+    tpm: int = 250_000
+    burst_fraction: float = 0.2
+
+    def buckets(self) -> tuple[TokenBucket, TokenBucket]:
+        steady = 1 - self.burst_fraction
+        return (
+            TokenBucket(max(1, math.floor(self.rpm * self.burst_fraction)), self.rpm * steady / 60),
+            TokenBucket(max(1, math.floor(self.tpm * self.burst_fraction)), self.tpm * steady / 60),
+        )
+
+
+@dataclass
+class _Waiter:
+    tokens: int
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class _ModelScheduler:
+    """Queues and buckets of one model name."""
+
+    def __init__(self, model: str, limits: ModelLimits):
+        self.model = model
+        self.requests, self.tokens = limits.buckets()
+        self.lanes: dict[Priority, OrderedDict[str, deque[_Waiter]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self.dispatcher: asyncio.Task | None = None
+        self.stats = {"granted": 0, "queued_seconds": 0.0, "max_queue_depth": 0}
+
+    def depth(self) -> int:
+        return sum(len(q) for lane in self.lanes.values() for q in lane.values())
+
+    def enqueue(self, waiter: _Waiter, session_key: str, priority: Priority):
+        self.lanes[priority].setdefault(session_key, deque()).append(waiter)
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.depth())
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.create_task(self._dispatch())
+
+    def _peek(self) -> tuple[OrderedDict, str, _Waiter] | None:
+        for priority in Priority:
+            lane = self.lanes[priority]
+            if lane:
+                session_key, queue = next(iter(lane.items()))
+                return lane, session_key, queue[0]
+        return None
+
+    @staticmethod
+    def _pop(lane: OrderedDict, session_key: str):
+        queue = lane[session_key]
+        queue.popleft()
+        if queue:
+            lane.move_to_end(session_key)  # round-robin across sessions
+        else:
+            del lane[session_key]
+
+    async def _dispatch(self):
+        while (picked := self._peek()) is not None:
+            lane, session_key, waiter = picked
+            if waiter.future.done():  # caller was cancelled
+                self._pop(lane, session_key)
+                continue
+            now = time.monotonic()
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(waiter.tokens, now))
+            if wait > 0:
+                # Re-pick after sleeping: a higher-priority request may arrive meanwhile.
+                await asyncio.sleep(wait)
+                continue
+            self.requests.consume(1, now)
+            self.tokens.consume(waiter.tokens, now)
+            self._pop(lane, session_key)
+            self.stats["granted"] += 1
+            self.stats["queued_seconds"] += now - waiter.enqueued_at
+            waiter.future.set_result(None)
+
+
+class ModelRateLimiter:
+    """Process-wide scheduler handing out request slots per model name.
+
+    Args:
+        default_limits: Limits for models without an explicit entry.
+        limits: Per-model overrides, keyed by model name.
+    """
+
+    def __init__(
+        self,
+        default_limits: ModelLimits | None = None,
+        limits: dict[str, ModelLimits] | None = None,
+    ):
+        self.default_limits = default_limits or ModelLimits()
+        self.limits = limits or {}
+        self._schedulers: dict[str, _ModelScheduler] = {}
+
+    def _scheduler(self, model: str) -> _ModelScheduler:
+        if model not in self._schedulers:
+            self._schedulers[model] = _ModelScheduler(
+                model, self.limits.get(model, self.default_limits)
+            )
+        return self._schedulers[model]
+
+    async def acquire(
+        self,
+        model: str,
+        tokens: int,
+        session_key: str | None = None,
+        priority: Priority | None = None,
+    ):
+        """Waits until the model's RPM and TPM buckets allow one more request."""
+        scheduler = self._scheduler(model)
+        waiter = _Waiter(tokens, asyncio.get_running_loop().create_future(), time.monotonic())
+        scheduler.enqueue(
+            waiter,
+            session_key or _session_key.get() or _plugin_session_key.get() or "default",
+            _priority.get() if priority is None else priority,
+        )
+        await waiter.future
+
+    def settle(self, model: str, reserved_tokens: int, actual_tokens: int):
+        """Corrects the TPM bucket once the real token usage is known."""
+        bucket = self._scheduler(model).tokens
+        if actual_tokens > reserved_tokens:
+            bucket.consume(actual_tokens - reserved_tokens, time.monotonic())
+        else:
+            bucket.refund(reserved_tokens - actual_tokens)
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            model: {**s.stats, "queue_depth": s.depth()} for model, s in self._schedulers.items()
+        }
+
+
+_default_limiter: ModelRateLimiter | None = None
+
+
+def default_rate_limiter() -> ModelRateLimiter:
+    """The limiter shared by every RateLimitedLlm in the process."""
+    global _default_limiter
+    if _default_limiter is None:
+        settings = get_settings()
+        _default_limiter = ModelRateLimiter(
+            ModelLimits(rpm=settings.rate_limit_rpm, tpm=settings.rate_limit_tpm)
+        )
+    return _default_limiter
+
+
+def estimate_request_tokens(llm_request: LlmRequest) -> int:
+    """Local estimate of the prompt size of a request."""
+    config = llm_request.config
+    instruction = config.system_instruction if isinstance(config.system_instruction, str) else ""
+    total = estimate_tokens(instruction or "")
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                total += estimate_tokens(part.text)
+            elif part.function_call or part.function_response:
+                total += estimate_tokens(part.model_dump_json(exclude_none=True))
+    return total
+
+
+class RateLimitedLlm(WrappedLlm):
+    """Takes a slot from a ModelRateLimiter before every call to the inner model.
+
+    Args:
+        inner: The model to wrap, e.g. Gemini(model="gemini-2.5-flash-lite").
+        limiter: Defaults to the process-wide default_rate_limiter().
+    """
+
+    limiter: ModelRateLimiter | None = None
+
+    def __init__(self, inner: BaseLlm, **data):
+        super().__init__(inner, **data)
+        if self.limiter is None:
+            self.limiter = default_rate_limiter()
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        model = llm_request.model or self.model
+        reserved = estimate_request_tokens(llm_request)
+        await self.limiter.acquire(model, reserved)
+
+        actual = None
+        async for llm_response in self.inner.generate_content_async(llm_request, stream):
+            if llm_response.usage_metadata and llm_response.usage_metadata.total_token_count:
+                actual = llm_response.usage_metadata.total_token_count
+            yield llm_response
+        if actual is not None:
+            self.limiter.settle(model, reserved, actual)
+
+
+class RateLimitPlugin(BasePlugin):
+    """Uses the ADK session as the rate limiter's fairness key.
+
+    Install on a runner, e.g. InMemoryRunner(agent=..., plugins=[RateLimitPlugin()]).
+    An explicit request_lane() session key takes precedence.
+    """
+
+    def __init__(self, name: str = "rate_limit"):
+        super().__init__(name=name)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> LlmResponse | None:
+        session = callback_context._invocation_context.session
+        _plugin_session_key.set(f"{session.app_name}/{session.user_id}/{session.id}")
+        return None
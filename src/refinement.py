@@ -0,0 +1,189 @@
+'''
+Refinement Loop
+
+Critique-and-rewrite (a critic reviews the draft, a reviser rewrites it) is
+what LoopAgent is for, but LoopAgent only stops on max_iterations or an
+escalate action: with max_iterations=4 it makes all eight calls even when
+the critic was happy after the first draft or the reviser returns the same
+text again. RefinementLoop is a LoopAgent that checks after every step:
+
+    Verdict     → the critic writes a CritiqueVerdict (output_schema) to
+                  verdict_key; approved, or a score of at least min_score,
+                  stops the loop right away (the reviser is not called)
+    Convergence → after each round the text in output_key is compared with
+                  the previous round: word-level edit distance ("edit") or
+                  1 - cosine of HashingEmbedder vectors ("semantic"); a change
+                  below min_change stops the loop
+    Budgets     → a round is not started if the average round so far would
+                  take the loop past time_budget seconds or token_budget
+                  tokens (usage_metadata of the sub-agents' responses)
+    Escalate    → a sub-agent's escalate action still stops it, as in LoopAgent
+
+A RefinementReport (rounds run, stop reason, rounds saved against
+max_iterations, change per round, tokens, seconds) goes to report_key in the
+session state and to the log.
+'''
+
+import difflib
+import time
+from dataclasses import asdict, dataclass, field
+from typing import AsyncGenerator, Literal
+
+from google.adk.agents import LoopAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from loguru import logger
+from pydantic import BaseModel, Field, ValidationError
+
+REPORT_STATE_KEY = "refinement_report"
+
+
+class CritiqueVerdict(BaseModel):
+    """Structured answer of a critic agent (use as its output_schema)."""
+
+    approved: bool = Field(description="True if the text needs no further revision.")
+    score: float = Field(ge=0, le=1, description="Overall quality from 0 (unusable) to 1 (publishable).")
+    issues: list[str] = Field(default_factory=list, description="Concrete problems to fix, most important first.")
+
+
+@dataclass
+class RefinementReport:
+    """What one run of a RefinementLoop did."""
+
+    rounds: int
+    max_rounds: int | None
+    stop_reason: str  # approved | converged | time_budget | token_budget | escalated | max_iterations
+    rounds_saved: int
+    changes: list[float] = field(default_factory=list)  # change of output_key per round, 0..1
+    scores: list[float] = field(default_factory=list)
+    tokens: int = 0
+    seconds: float = 0.0
+
+
+def edit_change(before: str, after: str) -> float:
+    """1 - similarity ratio of the two texts' word sequences (0: same words, 1: nothing shared)."""
+    if before == after:
+        return 0.0
+    return 1.0 - difflib.SequenceMatcher(None, before.split(), after.split(), autojunk=False).ratio()
+
+
+def semantic_change(before: str, after: str) -> float:
+    """1 - cosine similarity of the texts' HashingEmbedder vectors."""
+    from semantic_memory import HashingEmbedder
+
+    if before == after:
+        return 0.0
+    vectors = HashingEmbedder().embed([before, after])
+    return float(max(0.0, 1.0 - vectors[0] @ vectors[1]))
+
+
+def parse_verdict(value) -> CritiqueVerdict | None:
+    """The critic's state value as a CritiqueVerdict (dict or JSON text), None if it is neither."""
+    try:
+        if isinstance(value, CritiqueVerdict):
+            return value
+        if isinstance(value, dict):
+            return CritiqueVerdict.model_validate(value)
+        if isinstance(value, str) and value.strip():
+            return CritiqueVerdict.model_validate_json(value.strip().removeprefix("```json").strip("`\n "))
+    except ValidationError:
+        pass
+    return None
+
+
+class RefinementLoop(LoopAgent):
+    """LoopAgent that stops when the critic approves, the text converges or a budget runs out.
+
+    Args:
+        output_key: State key of the text being refined (written by the reviser).
+        verdict_key: State key of the critic's CritiqueVerdict (None: no verdict check).
+        min_score: Score that counts as approved even without approved=True.
+        measure: "edit" (word-level edit distance) or "semantic" (embedding delta).
+        min_change: Change between rounds below which the text has converged.
+        time_budget: Seconds the loop may take (None: unlimited).
+        token_budget: Model tokens the loop may use (None: unlimited).
+        report_key: State key receiving the RefinementReport (as a dict).
+    """
+
+    output_key: str
+    verdict_key: str | None = None
+    min_score: float = 0.9
+    measure: Literal["edit", "semantic"] = "edit"
+    min_change: float = 0.05
+    time_budget: float | None = None
+    token_budget: int | None = None
+    report_key: str = REPORT_STATE_KEY
+
+    def _change(self, before: str, after: str) -> float:
+        return (semantic_change if self.measure == "semantic" else edit_change)(before, after)
+
+    def _approved(self, ctx: InvocationContext, report: RefinementReport) -> bool:
+        if self.verdict_key is None:
+            return False
+        verdict = parse_verdict(ctx.session.state.get(self.verdict_key))
+        if verdict is None:
+            return False
+        report.scores.append(verdict.score)
+        return verdict.approved or verdict.score >= self.min_score
+
+    def _over_budget(self, report: RefinementReport, elapsed: float) -> str | None:
+        """Budget the next round would exceed, judged by the average round so far."""
+        if not report.rounds:
+            return None
+        if self.time_budget is not None and elapsed + elapsed / report.rounds > self.time_budget:
+            return "time_budget"
+        if self.token_budget is not None and report.tokens + report.tokens / report.rounds > self.token_budget:
+            return "token_budget"
+        return None
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+        started = time.perf_counter()
+        report = RefinementReport(rounds=0, max_rounds=self.max_iterations, stop_reason="max_iterations", rounds_saved=0)
+        previous = str(ctx.session.state.get(self.output_key) or "")
+
+        while not self.max_iterations or report.rounds < self.max_iterations:
+            if reason := self._over_budget(report, time.perf_counter() - started):
+                report.stop_reason = reason
+                break
+            stop = None
+            for sub_agent in self.sub_agents:
+                judged = False
+                async for event in sub_agent.run_async(ctx):
+                    yield event
+                    if event.usage_metadata and not event.partial:
+                        report.tokens += event.usage_metadata.total_token_count or 0
+                    if event.actions.escalate:
+                        stop = "escalated"
+                    judged = judged or self.verdict_key in (event.actions.state_delta or {})
+                if not stop and judged and self._approved(ctx, report):
+                    stop = "approved"
+                if stop:
+                    break
+            report.rounds += 1
+            current = str(ctx.session.state.get(self.output_key) or "")
+            if stop is None and previous:
+                change = self._change(previous, current)
+                report.changes.append(round(change, 4))
+                if change < self.min_change:
+                    stop = "converged"
+            previous = current
+            ctx.reset_sub_agent_states(self.name)
+            if stop:
+                report.stop_reason = stop
+                break
+
+        report.seconds = round(time.perf_counter() - started, 3)
+        if self.max_iterations:
+            report.rounds_saved = self.max_iterations - report.rounds
+        logger.info(
+            f"🔁 {self.name}: {report.rounds} round(s), stopped by {report.stop_reason}, "
+            f"{report.rounds_saved} saved, {report.tokens} tokens, changes {report.changes}."
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={self.report_key: asdict(report)}),
+        )
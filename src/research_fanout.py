@@ -0,0 +1,135 @@
+'''
+Research Fan-out
+
+ResearchCoordinator runs one search pass per question and spends an LLM turn
+deciding every hop (ResearchAgent, then SummarizerAgent). For multi-facet
+questions build_parallel_research() (multiagent.py) runs a fixed workflow:
+
+    QueryPlanner      → splits the question into N sub-queries (one LLM call)
+    SubQuerySplitter  → writes them to sub_query_0 .. sub_query_{N-1}
+    ParallelAgent     → N research agents, each with its own output_key
+                        (research_findings_0 ..), run concurrently
+    FindingsMerger    → joins the findings in sub-query order, dropping
+                        paragraphs already seen, into research_findings
+    SummarizerAgent   → one summary over the merged findings
+
+Wall-clock latency is planner + slowest branch + summarizer instead of the
+sum of every hop. The two custom agents make no model calls.
+'''
+
+import re
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+# Padding when the planner returns fewer sub-queries than research branches.
+_FALLBACK_ANGLES = (
+    "background and key facts",
+    "latest developments",
+    "open problems and criticism",
+    "practical applications",
+    "comparison with alternatives",
+)
+
+_LIST_MARKER_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def sub_query_key(index: int) -> str:
+    return f"sub_query_{index}"
+
+
+def findings_key(index: int) -> str:
+    return f"research_findings_{index}"
+
+
+def split_sub_queries(plan: str, question: str, fan_out: int) -> list[str]:
+    """Turns the planner's output into exactly fan_out distinct sub-queries."""
+    sub_queries: list[str] = []
+    for line in plan.splitlines():
+        line = _LIST_MARKER_RE.sub("", line).strip()
+        if line and line.lower() not in (q.lower() for q in sub_queries):
+            sub_queries.append(line)
+    sub_queries = sub_queries[:fan_out]
+    for angle in _FALLBACK_ANGLES:
+        if len(sub_queries) >= fan_out:
+            break
+        sub_queries.append(f"{question} ({angle})")
+    while len(sub_queries) < fan_out:
+        sub_queries.append(f"{question} (aspect {len(sub_queries) + 1})")
+    return sub_queries
+
+
+def merge_findings(sub_queries: list[str], findings: list[str]) -> str:
+    """Joins per-branch findings in sub-query order, skipping repeated paragraphs."""
+    seen: set[str] = set()
+    sections = []
+    for sub_query, text in zip(sub_queries, findings):
+        paragraphs = []
+        for paragraph in re.split(r"\n\s*\n", text or ""):
+            normalized = " ".join(paragraph.lower().split())
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                paragraphs.append(paragraph.strip())
+        sections.append(f"## {sub_query}\n" + ("\n\n".join(paragraphs) or "(no new findings)"))
+    return "\n\n".join(sections)
+
+
+def _user_question(ctx: InvocationContext) -> str:
+    content = ctx.user_content
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+class SubQuerySplitter(BaseAgent):
+    """Copies the planner's sub-queries into one state key per research branch."""
+
+    fan_out: int
+    plan_key: str = "sub_queries"
+
+    @property
+    def input_keys(self) -> list[str]:  # dataflow.py
+        return [self.plan_key]
+
+    @property
+    def output_keys(self) -> list[str]:
+        return [sub_query_key(i) for i in range(self.fan_out)]
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        sub_queries = split_sub_queries(
+            str(ctx.session.state.get(self.plan_key, "")), _user_question(ctx), self.fan_out
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(
+                state_delta={sub_query_key(i): q for i, q in enumerate(sub_queries)}
+            ),
+        )
+
+
+class FindingsMerger(BaseAgent):
+    """Merges research_findings_0 .. into research_findings, in a fixed order."""
+
+    fan_out: int
+    output_key: str = "research_findings"
+
+    @property
+    def input_keys(self) -> list[str]:  # dataflow.py
+        return [k(i) for i in range(self.fan_out) for k in (sub_query_key, findings_key)]
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        merged = merge_findings(
+            [str(state.get(sub_query_key(i), "")) for i in range(self.fan_out)],
+            [str(state.get(findings_key(i), "")) for i in range(self.fan_out)],
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={self.output_key: merged}),
+        )
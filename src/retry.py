@@ -0,0 +1,332 @@
+'''
+Adaptive Retries
+
+retry_config (attempts=5, exp_base=7, initial_delay=1) makes google.genai
+wait 1 s, 7 s, 49 s and 343 s between attempts, with no jitter: one
+throttled call stalls a whole SequentialAgent for minutes, and every client
+that hit the same 429 retries at the same moment. ResilientLlm replaces those
+HTTP-level retries (the registry builds the Gemini with attempts=1):
+
+    Backoff  → decorrelated jitter, delay = uniform(base, 3 × previous),
+               capped at max_delay; clients that failed together spread out
+    Server   → Retry-After (header) or RetryInfo (error details) replaces the
+               computed delay (plus up to 20% jitter); a wait past the call's
+               deadline fails now instead of stalling
+    Breaker  → one circuit per model name, shared by the process: after
+               failure_threshold consecutive 5xx / transport errors calls
+               fail fast with CircuitOpenError for reset_timeout seconds, then
+               one probe call decides whether it closes again (429 means
+               "throttled", not "down", and does not count)
+    Hedging  → optional: a non-streaming call still running after the
+               model's rolling p95 gets a duplicate request; the first answer
+               wins and the other is cancelled; at most hedge_budget of the
+               calls are hedged, so an overloaded model is not doubled
+    Metadata → responses carry custom_metadata["retries"] (and "hedged"),
+               which TracingPlugin records on the model span
+
+A streamed call is only retried before its first chunk was yielded.
+'''
+
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncGenerator
+
+import httpx
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import errors, types
+from loguru import logger
+from pydantic import Field, PrivateAttr
+
+from llm_wrapper import WrappedLlm
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a model whose circuit is open."""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit for {model} is open (model failing), next probe in {retry_in:.1f}s.")
+        self.model = model
+        self.retry_in = retry_in
+
+
+@dataclass
+class RetryPolicy:
+    """When and how long to retry one model call.
+
+    Args:
+        attempts: Calls in total, the first one included.
+        base_delay: Smallest wait between attempts (seconds).
+        max_delay: Largest jittered wait between attempts.
+        deadline: Seconds a call may take with all its retries; a retry whose
+                  wait would end past it is not made.
+        statuses: HTTP status codes that are retried.
+    """
+
+    attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+    deadline: float = 120.0
+    statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    @classmethod
+    def from_http_options(cls, options: types.HttpRetryOptions | None) -> "RetryPolicy":
+        """Policy with the attempts, initial delay and status codes of retry_config."""
+        if options is None:
+            return cls()
+        policy = cls()
+        if options.attempts:
+            policy.attempts = options.attempts
+        if options.initial_delay:
+            policy.base_delay = options.initial_delay
+        if options.max_delay:
+            policy.max_delay = options.max_delay
+        if options.http_status_codes:
+            policy.statuses = tuple(options.http_status_codes)
+        return policy
+
+    def next_delay(self, previous: float, rng: random.Random) -> float:
+        """Decorrelated jitter (AWS architecture blog): uniform(base, 3 × previous), capped."""
+        return min(self.max_delay, rng.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if isinstance(error, errors.APIError):
+            return error.code in self.statuses
+        return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def _seconds(value: str) -> float | None:
+    try:
+        return max(0.0, float(value.strip().rstrip("s")))
+    except ValueError:
+        return None
+
+
+def server_retry_delay(error: BaseException) -> float | None:
+    """Seconds the server asked to wait: Retry-After header or google.rpc.RetryInfo."""
+    if not isinstance(error, errors.APIError):
+        return None
+    headers = getattr(error.response, "headers", None)
+    if headers is not None and (value := headers.get("retry-after")):
+        return _seconds(value)  # HTTP-date form is not used by Gemini
+    details = error.details.get("error", {}).get("details", []) if isinstance(error.details, dict) else []
+    for detail in details:
+        if isinstance(detail, dict) and str(detail.get("@type", "")).endswith("RetryInfo"):
+            return _seconds(str(detail.get("retryDelay", "")))
+    return None
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed → open → half-open → closed).
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit.
+        reset_timeout: Seconds the circuit stays open before one probe call.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (in half-open state only the one probe may)."""
+        if self.state == "open" and self.retry_in() == 0:
+            self.state = "half_open"
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def record_success(self):
+        self.state, self.failures, self._probing = "closed", 0, False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.stats["opened"] += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_neutral(self):
+        """A call ended without telling whether the model is healthy (e.g. 429, cancellation)."""
+        self._probing = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker(model: str) -> CircuitBreaker:
+    """The process-wide breaker of a model name."""
+    if model not in _breakers:
+        _breakers[model] = CircuitBreaker()
+    return _breakers[model]
+
+
+class RollingPercentile:
+    """Percentiles over the last `window` samples."""
+
+    def __init__(self, window: int = 200):
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def add(self, value: float):
+        self.samples.append(value)
+
+    def percentile(self, q: float) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _is_outage(error: BaseException) -> bool:
+    if isinstance(error, errors.APIError):
+        return error.code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class ResilientLlm(WrappedLlm):
+    """Retries with decorrelated jitter, honours Retry-After, breaks circuits, hedges slow calls.
+
+    The inner model should not retry itself (HttpRetryOptions(attempts=1)).
+
+    Args:
+        inner: The model to wrap.
+        policy: Retry policy; defaults to RetryPolicy().
+        breaker: Circuit breaker; defaults to the process-wide one of the model.
+        hedge: Send a duplicate of non-streaming calls slower than the p95.
+        hedge_quantile: Percentile of recent latencies after which to hedge.
+        hedge_min_samples: Latencies needed before hedging starts.
+        hedge_budget: Largest share of calls that may be hedged.
+        seed: Seed of the jitter generator (None: random).
+    """
+
+    policy: RetryPolicy = Field(default_factory=RetryPolicy)
+    breaker: CircuitBreaker | None = None
+    hedge: bool = False
+    hedge_quantile: float = 95
+    hedge_min_samples: int = 20
+    hedge_budget: float = 0.1
+    seed: int | None = None
+    _latencies: RollingPercentile = PrivateAttr(default_factory=RollingPercentile)
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+    _stats: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, inner, **data):
+        super().__init__(inner, **data)
+        if self.breaker is None:
+            self.breaker = circuit_breaker(self.model)
+        self._rng = random.Random(self.seed)
+        self._stats = {"calls": 0, "retries": 0, "gave_up": 0, "rejected": 0, "hedged": 0, "hedge_wins": 0}
+
+    @property
+    def stats(self) -> dict:
+        return {**self._stats, "circuit": self.breaker.state, "p95_seconds": self._latencies.percentile(95)}
+
+    def _hedge_after(self, stream: bool) -> float | None:
+        if not self.hedge or stream or len(self._latencies.samples) < self.hedge_min_samples:
+            return None
+        if self._stats["hedged"] >= self.hedge_budget * self._stats["calls"]:
+            return None
+        return self._latencies.percentile(self.hedge_quantile)
+
+    async def _collect(self, llm_request: LlmRequest) -> list[LlmResponse]:
+        return [r async for r in self.inner.generate_content_async(llm_request, False)]
+
+    async def _hedged(self, llm_request: LlmRequest, after: float) -> tuple[list[LlmResponse], bool]:
+        """Runs the call, and a duplicate if it is still running `after` seconds later."""
+        primary = asyncio.ensure_future(self._collect(llm_request))
+        done, _ = await asyncio.wait({primary}, timeout=after)
+        if done:
+            return primary.result(), False
+        self._stats["hedged"] += 1
+        backup = asyncio.ensure_future(self._collect(llm_request))
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._stats["hedge_wins"] += 1
+                        return task.result(), True
+            raise primary.exception()  # both failed: report the original call's error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        model = llm_request.model or self.model
+        self._stats["calls"] += 1
+        started = time.monotonic()
+        delay = self.policy.base_delay
+        for attempt in range(self.policy.attempts):
+            if not self.breaker.allow():
+                self._stats["rejected"] += 1
+                raise CircuitOpenError(model, self.breaker.retry_in())
+            yielded = False
+            metadata = {"retries": attempt}
+            try:
+                call_started = time.monotonic()
+                if (after := self._hedge_after(stream)) is not None:
+                    responses, hedged = await self._hedged(llm_request, after)
+                    metadata["hedged"] = hedged
+                    self._latencies.add(time.monotonic() - call_started)
+                    self.breaker.record_success()
+                    for llm_response in responses:
+                        llm_response.custom_metadata = {**(llm_response.custom_metadata or {}), **metadata}
+                        yield llm_response
+                    return
+                async for llm_response in self.inner.generate_content_async(llm_request, stream):
+                    if not yielded and not llm_response.partial:
+                        self._latencies.add(time.monotonic() - call_started)
+                    if attempt:
+                        llm_response.custom_metadata = {**(llm_response.custom_metadata or {}), **metadata}
+                    yielded = True
+                    yield llm_response
+                self.breaker.record_success()
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                self.breaker.record_neutral()
+                raise
+            except Exception as e:
+                if _is_outage(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_neutral()
+                if yielded or not self.policy.is_retryable(e) or attempt == self.policy.attempts - 1:
+                    if self.policy.is_retryable(e):
+                        self._stats["gave_up"] += 1
+                    raise
+                server_delay = server_retry_delay(e)
+                if server_delay is not None:
+                    # The server knows when capacity returns; a little jitter
+                    # keeps the clients it throttled together from returning together.
+                    wait = server_delay * self._rng.uniform(1.0, 1.2)
+                else:
+                    wait = delay = self.policy.next_delay(delay, self._rng)
+                if time.monotonic() - started + wait > self.policy.deadline:
+                    self._stats["gave_up"] += 1
+                    logger.warning(f"⏳ {model}: retry in {wait:.1f}s would pass the {self.policy.deadline:g}s deadline.")
+                    raise
+                self._stats["retries"] += 1
+                code = getattr(e, "code", type(e).__name__)
+                logger.info(f"🔁 {model}: {code}, retry {attempt + 1}/{self.policy.attempts - 1} in {wait:.2f}s.")
+                await asyncio.sleep(wait)
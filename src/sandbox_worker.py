@@ -0,0 +1,96 @@
+'''
+Sandbox worker
+
+Runs inside the worker processes of LocalProcessCodeExecutor
+(local_code_executor.py). It only imports the standard library, so the
+forkserver can preload it together with the modules generated code usually
+needs and fork ready-to-run workers in milliseconds.
+
+Limits applied in every worker:
+
+    Memory  → RLIMIT_AS; allocations beyond it raise MemoryError
+    CPU     → RLIMIT_CPU, re-armed before each code block; exceeding it
+              kills the worker (the parent reports it and forks a new one)
+    Network → a new network namespace when the OS allows it, otherwise the
+              socket module refuses to create sockets
+    Output  → stdout/stderr truncated to max_output characters
+
+This is a best-effort sandbox for model-written arithmetic, not a security
+boundary against hostile code.
+'''
+
+import contextlib
+import io
+import math
+import os
+import re
+import resource
+import socket
+import time
+import traceback
+
+PRELOAD = ["math", "cmath", "decimal", "fractions", "statistics", "json", "datetime", "itertools", "collections", "re"]
+
+_MAIN_GUARD_RE = re.compile(r"if\s+__name__\s*==\s*['\"]__main__['\"]")
+
+
+class _NoNetwork:
+    def __init__(self, *args, **kwargs):
+        raise OSError("Network access is disabled in the code sandbox")
+
+
+def _disable_network():
+    unshare = getattr(os, "unshare", None)  # Python 3.12+
+    if unshare is not None:
+        try:
+            unshare(os.CLONE_NEWNET)  # empty namespace: no interfaces but loopback (down)
+            return
+        except OSError:
+            pass
+    import _socket
+
+    socket.socket = _socket.socket = _NoNetwork
+    socket.create_connection = socket.getaddrinfo = _NoNetwork
+
+
+def _arm_cpu_limit(cpu_seconds: float):
+    # Only the soft limit moves (SIGXCPU kills the worker); a lowered hard
+    # limit could not be raised again for the next block.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def run_code(code: str, max_output: int) -> tuple[str, str]:
+    """Executes one code block in fresh globals and captures its output."""
+    globals_ = {"__name__": "__main__" if _MAIN_GUARD_RE.search(code) else "__sandbox__"}
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            exec(compile(code, "<code>", "exec"), globals_, globals_)
+        except MemoryError:
+            print("MemoryError: memory limit exceeded", file=stderr)
+        except BaseException:  # SystemExit included: the worker must survive the block
+            traceback.print_exc(limit=-1, file=stderr)
+    return stdout.getvalue()[:max_output], stderr.getvalue()[:max_output]
+
+
+def serve(conn, memory_limit_mb: int, cpu_seconds: float, max_output: int):
+    """Worker loop: receive a code block, send back (stdout, stderr, seconds)."""
+    if memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _disable_network()
+    while True:
+        try:
+            code = conn.recv()
+        except EOFError:
+            return
+        if code is None:
+            return
+        if cpu_seconds:
+            _arm_cpu_limit(cpu_seconds)
+        start = time.perf_counter()
+        stdout, stderr = run_code(code, max_output)
+        conn.send((stdout, stderr, time.perf_counter() - start))
@@ -0,0 +1,545 @@
+'''
+Semantic Memory Service
+
+Drop-in replacement for ADK's InMemoryMemoryService. Instead of matching
+keywords against every raw event ever stored, each event is embedded once at
+ingestion time and kept in a contiguous NumPy matrix per (app_name, user_id).
+search_memory() then becomes a single matrix-vector product plus a top-k
+selection, and for very large stores an IVF (inverted file) index restricts
+the scan to the few clusters closest to the query.
+
+    Embed    → HashingEmbedder (offline stand-in, no API calls)
+    Index    → VectorIndex (brute-force cosine, optional IVF for large stores)
+    Ingest   → add_session_to_memory() only writes events past the session's
+               watermark, drops content already stored, and batches writes
+    Retrieve → SemanticMemoryService.search_memory() returns top-k MemoryEntry
+               (or consolidated fact records, see memory_consolidation.py)
+'''
+
+import asyncio
+import hashlib
+import re
+import threading
+import zlib
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.sessions import Session
+from google.genai import types
+from loguru import logger
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Function words plus the boilerplate of consolidated facts ("The user said").
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from has have i in is it its me my "
+    "of on or our said so that the their this to user was what when where "
+    "which who why will with you your".split()
+)
+
+
+@lru_cache(maxsize=65536)
+def _stem(word: str) -> str:
+    """Crude suffix stripping so "gifted"/"gift" or "colors"/"color" match."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str, dim: int) -> tuple[int, float]:
+    """Maps a feature to a (bucket, sign) pair, stable across processes."""
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, (1.0 if (h >> 31) & 1 else -1.0)
+
+
+class HashingEmbedder:
+    """Offline embedding stand-in based on the feature-hashing trick.
+
+    Stemmed word unigrams and bigrams are hashed into a fixed number of buckets and
+    the resulting vector is L2-normalised, so the dot product of two
+    embeddings is their cosine similarity. Any object exposing the same
+    ``dim`` attribute and ``embed(texts)`` method (e.g. a wrapper around
+    ``text-embedding-004``) can be passed to SemanticMemoryService instead.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str) -> list[str]:
+        words = [
+            _stem(w) for w in _WORD_RE.findall(text.lower()) if len(w) > 1 and w not in _STOPWORDS
+        ]
+        return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embeds a batch of texts into a (len(texts), dim) float32 matrix."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                bucket, sign = _hash_feature(feature, self.dim)
+                vectors[row, bucket] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+@dataclass
+class _IvfLayout:
+    """Trained centroids plus every vector of a snapshot, grouped by cluster."""
+
+    centroids: np.ndarray
+    blocks: list[np.ndarray]
+    block_ids: list[np.ndarray]
+    size: int
+
+
+class VectorIndex:
+    """Contiguous float32 matrix of unit vectors with top-k cosine search.
+
+    Small stores keep every vector in one pre-allocated matrix that doubles
+    in capacity, so ingestion is amortised O(1) and a search is a single BLAS
+    matrix-vector product. Once the index holds ``ann_threshold`` vectors it
+    switches to an IVF layout: centroids are trained with a few rounds of
+    spherical k-means and each cluster owns its own contiguous matrix, so a
+    search only scans the ``nprobe`` clusters closest to the query. New
+    vectors are routed straight into their cluster, and the centroids are
+    retrained whenever the store grows ``retrain_factor`` times past the size
+    they were trained on.
+
+    With ``auto_train`` (the default) add() trains in place, which stalls
+    that add() for the length of the training. Otherwise the owner checks
+    ``needs_training`` and runs begin_training() / train() /
+    install_training(), with only the first and last under its lock: the
+    index keeps serving (and taking adds) from the old layout meanwhile.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        initial_capacity: int = 1024,
+        ann_threshold: int | None = 20_000,
+        nprobe: int = 8,
+        retrain_factor: int = 4,
+        auto_train: bool = True,
+    ):
+        self.dim = dim
+        self.ann_threshold = ann_threshold
+        self.nprobe = nprobe
+        self.retrain_factor = retrain_factor
+        self.auto_train = auto_train
+        self._size = 0
+        # Flat layout
+        self._vectors = np.empty((initial_capacity, dim), dtype=np.float32)
+        self._ids = np.empty(initial_capacity, dtype=np.int64)
+        # IVF layout
+        self._centroids: np.ndarray | None = None
+        self._blocks: list[np.ndarray] = []
+        self._block_ids: list[np.ndarray] = []
+        self._block_sizes: list[int] = []
+        self._trained_at = 0
+        # Vectors added since begin_training(), re-routed by install_training()
+        self._since_snapshot: list[tuple[np.ndarray, np.ndarray]] | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_ivf(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def needs_training(self) -> bool:
+        """True when the IVF centroids are due to be (re)trained and no training is running."""
+        if self.ann_threshold is None or self._size < self.ann_threshold or self._since_snapshot is not None:
+            return False
+        return not self.is_ivf or self._size >= self.retrain_factor * self._trained_at
+
+    @staticmethod
+    def _append(matrix: np.ndarray, ids: np.ndarray, size: int, vectors, new_ids):
+        """Appends rows to a (matrix, ids) pair, doubling capacity if needed."""
+        needed = size + len(vectors)
+        if needed > len(matrix):
+            capacity = max(len(matrix), 1)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty((capacity, matrix.shape[1]), dtype=np.float32)
+            grown[:size] = matrix[:size]
+            grown_ids = np.empty(capacity, dtype=np.int64)
+            grown_ids[:size] = ids[:size]
+            matrix, ids = grown, grown_ids
+        matrix[size:needed] = vectors
+        ids[size:needed] = new_ids
+        return matrix, ids
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray):
+        """Appends unit vectors with their external ids."""
+        if len(vectors) == 0:
+            return
+        if self._since_snapshot is not None:
+            self._since_snapshot.append((np.array(vectors, dtype=np.float32), np.array(ids, dtype=np.int64)))
+        if not self.is_ivf:
+            self._vectors, self._ids = self._append(
+                self._vectors, self._ids, self._size, vectors, ids
+            )
+            self._size += len(vectors)
+        else:
+            self._route(vectors, ids)
+        if self.auto_train and self.needs_training:
+            self.build_ivf()
+
+    def _route(self, vectors: np.ndarray, ids: np.ndarray):
+        """Adds vectors to the IVF clusters of their closest centroids."""
+        assign = np.argmax(vectors @ self._centroids.T, axis=1)
+        for cluster in np.unique(assign):
+            mask = assign == cluster
+            self._blocks[cluster], self._block_ids[cluster] = self._append(
+                self._blocks[cluster],
+                self._block_ids[cluster],
+                self._block_sizes[cluster],
+                vectors[mask],
+                ids[mask],
+            )
+            self._block_sizes[cluster] += int(mask.sum())
+        self._size += len(vectors)
+
+    def _all_vectors(self) -> tuple[np.ndarray, np.ndarray]:
+        if not self.is_ivf:
+            return self._vectors[: self._size], self._ids[: self._size]
+        return (
+            np.concatenate([b[:n] for b, n in zip(self._blocks, self._block_sizes)]),
+            np.concatenate([i[:n] for i, n in zip(self._block_ids, self._block_sizes)]),
+        )
+
+    def build_ivf(self, iterations: int = 5, sample_size: int = 65_536, seed: int = 0):
+        """(Re)trains the centroids and redistributes every vector into clusters, in place."""
+        if self._size:
+            self._install(self.train(*self._all_vectors(), iterations, sample_size, seed))
+
+    def begin_training(self) -> tuple[np.ndarray, np.ndarray]:
+        """Snapshot (vectors, ids) to pass to train(); adds from now on are kept for install_training()."""
+        self._since_snapshot = []
+        return self._all_vectors()  # flat rows below _size are never written again
+
+    def train(
+        self, data: np.ndarray, ids: np.ndarray, iterations: int = 5, sample_size: int = 65_536, seed: int = 0
+    ) -> _IvfLayout:
+        """Spherical k-means over a snapshot; reads nothing else of the index, so it can run unlocked."""
+        n = len(data)
+        rng = np.random.default_rng(seed)
+        sample = data[rng.choice(n, size=min(n, sample_size), replace=False)]
+        nlist = min(len(sample), max(1, int(4 * np.sqrt(n))))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            nonempty = norms[:, 0] > 0
+            centroids[nonempty] = sums[nonempty] / norms[nonempty]
+
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, sample_size):
+            block = data[start : start + sample_size]
+            assign[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1))
+        return _IvfLayout(
+            centroids=centroids,
+            blocks=[data[order[s:e]] for s, e in zip(offsets, offsets[1:])],
+            block_ids=[ids[order[s:e]] for s, e in zip(offsets, offsets[1:])],
+            size=n,
+        )
+
+    def install_training(self, layout: _IvfLayout):
+        """Swaps in a layout from train() and routes the vectors added since its snapshot."""
+        pending, self._since_snapshot = self._since_snapshot or [], None
+        self._install(layout)
+        for vectors, ids in pending:
+            self._route(vectors, ids)
+
+    def abort_training(self):
+        """Forgets a begin_training() whose train() failed."""
+        self._since_snapshot = None
+
+    def _install(self, layout: _IvfLayout):
+        self._blocks = layout.blocks
+        self._block_ids = layout.block_ids
+        self._block_sizes = [len(b) for b in layout.blocks]
+        self._centroids = layout.centroids
+        self._size = self._trained_at = layout.size
+        # The flat matrix is no longer needed once every row lives in a cluster.
+        self._vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        logger.debug(f"🗂️ IVF index built: {layout.size} vectors in {len(layout.centroids)} clusters.")
+
+    def search(self, query: np.ndarray, k: int, exact: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """Returns (ids, scores) of the k most similar vectors, best first.
+
+        exact scans every IVF cluster (the ground truth for recall).
+        """
+        if self._size == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if not self.is_ivf:
+            ids = self._ids[: self._size]
+            scores = self._vectors[: self._size] @ query
+        else:
+            nprobe = len(self._centroids) if exact else min(self.nprobe, len(self._centroids))
+            probe = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+            ids = np.concatenate([self._block_ids[c][: self._block_sizes[c]] for c in probe])
+            scores = np.concatenate(
+                [self._blocks[c][: self._block_sizes[c]] @ query for c in probe]
+            )
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return ids[top], scores[top]
+
+
+class _MemoryPartition:
+    """Index, entries and content hashes for one (app_name, user_id) pair."""
+
+    def __init__(self, index: VectorIndex):
+        self.index = index
+        self.entries: list[MemoryEntry] = []
+        self.hashes: set[str] = set()
+
+
+def _event_text(content: types.Content | None) -> str:
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+def _content_hash(author: str | None, text: str) -> str:
+    return hashlib.blake2b(f"{author}\x00{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SemanticMemoryService(BaseMemoryService):
+    """Memory service with embedding-based top-k retrieval.
+
+    Memories are partitioned by (app_name, user_id) so a search only ever
+    touches the vectors of the requesting user. Each returned MemoryEntry
+    carries its similarity ``score`` and ``session_id`` in custom_metadata.
+
+    Args:
+        embedder: Object with ``dim`` and ``embed(texts) -> np.ndarray``.
+                  Defaults to the offline HashingEmbedder.
+        top_k: Maximum number of memories returned per search.
+        min_score: Minimum cosine similarity for a memory to be returned.
+        ann_threshold: Number of vectors per partition after which the IVF
+                       index is built (and later retrained) in a background
+                       thread. None keeps exact brute-force search.
+        nprobe: Number of IVF clusters scanned per query.
+        batch_writes: If True, add_session_to_memory() only queues new events
+                      and a background task embeds them in batches. Searches
+                      flush the queue first, so reads always see prior writes.
+        flush_interval: Seconds the background writer waits to gather a batch.
+        max_batch_size: Maximum number of events embedded per batch.
+        consolidator: Optional MemoryConsolidator. New events are handed to it
+                      in the background and searches return its consolidated
+                      fact records instead of raw turns, so raw turns are then
+                      not embedded or indexed at all.
+
+    Ingestion is incremental and idempotent: every session keeps a watermark
+    (timestamp of the newest ingested event), so calling
+    add_session_to_memory() after each turn only processes the new events,
+    and events whose (author, text) hash is already stored are skipped.
+    """
+
+    def __init__(
+        self,
+        embedder=None,
+        top_k: int = 5,
+        min_score: float = 0.1,
+        ann_threshold: int | None = 20_000,
+        nprobe: int = 8,
+        batch_writes: bool = False,
+        flush_interval: float = 0.05,
+        max_batch_size: int = 256,
+        consolidator=None,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.top_k = top_k
+        self.min_score = min_score
+        self.ann_threshold = ann_threshold
+        self.nprobe = nprobe
+        self.batch_writes = batch_writes
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.consolidator = consolidator
+        self._lock = threading.Lock()
+        self._partitions: dict[tuple[str, str], _MemoryPartition] = {}
+        self._watermarks: dict[tuple[str, str, str], float] = {}
+        self._pending: list[tuple[tuple[str, str], MemoryEntry, str]] = []
+        self._writer: asyncio.Task | None = None
+
+    def _partition(self, app_name: str, user_id: str) -> _MemoryPartition:
+        key = (app_name, user_id)
+        if key not in self._partitions:
+            self._partitions[key] = _MemoryPartition(
+                VectorIndex(
+                    self.embedder.dim,
+                    ann_threshold=self.ann_threshold,
+                    nprobe=self.nprobe,
+                    auto_train=False,  # trained by _train_in_background
+                )
+            )
+        return self._partitions[key]
+
+    def add_entries(
+        self, app_name: str, user_id: str, entries: list[MemoryEntry], texts: list[str]
+    ):
+        """Embeds and indexes pre-built memory entries for one user."""
+        if not entries:
+            return
+        vectors = self.embedder.embed(texts)
+        with self._lock:
+            partition = self._partition(app_name, user_id)
+            first_id = len(partition.entries)
+            partition.entries.extend(entries)
+            partition.index.add(vectors, np.arange(first_id, first_id + len(entries)))
+            snapshot = partition.index.begin_training() if partition.index.needs_training else None
+        if snapshot is not None:
+            threading.Thread(
+                target=self._train_in_background, args=(partition.index, snapshot), name="memory-ivf", daemon=True
+            ).start()
+
+    def _train_in_background(self, index: VectorIndex, snapshot: tuple[np.ndarray, np.ndarray]):
+        """Trains IVF centroids without holding the lock, so adds and searches go on meanwhile."""
+        try:
+            layout = index.train(*snapshot)
+        except Exception as e:
+            logger.error(f"IVF training failed: {e}")
+            with self._lock:
+                index.abort_training()
+            return
+        with self._lock:
+            index.install_training(layout)
+
+    def _new_events(self, session: Session) -> list[tuple[MemoryEntry, str]]:
+        """Returns entries for events past the session watermark, deduplicated."""
+        key = (session.app_name, session.user_id, session.id)
+        watermark = self._watermarks.get(key)
+        events = session.events
+        start = 0 if watermark is None else bisect_left(events, watermark, key=lambda e: e.timestamp)
+        if start == len(events):
+            return []
+        self._watermarks[key] = events[-1].timestamp
+
+        partition = self._partition(session.app_name, session.user_id)
+        new = []
+        for event in events[start:]:
+            text = _event_text(event.content)
+            if not text:
+                continue
+            digest = _content_hash(event.author, text)
+            if digest in partition.hashes:
+                continue
+            partition.hashes.add(digest)
+            new.append(
+                (
+                    MemoryEntry(
+                        id=event.id or None,
+                        content=event.content,
+                        author=event.author,
+                        timestamp=datetime.fromtimestamp(event.timestamp).isoformat(),
+                        custom_metadata={"session_id": session.id, "content_hash": digest},
+                    ),
+                    text,
+                )
+            )
+        return new
+
+    async def add_session_to_memory(self, session: Session):
+        with self._lock:
+            new = self._new_events(session)
+        if not new:
+            return
+        if self.consolidator is not None:
+            self.consolidator.submit(session.app_name, session.user_id, [entry for entry, _ in new])
+            return  # searches are answered from the fact records only
+
+        if not self.batch_writes:
+            self.add_entries(
+                session.app_name,
+                session.user_id,
+                [entry for entry, _ in new],
+                [text for _, text in new],
+            )
+            return
+
+        user_key = (session.app_name, session.user_id)
+        self._pending.extend((user_key, entry, text) for entry, text in new)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        """Background writer: embeds queued events in batches, grouped by user."""
+        await asyncio.sleep(self.flush_interval)
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            by_user: dict[tuple[str, str], tuple[list, list]] = {}
+            for user_key, entry, text in batch:
+                entries, texts = by_user.setdefault(user_key, ([], []))
+                entries.append(entry)
+                texts.append(text)
+            for (app_name, user_id), (entries, texts) in by_user.items():
+                await asyncio.to_thread(self.add_entries, app_name, user_id, entries, texts)
+            logger.debug(f"💾 Memory writer flushed {len(batch)} events.")
+
+    async def flush(self):
+        """Waits until every queued event has been written to the index."""
+        if self._writer is not None and not self._writer.done():
+            await self._writer
+        if self._pending:
+            self._writer = asyncio.create_task(self._drain())
+            await self._writer
+
+    async def search_memory(
+        self, *, app_name: str, user_id: str, query: str
+    ) -> SearchMemoryResponse:
+        if self.consolidator is not None:
+            await self.consolidator.flush()
+            query_vector = self.consolidator.embedder.embed([query])[0]
+            return SearchMemoryResponse(
+                memories=self.consolidator.search(
+                    app_name, user_id, query_vector, self.top_k, self.min_score
+                )
+            )
+
+        if self._pending or (self._writer is not None and not self._writer.done()):
+            await self.flush()
+        query_vector = self.embedder.embed([query])[0]
+        with self._lock:
+            partition = self._partitions.get((app_name, user_id))
+            if partition is None:
+                return SearchMemoryResponse()
+            ids, scores = partition.index.search(query_vector, self.top_k)
+            hits = [
+                (partition.entries[i], float(s))
+                for i, s in zip(ids, scores)
+                if s >= self.min_score
+            ]
+
+        return SearchMemoryResponse(
+            memories=[
+                entry.model_copy(
+                    update={"custom_metadata": {**entry.custom_metadata, "score": score}}
+                )
+                for entry, score in hits
+            ]
+        )
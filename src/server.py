@@ -0,0 +1,426 @@
+'''
+Agent Server
+
+`main.py run` and the tutorials serve one user at a time through
+runner.run_debug, and `adk web` is a single-user dev server. build_app()
+puts every agent of main.AGENTS behind one ASGI app (Starlette, which
+google-adk already brings along with uvicorn):
+
+    Runners      → one Runner per agent, built at startup with
+                   main.build_runner() in a worker thread (resolving model
+                   names may list the models over HTTP, which blocks) and
+                   shared by all users; every turn is a runner.run_async()
+                   task on the same event loop
+    Streaming    → POST /agents/{agent}/run answers with Server-Sent Events
+                   (one `event` per ADK Event, then `done`);
+                   WS /agents/{agent}/ws runs one turn per JSON message
+    Sessions     → a turn names its user_id and session_id; an unknown
+                   session is created, turns of one session run one after
+                   the other (never interleaved)
+    Limits       → at most max_per_user turns of one user run at a time
+                   and max_active in the whole process; up to
+                   queue_per_user more wait in line (FIFO, the client sees
+                   a `queued` event), anything beyond is refused with 429
+                   and Retry-After, which is the backpressure
+    Disconnects  → a client that goes away (noticed at the next write)
+                   cancels its turn or gives up its place in line, so
+                   nobody pays for answers nobody reads
+    Stats        → GET /stats: runs, rejections, disconnects, active and
+                   queued turns, latency percentiles; GET /healthz
+
+Usage:
+    python src/main.py serve --port 8000 --max-per-user 2
+    curl -N localhost:8000/agents/currency/run \
+         -d '{"user_id": "u1", "session_id": "s1", "message": "Convert 500 USD to EUR"}'
+'''
+
+import asyncio
+import json
+import time
+import uuid
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+
+from google.adk.runners import Runner
+from google.genai import types
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from latency import LatencyHistogram
+
+
+class Overloaded(Exception):
+    """A user's line (or the server) is full; try again after retry_after seconds."""
+
+    def __init__(self, user_id: str, retry_after: float):
+        super().__init__(f"Too many turns in flight for {user_id}; retry in {retry_after:.0f}s.")
+        self.user_id = user_id
+        self.retry_after = retry_after
+
+
+@dataclass
+class _UserLine:
+    running: asyncio.Semaphore
+    waiting: int = 0
+    active: int = 0
+
+
+class UserLimiter:
+    """Per-user and global limits on turns in flight, with a bounded FIFO line per user.
+
+    Args:
+        max_per_user: Turns of one user running at the same time.
+        queue_per_user: Turns of one user allowed to wait for a slot; more are refused.
+        max_active: Turns running in the whole process (None: no global limit).
+        retry_after: Seconds suggested to refused clients.
+    """
+
+    def __init__(self, max_per_user: int = 2, queue_per_user: int = 8, max_active: int | None = None,
+                 retry_after: float = 1.0):
+        self.max_per_user = max_per_user
+        self.queue_per_user = queue_per_user
+        self.max_active = max_active
+        self.retry_after = retry_after
+        self._lines: dict[str, _UserLine] = {}
+        self._global = asyncio.Semaphore(max_active) if max_active else None
+        self.stats = {"admitted": 0, "rejected": 0, "queued": 0, "active": 0, "waiting": 0, "peak_active": 0}
+
+    def admit(self, user_id: str) -> "_Ticket":
+        """A place in the user's line, or Overloaded if the line is full (never waits)."""
+        line = self._lines.get(user_id)
+        if line is None:
+            line = self._lines[user_id] = _UserLine(asyncio.Semaphore(self.max_per_user))
+        busy = line.active + line.waiting >= self.max_per_user
+        if busy and line.waiting >= self.queue_per_user:
+            self.stats["rejected"] += 1
+            raise Overloaded(user_id, self.retry_after)
+        self.stats["admitted"] += 1
+        return _Ticket(self, user_id, line, queued=busy)
+
+    def _forget(self, user_id: str, line: _UserLine):
+        if not line.active and not line.waiting and self._lines.get(user_id) is line:
+            del self._lines[user_id]  # idle users cost nothing
+
+
+class _Ticket:
+    """Waits for the user's (and the global) slot; `async with` holds it for one turn."""
+
+    def __init__(self, limiter: UserLimiter, user_id: str, line: _UserLine, queued: bool):
+        self.limiter = limiter
+        self.user_id = user_id
+        self.line = line
+        self.queued = queued
+        line.waiting += 1
+        limiter.stats["waiting"] += 1
+        if queued:
+            limiter.stats["queued"] += 1
+
+    async def __aenter__(self):
+        stats, acquired = self.limiter.stats, []
+        try:
+            await self.line.running.acquire()
+            acquired.append(self.line.running)
+            if self.limiter._global is not None:
+                await self.limiter._global.acquire()
+                acquired.append(self.limiter._global)
+        except BaseException:  # cancelled while in line
+            for semaphore in acquired:
+                semaphore.release()
+            self._leave_line()
+            self.limiter._forget(self.user_id, self.line)
+            raise
+        self._leave_line()
+        self.line.active += 1
+        stats["active"] += 1
+        stats["peak_active"] = max(stats["peak_active"], stats["active"])
+        return self
+
+    async def __aexit__(self, *exc):
+        self.line.active -= 1
+        self.limiter.stats["active"] -= 1
+        if self.limiter._global is not None:
+            self.limiter._global.release()
+        self.line.running.release()
+        self.limiter._forget(self.user_id, self.line)
+
+    def abandon(self):
+        """Gives up the place in line without ever entering (the client went away)."""
+        self._leave_line()
+        self.limiter._forget(self.user_id, self.line)
+
+    def _leave_line(self):
+        self.line.waiting -= 1
+        self.limiter.stats["waiting"] -= 1
+
+
+@dataclass
+class TurnRequest:
+    """One user message for an agent (the body of /run, or one WebSocket message)."""
+
+    user_id: str
+    message: str
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    @classmethod
+    def from_dict(cls, data: dict, user_id: str | None = None) -> "TurnRequest":
+        user_id = data.get("user_id") or user_id
+        if not user_id or not isinstance(data.get("message"), str) or not data["message"].strip():
+            raise ValueError("A turn needs a user_id and a non-empty message.")
+        if session_id := data.get("session_id"):
+            return cls(str(user_id), data["message"], str(session_id))
+        return cls(str(user_id), data["message"])
+
+
+def sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class AgentServer:
+    """Runners, limits and session bookkeeping behind the ASGI routes.
+
+    Args:
+        agents: Names from main.AGENTS to serve (None: all of them).
+        limiter: Turn limits (default: UserLimiter()).
+        session_db: SQLite file for DurableSessionService (None: in memory).
+        run_timeout: Seconds a turn may take before it is cancelled (None: no limit).
+    """
+
+    def __init__(self, agents: list[str] | None = None, limiter: UserLimiter | None = None,
+                 session_db: str | None = None, run_timeout: float | None = None):
+        from main import AGENTS
+
+        unknown = sorted(set(agents or ()) - AGENTS.keys())
+        if unknown:
+            raise ValueError(f"Unknown agents: {', '.join(unknown)}.")
+        self.agents = {name: AGENTS[name] for name in (agents or AGENTS)}
+        self.limiter = limiter or UserLimiter()
+        self.session_db = session_db
+        self.run_timeout = run_timeout
+        self.runners: dict[str, Runner] = {}
+        self._session_locks: dict[tuple[str, str, str], tuple[asyncio.Lock, int]] = {}
+        self.latency = LatencyHistogram()
+        self.first_event = LatencyHistogram()
+        self.stats = {"runs": 0, "completed": 0, "failed": 0, "timeouts": 0, "disconnected": 0, "events": 0}
+
+    async def start(self):
+        """Builds every runner before the first request, off the event loop."""
+        for agent in self.agents:
+            await asyncio.to_thread(self.runner, agent)
+
+    def runner(self, agent: str) -> Runner:
+        if agent not in self.agents:
+            raise KeyError(agent)
+        if agent not in self.runners:
+            from main import build_runner
+
+            started = time.perf_counter()
+            self.runners[agent] = build_runner(agent, self.session_db)
+            logger.info(f"🏗️ Runner for {agent} built in {time.perf_counter() - started:.3f}s.")
+        return self.runners[agent]
+
+    async def ensure_session(self, runner: Runner, user_id: str, session_id: str):
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            session = await runner.session_service.create_session(
+                app_name=runner.app_name, user_id=user_id, session_id=session_id
+            )
+        return session
+
+    @asynccontextmanager
+    async def _session_turn(self, key: tuple[str, str, str]):
+        """Serializes the turns of one session; the lock is dropped when nobody holds or waits for it."""
+        lock, users = self._session_locks.get(key, (asyncio.Lock(), 0))
+        self._session_locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._session_locks[key]
+            if users == 1:
+                del self._session_locks[key]
+            else:
+                self._session_locks[key] = (lock, users - 1)
+
+    async def turn(self, agent: str, request: TurnRequest):
+        """Yields ("queued" | "start" | "event" | "error" | "done", payload) for one turn.
+
+        Raises Overloaded before anything is yielded if the user's line is full.
+        """
+        runner = self.runner(agent)
+        received = time.perf_counter()
+        ticket = self.limiter.admit(request.user_id)
+        if ticket.queued:
+            try:
+                yield "queued", {"waiting": ticket.line.waiting}
+            except GeneratorExit:  # closed while in line
+                ticket.abandon()
+                self.stats["disconnected"] += 1
+                raise
+        async with ticket, self._session_turn((agent, request.user_id, request.session_id)):
+            self.stats["runs"] += 1
+            yield "start", {"session_id": request.session_id, "queued_ms": round((time.perf_counter() - received) * 1000, 1)}
+            first = True
+            deadline = None if self.run_timeout is None else asyncio.get_running_loop().time() + self.run_timeout
+            try:
+                async with asyncio.timeout_at(deadline):
+                    await self.ensure_session(runner, request.user_id, request.session_id)
+                message = types.Content(role="user", parts=[types.Part(text=request.message)])
+                events = runner.run_async(user_id=request.user_id, session_id=request.session_id, new_message=message)
+                async with aclosing(events):
+                    while True:
+                        async with asyncio.timeout_at(deadline):  # the yield stays outside: it waits on the client
+                            event = await anext(events, None)
+                        if event is None:
+                            break
+                        if first:
+                            self.first_event.add(time.perf_counter() - received)
+                            first = False
+                        self.stats["events"] += 1
+                        yield "event", event
+            except TimeoutError:
+                self.stats["timeouts"] += 1
+                logger.warning(f"⏱️ {agent} turn of {request.user_id}/{request.session_id} timed out.")
+                yield "error", {"error": "timeout", "detail": f"Turn took longer than {self.run_timeout}s."}
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                self.stats["disconnected"] += 1
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.exception(f"❌ {agent} turn of {request.user_id}/{request.session_id} failed.")
+                yield "error", {"error": type(e).__name__, "detail": str(e)}
+                return
+            self.stats["completed"] += 1
+            self.latency.add(time.perf_counter() - received)
+        yield "done", {"session_id": request.session_id}
+
+    def report(self) -> dict:
+        def ms(histogram: LatencyHistogram) -> dict:
+            return {f"p{q}": round(histogram.percentile(q) * 1000, 1) for q in (50, 95, 99)}
+
+        return {
+            **self.stats,
+            "limiter": dict(self.limiter.stats),
+            "runners": sorted(self.runners),
+            "latency_ms": ms(self.latency),
+            "first_event_ms": ms(self.first_event),
+        }
+
+    async def close(self):
+        for runner in self.runners.values():
+            await runner.close()
+            if hasattr(runner.session_service, "close"):
+                runner.session_service.close()
+        self.runners.clear()
+
+
+def _payload(kind: str, payload) -> str:
+    if kind == "event":
+        return payload.model_dump_json(exclude_none=True, by_alias=True)
+    return json.dumps(payload)
+
+
+def _overloaded(e: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        {"error": "overloaded", "detail": str(e), "retry_after": e.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(max(1, round(e.retry_after)))},
+    )
+
+
+def build_app(server: AgentServer | None = None, **kwargs) -> Starlette:
+    """The ASGI app; kwargs go to AgentServer when no server is given."""
+    server = server or AgentServer(**kwargs)
+
+    async def list_agents(request: Request):
+        return JSONResponse({name: spec.description for name, spec in server.agents.items()})
+
+    async def create_session(request: Request):
+        agent = request.path_params["agent"]
+        if agent not in server.agents:
+            return JSONResponse({"error": "unknown agent"}, status_code=404)
+        body = await request.json() if await request.body() else {}
+        user_id = body.get("user_id") or request.headers.get("x-user-id")
+        if not user_id:
+            return JSONResponse({"error": "user_id is required"}, status_code=400)
+        runner = server.runner(agent)
+        session = await server.ensure_session(runner, user_id, body.get("session_id") or uuid.uuid4().hex)
+        return JSONResponse({"user_id": user_id, "session_id": session.id, "state": session.state}, status_code=201)
+
+    async def run(request: Request):
+        agent = request.path_params["agent"]
+        if agent not in server.agents:
+            return JSONResponse({"error": "unknown agent"}, status_code=404)
+        try:
+            turn = TurnRequest.from_dict(await request.json(), request.headers.get("x-user-id"))
+        except (ValueError, AttributeError) as e:
+            return JSONResponse({"error": "bad request", "detail": str(e)}, status_code=400)
+        events = server.turn(agent, turn)
+        try:
+            kind, payload = await anext(events)  # Overloaded surfaces here, before the 200
+        except Overloaded as e:
+            return _overloaded(e)
+
+        async def stream():
+            async with aclosing(events):
+                yield sse(kind, _payload(kind, payload))
+                async for next_kind, next_payload in events:
+                    yield sse(next_kind, _payload(next_kind, next_payload))
+
+        return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    async def websocket(ws: WebSocket):
+        agent = ws.path_params["agent"]
+        if agent not in server.agents:
+            await ws.close(code=4404)
+            return
+        await ws.accept()
+        user_id = ws.query_params.get("user_id")
+        try:
+            while True:
+                try:
+                    turn = TurnRequest.from_dict(await ws.receive_json(), user_id)
+                except (ValueError, AttributeError) as e:
+                    await ws.send_json({"type": "error", "error": "bad request", "detail": str(e)})
+                    continue
+                try:
+                    async with aclosing(server.turn(agent, turn)) as events:
+                        async for kind, payload in events:
+                            await ws.send_text(f'{{"type": "{kind}", "data": {_payload(kind, payload)}}}')
+                except Overloaded as e:
+                    await ws.send_json({"type": "error", "error": "overloaded", "retry_after": e.retry_after})
+        except WebSocketDisconnect:
+            pass
+
+    async def stats(request: Request):
+        return JSONResponse(server.report())
+
+    async def healthz(request: Request):
+        return JSONResponse({"ok": True, "active": server.limiter.stats["active"]})
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await server.start()
+        logger.info(f"🚀 Serving {', '.join(server.agents)}.")
+        yield
+        await server.close()
+
+    app = Starlette(
+        routes=[
+            Route("/agents", list_agents),
+            Route("/agents/{agent}/sessions", create_session, methods=["POST"]),
+            Route("/agents/{agent}/run", run, methods=["POST"]),
+            WebSocketRoute("/agents/{agent}/ws", websocket),
+            Route("/stats", stats),
+            Route("/healthz", healthz),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.server = server
+    return app
@@ -0,0 +1,370 @@
+'''
+Durable Session Store
+
+InMemorySessionService loses every conversation on restart, and
+get_session() hands back the whole event list. DurableSessionService keeps
+sessions in SQLite and only loads what a turn needs:
+
+    Storage → one SQLite file in WAL mode (readers never block the writer);
+              events are rows keyed by an increasing seq and indexed by
+              (app_name, user_id, session_id, seq)
+    Writes  → append_event() buffers a session's events and state deltas and
+              writes them in one transaction when the turn ends (final
+              response), when batch_size events are pending, or before any
+              read of that session
+    Resume  → get_session() returns the whole history, like ADK's own
+              services, so a resumed conversation keeps its context; a
+              caller that rebuilds context itself can load only the newest
+              events with GetSessionConfig (or recent_events=N) and page
+              older ones with list_events()
+
+A window is cut by event count, not at turn boundaries: it can start with a
+model reply or a function response whose request was left out.
+
+A crash loses at most the turn in flight (its events are still buffered).
+
+Usage:
+    Runner(agent=..., app_name=..., session_service=DurableSessionService("sessions.sqlite"))
+'''
+
+import copy
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+from loguru import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    invocation_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    event_data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+"""
+
+SessionKey = tuple[str, str, str]
+
+
+def _split_state(state: dict[str, Any] | None) -> tuple[dict, dict, dict]:
+    """Splits a state (delta) into app, user and session parts; temp: keys are dropped."""
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key.removeprefix(State.APP_PREFIX)] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key.removeprefix(State.USER_PREFIX)] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+def _merge_state(app: dict, user: dict, session: dict) -> dict[str, Any]:
+    merged = copy.deepcopy(session)
+    merged.update({State.APP_PREFIX + k: v for k, v in app.items()})
+    merged.update({State.USER_PREFIX + k: v for k, v in user.items()})
+    return merged
+
+
+class _Pending:
+    def __init__(self):
+        self.rows: list[tuple] = []
+        self.delta: dict[str, Any] = {}
+        self.update_time = 0.0
+
+
+class DurableSessionService(BaseSessionService):
+    """SQLite-backed session service with per-turn batched writes and windowed loading.
+
+    Args:
+        db_path: SQLite file (created if missing); ":memory:" for a throwaway store.
+        recent_events: Events loaded by get_session() without a config;
+                       None (the default) loads the whole history.
+        batch_size: Pending events per session that force a write before
+                    the turn ends (1 writes every event immediately).
+    """
+
+    def __init__(self, db_path: str | Path, recent_events: int | None = None, batch_size: int = 64):
+        self.recent_events = recent_events
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: dict[SessionKey, _Pending] = {}
+        self.stats = {"appended": 0, "flushes": 0, "events_written": 0, "events_loaded": 0}
+        if str(db_path) != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, no fsync per commit
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        logger.debug(f"💾 Session store ready ({db_path}).")
+
+    # ---- state helpers (call with the lock held) ----
+
+    def _load_state(self, table: str, where: str, params: tuple) -> dict:
+        row = self._db.execute(f"SELECT state FROM {table} WHERE {where}", params).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _patch_state(self, table: str, keys: dict[str, str], delta: dict):
+        # Each key of the delta replaces the stored value, as in ADK's own
+        # services; SQLite's json_patch would merge nested dicts and drop None.
+        if not delta:
+            return
+        columns = ", ".join(keys)
+        marks = ", ".join("?" for _ in keys)
+        state = self._load_state(table, " AND ".join(f"{c} = ?" for c in keys), tuple(keys.values()))
+        state.update(delta)
+        self._db.execute(
+            f"INSERT INTO {table} ({columns}, state) VALUES ({marks}, ?)"
+            f" ON CONFLICT({columns}) DO UPDATE SET state = excluded.state",
+            (*keys.values(), json.dumps(state)),
+        )
+
+    def _write(self, key: SessionKey, pending: _Pending):
+        app_name, user_id, session_id = key
+        app, user, session = _split_state(pending.delta)
+        self._patch_state("app_states", {"app_name": app_name}, app)
+        self._patch_state("user_states", {"app_name": app_name, "user_id": user_id}, user)
+        self._db.executemany(
+            "INSERT INTO events (app_name, user_id, session_id, id, invocation_id, timestamp, event_data)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            pending.rows,
+        )
+        state = self._load_state("sessions", "app_name = ? AND user_id = ? AND id = ?", key)
+        state.update(session)
+        self._db.execute(
+            "UPDATE sessions SET state = ?, update_time = ?, event_count = event_count + ?"
+            " WHERE app_name = ? AND user_id = ? AND id = ?",
+            (json.dumps(state), pending.update_time, len(pending.rows), app_name, user_id, session_id),
+        )
+        self.stats["flushes"] += 1
+        self.stats["events_written"] += len(pending.rows)
+
+    def _flush(self, keys: list[SessionKey]):
+        batches = [(k, p) for k in keys if (p := self._pending.pop(k, None)) is not None]
+        if not batches:
+            return
+        with self._db:  # one transaction for everything pending
+            for key, pending in batches:
+                self._write(key, pending)
+
+    async def flush(self):
+        """Writes every buffered event now (Runner.close() awaits this)."""
+        with self._lock:
+            self._flush(list(self._pending))
+
+    def close(self):
+        """Writes every buffered event and closes the database."""
+        with self._lock:
+            self._flush(list(self._pending))
+            self._db.close()
+
+    # ---- BaseSessionService ----
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: dict[str, Any] | None = None,
+        session_id: str | None = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        app, user, session = _split_state(state)
+        now = time.time()
+        with self._lock, self._db:
+            exists = self._db.execute(
+                "SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if exists:
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            self._patch_state("app_states", {"app_name": app_name}, app)
+            self._patch_state("user_states", {"app_name": app_name, "user_id": user_id}, user)
+            self._db.execute(
+                "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (app_name, user_id, session_id, json.dumps(session), now, now),
+            )
+            merged = _merge_state(
+                self._load_state("app_states", "app_name = ?", (app_name,)),
+                self._load_state("user_states", "app_name = ? AND user_id = ?", (app_name, user_id)),
+                session,
+            )
+        return Session(
+            app_name=app_name, user_id=user_id, id=session_id, state=merged, events=[], last_update_time=now
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: GetSessionConfig | None = None,
+    ) -> Session | None:
+        key = (app_name, user_id, session_id)
+        limit = config.num_recent_events if config else self.recent_events
+        after = config.after_timestamp if config else None
+        with self._lock:
+            self._flush([key])
+            row = self._db.execute(
+                "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            query = "SELECT event_data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            params: list[Any] = list(key)
+            if after:
+                query += " AND timestamp >= ?"
+                params.append(after)
+            query += " ORDER BY seq DESC"
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            event_rows = self._db.execute(query, params).fetchall()
+            state = _merge_state(
+                self._load_state("app_states", "app_name = ?", (app_name,)),
+                self._load_state("user_states", "app_name = ? AND user_id = ?", (app_name, user_id)),
+                json.loads(row[0]),
+            )
+            self.stats["events_loaded"] += len(event_rows)
+        events = [Event.model_validate_json(data) for (data,) in reversed(event_rows)]
+        return Session(
+            app_name=app_name, user_id=user_id, id=session_id, state=state, events=events, last_update_time=row[1]
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: str | None = None) -> ListSessionsResponse:
+        with self._lock:
+            self._flush([k for k in self._pending if k[0] == app_name and user_id in (None, k[1])])
+            query = "SELECT user_id, id, state, update_time FROM sessions WHERE app_name = ?"
+            params: tuple = (app_name,)
+            if user_id is not None:
+                query += " AND user_id = ?"
+                params += (user_id,)
+            rows = self._db.execute(query, params).fetchall()
+            app = self._load_state("app_states", "app_name = ?", (app_name,))
+            users = {
+                uid: json.loads(state)
+                for uid, state in self._db.execute(
+                    "SELECT user_id, state FROM user_states WHERE app_name = ?", (app_name,)
+                )
+            }
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    app_name=app_name,
+                    user_id=uid,
+                    id=sid,
+                    state=_merge_state(app, users.get(uid, {}), json.loads(state)),
+                    events=[],
+                    last_update_time=update_time,
+                )
+                for uid, sid, state, update_time in rows
+            ]
+        )
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        with self._lock, self._db:
+            self._pending.pop(key, None)
+            self._db.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+            self._db.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session, event)  # trims temp: keys, updates session.state
+        session.last_update_time = event.timestamp
+        key = (session.app_name, session.user_id, session.id)
+        row = (
+            *key,
+            event.id,
+            event.invocation_id,
+            event.timestamp,
+            event.model_dump_json(exclude_none=True),
+        )
+        with self._lock:
+            pending = self._pending.setdefault(key, _Pending())
+            pending.rows.append(row)
+            if event.actions and event.actions.state_delta:
+                pending.delta.update(event.actions.state_delta)
+            pending.update_time = event.timestamp
+            self.stats["appended"] += 1
+            if len(pending.rows) >= self.batch_size or (event.is_final_response() and event.author != "user"):
+                self._flush([key])
+        return event
+
+    # ---- history ----
+
+    async def count_events(self, *, app_name: str, user_id: str, session_id: str) -> int:
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._flush([key])
+            row = self._db.execute(
+                "SELECT event_count FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            ).fetchone()
+        return row[0] if row else 0
+
+    async def list_events(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        page_size: int = 100,
+        before: int | None = None,
+    ) -> tuple[list[Event], int | None]:
+        """One page of history, newest page first, events in chronological order.
+
+        Returns (events, cursor); pass cursor as before= to get the previous
+        page, None means the start of the session was reached.
+        """
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._flush([key])
+            rows = self._db.execute(
+                "SELECT seq, event_data FROM events"
+                " WHERE app_name = ? AND user_id = ? AND session_id = ? AND seq < ?"
+                " ORDER BY seq DESC LIMIT ?",
+                (*key, before if before is not None else 2**63 - 1, page_size),
+            ).fetchall()
+            self.stats["events_loaded"] += len(rows)
+        events = [Event.model_validate_json(data) for _, data in reversed(rows)]
+        cursor = rows[-1][0] if len(rows) == page_size else None
+        return events, cursor
@@ -0,0 +1,192 @@
+'''
+Streaming Pipeline
+
+BlogPipeline (SequentialAgent) runs OutlineAgent → WriterAgent → EditorAgent
+and every stage waits for the previous stage's complete output in session
+state. StreamingPipeline overlaps the stages instead:
+
+    Stream  → each stage calls its model with stream=True
+    Chunk   → upstream text is cut into chunks at blank lines as it arrives
+              (an outline section, a draft paragraph)
+    Overlap → a downstream stage starts a model call per chunk as soon as the
+              chunk is complete, up to `concurrency` calls per stage
+    Order   → a stage's outputs are released strictly in chunk order, so the
+              assembled text is identical whatever order calls finish in
+    State   → once the last stage is done, every stage's output_key
+              (blog_outline, blog_draft, final_blog) holds its full text
+
+Chunks of the last stage are emitted as partial events the moment they are
+ready, so the first edited paragraph appears long before the draft is done.
+
+What it costs (why main.py does not offer it as an agent):
+
+    Calls   → one model call per upstream chunk: the blog's 3 requests
+              become 13, so under a requests-per-minute quota (15 by
+              default, rate_limiter.py) it is several times slower than
+              BlogPipeline (benchmarks/bench_streaming_pipeline.py --rpm 15)
+    Output  → the writer only sees the outline received so far and the
+              editor one paragraph at a time, so the text differs from
+              what whole-document stages would write
+    Hooks   → stages call their models directly: LlmAgent callbacks and
+              plugins (RateLimitPlugin, TracingPlugin) do not see them
+
+It pays off only where decode time dominates and calls are not rate limited.
+'''
+
+import asyncio
+import re
+from typing import AsyncGenerator, AsyncIterator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.models import LlmRequest
+from google.adk.models.base_llm import BaseLlm
+from google.genai import types
+from pydantic import BaseModel, ConfigDict
+
+_CHUNK_BOUNDARY_RE = re.compile(r"\n\s*\n")
+
+
+class StreamingStage(BaseModel):
+    """One stage of a StreamingPipeline.
+
+    Args:
+        name: Stage name (used as the author of its events).
+        model: Model called once per upstream chunk (once for the first stage).
+        instruction: System instruction; `{context}` is replaced by the
+                     upstream text received so far.
+        output_key: Session state key receiving the stage's full output.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str
+    model: BaseLlm
+    instruction: str
+    output_key: str
+
+
+async def split_chunks(deltas: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+    """Re-cuts a stream of text deltas into blank-line separated chunks."""
+    buffer = ""
+    async for delta in deltas:
+        buffer += delta
+        *complete, buffer = _CHUNK_BOUNDARY_RE.split(buffer)
+        for chunk in complete:
+            if chunk.strip():
+                yield chunk.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def stream_text(model: BaseLlm, instruction: str, text: str) -> AsyncGenerator[str, None]:
+    """Yields the text deltas of one streamed model call."""
+    request = LlmRequest(
+        model=model.model,
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(system_instruction=instruction),
+    )
+    streamed = False
+    async for response in model.generate_content_async(request, stream=True):
+        if response.error_code:
+            raise RuntimeError(f"{model.model}: {response.error_code} {response.error_message}")
+        parts = response.content.parts if response.content else None
+        text_out = "".join(part.text for part in parts or [] if part.text and not part.thought)
+        if response.partial:
+            streamed = True
+            yield text_out
+        elif not streamed:
+            # Non-streaming backends (or cache hits) only send the final response;
+            # when partials were streamed, the final response repeats them.
+            yield text_out
+
+
+class StreamingPipeline(BaseAgent):
+    """Runs StreamingStages with each stage consuming the previous one chunk by chunk.
+
+    Args:
+        stages: The stages, in order. The first one gets the user's message.
+        concurrency: Maximum model calls in flight per stage.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    stages: list[StreamingStage]
+    concurrency: int = 4
+
+    def _run_stage(
+        self, stage: StreamingStage, upstream: AsyncIterator[str], collected: list[str]
+    ) -> AsyncGenerator[str, None]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        received: list[str] = []
+
+        async def call(chunk: str, out: asyncio.Queue):
+            try:
+                async with semaphore:
+                    instruction = stage.instruction.replace("{context}", "\n\n".join(received))
+                    async for piece in split_chunks(stream_text(stage.model, instruction, chunk)):
+                        await out.put(piece)
+            finally:
+                await out.put(None)
+
+        async def ordered() -> AsyncGenerator[str, None]:
+            pending: asyncio.Queue[tuple[asyncio.Task, asyncio.Queue] | None] = asyncio.Queue()
+
+            async def feed():
+                try:
+                    async for chunk in upstream:
+                        received.append(chunk)
+                        out: asyncio.Queue = asyncio.Queue()
+                        await pending.put((asyncio.create_task(call(chunk, out)), out))
+                finally:
+                    await pending.put(None)
+
+            feeder = asyncio.create_task(feed())
+            tasks = []
+            try:
+                while (item := await pending.get()) is not None:
+                    task, out = item
+                    tasks.append(task)
+                    while (piece := await out.get()) is not None:
+                        collected.append(piece)
+                        yield piece
+                    await task  # surfaces the call's exception, if any
+                await feeder
+            finally:
+                feeder.cancel()
+                for task in tasks:
+                    task.cancel()
+
+        return ordered()
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        content = ctx.user_content
+        question = " ".join(p.text for p in (content.parts if content else None) or [] if p.text)
+
+        async def first_input() -> AsyncGenerator[str, None]:
+            yield question
+
+        outputs: list[list[str]] = [[] for _ in self.stages]
+        stream: AsyncIterator[str] = first_input()
+        for stage, collected in zip(self.stages, outputs):
+            stream = self._run_stage(stage, stream, collected)
+
+        last = self.stages[-1]
+        async for piece in stream:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=last.name,
+                branch=ctx.branch,
+                partial=True,
+                content=types.Content(role="model", parts=[types.Part(text=piece + "\n\n")]),
+            )
+
+        texts = {stage.output_key: "\n\n".join(out) for stage, out in zip(self.stages, outputs)}
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=last.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=texts[last.output_key])]),
+            actions=EventActions(state_delta=texts),
+        )
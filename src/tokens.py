@@ -0,0 +1,32 @@
+'''
+Local token estimation
+
+Gemini bills and limits by tokens, but calling countTokens before every
+request would add a network round trip. estimate_tokens() approximates the
+count locally (~4 characters or ~0.75 words per token for English text) and
+memoizes the result, since the same instructions and memories are estimated
+over and over.
+'''
+
+import re
+from functools import lru_cache
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=16384)
+def estimate_tokens(text: str) -> int:
+    """Returns an approximate Gemini token count for a piece of text.
+
+    Args:
+        text: The text to estimate.
+
+    Returns:
+        The larger of the character-based and word-based estimates, so
+        punctuation-heavy and long-word texts are not underestimated.
+    """
+    if not text:
+        return 0
+    by_chars = (len(text) + 3) // 4
+    by_words = (len(_WORD_RE.findall(text)) * 4 + 2) // 3
+    return max(by_chars, by_words)
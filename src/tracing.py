@@ -0,0 +1,373 @@
+'''
+Tracing
+
+The only visibility so far was loguru debug lines and
+show_python_code_and_result(), which reads the finished event list after
+the fact. TracingPlugin records spans from the runner's callback hooks
+while the request runs:
+
+    Spans   → one per run, agent, model call and tool call; a tool call that
+              is an AgentTool is an "agent_tool" span and the sub-agent's
+              run nests under it, so the tree matches the agent tree
+    Model   → model name, latency, time to first chunk (streaming), input /
+              output / cached tokens, response-cache hit, retries (when a
+              wrapper reports them in custom_metadata)
+    Export  → JsonlSpanExporter appends finished spans to a JSONL file;
+              PrometheusMetrics aggregates them and serve_metrics() exposes
+              the Prometheus text format on /metrics
+    Report  → format_trace() prints a trace as an indented tree with
+              durations, e.g. to see where a BlogPipeline request goes
+
+Usage:
+    metrics = PrometheusMetrics()
+    plugin = TracingPlugin(exporters=[JsonlSpanExporter("trace.jsonl"), metrics])
+    InMemoryRunner(agent=..., plugins=[plugin])
+    serve_metrics(metrics, port=9464)
+'''
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Protocol
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import AgentTool
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from loguru import logger
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    kind: str  # run | agent | model | tool | agent_tool
+    name: str
+    start: float  # epoch seconds
+    duration_ms: float = 0.0
+    status: str = "ok"
+    attributes: dict[str, Any] = field(default_factory=dict)
+    _t0: float = field(default=0.0, repr=False)
+    _parent: "Span | None" = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["_t0"], data["_parent"]
+        return data
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span): ...
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("trace_span", default=None)
+
+
+class JsonlSpanExporter:
+    """Appends finished spans, one JSON object per line.
+
+    Args:
+        path: Trace file (created if missing, appended to otherwise).
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class PrometheusMetrics:
+    """Aggregates spans into Prometheus counters and histograms.
+
+    Args:
+        buckets: Upper bounds (seconds) of the span duration histogram.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple, list[float]] = {}  # labels → bucket counts + [sum, count]
+        self._counters: dict[str, dict[tuple, float]] = defaultdict(lambda: defaultdict(float))
+
+    def export(self, span: Span):
+        seconds = span.duration_ms / 1000
+        labels = (("kind", span.kind), ("name", span.name), ("model", span.attributes.get("model", "")))
+        with self._lock:
+            counts = self._histograms.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+            counts[-2] += seconds
+            counts[-1] += 1
+            if span.status != "ok":
+                self._counters["adk_span_errors_total"][labels[:2]] += 1
+            if span.kind == "model":
+                model = (("model", span.attributes.get("model", "")), ("agent", span.name))
+                for direction in ("input", "output", "cached"):
+                    tokens = span.attributes.get(f"{direction}_tokens") or 0
+                    self._counters["adk_model_tokens_total"][(*model, ("direction", direction))] += tokens
+                self._counters["adk_model_cache_hits_total"][model] += bool(span.attributes.get("cache_hit"))
+                self._counters["adk_model_retries_total"][model] += span.attributes.get("retries") or 0
+
+    @staticmethod
+    def _labels(labels: tuple) -> str:
+        escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+        return "{" + ",".join(escaped) + "}"
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP adk_span_duration_seconds Duration of runs, agents, model and tool calls.",
+            "# TYPE adk_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for labels, counts in sorted(self._histograms.items()):
+                for bound, count in zip((*self.buckets, "+Inf"), (*counts[: len(self.buckets)], counts[-1])):
+                    lines.append(f"adk_span_duration_seconds_bucket{self._labels((*labels, ('le', bound)))} {count:g}")
+                lines.append(f"adk_span_duration_seconds_sum{self._labels(labels)} {counts[-2]:.6f}")
+                lines.append(f"adk_span_duration_seconds_count{self._labels(labels)} {counts[-1]:g}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{self._labels(labels)} {value:g}" for labels, value in sorted(series.items()))
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(metrics: PrometheusMetrics, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves metrics.render() on http://host:port/metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"📈 Metrics on http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def _usage(llm_response: LlmResponse) -> dict[str, Any]:
+    usage = llm_response.usage_metadata
+    if usage is None:
+        return {}
+    return {
+        "input_tokens": usage.prompt_token_count or 0,
+        "output_tokens": usage.candidates_token_count or 0,
+        "cached_tokens": usage.cached_content_token_count or 0,
+    }
+
+
+class TracingPlugin(BasePlugin):
+    """Records nested spans for every run, agent, model and tool call.
+
+    Install on a runner, e.g. InMemoryRunner(agent=..., plugins=[TracingPlugin(...)]).
+    AgentTool passes the plugin on to the sub-agent's runner, so its spans
+    nest under the tool call.
+
+    Args:
+        exporters: Receive each span when it ends (JsonlSpanExporter,
+                   PrometheusMetrics, ...).
+    """
+
+    def __init__(self, exporters: list[SpanExporter] | None = None, name: str = "tracing"):
+        super().__init__(name=name)
+        self.exporters = exporters or []
+        self._open: dict[tuple, Span] = {}
+
+    def _start(self, key: tuple, kind: str, name: str, **attributes) -> Span:
+        parent = _current.get()
+        span = Span(
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            name=name,
+            start=time.time(),
+            attributes=attributes,
+            _t0=time.perf_counter(),
+            _parent=parent,
+        )
+        self._open[key] = span
+        _current.set(span)
+        return span
+
+    def _end(self, key: tuple, status: str = "ok", **attributes) -> Span | None:
+        span = self._open.pop(key, None)
+        if span is None:
+            return None
+        span.duration_ms = round((time.perf_counter() - span._t0) * 1000, 3)
+        span.status = status
+        span.attributes.update(attributes)
+        if _current.get() is span:
+            _current.set(span._parent)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"Span exporter {type(exporter).__name__} failed: {e}")
+        return span
+
+    # ---- run ----
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext) -> types.Content | None:
+        session = invocation_context.session
+        self._start(
+            ("run", invocation_context.invocation_id),
+            "run",
+            invocation_context.app_name,
+            invocation_id=invocation_context.invocation_id,
+            session_id=session.id,
+            user_id=session.user_id,
+        )
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._end(("run", invocation_context.invocation_id))
+
+    # ---- agents ----
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> types.Content | None:
+        self._start(("agent", callback_context.invocation_id, agent.name), "agent", agent.name)
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> types.Content | None:
+        self._end(("agent", callback_context.invocation_id, agent.name))
+        return None
+
+    # ---- model calls ----
+
+    def _model_key(self, callback_context: CallbackContext) -> tuple:
+        return ("model", callback_context.invocation_id, callback_context.agent_name)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> LlmResponse | None:
+        self._start(self._model_key(callback_context), "model", callback_context.agent_name, model=llm_request.model)
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> LlmResponse | None:
+        key = self._model_key(callback_context)
+        if llm_response.partial:
+            span = self._open.get(key)
+            if span is not None and "first_chunk_ms" not in span.attributes:
+                span.attributes["first_chunk_ms"] = round((time.perf_counter() - span._t0) * 1000, 3)
+            return None
+        metadata = llm_response.custom_metadata or {}
+        self._end(
+            key,
+            status="error" if llm_response.error_code else "ok",
+            cache_hit=metadata.get("response_cache") == "hit",
+            retries=metadata.get("retries", 0),
+            **({"model": metadata["routed_model"], "escalations": len(metadata["escalations"])}
+               if "routed_model" in metadata else {}),
+            **_usage(llm_response),
+            **({"error": llm_response.error_code} if llm_response.error_code else {}),
+        )
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> LlmResponse | None:
+        self._end(self._model_key(callback_context), status="error", error=f"{type(error).__name__}: {error}")
+        return None
+
+    # ---- tool calls ----
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext
+    ) -> dict | None:
+        kind = "agent_tool" if isinstance(tool, AgentTool) else "tool"
+        self._start(("tool", tool_context.function_call_id), kind, tool.name, agent=tool_context.agent_name)
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict
+    ) -> dict | None:
+        failed = isinstance(result, dict) and result.get("status") == "error"
+        self._end(("tool", tool_context.function_call_id), status="error" if failed else "ok")
+        return None
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> dict | None:
+        self._end(("tool", tool_context.function_call_id), status="error", error=f"{type(error).__name__}: {error}")
+        return None
+
+
+def read_traces(path: str | Path) -> dict[str, list[dict]]:
+    """Spans of a JSONL trace file grouped by trace_id, in file order."""
+    traces: dict[str, list[dict]] = defaultdict(list)
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["trace_id"]].append(span)
+    return traces
+
+
+def format_trace(spans: list[dict]) -> str:
+    """One trace as an indented tree: duration, kind, name and key attributes."""
+    children: dict[str | None, list[dict]] = defaultdict(list)
+    ids = {s["span_id"] for s in spans}
+    for span in sorted(spans, key=lambda s: s["start"]):
+        children[span["parent_id"] if span["parent_id"] in ids else None].append(span)
+
+    lines = []
+
+    def walk(parent_id, depth):
+        for span in children.get(parent_id, []):
+            attrs = span["attributes"]
+            details = [attrs["model"]] if attrs.get("model") else []
+            if "input_tokens" in attrs:
+                details.append(f"{attrs['input_tokens']}→{attrs['output_tokens']} tok")
+            if attrs.get("cached_tokens"):
+                details.append(f"{attrs['cached_tokens']} cached")
+            if attrs.get("cache_hit"):
+                details.append("cache hit")
+            if attrs.get("retries"):
+                details.append(f"{attrs['retries']} retries")
+            if span["status"] != "ok":
+                details.append(f"ERROR {attrs.get('error', '')}".strip())
+            suffix = f"  ({', '.join(details)})" if details else ""
+            lines.append(f"{span['duration_ms']:9.1f} ms  {'  ' * depth}{span['kind']} {span['name']}{suffix}")
+            walk(span["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
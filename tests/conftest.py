@@ -0,0 +1,57 @@
+"""Offline fixtures: every test talks to FakeGemini, never to the real API."""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fake_gemini import FakeGemini, Latency  # noqa: E402
+
+
+@pytest.fixture
+def fake_gemini(tmp_path, monkeypatch):
+    """A FakeGemini with fresh settings and a fresh model registry pointing at it."""
+    from config import get_settings
+    from model_registry import ModelRegistry, set_default_registry
+
+    monkeypatch.setenv("rate_limit_rpm", "1000000")
+    monkeypatch.setenv("rate_limit_tpm", "1000000000")
+    monkeypatch.setenv("llm_cache_path", str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setenv("model_catalog_path", str(tmp_path / "models.json"))
+    monkeypatch.delenv("session_db_path", raising=False)
+    with FakeGemini(latency=Latency(median_ms=5, sigma=0.1)) as fake:
+        monkeypatch.setenv("GOOGLE_GEMINI_BASE_URL", fake.base_url)
+        monkeypatch.setenv("GOOGLE_API_KEY", "fake-gemini")
+        monkeypatch.delenv("GOOGLE_GENAI_USE_VERTEXAI", raising=False)
+        get_settings.cache_clear()
+        set_default_registry(ModelRegistry())
+        yield fake
+    get_settings.cache_clear()
+    set_default_registry(None)
+
+
+def run_within(coro, seconds: float = 30):
+    """Runs coro on a fresh event loop in a daemon thread and fails if it does not finish in time.
+
+    A timeout inside the loop cannot catch code that never yields to it, so
+    the deadline is enforced from outside.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = asyncio.run(coro)
+        except BaseException as e:  # re-raised in the test's thread
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), f"event loop still busy after {seconds}s (frozen?)"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
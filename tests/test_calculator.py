@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+import pytest
+
+from calculator import CalculationError, calculate
+
+
+@pytest.mark.parametrize(
+    ("expression", "value", "unit"),
+    [("4e-05 USD * 2", "0.00008", "USD"), ("1e+16 USD * 0.01", "1E+14", "USD"), ("2E-3 * 500", "1", "")],
+)
+def test_exponent_literals_are_numbers(expression, value, unit):
+    result = calculate(expression).result
+    assert result.value == Decimal(value)
+    assert result.unit_text() == unit
+
+
+def test_percent_of_and_units_convert_a_fee_adjusted_amount():
+    calculation = calculate("(1,250 USD - 1% of 1,250 USD) * 83.58 INR/USD")
+    assert calculation.result.value == Decimal("103430.25")
+    assert calculation.result.unit_text() == "INR"
+    assert calculation.steps[-1] == "1237.50 USD × 83.58 INR/USD = 103430.2500 INR"
+    assert calculate("0.1 + 0.2").result.value == Decimal("0.3")
+    assert calculate("5 % 3").result.value == 2  # modulo, not percent
+
+
+@pytest.mark.parametrize("expression", ["1250 USD + 83 INR", "__import__('os')", "2 ** 1000", "1 / 0"])
+def test_disallowed_or_invalid_expressions_raise(expression):
+    with pytest.raises(CalculationError):
+        calculate(expression)
@@ -0,0 +1,18 @@
+import pytest
+
+from custom_tool import calculate_conversion
+
+
+@pytest.mark.parametrize(
+    ("amount", "base", "target", "converted"),
+    [
+        (1_000_000, "VND", "USD", "38.98 USD"),  # rate 3.9e-05
+        (1_000_000, "IDR", "USD", "60.92 USD"),  # rate 6.2e-05
+        (5, "USD", "VND", "125730.00 VND"),
+        (1e16, "USD", "EUR", "9207000000000000.00 EUR"),  # str(1e16) == "1e+16"
+    ],
+)
+def test_conversions_with_tiny_rates_or_huge_amounts(amount, base, target, converted):
+    result = calculate_conversion(amount, base, target, "bank transfer")
+    assert result["status"] == "success", result
+    assert result["converted_amount"] == converted
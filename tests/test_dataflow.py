@@ -0,0 +1,73 @@
+import pytest
+from conftest import run_within
+from google.adk.agents import LlmAgent
+from google.genai import types
+
+from dataflow import DataflowAgent, DataflowError, dependency_graph, steps
+from fake_gemini import Rule
+
+
+def _agent(name: str, instruction: str, output_key: str | None = None) -> LlmAgent:
+    return LlmAgent(name=name, model="gemini-2.5-flash-lite", instruction=instruction, output_key=output_key)
+
+
+def test_order_is_derived_from_output_keys_and_placeholders():
+    graph = dependency_graph(
+        [
+            _agent("Editor", "Edit {draft}", "final"),
+            _agent("Writer", "Write from {outline} and {keywords?}", "draft"),
+            _agent("Outliner", "Outline the topic", "outline"),
+            _agent("Social", "Announce {outline} to {user:handle}", "post"),
+        ]
+    )
+    assert graph == {"Editor": {"Writer"}, "Writer": {"Outliner"}, "Outliner": set(), "Social": {"Outliner"}}
+    assert steps(graph) == [["Outliner"], ["Writer", "Social"], ["Editor"]]
+
+
+@pytest.mark.parametrize(
+    "agents, problem",
+    [
+        ([_agent("Writer", "Write from {outline}", "draft")], "Writer reads outline, which no agent writes"),
+        ([_agent("A", "Go", "draft"), _agent("B", "Go", "draft")], "draft is written by A and B"),
+        ([_agent("A", "Use {b}", "a"), _agent("B", "Use {a}", "b")], "cycle A → B → A"),
+    ],
+)
+def test_invalid_graphs_fail_at_construction(agents, problem):
+    with pytest.raises(DataflowError, match=problem):
+        DataflowAgent(name="Flow", sub_agents=agents)
+
+
+def test_blog_dataflow_feeds_every_agent_its_inputs(fake_gemini):
+    from google.adk.runners import InMemoryRunner
+
+    from multiagent import build_blog_dataflow
+
+    def needs(*keys: str, reply: str):
+        return lambda request: reply if all(k in request.instruction for k in keys) else "MISSING INPUT"
+
+    fake_gemini.rules = [
+        Rule(instruction="Create a blog outline", reply="OUTLINE"),
+        Rule(instruction="List 5 search keywords", reply="KEYWORDS"),
+        Rule(instruction="Following this outline", reply=needs("OUTLINE", "KEYWORDS", reply="DRAFT")),
+        Rule(instruction="Edit this draft", reply=needs("DRAFT", reply="FINAL")),
+        Rule(instruction="social media post", reply=needs("OUTLINE", reply="POST")),
+    ]
+
+    async def scenario():
+        runner = InMemoryRunner(agent=build_blog_dataflow(), app_name="blog")
+        session = await runner.session_service.create_session(app_name="blog", user_id="u1")
+        message = types.Content(role="user", parts=[types.Part(text="Topic: tide pools")])
+        async for _ in runner.run_async(user_id="u1", session_id=session.id, new_message=message):
+            pass
+        session = await runner.session_service.get_session(app_name="blog", user_id="u1", session_id=session.id)
+        await runner.close()
+        return session.state
+
+    state = run_within(scenario())
+    assert {key: state[key] for key in ("blog_outline", "seo_keywords", "blog_draft", "final_blog", "social_post")} == {
+        "blog_outline": "OUTLINE",
+        "seo_keywords": "KEYWORDS",
+        "blog_draft": "DRAFT",
+        "final_blog": "FINAL",
+        "social_post": "POST",
+    }
@@ -0,0 +1,77 @@
+from conftest import run_within
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from llm_cache import CachedLlm, ResponseCache
+from model_registry import ModelRegistry
+
+MODEL = "gemini-2.5-flash-lite"
+
+
+def _request(prompt: str = "Convert 500 USD to EUR.", **config) -> LlmRequest:
+    return LlmRequest(
+        model=MODEL,
+        contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
+        config=types.GenerateContentConfig(**config),
+    )
+
+
+def _cached(cache: ResponseCache) -> CachedLlm:
+    registry = ModelRegistry(cache=False, rate_limit=False, context_cache=False, resilient=False, catalog=False)
+    return CachedLlm(registry.get_model(MODEL), cache=cache)
+
+
+def _ask(calls: list[tuple[CachedLlm, LlmRequest]]) -> list[str]:
+    """Sends every (model, request) in order on one event loop and returns the answers."""
+
+    async def scenario():
+        texts = []
+        for llm, request in calls:
+            async for response in llm.generate_content_async(request.model_copy(deep=True)):
+                texts.append(response.content.parts[0].text)
+        return texts
+
+    return run_within(scenario())
+
+
+def test_temperature_zero_is_served_from_cache(fake_gemini, tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    llm = _cached(cache)
+    texts = _ask([(llm, _request(temperature=0))] * 2)
+    assert fake_gemini.stats["requests"] == 1
+    assert texts[0] == texts[1]
+    assert cache.stats["stores"] == 1
+
+
+def test_disk_tier_survives_a_new_cache(fake_gemini, tmp_path):
+    first = _cached(ResponseCache(tmp_path / "cache.sqlite"))
+    reopened = ResponseCache(tmp_path / "cache.sqlite")
+    second = _cached(reopened)
+    _ask([(first, _request(temperature=0))])
+    _ask([(second, _request(temperature=0))])
+    assert fake_gemini.stats["requests"] == 1
+    assert reopened.stats["disk_hits"] == 1
+
+
+def test_unset_or_positive_temperature_is_not_cached(fake_gemini):
+    cache = ResponseCache()
+    llm = _cached(cache)
+    _ask([(llm, _request())] * 2 + [(llm, _request(temperature=0.7))] * 2)
+    assert fake_gemini.stats["requests"] == 4
+    assert cache.stats["bypassed"] == 4
+
+
+def test_grounded_requests_are_never_cached(fake_gemini):
+    cache = ResponseCache()
+    llm = _cached(cache)
+    llm.cache_sampled = True
+    grounded = _request(temperature=0, tools=[types.Tool(google_search=types.GoogleSearch())])
+    _ask([(llm, grounded)] * 2)
+    assert fake_gemini.stats["requests"] == 2
+    assert cache.stats["stores"] == 0
+
+
+def test_different_prompts_do_not_share_an_entry(fake_gemini):
+    llm = _cached(ResponseCache())
+    _ask([(llm, _request("Convert 500 USD to EUR.", temperature=0)), (llm, _request("Convert 600 USD to EUR.", temperature=0))])
+    assert fake_gemini.stats["requests"] == 2
@@ -0,0 +1,26 @@
+from local_code_executor import LocalProcessCodeExecutor
+
+RANDOM = "import random\nprint(random.random())"
+PURE = "import math\nprint(math.sqrt(2))"
+
+
+def test_results_are_not_cached_by_default():
+    executor = LocalProcessCodeExecutor(workers=1)
+    try:
+        assert executor.run(RANDOM) != executor.run(RANDOM)
+        assert executor.stats()["cache_hits"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_opt_in_cache_only_keeps_pure_code():
+    executor = LocalProcessCodeExecutor(workers=1, cache_size=8)
+    try:
+        assert executor.run(PURE) == executor.run(PURE)
+        assert executor.stats()["cache_hits"] == 1
+        assert executor.run(RANDOM) != executor.run(RANDOM)
+        executor.run("print(open('/etc/hostname').read())")
+        executor.run("print(open('/etc/hostname').read())")
+        assert executor.stats()["cache_hits"] == 1
+    finally:
+        executor.shutdown()
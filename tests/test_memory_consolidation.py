@@ -0,0 +1,90 @@
+import asyncio
+
+from conftest import run_within
+from google.adk.memory.memory_entry import MemoryEntry
+from google.genai import types
+
+from memory_consolidation import MemoryConsolidator
+
+
+def _entry(text: str) -> MemoryEntry:
+    return MemoryEntry(content=types.Content(role="user", parts=[types.Part(text=text)]), author="user")
+
+
+def test_flush_returns_once_consolidations_are_done():
+    async def scenario():
+        consolidator = MemoryConsolidator()
+        consolidator.submit("app", "u1", [_entry("My favourite colour is blue.")])
+        consolidator.submit("app", "u2", [_entry("My favourite colour is green.")])
+        await asyncio.gather(consolidator.flush(), consolidator.flush())
+        await consolidator.flush()  # every task finished, callbacks may not have run yet
+        return consolidator.facts("app", "u1"), consolidator.facts("app", "u2")
+
+    u1, u2 = run_within(scenario(), seconds=10)
+    assert [f.text for f in u1] == ["The user's favourite colour is blue."]
+    assert [f.text for f in u2] == ["The user's favourite colour is green."]
+
+
+def test_flush_ignores_finished_tasks_still_in_the_set():
+    async def scenario():
+        consolidator = MemoryConsolidator()
+        finished = asyncio.create_task(asyncio.sleep(0))
+        await finished
+        consolidator._tasks.add(finished)  # done, but its discard callback has not run
+        await consolidator.flush()
+
+    run_within(scenario(), seconds=5)
+
+
+def test_concurrent_auto_memory_turns_do_not_freeze_the_loop(fake_gemini):
+    from main import build_runner
+
+    async def converse(runner, user_id: str, session_id: str, text: str):
+        await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        async for _ in runner.run_async(user_id=user_id, session_id=session_id, new_message=message):
+            pass
+
+    async def scenario():
+        runner = build_runner("auto_memory")
+        await asyncio.gather(*(
+            converse(runner, f"user{i % 2}", f"tell{i}", f"My favourite number is {i}.") for i in range(4)
+        ))
+        await asyncio.gather(*(
+            converse(runner, f"user{i % 2}", f"ask{i}", "What is my favourite number?") for i in range(4)
+        ))
+        await runner.close()
+
+    run_within(scenario(), seconds=60)
+    assert fake_gemini.stats["requests"] >= 8
+
+
+def test_consolidated_service_does_not_index_raw_turns():
+    from google.adk.events import Event
+    from google.adk.sessions import InMemorySessionService
+
+    from semantic_memory import SemanticMemoryService
+
+    async def scenario():
+        service = SemanticMemoryService(consolidator=MemoryConsolidator())
+        sessions = InMemorySessionService()
+        session = await sessions.create_session(app_name="app", user_id="u1", session_id="s1")
+        content = types.Content(role="user", parts=[types.Part(text="My favourite colour is blue.")])
+        await sessions.append_event(session, Event(invocation_id="inv-0", author="user", content=content))
+        await service.add_session_to_memory(session)
+        response = await service.search_memory(app_name="app", user_id="u1", query="favourite colour")
+        return service, response
+
+    service, response = run_within(scenario(), seconds=10)
+    assert [m.content.parts[0].text for m in response.memories] == ["The user's favourite colour is blue."]
+    assert not service._partitions[("app", "u1")].entries
+
+
+def test_auto_runner_shares_the_walkthrough_memory(fake_gemini):
+    from google.adk.sessions import InMemorySessionService
+
+    from memory import build_auto_runner, build_memory_service
+
+    memory_service = build_memory_service()
+    runner = build_auto_runner(InMemorySessionService(), memory_service)
+    assert runner.memory_service is memory_service
@@ -0,0 +1,26 @@
+from conftest import run_within
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from model_registry import ModelRegistry
+
+MODEL = "gemini-2.5-flash-lite"
+
+
+def _ask(llm, registry: ModelRegistry, text: str):
+    async def scenario():
+        request = LlmRequest(model=MODEL, contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+        responses = [r async for r in llm.generate_content_async(request)]
+        return responses[-1].content.parts[0].text, registry.client(None)
+
+    return run_within(scenario())
+
+
+def test_a_shared_model_survives_its_first_event_loop(fake_gemini):
+    registry = ModelRegistry(cache=False, rate_limit=False, context_cache=False, catalog=False)
+    llm = registry.get_model(MODEL)
+    first_answer, first_client = _ask(llm, registry, "Say hi.")
+    second_answer, second_client = _ask(llm, registry, "Say hi again.")  # the first loop is closed by now
+    assert first_answer and second_answer
+    assert fake_gemini.stats["requests"] == 2
+    assert first_client is not second_client
@@ -0,0 +1,76 @@
+import time
+
+from conftest import run_within
+from google.adk.agents import LlmAgent
+from google.adk.models import LlmRequest
+from google.genai import types
+
+import model_router
+import retry
+from model_router import CascadeLlm, RoutingPolicy, route_agents
+
+POLICY = RoutingPolicy.from_dict(
+    {
+        "tiers": ["gemini-2.5-flash-lite", "gemini-2.5-flash", "gemini-2.5-pro"],
+        "agents": {"EditorAgent": {"tiers": ["gemini-2.5-flash", "gemini-2.5-pro"]}},
+    }
+)
+
+
+def test_cascade_starts_at_the_agents_own_model(fake_gemini):
+    from model_registry import get_model
+
+    own = get_model("gemini-2.5-flash")
+    agent = LlmAgent(name="WriterAgent", model=own, instruction="Write.")
+    assert route_agents(agent, POLICY) == 1
+    assert isinstance(agent.model, CascadeLlm)
+    assert agent.model.tiers[0] is own
+    assert [tier.model for tier in agent.model.tiers[1:]] == ["gemini-2.5-pro"]
+
+
+def test_models_off_the_ladder_are_left_alone(fake_gemini):
+    agent = LlmAgent(name="helpful_assistant", model="gemini-2.0-flash-exp", instruction="Help.")
+    top = LlmAgent(name="Strongest", model="gemini-2.5-pro", instruction="Think.")
+    assert route_agents(agent, POLICY) == 0
+    assert route_agents(top, POLICY) == 0
+    assert agent.model == "gemini-2.0-flash-exp"
+
+
+def test_agent_override_replaces_the_tiers(fake_gemini):
+    agent = LlmAgent(name="EditorAgent", model="gemini-2.5-flash-lite", instruction="Edit.")
+    route_agents(agent, POLICY)
+    assert agent.model.policy.tiers == ("gemini-2.5-flash", "gemini-2.5-pro")
+
+
+def test_build_runner_does_not_route_unless_enabled(fake_gemini):
+    from main import build_runner
+
+    runner = build_runner("blog")
+    assert not any(isinstance(getattr(a, "model", None), CascadeLlm) for a in runner.agent.sub_agents)
+
+
+def test_open_tier_gets_its_probe_after_the_reset_timeout(fake_gemini, monkeypatch):
+    from model_registry import get_model
+
+    monkeypatch.setattr(retry, "_breakers", {})
+    monkeypatch.setattr(model_router, "_health", {})
+    breaker = retry.circuit_breaker("gemini-2.5-flash-lite")
+    breaker.reset_timeout = 0.2
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    cascade = CascadeLlm([get_model("gemini-2.5-flash-lite"), get_model("gemini-2.5-pro")], POLICY)
+    assert [tier.model for tier in cascade._route()] == ["gemini-2.5-pro"]
+
+    time.sleep(0.25)
+    assert [tier.model for tier in cascade._route()] == ["gemini-2.5-flash-lite", "gemini-2.5-pro"]
+    request = LlmRequest(
+        model="gemini-2.5-flash-lite",
+        contents=[types.Content(role="user", parts=[types.Part(text="Say hi.")])],
+    )
+
+    async def ask():
+        return [r async for r in cascade.generate_content_async(request)]
+
+    run_within(ask())
+    assert breaker.state == "closed"
+    assert cascade.stats["served_by"]["gemini-2.5-flash-lite"] == 1
@@ -0,0 +1,44 @@
+import asyncio
+
+from conftest import run_within
+
+from rate_limiter import ModelLimits, ModelRateLimiter, Priority
+
+# A one-request burst refilled every ~10 ms: after the first grant every request queues.
+TIGHT = ModelLimits(rpm=6000, tpm=10_000_000, burst_fraction=0.0001)
+
+
+def test_interactive_lane_first_and_sessions_round_robin():
+    limiter = ModelRateLimiter(TIGHT)
+    granted = []
+
+    async def ask(label: str, session_key: str, priority: Priority):
+        await limiter.acquire("m", 1, session_key=session_key, priority=priority)
+        granted.append(label)
+
+    async def scenario():
+        await limiter.acquire("m", 1)  # uses up the burst
+        await asyncio.gather(
+            ask("batch-1", "nightly", Priority.BATCH),
+            ask("batch-2", "nightly", Priority.BATCH),
+            ask("alice-1", "alice", Priority.INTERACTIVE),
+            ask("alice-2", "alice", Priority.INTERACTIVE),
+            ask("bob-1", "bob", Priority.INTERACTIVE),
+        )
+
+    run_within(scenario(), seconds=10)
+    assert granted == ["alice-1", "bob-1", "alice-2", "batch-1", "batch-2"]
+    assert limiter.stats()["m"]["granted"] == 6
+
+
+def test_settle_refunds_over_reserved_tokens():
+    limiter = ModelRateLimiter(ModelLimits(rpm=1000, tpm=1000, burst_fraction=0.5))
+
+    async def scenario():
+        await limiter.acquire("m", 500)  # the whole token burst
+        bucket = limiter._scheduler("m").tokens
+        assert bucket.wait_time(400, bucket._last) > 0
+        limiter.settle("m", reserved_tokens=500, actual_tokens=100)
+        return bucket.wait_time(400, bucket._last)
+
+    assert run_within(scenario(), seconds=10) == 0.0
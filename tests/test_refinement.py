@@ -0,0 +1,69 @@
+import itertools
+import json
+
+import pytest
+from conftest import run_within
+from google.genai import types
+
+from fake_gemini import Rule
+from refinement import CritiqueVerdict, edit_change, parse_verdict
+
+APPROVED = json.dumps({"approved": True, "score": 0.95, "issues": []})
+REJECTED = json.dumps({"approved": False, "score": 0.4, "issues": ["too short"]})
+
+
+def test_verdicts_parse_from_dicts_and_fenced_json():
+    assert parse_verdict({"approved": True, "score": 1}) == CritiqueVerdict(approved=True, score=1)
+    assert parse_verdict(f"```json\n{REJECTED}\n```").issues == ["too short"]
+    assert parse_verdict("Looks good to me!") is None
+    assert parse_verdict({"approved": True, "score": 3}) is None  # score out of range
+
+
+def test_edit_change_is_word_level():
+    assert edit_change("the quick brown fox", "the quick brown fox") == 0.0
+    assert edit_change("the quick brown fox", "the quick red fox") == pytest.approx(0.25)
+    assert edit_change("alpha beta", "gamma delta") == 1.0
+
+
+def _run_refinement(fake, critic: str, reviser) -> dict:
+    from google.adk.runners import InMemoryRunner
+
+    from multiagent import build_blog_refinement
+
+    fake.rules = [
+        Rule(instruction="Create a blog outline", reply="OUTLINE"),
+        Rule(instruction="Following this outline", reply="first draft of the post"),
+        Rule(instruction="Review this blog draft", reply=critic, name="critic"),
+        Rule(instruction="Revise this blog draft", reply=reviser, name="reviser"),
+    ]
+
+    async def scenario():
+        runner = InMemoryRunner(agent=build_blog_refinement(max_iterations=4), app_name="blog")
+        session = await runner.session_service.create_session(app_name="blog", user_id="u1")
+        message = types.Content(role="user", parts=[types.Part(text="Topic: tide pools")])
+        async for _ in runner.run_async(user_id="u1", session_id=session.id, new_message=message):
+            pass
+        session = await runner.session_service.get_session(app_name="blog", user_id="u1", session_id=session.id)
+        await runner.close()
+        return session.state["refinement_report"]
+
+    return run_within(scenario())
+
+
+def test_approval_stops_the_loop_before_the_reviser(fake_gemini):
+    report = _run_refinement(fake_gemini, APPROVED, "unused")
+    assert (report["stop_reason"], report["rounds"], report["rounds_saved"]) == ("approved", 1, 3)
+    assert fake_gemini.stats["by_rule"]["reviser"] == 0
+
+
+def test_unchanged_revision_converges(fake_gemini):
+    report = _run_refinement(fake_gemini, REJECTED, "first draft of the post")
+    assert (report["stop_reason"], report["rounds"], report["changes"]) == ("converged", 1, [0.0])
+    assert fake_gemini.stats["by_rule"]["critic"] == 1
+
+
+def test_loop_without_approval_or_convergence_runs_max_iterations(fake_gemini):
+    revisions = itertools.count(1)
+    report = _run_refinement(fake_gemini, REJECTED, lambda request: f"revision{next(revisions)} " * 20)
+    assert (report["stop_reason"], report["rounds"], report["rounds_saved"]) == ("max_iterations", 4, 0)
+    assert fake_gemini.stats["by_rule"]["reviser"] == 4
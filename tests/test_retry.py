@@ -0,0 +1,174 @@
+import asyncio
+import random
+import time
+
+import httpx
+import pytest
+from conftest import run_within
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.base_llm import BaseLlm
+from google.genai import errors, types
+
+from retry import CircuitBreaker, CircuitOpenError, ResilientLlm, RetryPolicy, RollingPercentile, server_retry_delay
+
+FAST = RetryPolicy(attempts=5, base_delay=0.01, max_delay=0.05, deadline=10)
+REQUEST = LlmRequest(
+    model="gemini-2.5-flash-lite",
+    contents=[types.Content(role="user", parts=[types.Part(text="Say hi.")])],
+)
+
+
+def _unavailable() -> errors.APIError:
+    return errors.APIError(503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}})
+
+
+class _StubLlm(BaseLlm):
+    """Counts calls; sleeps `delay` per call, or yields one chunk and then fails with 503."""
+
+    model: str = "stub"
+    delay: float = 0.0
+    fail_after_first_chunk: bool = False
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Hi")]), partial=stream)
+        if self.fail_after_first_chunk:
+            raise _unavailable()
+
+
+def _resilient(inner: BaseLlm, **data) -> ResilientLlm:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.2)
+    return ResilientLlm(inner, policy=FAST, breaker=breaker, seed=0, **data)
+
+
+def _bare_model():
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(cache=False, rate_limit=False, context_cache=False, resilient=False, catalog=False)
+    return registry.get_model("gemini-2.5-flash-lite", types.HttpRetryOptions(attempts=1))
+
+
+def _generate(llm, stream: bool = False) -> list[LlmResponse]:
+    async def collect():
+        return [r async for r in llm.generate_content_async(REQUEST, stream)]
+
+    return run_within(collect())
+
+
+def test_jitter_stays_between_the_base_and_three_times_the_previous_delay():
+    policy, rng = RetryPolicy(base_delay=0.5, max_delay=20.0), random.Random(0)
+    delay = policy.base_delay
+    for _ in range(1000):
+        previous, delay = delay, policy.next_delay(delay, rng)
+        assert policy.base_delay <= delay <= min(policy.max_delay, 3 * previous)
+    assert all(policy.next_delay(1000.0, rng) <= policy.max_delay for _ in range(100))
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (errors.APIError(429, {}, httpx.Response(429, headers={"Retry-After": "7"})), 7.0),
+        (
+            errors.APIError(
+                429,
+                {"error": {"code": 429, "details": [
+                    {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "2.5s"}
+                ]}},
+            ),
+            2.5,
+        ),
+        (errors.APIError(503, {"error": {"code": 503, "details": []}}), None),
+        (httpx.ConnectError("refused"), None),
+    ],
+)
+def test_server_retry_delay_reads_retry_after_and_retry_info(error, expected):
+    assert server_retry_delay(error) == expected
+
+
+def test_breaker_opens_lets_one_probe_through_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()  # the probe failed: open for another reset_timeout
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    assert breaker.stats["opened"] == 2
+
+
+def test_scripted_503s_are_retried_until_the_call_succeeds(fake_gemini):
+    llm = _resilient(_bare_model())
+    fake_gemini.fail_next(503, times=2)
+    responses = _generate(llm)
+    assert responses[-1].custom_metadata["retries"] == 2
+    assert llm.stats["retries"] == 2 and llm.stats["circuit"] == "closed"
+    assert fake_gemini.stats["faults"][503] == 2
+
+
+def test_429_waits_for_retry_after_and_does_not_trip_the_breaker(fake_gemini):
+    fake_gemini.retry_after = 0.3
+    llm = _resilient(_bare_model())
+    fake_gemini.fail_next(429, times=2)
+    started = time.monotonic()
+    _generate(llm)
+    assert time.monotonic() - started >= 0.6
+    assert llm.breaker.failures == 0 and llm.stats["circuit"] == "closed"
+
+
+def test_outage_opens_the_breaker_and_later_calls_fail_fast(fake_gemini):
+    llm = _resilient(_bare_model())
+    fake_gemini.fail_for(503, seconds=10)
+    with pytest.raises(CircuitOpenError):
+        _generate(llm)
+    requests = fake_gemini.stats["requests"]
+    assert requests == llm.breaker.failure_threshold
+    with pytest.raises(CircuitOpenError):
+        _generate(llm)
+    assert fake_gemini.stats["requests"] == requests
+    fake_gemini.clear_faults()
+
+
+def test_stream_is_retried_before_its_first_chunk(fake_gemini):
+    llm = _resilient(_bare_model())
+    fake_gemini.fail_next(503)
+    responses = _generate(llm, stream=True)
+    assert "".join(r.content.parts[0].text for r in responses if r.partial) == "OK."
+    assert llm.stats["retries"] == 1
+
+
+def test_stream_is_not_retried_after_its_first_chunk():
+    inner = _StubLlm(fail_after_first_chunk=True)
+    llm = _resilient(inner)
+    chunks = []
+
+    async def consume():
+        async for response in llm.generate_content_async(REQUEST, stream=True):
+            chunks.append(response)
+
+    with pytest.raises(errors.APIError):
+        run_within(consume())
+    assert len(chunks) == 1 and inner.calls == 1
+    assert llm.stats["retries"] == 0 and llm.stats["gave_up"] == 1
+
+
+def test_hedging_stays_within_its_budget():
+    inner = _StubLlm(delay=0.01)
+    llm = _resilient(inner, hedge=True, hedge_budget=0.1)
+    llm._latencies = RollingPercentile(window=10_000)
+    for _ in range(1000):  # a fast history: every call is slower than the p95
+        llm._latencies.add(0.001)
+    for _ in range(40):
+        _generate(llm)
+    assert llm.stats["hedged"] == 4  # hedged < 10% of calls before each hedge
+    assert inner.calls == 40 + llm.stats["hedged"]
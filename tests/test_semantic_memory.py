@@ -0,0 +1,65 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from semantic_memory import SemanticMemoryService, VectorIndex
+
+
+def _unit(rng, n: int, dim: int = 32) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("threshold", [2, 5, 10, 13, 50])
+def test_small_ann_thresholds_build_an_ivf_index(threshold):
+    rng = np.random.default_rng(threshold)
+    vectors = _unit(rng, threshold + 3)
+    index = VectorIndex(32, ann_threshold=threshold)
+    index.add(vectors, np.arange(len(vectors)))
+    assert index.is_ivf
+    ids, _ = index.search(vectors[0], 1, exact=True)
+    assert ids[0] == 0
+
+
+def test_adds_during_training_survive_the_swap():
+    rng = np.random.default_rng(0)
+    index = VectorIndex(32, ann_threshold=100, auto_train=False)
+    index.add(_unit(rng, 100), np.arange(100))
+    assert index.needs_training
+    snapshot = index.begin_training()
+    assert not index.needs_training
+    late = _unit(rng, 20)
+    index.add(late, np.arange(100, 120))
+    index.install_training(index.train(*snapshot))
+    assert index.is_ivf and len(index) == 120
+    for i, vector in enumerate(late):
+        ids, _ = index.search(vector, 1, exact=True)
+        assert ids[0] == 100 + i
+
+
+def test_service_trains_without_holding_its_lock(monkeypatch):
+    service = SemanticMemoryService(ann_threshold=200)
+    started, release = threading.Event(), threading.Event()
+    train = VectorIndex.train
+
+    def slow_train(self, *args, **kwargs):
+        started.set()
+        release.wait(10)
+        return train(self, *args, **kwargs)
+
+    monkeypatch.setattr(VectorIndex, "train", slow_train)
+    texts = [f"fact number {i} about topic {i % 17}" for i in range(200)]
+    service.add_entries("app", "u1", [None] * len(texts), texts)
+    assert started.wait(5)
+    begin = time.perf_counter()
+    with service._lock:  # free while training runs
+        index = service._partitions[("app", "u1")].index
+        assert not index.is_ivf
+    assert time.perf_counter() - begin < 1
+    release.set()
+    deadline = time.monotonic() + 10
+    while not index.is_ivf and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.is_ivf and len(index) == 200
@@ -0,0 +1,29 @@
+import asyncio
+
+from starlette.testclient import TestClient
+
+import model_catalog
+
+
+def test_models_are_listed_off_the_event_loop_before_the_first_request(fake_gemini, monkeypatch):
+    from server import AgentServer, build_app
+
+    monkeypatch.setattr(model_catalog, "_default_catalog", None)  # cold: nothing listed yet
+    listings = []
+    list_models = model_catalog.ModelCatalog._list
+
+    def spy(self, client):
+        try:
+            asyncio.get_running_loop()
+            listings.append("event loop")
+        except RuntimeError:
+            listings.append("worker thread")
+        return list_models(self, client)
+
+    monkeypatch.setattr(model_catalog.ModelCatalog, "_list", spy)
+    server = AgentServer(["currency"])
+    with TestClient(build_app(server)) as client:  # runs the lifespan
+        assert sorted(server.runners) == ["currency"]
+        response = client.post("/agents/currency/sessions", json={"user_id": "u1", "session_id": "s1"})
+        assert response.status_code == 201
+    assert listings == ["worker thread"]
@@ -0,0 +1,91 @@
+from conftest import run_within
+from google.adk.events import Event, EventActions
+from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+from session_store import DurableSessionService
+
+APP, USER, SESSION = "app", "u1", "long"
+
+
+def _event(i: int) -> Event:
+    user_turn = i % 2 == 0
+    return Event(
+        invocation_id=f"inv-{i // 2}",
+        author="user" if user_turn else "assistant",
+        content=types.Content(role="user" if user_turn else "model", parts=[types.Part(text=f"message {i}")]),
+    )
+
+
+async def _write(path, n: int):
+    service = DurableSessionService(path)
+    session = await service.create_session(app_name=APP, user_id=USER, session_id=SESSION)
+    for i in range(n):
+        await service.append_event(session, _event(i))
+    service.close()
+
+
+def _texts(session) -> list[str]:
+    return [event.content.parts[0].text for event in session.events]
+
+
+def test_resumed_long_session_keeps_its_whole_history(tmp_path):
+    async def scenario():
+        await _write(tmp_path / "sessions.sqlite", 500)
+        resumed = DurableSessionService(tmp_path / "sessions.sqlite")  # as after a restart
+        return await resumed.get_session(app_name=APP, user_id=USER, session_id=SESSION)
+
+    session = run_within(scenario())
+    assert _texts(session) == [f"message {i}" for i in range(500)]
+
+
+def test_windowed_loading_is_opt_in(tmp_path):
+    async def scenario():
+        await _write(tmp_path / "sessions.sqlite", 500)
+        windowed = DurableSessionService(tmp_path / "sessions.sqlite", recent_events=50)
+        default = await windowed.get_session(app_name=APP, user_id=USER, session_id=SESSION)
+        config = GetSessionConfig(num_recent_events=10)
+        recent = await DurableSessionService(tmp_path / "sessions.sqlite").get_session(
+            app_name=APP, user_id=USER, session_id=SESSION, config=config
+        )
+        return default, recent
+
+    default, recent = run_within(scenario())
+    assert _texts(default) == [f"message {i}" for i in range(450, 500)]
+    assert _texts(recent) == [f"message {i}" for i in range(490, 500)]
+
+
+def test_runner_close_flushes_buffered_events(tmp_path):
+    from google.adk.agents import LlmAgent
+    from google.adk.runners import Runner
+
+    async def scenario():
+        service = DurableSessionService(tmp_path / "sessions.sqlite")
+        runner = Runner(app_name=APP, agent=LlmAgent(name="Agent", model="gemini-2.5-flash-lite"), session_service=service)
+        session = await service.create_session(app_name=APP, user_id=USER, session_id=SESSION)
+        await service.append_event(session, _event(0))  # a user message stays buffered until the turn ends
+        assert service._pending
+        await runner.close()
+        return await DurableSessionService(tmp_path / "sessions.sqlite").get_session(
+            app_name=APP, user_id=USER, session_id=SESSION
+        )
+
+    assert _texts(run_within(scenario())) == ["message 0"]
+
+
+def test_state_deltas_replace_values_like_in_memory_sessions(tmp_path):
+    initial = {"cfg": {"a": 1}, "k": 1, "user:prefs": {"x": 1}, "app:flags": {"beta": True}}
+    delta = {"cfg": {"b": 2}, "k": None, "user:prefs": {"y": 2}, "app:flags": None, "temp:scratch": 1}
+
+    async def state_after(service):
+        session = await service.create_session(app_name=APP, user_id=USER, session_id=SESSION, state=initial)
+        event = _event(1)
+        event.actions = EventActions(state_delta=dict(delta))
+        await service.append_event(session, event)
+        resumed = await service.get_session(app_name=APP, user_id=USER, session_id=SESSION)
+        return resumed.state
+
+    expected = run_within(state_after(InMemorySessionService()))
+    assert expected == {"cfg": {"b": 2}, "k": None, "user:prefs": {"y": 2}, "app:flags": None}
+    assert run_within(state_after(DurableSessionService(tmp_path / "sessions.sqlite"))) == expected